@@ -0,0 +1,58 @@
+"""Micro-benchmark of utils.dicts_to_jsonl(), which serialises _bulk and _msearch request bodies.
+
+Compares the current implementation with the previous functools.reduce() based one, on add_documents
+_bulk bodies of various sizes (docs with chunks that each hold a 768 dimension vector).
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/benchmarks/bench_dicts_to_jsonl.py
+"""
+import functools
+import json
+import random
+import timeit
+
+from marqo.tensor_search import utils
+from marqo.tensor_search.enums import TensorField
+
+
+def previous_dicts_to_jsonl(dicts):
+    return functools.reduce(
+        lambda x, y: "{}\n{}".format(x, json.dumps(y)),
+        dicts, ""
+    ) + "\n"
+
+
+def make_bulk_body(num_docs: int, chunks_per_doc: int, dimensions: int = 768):
+    body = []
+    for i in range(num_docs):
+        body.append({"index": {"_index": "my-index", "_id": f"doc-{i}"}})
+        body.append({
+            "title": f"Title of document {i}",
+            "description": "Some description of the document. " * 5,
+            TensorField.chunks: [{
+                TensorField.marqo_knn_field: [random.uniform(-1, 1) for _ in range(dimensions)],
+                TensorField.field_content: f"chunk {j} of document {i}",
+                TensorField.field_name: "description",
+                "title": f"Title of document {i}",
+            } for j in range(chunks_per_doc)]
+        })
+    return body
+
+
+def main():
+    random.seed(0)
+    print(f"{'docs':>6} {'chunks/doc':>10} {'body MB':>8} {'previous (s)':>13} {'current (s)':>12} {'speedup':>8}")
+    for num_docs, chunks_per_doc in [(16, 4), (64, 4), (128, 8), (256, 8)]:
+        body = make_bulk_body(num_docs, chunks_per_doc)
+        assert previous_dicts_to_jsonl(body).lstrip("\n") == utils.dicts_to_jsonl(body)
+
+        repeats = 3
+        previous_time = min(timeit.repeat(lambda: previous_dicts_to_jsonl(body), number=1, repeat=repeats))
+        current_time = min(timeit.repeat(lambda: utils.dicts_to_jsonl(body), number=1, repeat=repeats))
+        body_mb = len(utils.dicts_to_jsonl(body)) / 1e6
+        print(f"{num_docs:>6} {chunks_per_doc:>10} {body_mb:>8.1f} {previous_time:>13.4f} {current_time:>12.4f} "
+              f"{previous_time / current_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark of HYBRID search against the two-call client pattern it replaces.
+
+Runs against a running Marqo. Creates an index of synthetic docs, then for each query times:
+    - two-call: a LEXICAL search and a TENSOR search, sent one after the other, fused client-side with the same
+      reciprocal rank fusion HYBRID search uses
+    - hybrid: a single HYBRID search, whose lexical and tensor queries are sent to Marqo-OS in one /_msearch
+
+Reports the p50 and p99 latency of each, and how often the two return the same ranking.
+
+Usage (from the repo root, with Marqo running):
+    PYTHONPATH=src python scripts/benchmarks/bench_hybrid_search.py [--url http://localhost:8882] [--queries 200]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import requests
+
+from marqo.tensor_search import fusion
+
+INDEX_NAME = "bench-hybrid-search"
+WORDS = ["river", "mountain", "city", "forest", "ocean", "desert", "train", "bicycle", "market", "garden",
+         "library", "castle", "bridge", "island", "festival", "harbour", "valley", "museum", "stadium", "village"]
+
+
+def make_docs(count: int):
+    random.seed(0)
+    return [{"_id": str(i), "title": " ".join(random.choices(WORDS, k=6)),
+             "description": " ".join(random.choices(WORDS, k=20))} for i in range(count)]
+
+
+def setup_index(url: str, num_docs: int):
+    requests.delete(f"{url}/indexes/{INDEX_NAME}")
+    requests.post(f"{url}/indexes/{INDEX_NAME}").raise_for_status()
+    docs = make_docs(num_docs)
+    for i in range(0, len(docs), 64):
+        requests.post(f"{url}/indexes/{INDEX_NAME}/documents?refresh=false",
+                      json={"documents": docs[i:i + 64], "tensorFields": ["title", "description"]}).raise_for_status()
+    requests.post(f"{url}/indexes/{INDEX_NAME}/refresh").raise_for_status()
+
+
+def search(session: requests.Session, url: str, query: str, search_method: str, limit: int) -> list:
+    res = session.post(f"{url}/indexes/{INDEX_NAME}/search",
+                       json={"q": query, "searchMethod": search_method, "limit": limit})
+    res.raise_for_status()
+    return res.json()["hits"]
+
+
+def two_call(session: requests.Session, url: str, query: str, limit: int) -> list:
+    lexical_hits = search(session, url, query, "LEXICAL", limit)
+    tensor_hits = search(session, url, query, "TENSOR", limit)
+    return fusion.reciprocal_rank_fusion(lexical_hits, tensor_hits)[:limit]
+
+
+def percentile(times: list, p: float) -> float:
+    return statistics.quantiles(times, n=100, method="inclusive")[int(p) - 1] if len(times) > 1 else times[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8882")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_index(args.url, args.docs)
+    random.seed(1)
+    queries = [" ".join(random.choices(WORDS, k=3)) for _ in range(args.queries)]
+    session = requests.Session()
+
+    # warm up the model and connections
+    two_call(session, args.url, queries[0], args.limit)
+    search(session, args.url, queries[0], "HYBRID", args.limit)
+
+    times = {"two-call": [], "hybrid": []}
+    same_ranking = 0
+    for query in queries:
+        start = time.perf_counter()
+        client_fused = two_call(session, args.url, query, args.limit)
+        times["two-call"].append(1000 * (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        hybrid = search(session, args.url, query, "HYBRID", args.limit)
+        times["hybrid"].append(1000 * (time.perf_counter() - start))
+
+        same_ranking += [hit["_id"] for hit in client_fused] == [hit["_id"] for hit in hybrid]
+
+    print(f"{args.docs} docs, {args.queries} queries, limit {args.limit}")
+    print(f"{'pattern':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for pattern, pattern_times in times.items():
+        print(f"{pattern:>9} {percentile(pattern_times, 50):>9.1f} {percentile(pattern_times, 99):>9.1f}")
+    print(f"same ranking for {same_ranking}/{len(queries)} queries")
+    requests.delete(f"{args.url}/indexes/{INDEX_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark of the image decoding and preprocessing stage of the CLIP models' encode_image().
+
+Measures images/sec of clip_utils.preprocess_images() with the preprocess transform each model class uses, run in
+the calling thread (MARQO_IMAGE_PREPROCESSING_THREAD_COUNT=1, the previous behaviour) and in the preprocessing
+thread pool. Images are JPEGs of various sizes, opened lazily as they are after download, so the times include
+decoding. The transforms are built without loading model weights:
+    - CLIP, and MULTILINGUAL_CLIP with a CLIP visual model: clip's transform
+    - OPEN_CLIP, and MULTILINGUAL_CLIP with an open_clip visual model: open_clip's transform
+    - CLIP_ONNX: clip_utils._get_transform()
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/benchmarks/bench_image_preprocessing.py [--batch-size 64] [--threads 8]
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+import clip
+import open_clip
+from PIL import Image
+
+from marqo.s2_inference import clip_utils
+from marqo.tensor_search.enums import EnvVars
+
+
+def make_jpegs(count: int):
+    random.seed(0)
+    jpegs = []
+    for _ in range(count):
+        size = (random.randint(400, 1600), random.randint(300, 1200))
+        image = Image.effect_noise(size, random.randint(10, 100)).convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        jpegs.append(buffer.getvalue())
+    return jpegs
+
+
+def images_per_second(jpegs, preprocess, thread_count: int, repeats: int = 3) -> float:
+    os.environ[EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT] = str(thread_count)
+    clip_utils.shutdown_preprocessing_executor()
+    best = float("inf")
+    for _ in range(repeats):
+        images = [Image.open(io.BytesIO(jpeg)) for jpeg in jpegs]
+        start = time.perf_counter()
+        clip_utils.preprocess_images(images, preprocess)
+        best = min(best, time.perf_counter() - start)
+    return len(jpegs) / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=min(8, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    transforms = {
+        "CLIP": clip.clip._transform(224),
+        "OPEN_CLIP": open_clip.image_transform(224, is_train=False),
+        "MULTILINGUAL_CLIP": clip.clip._transform(224),
+        "CLIP_ONNX": clip_utils._get_transform(224),
+    }
+    jpegs = make_jpegs(args.batch_size)
+
+    print(f"batch size {args.batch_size}, {os.cpu_count()} CPUs, pool of {args.threads} threads")
+    print(f"{'model':>18} {'sequential (img/s)':>19} {'pool (img/s)':>13} {'speedup':>8}")
+    for model, preprocess in transforms.items():
+        sequential = images_per_second(jpegs, preprocess, thread_count=1)
+        pooled = images_per_second(jpegs, preprocess, thread_count=args.threads)
+        print(f"{model:>18} {sequential:>19.1f} {pooled:>13.1f} {pooled / sequential:>7.1f}x")
+    clip_utils.shutdown_preprocessing_executor()
+
+
+if __name__ == "__main__":
+    main()
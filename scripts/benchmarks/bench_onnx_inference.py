@@ -0,0 +1,89 @@
+"""Benchmark of CPU inference throughput of the registry's ONNX models against their pytorch versions.
+
+For each ONNX model in the registry, measures texts/sec of encode() of:
+    - torch: the pytorch version of the model (e.g. sentence-transformers/all-MiniLM-L6-v2 for
+      onnx/all-MiniLM-L6-v2, and ViT-L/14 for onnx32/openai/ViT-L/14)
+    - onnx: the ONNX model, in a session with all graph optimisations enabled
+    - onnx int8: the ONNX model, dynamically quantised to int8 (MARQO_ONNX_QUANTIZE=TRUE)
+CLIP models are measured on text, as image preprocessing is benchmarked by bench_image_preprocessing.py. The models
+are downloaded and, for SBERT_ONNX, exported the first time they are loaded.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/benchmarks/bench_onnx_inference.py [--batch-size 32] [--models onnx/all-MiniLM-L6-v2]
+"""
+import argparse
+import os
+import random
+import time
+from typing import Optional
+
+from marqo.s2_inference import model_registry, s2_inference
+from marqo.tensor_search.enums import EnvVars
+
+WORDS = ("the quick brown fox jumps over a lazy dog while marqo indexes documents of images and text for search "
+         "with tensors of every field in the index").split()
+
+
+def make_texts(count: int):
+    random.seed(0)
+    return [" ".join(random.choices(WORDS, k=random.randint(8, 48))) for _ in range(count)]
+
+
+def torch_model_name(onnx_model_name: str) -> Optional[str]:
+    """The registry name of the pytorch version of an ONNX model, or None if it has none"""
+    if onnx_model_name.startswith("onnx/"):
+        name = model_registry._get_sbert_onnx_properties()[onnx_model_name]["name"]
+        torch_models = {**model_registry._get_sbert_properties(), **model_registry._get_hf_properties()}
+        return next((model for model, properties in torch_models.items() if properties["name"] == name), None)
+    _, source, clip_model = onnx_model_name.split("/", 2)
+    model = clip_model if source == "openai" else f"open_clip/{clip_model}"
+    return model if model in model_registry.load_model_properties()["models"] else None
+
+
+def load_model(model_name: str, quantize: bool = False):
+    os.environ[EnvVars.MARQO_ONNX_QUANTIZE] = "TRUE" if quantize else "FALSE"
+    model_properties = s2_inference.get_model_properties_from_registry(model_name)
+    return s2_inference._load_model(model_name, model_properties, device="cpu", calling_func="unit_test")
+
+
+def texts_per_second(model, texts, batch_size: int, repeats: int = 3) -> float:
+    # warm up, so session and allocator set up isn't timed
+    model.encode(texts[:batch_size])
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            model.encode(texts[i:i + batch_size])
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def main():
+    onnx_models = [name for name in model_registry._get_sbert_onnx_properties()] + \
+                  [name for name in model_registry._get_onnx_clip_properties() if name.startswith("onnx32/")]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batches", type=int, default=4)
+    parser.add_argument("--models", nargs="*", default=onnx_models, help="ONNX models of the registry")
+    args = parser.parse_args()
+
+    texts = make_texts(args.batch_size * args.batches)
+    print(f"batch size {args.batch_size}, {args.batches} batches, {os.cpu_count()} CPUs")
+    print(f"{'model':>40} {'torch (text/s)':>15} {'onnx (text/s)':>14} {'onnx int8 (text/s)':>19} "
+          f"{'onnx speedup':>13} {'int8 speedup':>13}")
+    for onnx_model_name in args.models:
+        torch_model = torch_model_name(onnx_model_name)
+        torch_throughput = texts_per_second(load_model(torch_model), texts, args.batch_size) if torch_model else None
+        onnx_throughput = texts_per_second(load_model(onnx_model_name), texts, args.batch_size)
+        int8_throughput = texts_per_second(load_model(onnx_model_name, quantize=True), texts, args.batch_size)
+        if torch_throughput is None:
+            print(f"{onnx_model_name:>40} {'n/a':>15} {onnx_throughput:>14.1f} {int8_throughput:>19.1f} "
+                  f"{'n/a':>13} {'n/a':>13}")
+        else:
+            print(f"{onnx_model_name:>40} {torch_throughput:>15.1f} {onnx_throughput:>14.1f} {int8_throughput:>19.1f} "
+                  f"{onnx_throughput / torch_throughput:>12.1f}x {int8_throughput / torch_throughput:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
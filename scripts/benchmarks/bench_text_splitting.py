@@ -0,0 +1,82 @@
+"""Benchmark of the text splitting add_documents() does for text fields.
+
+Compares the previous splitting (the splitting function looked up per field, with a punkt lookup each time, and every
+text sent through nltk's tokenizers) with the current one (splitting functions cached per (method, language), texts
+of the batch split by one split_texts() call, and punkt only run on texts that can have more than one sentence).
+Both must produce the same chunks.
+
+The corpus is a batch of product-like docs: short titles without sentence ends, and multi sentence descriptions.
+nltk's punkt data must be installed.
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/benchmarks/bench_text_splitting.py
+"""
+import random
+import time
+from functools import partial
+
+import nltk
+from more_itertools import windowed
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from marqo.s2_inference.processing import text
+
+WORDS = ("red blue green large small cotton leather shirt shoe bag dress jacket with for and the a of in on "
+         "lightweight waterproof classic modern vintage slim fit").split()
+
+
+def make_corpus(num_docs: int):
+    rng = random.Random(0)
+    titles = [" ".join(rng.choices(WORDS, k=rng.randint(3, 8))) for _ in range(num_docs)]
+    descriptions = [" ".join(" ".join(rng.choices(WORDS, k=rng.randint(5, 15))).capitalize() + rng.choice(".!?")
+                             for _ in range(rng.randint(2, 10))) for _ in range(num_docs)]
+    return titles, descriptions
+
+
+def previous_split_text(text_to_split: str, split_by: str, split_length: int, split_overlap: int):
+    text_to_split = text.check_make_string_valid(text_to_split, coerce=True)
+    if len(text_to_split) <= 1:
+        return [text_to_split]
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("punkt")
+    mapping = {
+        'character': list,
+        'word': partial(word_tokenize, language='english'),
+        'sentence': partial(sent_tokenize, language='english'),
+        'passage': lambda x: x.split("\n\n")
+    }
+    seperator = '' if split_by == 'character' else ' '
+    segments = list(windowed(mapping[split_by](text_to_split), n=split_length, step=split_length - split_overlap))
+    return text._reconstruct_multi_list(segments, seperator)
+
+
+def best_time(func, repeats: int = 3) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'docs':>6} {'split_by':>9} {'fields':>13} {'previous (s)':>13} {'current (s)':>12} {'speedup':>8}")
+    for num_docs in [1000, 10000]:
+        titles, descriptions = make_corpus(num_docs)
+        for split_by, split_length, split_overlap in [("sentence", 2, 1), ("word", 8, 2)]:
+            for fields, texts in [("titles", titles), ("descriptions", descriptions)]:
+                previous = lambda: [previous_split_text(t, split_by, split_length, split_overlap) for t in texts]
+                current = lambda: text.split_texts(texts, split_by=split_by, split_length=split_length,
+                                                   split_overlap=split_overlap)
+                assert previous() == current()
+
+                previous_time = best_time(previous)
+                current_time = best_time(current)
+                print(f"{num_docs:>6} {split_by:>9} {fields:>13} {previous_time:>13.4f} {current_time:>12.4f} "
+                      f"{previous_time / current_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
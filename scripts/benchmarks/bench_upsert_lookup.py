@@ -0,0 +1,114 @@
+"""Benchmark of the doc lookups add_documents() does when use_existing_tensors=True.
+
+Compares the previous list based lookups with the current dict based ones, for batches of 1k and 10k docs:
+    - dedup: collecting the unique IDs of the batch (latest doc wins)
+    - combine: tensor_search._get_documents_for_upsert() combining the chunk and data halves of its _mget response
+      (Marqo-OS is mocked, so only the combining is timed)
+    - match: finding the existing doc of each doc in the batch
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/benchmarks/bench_upsert_lookup.py
+"""
+import time
+from unittest import mock
+
+from marqo import config
+from marqo.tensor_search import tensor_search
+
+
+def make_batch(num_docs: int):
+    docs = [{"_id": f"doc-{i}", "title": f"title {i}"} for i in range(num_docs)]
+    chunk_results = [{"_id": doc["_id"], "found": True, "_source": {"__chunks": [
+        {"__field_name": "title", "__field_content": doc["title"], "__vector_title": [0.1] * 8}]}} for doc in docs]
+    data_results = [{"_id": doc["_id"], "found": True, "_source": {"title": doc["title"], "__chunks": []}}
+                    for doc in docs]
+    return docs, {"docs": chunk_results + data_results}
+
+
+def previous_dedup(docs):
+    doc_ids = []
+    for i in range(len(docs) - 1, -1, -1):
+        if ("_id" in docs[i]) and (docs[i]["_id"] not in doc_ids):
+            doc_ids.append(docs[i]["_id"])
+    return doc_ids
+
+
+def current_dedup(docs):
+    doc_ids = dict()
+    for doc in reversed(docs):
+        if "_id" in doc:
+            doc_ids[doc["_id"]] = None
+    return list(doc_ids)
+
+
+def previous_combine(doc_ids, res):
+    combined_result = []
+    for doc_id in doc_ids:
+        result_list = [doc for doc in res["docs"] if doc["_id"] == doc_id]
+        for result in result_list:
+            if ("__chunks" in result["_source"]) and (result["_source"]["__chunks"] == []):
+                res_data = result
+            else:
+                res_chunks = result
+        res_data["_source"]["__chunks"] = res_chunks["_source"]["__chunks"]
+        combined_result.append(res_data)
+    return {"docs": combined_result}
+
+
+def current_combine(doc_ids, res):
+    with mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+        mock_http_requests.return_value.get.return_value = res
+        return tensor_search._get_documents_for_upsert(
+            config=config.Config(url="https://localhost:9200"), index_name="my-index", document_ids=doc_ids)
+
+
+def previous_match(docs, existing_docs):
+    return [[d for d in existing_docs["docs"] if d["_id"] == doc["_id"]][0] for doc in docs]
+
+
+def current_match(docs, existing_docs):
+    existing_docs_by_id = {d["_id"]: d for d in existing_docs["docs"]}
+    return [existing_docs_by_id.get(doc["_id"], {"found": False}) for doc in docs]
+
+
+def best_time(func, repeats: int = 3, setup=lambda: None) -> float:
+    """Runs func(setup()) `repeats` times, returning the fastest time. Only func is timed."""
+    times = []
+    for _ in range(repeats):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'docs':>6} {'step':>8} {'previous (s)':>13} {'current (s)':>12} {'speedup':>8}")
+    for num_docs in [1000, 10000]:
+        docs, mget_response = make_batch(num_docs)
+        doc_ids = current_dedup(docs)
+        assert previous_dedup(docs) == doc_ids
+        existing_docs = current_combine(doc_ids, mget_response)
+        assert previous_combine(doc_ids, make_batch(num_docs)[1]) == existing_docs
+        assert previous_match(docs, existing_docs) == current_match(docs, existing_docs)
+
+        # The previous versions are quadratic, so are only run once on large batches
+        repeats = 3 if num_docs <= 1000 else 1
+        # _get_documents_for_upsert() modifies the _mget response, so each run gets a new one
+        new_response = lambda: make_batch(num_docs)[1]
+        steps = [
+            ("dedup", lambda _: previous_dedup(docs), lambda _: current_dedup(docs), lambda: None),
+            ("combine", lambda res: previous_combine(doc_ids, res), lambda res: current_combine(doc_ids, res),
+             new_response),
+            ("match", lambda _: previous_match(docs, existing_docs), lambda _: current_match(docs, existing_docs),
+             lambda: None),
+        ]
+        for step, previous, current, setup in steps:
+            previous_time = best_time(previous, repeats, setup)
+            current_time = best_time(current, repeats, setup)
+            print(f"{num_docs:>6} {step:>8} {previous_time:>13.4f} {current_time:>12.4f} "
+                  f"{previous_time / current_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Evaluation of the accuracy and throughput of the `cpu_precision` model property on CPU.
+
+For each registry model, encodes a corpus of texts with the model loaded at fp32, int8 and bf16, and reports:
+    - texts/sec of encode()
+    - the mean and minimum cosine similarity of each text's vector to its fp32 vector
+    - recall@10: the share of each query's 10 nearest fp32 neighbours in the corpus that are also among its 10
+      nearest neighbours at the lower precision
+CLIP models are evaluated on text, as their image encoders have the same layers. The models are downloaded the first
+time they are loaded. bf16 is only faster than fp32 on CPUs with native bf16 support (e.g. AVX512-BF16 or AMX).
+
+Usage (from the repo root):
+    PYTHONPATH=src python scripts/benchmarks/eval_cpu_precision.py [--corpus-size 512] [--models hf/all-MiniLM-L6-v2]
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from marqo.s2_inference import cpu_precision, s2_inference
+
+DEFAULT_MODELS = ["hf/all-MiniLM-L6-v2", "hf/all_datasets_v4_MiniLM-L6", "sentence-transformers/all-mpnet-base-v2",
+                  "ViT-B/32", "open_clip/ViT-B-32/laion2b_s34b_b79k"]
+WORDS = ("the quick brown fox jumps over a lazy dog while marqo indexes documents of images and text for search "
+         "with tensors of every field in the index red green blue house car tree river mountain city").split()
+
+
+def make_texts(count: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(4, 32))) for _ in range(count)]
+
+
+def load_model(model_name: str, precision: str):
+    model_properties = {**s2_inference.get_model_properties_from_registry(model_name), "cpu_precision": precision}
+    return s2_inference._load_model(model_name, model_properties, device="cpu", calling_func="unit_test")
+
+
+def encode(model, texts, batch_size: int):
+    """Returns the normalised vectors of the texts, and texts/sec"""
+    model.encode(texts[:batch_size])
+    start = time.perf_counter()
+    vectors = np.concatenate([np.asarray(model.encode(texts[i:i + batch_size]), dtype=np.float32)
+                              for i in range(0, len(texts), batch_size)])
+    elapsed = time.perf_counter() - start
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), len(texts) / elapsed
+
+
+def nearest_neighbours(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-queries @ corpus.T, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus-size", type=int, default=512)
+    parser.add_argument("--query-count", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--models", nargs="*", default=DEFAULT_MODELS, help="models of the registry")
+    args = parser.parse_args()
+
+    corpus = make_texts(args.corpus_size, seed=0)
+    queries = make_texts(args.query_count, seed=1)
+    k = 10
+
+    print(f"corpus of {args.corpus_size} texts, {args.query_count} queries, batch size {args.batch_size}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'model':>40} {'precision':>9} {'text/s':>8} {'speedup':>8} {'mean cos':>9} {'min cos':>8} "
+          f"{'recall@10':>10}")
+    for model_name in args.models:
+        baseline = None
+        for precision in cpu_precision.CPU_PRECISIONS:
+            model = load_model(model_name, precision)
+            corpus_vectors, throughput = encode(model, corpus, args.batch_size)
+            query_vectors, _ = encode(model, queries, args.batch_size)
+            neighbours = nearest_neighbours(query_vectors, corpus_vectors, k)
+            if baseline is None:
+                baseline = corpus_vectors, throughput, neighbours
+            baseline_vectors, baseline_throughput, baseline_neighbours = baseline
+
+            cosine_similarities = (corpus_vectors * baseline_vectors).sum(axis=1)
+            recall = np.mean([len(set(found) & set(expected)) / k
+                              for found, expected in zip(neighbours, baseline_neighbours)])
+            print(f"{model_name:>40} {precision:>9} {throughput:>8.1f} {throughput / baseline_throughput:>7.2f}x "
+                  f"{cosine_similarities.mean():>9.4f} {cosine_similarities.min():>8.4f} {recall:>10.3f}")
+            del model
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ setup(
         "click==8.0.4",
         # tensor_search:
         "requests",
+        "httpx",
         "urllib3",
         "fastapi_utils",
         # s2_inference:
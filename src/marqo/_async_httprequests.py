@@ -0,0 +1,188 @@
+"""An asyncio client for Marqo-OS, used by the async request path (see marqo.tensor_search.async_tensor_search).
+
+AsyncHttpRequests mirrors HttpRequests: the same retries on connection errors, and the same translation of
+OpenSearch errors into Marqo errors. Requests are sent through one httpx.AsyncClient per event loop, so that
+connections to Marqo-OS are kept alive and reused, and a request waiting on Marqo-OS doesn't hold a thread.
+"""
+import asyncio
+import copy
+import json
+import weakref
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+from marqo._httprequests import HttpRequests, convert_to_marqo_web_error_and_raise, verify_certificates
+from marqo.config import Config
+from marqo.errors import BackendCommunicationError, BackendTimeoutError
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.tensor_search_logging import get_logger
+from marqo.tensor_search.utils import read_env_vars_and_defaults, read_env_vars_and_defaults_ints
+
+logger = get_logger(__name__)
+
+ALLOWED_OPERATIONS = {"DELETE", "GET", "POST", "PUT"}
+
+# A client can only be used by the event loop it was created in. Certificate verification is a setting of the
+# client rather than of a request, so there is a client per verify setting.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_client(verify: bool) -> httpx.AsyncClient:
+    """Returns the client of the running event loop that verifies certificates or not, creating it on first use."""
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), dict())
+    client = loop_clients.get(verify)
+    if client is None or client.is_closed:
+        client = _create_client(verify)
+        loop_clients[verify] = client
+    return client
+
+
+def _create_client(verify: bool) -> httpx.AsyncClient:
+    """Creates a client with a connection pool sized by the MARQO_OS_CONNECTION_POOL_* env vars."""
+    pool_size = read_env_vars_and_defaults_ints(EnvVars.MARQO_OS_CONNECTION_POOL_SIZE)
+    pool_block = read_env_vars_and_defaults(EnvVars.MARQO_OS_CONNECTION_POOL_BLOCK) == "TRUE"
+    # As with the requests session, extra connections are opened when the pool is busy, unless it blocks
+    limits = httpx.Limits(max_connections=pool_size if pool_block else None,
+                          max_keepalive_connections=pool_size)
+    logger.debug(f"Created async Marqo-OS client with max_keepalive_connections={pool_size}, "
+                 f"pool_block={pool_block}, verify={verify}")
+    return httpx.AsyncClient(limits=limits, verify=verify)
+
+
+async def close_client() -> None:
+    """Closes the clients of the running event loop. New clients are created on the next request."""
+    for client in _clients.pop(asyncio.get_running_loop(), dict()).values():
+        await client.aclose()
+
+
+class AsyncHttpRequests:
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.headers = dict()
+
+    calculate_backoff_sleep = HttpRequests.calculate_backoff_sleep
+
+    async def send_request(
+        self,
+        http_method: str,
+        path: str,
+        body: Optional[Union[Dict[str, Any], List[Dict[str, Any]], List[str], str]] = None,
+        content_type: Optional[str] = None,
+        max_retry_attempts: Optional[int] = None,
+        max_retry_backoff_seconds: Optional[int] = None
+    ) -> Any:
+        if max_retry_attempts is None:
+            max_retry_attempts = read_env_vars_and_defaults_ints(EnvVars.DEFAULT_MARQO_MAX_BACKEND_RETRY_ATTEMPTS)
+        if max_retry_backoff_seconds is None:
+            max_retry_backoff_seconds = read_env_vars_and_defaults_ints(EnvVars.DEFAULT_MARQO_MAX_BACKEND_RETRY_BACKOFF)
+
+        if http_method not in ALLOWED_OPERATIONS:
+            raise ValueError("{} not an allowed operation {}".format(http_method, ALLOWED_OPERATIONS))
+
+        req_headers = copy.deepcopy(self.headers)
+        if content_type is not None and content_type:
+            req_headers['Content-Type'] = content_type
+
+        if isinstance(body, (bytes, str)):
+            content = body
+        else:
+            content = json.dumps(body) if body else None
+
+        request_path = self.config.url + '/' + path
+        for attempt in range(max_retry_attempts + 1):
+            try:
+                response = await get_client(verify_certificates(self.config)).request(
+                    http_method, request_path, content=content, headers=req_headers, timeout=self.config.timeout)
+                return self._validate(response)
+            except httpx.TimeoutException as err:
+                raise BackendTimeoutError(str(err)) from err
+            except httpx.TransportError as err:
+                if attempt == max_retry_attempts:
+                    raise BackendCommunicationError(str(err)) from err
+                else:
+                    logger.info(f"BackendCommunicationError encountered... Retrying request to {request_path}. "
+                                f"Attempt {attempt + 1} of {max_retry_attempts}")
+                    await asyncio.sleep(self.calculate_backoff_sleep(attempt, max_retry_backoff_seconds))
+
+    async def get(
+        self, path: str,
+        body: Optional[Union[Dict[str, Any], List[Dict[str, Any]], List[str], str]] = None,
+        max_retry_attempts: Optional[int] = None,
+        max_retry_backoff_seconds: Optional[int] = None
+    ) -> Any:
+        content_type = None
+        if body is not None:
+            content_type = 'application/json'
+        return await self.send_request(
+            http_method="GET",
+            path=path,
+            body=body,
+            content_type=content_type,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff_seconds
+        )
+
+    async def post(
+        self,
+        path: str,
+        body: Optional[Union[Dict[str, Any], List[Dict[str, Any]], List[str], str]] = None,
+        content_type: Optional[str] = 'application/json',
+        max_retry_attempts: Optional[int] = None,
+        max_retry_backoff_seconds: Optional[int] = None
+    ) -> Any:
+        return await self.send_request(
+            http_method="POST",
+            path=path,
+            body=body,
+            content_type=content_type,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff_seconds
+        )
+
+    async def put(
+        self,
+        path: str,
+        body: Optional[Union[Dict[str, Any], List[Dict[str, Any]], List[str], str]] = None,
+        content_type: Optional[str] = None,
+        max_retry_attempts: Optional[int] = None,
+        max_retry_backoff_seconds: Optional[int] = None
+    ) -> Any:
+        if body is not None:
+            content_type = 'application/json'
+        return await self.send_request(
+            http_method="PUT",
+            path=path,
+            body=body,
+            content_type=content_type,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff_seconds
+        )
+
+    async def delete(
+        self,
+        path: str,
+        body: Optional[Union[Dict[str, Any], List[Dict[str, Any]], List[str]]] = None,
+        max_retry_attempts: Optional[int] = None,
+        max_retry_backoff_seconds: Optional[int] = None
+    ) -> Any:
+        return await self.send_request(
+            http_method="DELETE",
+            path=path,
+            body=body,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff_seconds
+        )
+
+    @staticmethod
+    def _validate(response: httpx.Response) -> Any:
+        # Only 4xx and 5xx responses are errors, as with requests' raise_for_status()
+        if response.is_error:
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as err:
+                convert_to_marqo_web_error_and_raise(response=response, err=err)
+        if response.content == b'':
+            return response
+        return response.json()
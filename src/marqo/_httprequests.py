@@ -2,6 +2,7 @@ import copy
 import json
 import time
 import pprint
+import threading
 from http import HTTPStatus
 from typing import Any, Callable, Dict, List, Optional, Union
 import requests
@@ -22,7 +23,7 @@ from marqo.errors import (
 from urllib3.exceptions import InsecureRequestWarning
 import warnings
 from marqo.tensor_search.tensor_search_logging import get_logger
-from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+from marqo.tensor_search.utils import read_env_vars_and_defaults, read_env_vars_and_defaults_ints
 from marqo.tensor_search.enums import EnvVars
 
 logger = get_logger(__name__)
@@ -32,6 +33,85 @@ ALLOWED_OPERATIONS = {requests.delete, requests.get, requests.post, requests.put
 OPERATION_MAPPING = {'delete': requests.delete, 'get': requests.get,
                      'post': requests.post, 'put': requests.put}
 
+# The method of the shared session that sends each allowed operation
+SESSION_OPERATIONS = {requests.delete: 'delete', requests.get: 'get',
+                      requests.post: 'post', requests.put: 'put'}
+
+# A single session is shared by all HttpRequests instances in the process, so that connections to Marqo-OS
+# are kept alive and reused, rather than a new TCP/TLS connection being opened for every request.
+_session: Optional[requests.Session] = None
+# The max connections kept per host by the shared session's pools
+_session_pool_size: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide session used to send requests to Marqo-OS, creating it on first use."""
+    global _session, _session_pool_size
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = read_env_vars_and_defaults_ints(EnvVars.MARQO_OS_CONNECTION_POOL_SIZE)
+                _session = _create_session(pool_size)
+                _session_pool_size = pool_size
+    return _session
+
+
+def _create_session(pool_size: int) -> requests.Session:
+    """Creates a session with a connection pool of pool_size connections per host, with the other
+    MARQO_OS_CONNECTION_POOL_* settings read from env vars."""
+    pool_hosts = read_env_vars_and_defaults_ints(EnvVars.MARQO_OS_CONNECTION_POOL_HOSTS)
+    pool_block = read_env_vars_and_defaults(EnvVars.MARQO_OS_CONNECTION_POOL_BLOCK) == "TRUE"
+
+    session = requests.Session()
+    # Retries are handled by HttpRequests.send_request()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_hosts, pool_maxsize=pool_size, pool_block=pool_block, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    logger.debug(f"Created Marqo-OS session with pool_maxsize={pool_size}, pool_connections={pool_hosts}, "
+                 f"pool_block={pool_block}")
+    return session
+
+
+def close_session() -> None:
+    """Closes the shared session and its pooled connections. A new session is created on the next request."""
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            _session_pool_size = None
+
+
+def verify_certificates(config: Config) -> bool:
+    """Whether the TLS certificates of Marqo-OS are verified. Used by both HttpRequests and AsyncHttpRequests."""
+    return False  # config.cluster_is_remote
+
+
+def get_connection_pool_stats() -> dict:
+    """Returns statistics of the connection pools of the shared session, one entry per Marqo-OS host."""
+    session = _session
+    if session is None:
+        return {"pools": []}
+    pools = []
+    # The same adapter is mounted for http:// and https://
+    adapter = session.get_adapter('https://')
+    for pool_key in adapter.poolmanager.pools.keys():
+        pool = adapter.poolmanager.pools.get(pool_key)
+        if pool is None:
+            # Evicted since the keys were read
+            continue
+        pools.append({
+            "scheme": pool.scheme,
+            "host": pool.host,
+            "port": pool.port,
+            "max_connections": _session_pool_size,
+            "connections_created": pool.num_connections,
+            "requests_sent": pool.num_requests,
+        })
+    return {"pools": pools}
+
 
 class HttpRequests:
     def __init__(self, config: Config) -> None:
@@ -52,11 +132,13 @@ class HttpRequests:
         if max_retry_backoff_seconds is None:
             max_retry_backoff_seconds = read_env_vars_and_defaults_ints(EnvVars.DEFAULT_MARQO_MAX_BACKEND_RETRY_ATTEMPTS)
 
-        to_verify = False #  self.config.cluster_is_remote
+        to_verify = verify_certificates(self.config)
 
         if http_method not in ALLOWED_OPERATIONS:
             raise ValueError("{} not an allowed operation {}".format(http_method, ALLOWED_OPERATIONS))
 
+        send = getattr(get_session(), SESSION_OPERATIONS[http_method])
+
         req_headers = copy.deepcopy(self.headers)
 
         if content_type is not None and content_type:
@@ -70,7 +152,7 @@ class HttpRequests:
                 try:
                     request_path = self.config.url + '/' + path
                     if isinstance(body, (bytes, str)):
-                        response = http_method(
+                        response = send(
                             request_path,
                             timeout=self.config.timeout,
                             headers=req_headers,
@@ -78,7 +160,7 @@ class HttpRequests:
                             verify=to_verify
                         )
                     else:
-                        response = http_method(
+                        response = send(
                             request_path,
                             timeout=self.config.timeout,
                             headers=req_headers,
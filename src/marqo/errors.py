@@ -159,6 +159,11 @@ class DocumentNotFoundError(__InvalidRequestError):
     status_code = HTTPStatus.NOT_FOUND
 
 
+class IndexingJobNotFoundError(__InvalidRequestError):
+    code = "indexing_job_not_found"
+    status_code = HTTPStatus.NOT_FOUND
+
+
 class NonTensorIndexError(__InvalidRequestError):
     """Error trying to use a non-tensor OpenSearch index like a tensor one"""
     code = "document_not_found"
@@ -1,7 +1,12 @@
+import io
 import os
-from marqo.tensor_search.enums import ModelProperties, InferenceParams
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from marqo.tensor_search.enums import ModelProperties, InferenceParams, EnvVars
 from marqo.tensor_search.models.private_models import ModelLocation, ModelAuth
 import validators
+import httpx
 import requests
 import numpy as np
 import clip
@@ -19,12 +24,16 @@ from torchvision.transforms import InterpolationMode
 from marqo.s2_inference.configs import ModelCache
 from marqo.errors import InternalError
 from marqo.tensor_search.telemetry import RequestMetrics, RequestMetricsStore
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+from marqo.s2_inference import image_cache, image_download, weights_cache
+from clip.model import build_model as build_clip_model
 
 logger = get_logger(__name__)
 
 OPENAI_DATASET_MEAN = (0.48145466, 0.4578275, 0.40821073)
 OPENAI_DATASET_STD = (0.26862954, 0.26130258, 0.27577711)
 BICUBIC = InterpolationMode.BICUBIC
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 
 def get_allowed_image_types():
@@ -74,21 +83,88 @@ def format_and_load_CLIP_images(images: List[Union[str, ndarray, ImageType]], im
     if not isinstance(images, list):
         raise TypeError(f"expected list but received {type(images)}")
 
+    # Images given as pointers are loaded concurrently in the image download pool
+    pointers = [image for image in images if isinstance(image, str)]
+    loaded = dict()
+    if len(pointers) > 1:
+        loaded = image_download.map_in_pool(
+            lambda group: {pointer: format_and_load_CLIP_image(pointer, image_download_headers) for pointer in group},
+            pointers, max_tasks=len(pointers)
+        )
+
     results = []
     for image in images:
-        results.append(format_and_load_CLIP_image(image, image_download_headers))
+        if isinstance(image, str) and image in loaded:
+            results.append(loaded[image])
+        else:
+            results.append(format_and_load_CLIP_image(image, image_download_headers))
     
     return results
 
 
-def load_image_from_path(image_path: str, image_download_headers: dict, timeout=3,
+_preprocessing_executor: Optional[ThreadPoolExecutor] = None
+_preprocessing_thread_count: Optional[int] = None
+_preprocessing_executor_lock = threading.Lock()
+
+
+def _get_preprocessing_thread_count() -> int:
+    thread_count = read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT)
+    if thread_count is None:
+        thread_count = min(8, os.cpu_count() or 1)
+    return max(1, thread_count)
+
+
+def _get_preprocessing_executor() -> Tuple[ThreadPoolExecutor, int]:
+    """Returns the process-wide pool of threads that preprocess images, creating it on first use, and its thread
+    count."""
+    global _preprocessing_executor, _preprocessing_thread_count
+    if _preprocessing_executor is None:
+        with _preprocessing_executor_lock:
+            if _preprocessing_executor is None:
+                _preprocessing_thread_count = _get_preprocessing_thread_count()
+                _preprocessing_executor = ThreadPoolExecutor(
+                    max_workers=_preprocessing_thread_count, thread_name_prefix="image_preprocessing")
+    return _preprocessing_executor, _preprocessing_thread_count
+
+
+def shutdown_preprocessing_executor() -> None:
+    """Stops the preprocessing threads. They are recreated (with the thread count re-read from env vars) on next use."""
+    global _preprocessing_executor, _preprocessing_thread_count
+    with _preprocessing_executor_lock:
+        if _preprocessing_executor is not None:
+            _preprocessing_executor.shutdown(wait=True)
+            _preprocessing_executor = None
+            _preprocessing_thread_count = None
+
+
+def preprocess_images(images: List[ImageType], preprocess: Callable[[ImageType], torch.Tensor]) -> List[torch.Tensor]:
+    """Applies a model's preprocess transform to each image, using the preprocessed image cache if it is enabled.
+
+    Images are decoded and preprocessed concurrently by a pool of MARQO_IMAGE_PREPROCESSING_THREAD_COUNT threads.
+    PIL and torch release the GIL while decoding, resizing and normalising, so this scales with CPU cores.
+
+    A batch that repeats an image url holds the same lazily decoded PIL image more than once (see
+    format_and_load_CLIP_images), and a PIL image can't be decoded by several threads at once. So each distinct image
+    object is preprocessed once, and its tensor is used for each of its positions.
+    """
+    unique_images = {id(image): image for image in images}
+    executor, thread_count = _get_preprocessing_executor()
+    if len(unique_images) <= 1 or thread_count <= 1:
+        processed = [image_cache.preprocess_image(image, preprocess) for image in unique_images.values()]
+    else:
+        processed = executor.map(lambda image: image_cache.preprocess_image(image, preprocess), unique_images.values())
+    processed_by_id = dict(zip(unique_images.keys(), processed))
+    return [processed_by_id[id(image)] for image in images]
+
+
+def load_image_from_path(image_path: str, image_download_headers: dict, timeout: Optional[float] = None,
                          metrics_obj: Optional[RequestMetrics] = None) -> ImageType:
     """Loads an image into PIL from a string path that is either local or a url
 
     Args:
         image_path (str): Local or remote path to image.
         image_download_headers (dict): header for the image download
-        timeout (number): timeout (in seconds)
+        timeout (number): timeout (in seconds). Defaults to MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS
     Raises:
         ValueError: If the local path is invalid, and is not a url
         UnidentifiedImageError: If the image is irretrievable or unprocessable.
@@ -99,16 +175,27 @@ def load_image_from_path(image_path: str, image_download_headers: dict, timeout=
     if os.path.isfile(image_path):
         img = Image.open(image_path)
     elif validators.url(image_path):
+        if timeout is None:
+            timeout = image_download.get_download_timeout()
         try:
             if metrics_obj is not None:
                 metrics_obj.start(f"image_download.{image_path}")
 
-            with requests.get(image_path, stream=True, timeout=timeout, headers=image_download_headers) as resp:
-                if not resp.ok:
-                    raise UnidentifiedImageError(
-                        f"image url `{image_path}` returned {resp.status_code}. Reason: {resp.reason}")
+            cached = image_cache.get_download(image_path, image_download_headers)
+            headers = image_download_headers if cached is None \
+                else {**image_download_headers, **cached.conditional_headers()}
+
+            with image_download.get(image_path, headers=headers, timeout=timeout) as resp:
+                if cached is not None and resp.status_code == 304:
+                    body = io.BytesIO(cached.content)
+                else:
+                    if not resp.ok:
+                        raise UnidentifiedImageError(
+                            f"image url `{image_path}` returned {resp.status_code}. Reason: {resp.reason}")
+                    body = _read_response_body(resp)
+                    image_cache.put_download(image_path, resp.headers, body, image_download_headers)
 
-                img = Image.open(resp.raw)
+                img = Image.open(body)
 
             if metrics_obj is not None:
                 metrics_obj.stop(f"image_download.{image_path}")
@@ -126,6 +213,64 @@ def load_image_from_path(image_path: str, image_download_headers: dict, timeout=
     return img
 
 
+async def load_image_from_path_async(image_path: str, image_download_headers: dict,
+                                     timeout: Optional[float] = None,
+                                     metrics_obj: Optional[RequestMetrics] = None) -> ImageType:
+    """Loads an image into PIL from a string path that is either local or a url, like load_image_from_path(), but
+    downloads the image on the running event loop rather than in a thread.
+
+    Raises:
+        UnidentifiedImageError: If the image is irretrievable or unprocessable.
+    """
+    if os.path.isfile(image_path) or not validators.url(image_path):
+        return load_image_from_path(image_path, image_download_headers, timeout=timeout, metrics_obj=metrics_obj)
+
+    if timeout is None:
+        timeout = image_download.get_download_timeout()
+    try:
+        if metrics_obj is not None:
+            metrics_obj.start(f"image_download.{image_path}")
+
+        cached = image_cache.get_download(image_path, image_download_headers)
+        headers = image_download_headers if cached is None \
+            else {**image_download_headers, **cached.conditional_headers()}
+
+        resp = await image_download.get_async(image_path, headers=headers, timeout=timeout)
+        if cached is not None and resp.status_code == 304:
+            body = io.BytesIO(cached.content)
+        else:
+            if not resp.is_success:
+                raise UnidentifiedImageError(
+                    f"image url `{image_path}` returned {resp.status_code}. Reason: {resp.reason_phrase}")
+            body = io.BytesIO(resp.content)
+            image_cache.put_download(image_path, resp.headers, body, image_download_headers)
+
+        img = Image.open(body)
+
+        if metrics_obj is not None:
+            metrics_obj.stop(f"image_download.{image_path}")
+
+    except httpx.HTTPError as e:
+        raise UnidentifiedImageError(
+            f"image url `{image_path}` is unreachable, perhaps due to timeout. "
+            f"Timeout threshold is set to {timeout} seconds."
+            f"\nConnection error type: `{e.__class__.__name__}`")
+
+    return img
+
+
+def _read_response_body(resp: requests.Response) -> io.BytesIO:
+    """Streams the body of a response into a single in-memory buffer that PIL can seek in.
+
+    Opening the raw stream directly makes PIL read the whole body into a bytes object and then copy it into its
+    own buffer. Content-Encoding (e.g. gzip) is decoded while streaming."""
+    resp.raw.decode_content = True
+    buffer = io.BytesIO()
+    shutil.copyfileobj(resp.raw, buffer, IMAGE_DOWNLOAD_CHUNK_SIZE)
+    buffer.seek(0)
+    return buffer
+
+
 def format_and_load_CLIP_image(image: Union[str, ndarray, ImageType], image_download_headers: dict) -> ImageType:
     """standardizes the input to be a PIL image
 
@@ -258,7 +403,16 @@ class CLIP:
             # We must load the model into CPU then transfer it to the desired device, always
             # The original method to load the openai clip model
             # https://github.com/openai/CLIP/issues/30
-            self.model, self.preprocess = clip.load(self.model_type, device='cpu', jit=False, download_root=ModelCache.clip_cache_path)
+            weights_key = f"clip||{self.model_type}"
+            # The architecture is inferred from the weights, as clip.load() does
+            cached_model = weights_cache.load_model_from_state_dict(
+                weights_key, lambda state_dict: build_clip_model(state_dict).float())
+            if cached_model is not None:
+                self.model = cached_model
+                self.preprocess = _get_transform(self.model.visual.input_resolution)
+            else:
+                self.model, self.preprocess = clip.load(self.model_type, device='cpu', jit=False, download_root=ModelCache.clip_cache_path)
+                weights_cache.save_model(weights_key, self.model)
             self.model = self.model.to(self.device)
             self.tokenizer = clip.tokenize
         else:
@@ -337,7 +491,7 @@ class CLIP:
         else:
             image_input = [format_and_load_CLIP_image(images, image_download_headers)]
 
-        self.image_input_processed = torch.stack([self.preprocess(_img).to(self.device) for _img in image_input])
+        self.image_input_processed = torch.stack([_img.to(self.device) for _img in preprocess_images(image_input, self.preprocess)])
     
         with torch.no_grad():
             outputs = self.model.encode_image(self.image_input_processed)
@@ -412,9 +566,12 @@ class OPEN_CLIP(CLIP):
 
         model_location_presence = ModelProperties.model_location in self.model_properties
         if path is None and not model_location_presence:
-            self.model, _, self.preprocess = open_clip.create_model_and_transforms(self.model_name,
-                                                                                   pretrained=self.pretrained,
-                                                                                   device=self.device, jit=False, cache_dir=ModelCache.clip_cache_path)
+            if not self._load_from_weights_cache():
+                self.model, _, self.preprocess = open_clip.create_model_and_transforms(self.model_name,
+                                                                                       pretrained=self.pretrained,
+                                                                                       device=self.device, jit=False, cache_dir=ModelCache.clip_cache_path)
+                if self._weights_cacheable():
+                    weights_cache.save_model(self._weights_key(), self.model)
             self.tokenizer = open_clip.get_tokenizer(self.model_name)
             self.model.eval()
         else:
@@ -446,6 +603,41 @@ class OPEN_CLIP(CLIP):
 
             self.model.eval()
 
+    def _weights_key(self) -> str:
+        return f"open_clip||{self.model_name}||{self.pretrained}"
+
+    def _weights_cacheable(self) -> bool:
+        """OpenAI weights are loaded by clip's own loader, rather than into an architecture open_clip builds."""
+        return (self.pretrained.lower() != "openai"
+                and open_clip.get_pretrained_cfg(self.model_name, self.pretrained) != dict())
+
+    def _load_from_weights_cache(self) -> bool:
+        """Loads the model's weights from the weights cache, if they are cached.
+
+        Returns:
+            True if the model was loaded, otherwise False
+        """
+        if not weights_cache.is_enabled() or not self._weights_cacheable():
+            return False
+        pretrained_cfg = open_clip.get_pretrained_cfg(self.model_name, self.pretrained)
+        preprocess = dict()
+
+        def build_model():
+            # The architecture, without downloading its pretrained weights. The pretrained weights' preprocessing
+            # config is passed explicitly, as open_clip only picks it up when it loads the weights itself
+            model, _, preprocess["transform"] = open_clip.create_model_and_transforms(
+                self.model_name, pretrained=None, device=self.device, jit=False, pretrained_hf=False,
+                image_mean=pretrained_cfg.get("mean"), image_std=pretrained_cfg.get("std"),
+                image_interpolation=pretrained_cfg.get("interpolation"),
+                image_resize_mode=pretrained_cfg.get("resize_mode"), cache_dir=ModelCache.clip_cache_path)
+            return model
+
+        model = weights_cache.load_model(self._weights_key(), build_model, device=self.device)
+        if model is None:
+            return False
+        self.model, self.preprocess = model, preprocess["transform"]
+        return True
+
     def custom_clip_load(self):
         self.model_name = self.model_properties.get("name", None)
         logger.info(f"The name of the custom clip model is {self.model_name}. We use open_clip load")
@@ -518,7 +710,7 @@ class OPEN_CLIP(CLIP):
         else:
             image_input = [format_and_load_CLIP_image(images, image_download_headers)]
 
-        self.image_input_processed = torch.stack([self.preprocess(_img).to(self.device) for _img in image_input])
+        self.image_input_processed = torch.stack([_img.to(self.device) for _img in preprocess_images(image_input, self.preprocess)])
 
         with torch.no_grad():
             if self.device.startswith("cuda"):
@@ -624,7 +816,7 @@ class MULTILINGUAL_CLIP(CLIP):
         else:
             image_input = [format_and_load_CLIP_image(images, {})]
 
-        self.image_input_processed = torch.stack([self.preprocess(_img).to(self.device) for _img in image_input])
+        self.image_input_processed = torch.stack([_img.to(self.device) for _img in preprocess_images(image_input, self.preprocess)])
 
         with torch.no_grad():
             outputs = self.visual_model.forward(self.image_input_processed)
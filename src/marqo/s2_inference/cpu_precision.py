@@ -0,0 +1,123 @@
+"""Lower precision inference of pytorch models on CPU, set by the `cpu_precision` model property.
+
+- "fp32" (the default): models run as they are loaded
+- "int8": the models' Linear layers are dynamically quantised to int8. Weights are quantised once, when the model
+  is loaded, and activations are quantised on the fly
+- "bf16": the models run under bfloat16 autocast. Their outputs are cast back to fp32
+
+Models are loaded with the precision recorded in their model cache key, so the same model can be loaded at
+different precisions. The precision only applies to models loaded on CPU: models loaded on CUDA run as they are
+loaded (see FP16_CLIP for fp16 CUDA models). ONNX models are quantised with MARQO_ONNX_QUANTIZE instead.
+"""
+import functools
+from typing import Any, Callable, List
+
+import torch
+
+from marqo.s2_inference.errors import InvalidModelPropertiesError
+from marqo.s2_inference.logger import get_logger
+from marqo.tensor_search.enums import ModelProperties
+
+logger = get_logger(__name__)
+
+FP32 = "fp32"
+INT8 = "int8"
+BF16 = "bf16"
+CPU_PRECISIONS = (FP32, INT8, BF16)
+
+# The attributes of the model classes that hold their pytorch modules
+_MODULE_ATTRIBUTES = ("model", "textual_model", "visual_model")
+# The methods of the modules that models call to run inference
+_INFERENCE_METHODS = ("forward", "encode_text", "encode_image")
+_ONNX_MODEL_TYPES = ("sbert_onnx", "clip_onnx")
+
+
+def get_cpu_precision(model_properties: dict) -> str:
+    """Returns the precision set in the model properties.
+
+    Raises:
+        InvalidModelPropertiesError: if the precision isn't one of CPU_PRECISIONS
+    """
+    precision = model_properties.get(ModelProperties.cpu_precision, FP32)
+    if precision not in CPU_PRECISIONS:
+        raise InvalidModelPropertiesError(
+            f"Invalid `{ModelProperties.cpu_precision}` = `{precision}` in model_properties. "
+            f"`{ModelProperties.cpu_precision}` must be one of {list(CPU_PRECISIONS)}.")
+    if precision != FP32 and model_properties.get("type", "") in _ONNX_MODEL_TYPES:
+        raise InvalidModelPropertiesError(
+            f"`{ModelProperties.cpu_precision}` is not supported by ONNX models. "
+            f"ONNX models can be quantised by setting MARQO_ONNX_QUANTIZE.")
+    return precision
+
+
+def apply_cpu_precision(model: Any, precision: str, device: str) -> Any:
+    """Sets up the loaded model to run at the precision.
+
+    Args:
+        model: a loaded model, e.g. a CLIP or SBERT object
+        precision: one of CPU_PRECISIONS
+        device: the device the model is loaded on. Models not loaded on CPU are returned as they are
+
+    Returns:
+        The model, with its pytorch modules quantised or autocast
+
+    Raises:
+        InvalidModelPropertiesError: if the model has no pytorch modules, e.g. if it is an ONNX model
+    """
+    if precision == FP32:
+        return model
+    if not device.startswith("cpu"):
+        logger.warning(f"`{ModelProperties.cpu_precision}` = `{precision}` only applies to models loaded on CPU. "
+                       f"The model loaded on device `{device}` will run at its default precision.")
+        return model
+
+    module_attributes = _get_module_attributes(model)
+    if not module_attributes:
+        raise InvalidModelPropertiesError(
+            f"`{ModelProperties.cpu_precision}` = `{precision}` is only supported by pytorch models, not by models "
+            f"of type `{type(model).__name__}`. ONNX models can be quantised by setting MARQO_ONNX_QUANTIZE.")
+
+    for attribute in module_attributes:
+        module = getattr(model, attribute)
+        if precision == INT8:
+            setattr(model, attribute, torch.quantization.quantize_dynamic(
+                module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True))
+        elif precision == BF16:
+            for method_name in _INFERENCE_METHODS:
+                method = getattr(module, method_name, None)
+                if method is not None:
+                    # Set on the instance, so only this module is autocast
+                    setattr(module, method_name, _with_bf16_autocast(method))
+    return model
+
+
+def _get_module_attributes(model: Any) -> List[str]:
+    return [attribute for attribute in _MODULE_ATTRIBUTES
+            if isinstance(getattr(model, attribute, None), torch.nn.Module)]
+
+
+def _with_bf16_autocast(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def method_with_bf16_autocast(*args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            output = method(*args, **kwargs)
+        return _to_fp32(output)
+
+    return method_with_bf16_autocast
+
+
+def _to_fp32(output: Any) -> Any:
+    """Casts bf16 tensors in the output back to fp32, so they can be converted to numpy.
+
+    Dict outputs (e.g. sentence-transformers' features) are updated in place."""
+    if isinstance(output, torch.Tensor):
+        return output.float() if output.dtype == torch.bfloat16 else output
+    if isinstance(output, dict):
+        for key, value in output.items():
+            output[key] = _to_fp32(value)
+        return output
+    if isinstance(output, tuple):
+        return type(output)(*map(_to_fp32, output)) if hasattr(output, "_fields") else tuple(map(_to_fp32, output))
+    if isinstance(output, list):
+        return [_to_fp32(value) for value in output]
+    return output
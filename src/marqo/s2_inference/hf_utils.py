@@ -5,7 +5,8 @@ import numpy as np
 from typing import Optional
 import torch
 from torch import nn
-from transformers import (AutoModel, AutoTokenizer)
+from transformers import (AutoConfig, AutoModel, AutoTokenizer, PretrainedConfig)
+from transformers.modeling_utils import no_init_weights
 from marqo.tensor_search.models.private_models import ModelLocation, ModelAuth
 from marqo.tensor_search.enums import ModelProperties, InferenceParams
 from marqo.s2_inference.sbert_utils import Model
@@ -15,6 +16,7 @@ from marqo.tensor_search.enums import ModelProperties
 from marqo.s2_inference.errors import InvalidModelPropertiesError, ModelDownloadError
 from marqo.s2_inference.processing.custom_clip_utils import download_model
 from marqo.s2_inference.configs import ModelCache
+from marqo.s2_inference import weights_cache
 
 
 
@@ -60,7 +62,17 @@ class HF_MODEL(Model):
         # We need to do extraction here if necessary
         self.model_path = extract_huggingface_archive(self.model_path)
 
-        self.model = AutoModelForSentenceEmbedding(self.model_path).to(self.device)
+        if self.model_name is not None:
+            # Only models loaded by name are cached, as the files at a path may change
+            weights_key = f"hf||{self.model_name}"
+            self.model = weights_cache.load_model(
+                weights_key, lambda: AutoModelForSentenceEmbedding.from_config(self.model_path).to(self.device),
+                device=self.device)
+            if self.model is None:
+                self.model = AutoModelForSentenceEmbedding(self.model_path).to(self.device)
+                weights_cache.save_model(weights_key, self.model)
+        else:
+            self.model = AutoModelForSentenceEmbedding(self.model_path).to(self.device)
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
         except (OSError, ValueError, RuntimeError) as e:
@@ -150,13 +162,19 @@ class HF_MODEL(Model):
 
 class AutoModelForSentenceEmbedding(nn.Module):
 
-    def __init__(self, model_name: Optional[str] = None, use_auth_token: Optional[str] = None, normalize=True, pooling='mean'):
+    def __init__(self, model_name: Optional[str] = None, use_auth_token: Optional[str] = None, normalize=True, pooling='mean',
+                 config: Optional[PretrainedConfig] = None):
         super().__init__()
         self.model_name = model_name
         self.normalize = normalize
         self.pooling = pooling
         try:
-            self.model = AutoModel.from_pretrained(model_name, use_auth_token = use_auth_token, cache_dir=ModelCache.hf_cache_path)
+            if config is not None:
+                # The architecture only. Its weights are left uninitialised, to be loaded by the caller
+                with no_init_weights():
+                    self.model = AutoModel.from_config(config)
+            else:
+                self.model = AutoModel.from_pretrained(model_name, use_auth_token = use_auth_token, cache_dir=ModelCache.hf_cache_path)
         except (OSError, ValueError, RuntimeError) as e:
             raise InvalidModelPropertiesError(
                 f"Marqo encounters error loading the Hugging Face model = `{self.model_path}` using AutoModel "
@@ -175,6 +193,12 @@ class AutoModelForSentenceEmbedding(nn.Module):
         else:
             raise TypeError(f"{pooling} not in allowed pooling types of 'mean' or 'cls' ")
 
+    @classmethod
+    def from_config(cls, model_name: str, **kwargs) -> "AutoModelForSentenceEmbedding":
+        """Builds the model's architecture from its config, without loading its pretrained weights."""
+        config = AutoConfig.from_pretrained(model_name, cache_dir=ModelCache.hf_cache_path)
+        return cls(model_name, config=config, **kwargs)
+
     def forward(self, **kwargs):
 
         model_output = self.model(**kwargs)
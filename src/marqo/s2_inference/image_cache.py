@@ -0,0 +1,284 @@
+"""Optional on-disk caches of downloaded and preprocessed images.
+
+Enabled by setting MARQO_IMAGE_CACHE_DIR. It has two tiers, each bounded by its total size in bytes, with the least
+recently used files evicted first:
+
+- downloads (MARQO_IMAGE_CACHE_MAX_BYTES): image bodies downloaded from URLs. Bodies are stored by the hash of their
+  content, and each (URL, image download headers) pair points to a body along with the response's
+  ETag/Last-Modified. The headers are part of the key (as a hash, so credentials aren't written to disk), as the image
+  a URL returns can depend on them, e.g. on who it's authorised for. A cached URL is revalidated with a conditional
+  request, so the body is only downloaded again if the image has changed. This round trip is made on every cache hit,
+  so a hit saves the transfer of the body (and the host's bandwidth), but not the latency of a request. Responses
+  with neither header are not cached.
+- preprocessed (MARQO_PREPROCESSED_IMAGE_CACHE_MAX_BYTES): the tensors CLIP models' preprocess transforms produce,
+  keyed by a hash of the decoded pixels and the transform (e.g. the model's resolution and normalisation).
+
+The caches are safe to share between threads and processes: files are written atomically, and a file evicted by
+another process is treated as a miss.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Mapping, NamedTuple, Optional
+
+import numpy as np
+import torch
+
+from marqo.s2_inference.logger import get_logger
+from marqo.s2_inference.types import ImageType
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults, read_env_vars_and_defaults_ints
+
+logger = get_logger(__name__)
+
+DOWNLOADS_DIR = "downloads"
+PREPROCESSED_DIR = "preprocessed"
+_TEMP_FILE_PREFIX = ".tmp"
+
+
+class DiskLRUCache:
+    """A directory of files, bounded by their total size in bytes. The least recently used files are evicted first.
+
+    Keys are used as file names, so must only contain characters that are safe in file names (e.g. hex digests).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_entries()
+
+    def _load_entries(self) -> None:
+        """Picks up the files left by previous processes, ordered by when they were last used."""
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.startswith(_TEMP_FILE_PREFIX):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.current_bytes += size
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the cached bytes for the key, or None if they aren't cached."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Written by another process
+                self._entries[key] = len(data)
+                self.current_bytes += len(data)
+                self._evict()
+        try:
+            # The modification time records when the file was last used, for the next process
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Stores data under the key, evicting least recently used files if the cache is full.
+
+        Data larger than the whole cache is not stored."""
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.directory, prefix=_TEMP_FILE_PREFIX, delete=False) as f:
+                f.write(data)
+            os.replace(f.name, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write to image cache directory `{self.directory}`. Reason: {e}")
+            return
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self.current_bytes += size
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _forget(self, key: str) -> None:
+        """Removes the key from the index. The caller must hold the lock."""
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self.current_bytes -= size
+
+    def _remove(self, key: str) -> None:
+        """Removes the key and its file. The caller must hold the lock."""
+        self._forget(key)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """The caller must hold the lock."""
+        while self.current_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+
+class CachedDownload(NamedTuple):
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    def conditional_headers(self) -> dict:
+        """Headers that make the server respond 304 Not Modified if the image hasn't changed."""
+        headers = dict()
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+_download_cache: Optional[DiskLRUCache] = None
+_preprocessed_cache: Optional[DiskLRUCache] = None
+_caches_loaded = False
+_lock = threading.Lock()
+
+
+def _load_caches() -> None:
+    global _download_cache, _preprocessed_cache, _caches_loaded
+    if _caches_loaded:
+        return
+    with _lock:
+        if _caches_loaded:
+            return
+        cache_dir = read_env_vars_and_defaults(EnvVars.MARQO_IMAGE_CACHE_DIR)
+        if cache_dir is not None:
+            _download_cache = DiskLRUCache(
+                os.path.join(cache_dir, DOWNLOADS_DIR),
+                max_bytes=read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_CACHE_MAX_BYTES))
+            _preprocessed_cache = DiskLRUCache(
+                os.path.join(cache_dir, PREPROCESSED_DIR),
+                max_bytes=read_env_vars_and_defaults_ints(EnvVars.MARQO_PREPROCESSED_IMAGE_CACHE_MAX_BYTES))
+            logger.info(f"Caching downloaded and preprocessed images in `{cache_dir}`")
+        _caches_loaded = True
+
+
+def get_download_cache() -> Optional[DiskLRUCache]:
+    """Returns the cache of downloaded images, or None if image caching is disabled."""
+    _load_caches()
+    return _download_cache
+
+
+def get_preprocessed_cache() -> Optional[DiskLRUCache]:
+    """Returns the cache of preprocessed images, or None if image caching is disabled."""
+    _load_caches()
+    return _preprocessed_cache
+
+
+def reset_caches() -> None:
+    """Drops the process-wide caches (leaving their files on disk). They are reloaded, with settings re-read from env
+    vars, on next use."""
+    global _download_cache, _preprocessed_cache, _caches_loaded
+    with _lock:
+        _download_cache = None
+        _preprocessed_cache = None
+        _caches_loaded = False
+
+
+def _download_key(url: str, request_headers: Optional[Mapping[str, str]]) -> str:
+    """The key of the url entry of a download. Header names are case-insensitive."""
+    headers = {name.lower(): value for name, value in (request_headers or dict()).items()}
+    return "url-" + hashlib.sha256(json.dumps([url, sorted(headers.items())]).encode("utf-8")).hexdigest()
+
+
+def get_download(url: str, request_headers: Optional[Mapping[str, str]] = None) -> Optional[CachedDownload]:
+    """Returns the cached body of the image downloaded from url with request_headers, with the validators to
+    revalidate it, or None."""
+    cache = get_download_cache()
+    if cache is None:
+        return None
+    url_entry = cache.get(_download_key(url, request_headers))
+    if url_entry is None:
+        return None
+    url_entry = json.loads(url_entry)
+    content = cache.get(f"blob-{url_entry['content_hash']}")
+    if content is None:
+        return None
+    return CachedDownload(content=content, etag=url_entry["etag"], last_modified=url_entry["last_modified"])
+
+
+def put_download(url: str, response_headers: Mapping[str, str], body: io.BytesIO,
+                 request_headers: Optional[Mapping[str, str]] = None) -> None:
+    """Caches the body of an image downloaded from url with request_headers, if the response can be revalidated."""
+    cache = get_download_cache()
+    if cache is None:
+        return
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if etag is None and last_modified is None:
+        return
+    content = body.getvalue()
+    content_hash = hashlib.sha256(content).hexdigest()
+    cache.put(f"blob-{content_hash}", content)
+    cache.put(_download_key(url, request_headers), json.dumps({
+        "url": url, "etag": etag, "last_modified": last_modified, "content_hash": content_hash
+    }).encode("utf-8"))
+
+
+def _transform_id(preprocess: Callable) -> str:
+    """Describes a preprocess transform. Torchvision transforms describe their parameters in their repr. Memory
+    addresses (e.g. of plain functions in a Compose) are removed so the description is the same across processes."""
+    return re.sub(r" at 0x[0-9a-fA-F]+", "", repr(preprocess))
+
+
+def _preprocessed_key(image: ImageType, preprocess: Callable) -> str:
+    h = hashlib.blake2b(digest_size=32)
+    h.update(_transform_id(preprocess).encode("utf-8"))
+    h.update(f"|{image.mode}|{image.size}|".encode("utf-8"))
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def preprocess_image(image: ImageType, preprocess: Callable) -> torch.Tensor:
+    """Returns preprocess(image), from the preprocessed image cache if it is enabled."""
+    cache = get_preprocessed_cache()
+    if cache is None:
+        return preprocess(image)
+
+    key = _preprocessed_key(image, preprocess)
+    cached = cache.get(key)
+    if cached is not None:
+        return torch.from_numpy(np.load(io.BytesIO(cached), allow_pickle=False))
+
+    tensor = preprocess(image)
+    buffer = io.BytesIO()
+    np.save(buffer, tensor.detach().cpu().numpy(), allow_pickle=False)
+    cache.put(key, buffer.getvalue())
+    return tensor
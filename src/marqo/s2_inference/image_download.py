@@ -0,0 +1,200 @@
+"""Shared machinery for downloading images from URLs.
+
+All image downloads in the process (add_documents, search queries, reranking) go through a single session, so
+connections to image hosts are kept alive and reused across downloads and requests. Batches of images are
+downloaded by a persistent, bounded pool of worker threads, rather than by threads spawned for every request.
+The async request path downloads images on its event loop instead, through one httpx client per loop (get_async()).
+
+Settings are read from env vars when the session and pool are first used:
+    MARQO_IMAGE_DOWNLOAD_THREAD_COUNT: max number of worker threads downloading images, across all requests
+    MARQO_IMAGE_DOWNLOAD_POOL_SIZE: max connections kept alive per image host
+    MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS: connect and read timeout of each download
+    MARQO_IMAGE_DOWNLOAD_MAX_RETRIES: retries of a download after a connection error or a 429/5xx response
+    MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS: backoff factor between retries
+"""
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+import httpx
+import requests
+from urllib3.util.retry import Retry
+
+from marqo.errors import ConfigurationError
+from marqo.s2_inference.logger import get_logger
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults, read_env_vars_and_defaults_ints
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+# Set on the pool's worker threads, see map_in_pool()
+_pool_thread = threading.local()
+# A client can only be used by the event loop it was created in
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _read_float_env_var(var: str) -> float:
+    str_val = read_env_vars_and_defaults(var)
+    try:
+        return float(str_val)
+    except (ValueError, TypeError) as e:
+        raise ConfigurationError(
+            f"Could not properly read env var `{var}`. `{var}` must be able to be parsed as a number. "
+            f"Current value: `{str_val}`. Reason: {e}")
+
+
+def get_download_timeout() -> float:
+    """Returns the timeout, in seconds, used for image downloads."""
+    return _read_float_env_var(EnvVars.MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS)
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide session used to download images, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def _create_session() -> requests.Session:
+    pool_size = read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_DOWNLOAD_POOL_SIZE)
+    max_retries = read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_DOWNLOAD_MAX_RETRIES)
+    backoff = _read_float_env_var(EnvVars.MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS)
+
+    retry = Retry(
+        total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+        backoff_factor=backoff, status_forcelist=RETRY_STATUS_CODES,
+        # Once retries are exhausted, the last response is returned so that its status can be reported
+        raise_on_status=False
+    )
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    logger.debug(f"Created image download session with pool_maxsize={pool_size}, max_retries={max_retries}")
+    return session
+
+
+def _mark_pool_thread() -> None:
+    _pool_thread.in_pool = True
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide pool of threads used to download images, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                thread_count = read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_DOWNLOAD_THREAD_COUNT)
+                _executor = ThreadPoolExecutor(max_workers=thread_count, thread_name_prefix="image_download",
+                                               initializer=_mark_pool_thread)
+    return _executor
+
+
+def shutdown() -> None:
+    """Closes the session and stops the worker threads. They are recreated (with settings re-read from env vars)
+    on next use."""
+    global _session, _executor
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def get(url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> requests.Response:
+    """Sends a streaming GET request for an image through the shared session.
+
+    The response must be used as a context manager (or closed) so that its connection is returned to the pool.
+    """
+    if timeout is None:
+        timeout = get_download_timeout()
+    return get_session().get(url, stream=True, timeout=timeout, headers=headers)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the client the running event loop uses to download images, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        pool_size = read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_DOWNLOAD_POOL_SIZE)
+        client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=pool_size))
+        _async_clients[loop] = client
+        logger.debug(f"Created async image download client with max_keepalive_connections={pool_size}")
+    return client
+
+
+async def close_async_client() -> None:
+    """Closes the client of the running event loop. A new client is created on the next download."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def get_async(url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+    """Sends a GET request for an image through the running event loop's client, and reads its body.
+
+    Like the session's downloads, it is retried up to MARQO_IMAGE_DOWNLOAD_MAX_RETRIES times after a connection
+    error or a 429/5xx response, after which the last response (or error) is returned (or raised). Each retry waits
+    MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS * 2 ** (number of previous retries) seconds.
+    """
+    if timeout is None:
+        timeout = get_download_timeout()
+    max_retries = read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_DOWNLOAD_MAX_RETRIES)
+    backoff = _read_float_env_var(EnvVars.MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS)
+
+    for attempt in range(max_retries + 1):
+        try:
+            response = await get_async_client().get(url, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                return response
+        except httpx.TransportError:
+            if attempt == max_retries:
+                raise
+        # The backoff doubles with every retry
+        await asyncio.sleep(backoff * (2 ** attempt))
+
+
+def map_in_pool(func: Callable[[List[str]], Dict[str, T]], urls: Iterable[str],
+                max_tasks: int) -> Dict[str, T]:
+    """Splits the unique urls into at most `max_tasks` groups, and calls func on each group in the download pool.
+
+    Args:
+        func: called with a list of urls, returns a dict of url to result
+        urls: urls to process. Duplicates are only processed once.
+        max_tasks: the max number of groups processed concurrently for this call
+
+    Returns:
+        The merged results of every call to func
+
+    When called from one of the pool's threads, func is called on all the urls in the calling thread instead: waiting
+    on tasks queued behind the caller's own could deadlock the pool.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return dict()
+    if getattr(_pool_thread, "in_pool", False):
+        return func(unique_urls)
+    task_count = max(1, min(max_tasks, len(unique_urls)))
+    groups = [unique_urls[i::task_count] for i in range(task_count)]
+
+    if task_count == 1:
+        return func(groups[0])
+
+    results = dict()
+    for future in [get_executor().submit(func, group) for group in groups]:
+        results.update(future.result())
+    return results
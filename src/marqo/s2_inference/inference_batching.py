@@ -0,0 +1,237 @@
+"""Coalesces concurrent vectorise() calls to the same model into shared batches.
+
+Without it, concurrent requests (e.g. many single query searches) each run their own batch-of-1 forward pass,
+competing for the same model. When MARQO_ENABLE_INFERENCE_BATCHING is "TRUE", vectorise() calls with fewer items
+than MARQO_MAX_VECTORISE_BATCH_SIZE are instead queued on a batcher for their model and settings. The batcher's
+worker thread drains the queue into batches of up to MARQO_MAX_VECTORISE_BATCH_SIZE items, waiting at most
+MARQO_INFERENCE_BATCHING_MAX_WAIT_MS after the first queued call for more calls to arrive.
+
+If a shared batch fails, each of its calls is retried on its own, so an error (e.g. an unreachable image) only fails
+the call that caused it.
+"""
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from marqo.s2_inference.logger import get_logger
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults, read_env_vars_and_defaults_ints
+
+logger = get_logger(__name__)
+
+# Seconds a batcher waits for calls before its worker thread exits
+IDLE_TIMEOUT_SECONDS = 60
+
+# Upper bounds of the queue wait histogram buckets, in ms
+QUEUE_WAIT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+
+
+def is_enabled() -> bool:
+    return read_env_vars_and_defaults(EnvVars.MARQO_ENABLE_INFERENCE_BATCHING) == "TRUE"
+
+
+def get_max_wait_seconds() -> float:
+    return read_env_vars_and_defaults_ints(EnvVars.MARQO_INFERENCE_BATCHING_MAX_WAIT_MS) / 1000
+
+
+class _PendingCall:
+    __slots__ = ("content", "future", "enqueued_time")
+
+    def __init__(self, content: list):
+        self.content = content
+        self.future: Future = Future()
+        self.enqueued_time = time.perf_counter()
+
+
+class BatchingStats:
+    """Batch sizes and queue wait times of the batches run for one model."""
+
+    def __init__(self):
+        self.batch_sizes: Counter = Counter()
+        self.queue_wait_counts: Counter = Counter()
+        self.queue_wait_total_ms = 0.0
+        self.queue_wait_max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, batch_size: int, queue_waits_ms: List[float]) -> None:
+        with self._lock:
+            self.batch_sizes[batch_size] += 1
+            for wait_ms in queue_waits_ms:
+                self.queue_wait_counts[next(b for b in QUEUE_WAIT_BUCKETS_MS if wait_ms <= b)] += 1
+                self.queue_wait_total_ms += wait_ms
+                self.queue_wait_max_ms = max(self.queue_wait_max_ms, wait_ms)
+
+    def json(self) -> dict:
+        with self._lock:
+            calls = sum(self.queue_wait_counts.values())
+            return {
+                "batches": sum(self.batch_sizes.values()),
+                "calls": calls,
+                "batch_size": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "queue_wait_ms": {
+                    "mean": self.queue_wait_total_ms / calls if calls else 0.0,
+                    "max": self.queue_wait_max_ms,
+                    "histogram": {
+                        ("+Inf" if bucket == float("inf") else str(bucket)): self.queue_wait_counts[bucket]
+                        for bucket in QUEUE_WAIT_BUCKETS_MS
+                    }
+                }
+            }
+
+
+class InferenceBatcher:
+    """Runs the calls queued on it in batches, on its own worker thread.
+
+    All calls queued on a batcher must be compatible, i.e. be for the same model with the same settings, as they are
+    concatenated and passed to a single encode() call.
+    """
+
+    def __init__(self, encode: Callable[[list], np.ndarray], max_batch_size: int, max_wait_seconds: float,
+                 stats: BatchingStats, idle_timeout_seconds: float = IDLE_TIMEOUT_SECONDS):
+        """
+        Args:
+            encode: vectorises a list of content, returning an array with a row per item
+            max_batch_size: max number of items in a batch. Single calls with more items are run on their own.
+            max_wait_seconds: max time a batch waits for more calls, after its first call is queued
+            stats: records the batches run
+            idle_timeout_seconds: the worker thread exits if no calls are queued for this long
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.stats = stats
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._queue: Deque[_PendingCall] = deque()
+        self._queued_items = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="inference_batcher")
+        self._thread.start()
+
+    def submit(self, content: list) -> Optional[Future]:
+        """Queues content to be vectorised.
+
+        Returns:
+            A future of the array of vectors of the content, or None if the batcher has closed (after being idle)
+        """
+        call = _PendingCall(content)
+        with self._condition:
+            if self._closed:
+                return None
+            self._queue.append(call)
+            self._queued_items += len(content)
+            self._condition.notify()
+        return call.future
+
+    def _next_batch(self) -> Optional[List[_PendingCall]]:
+        """Waits for calls, and returns the next batch. Returns None if the batcher has closed."""
+        with self._condition:
+            while not self._queue:
+                if not self._condition.wait(timeout=self.idle_timeout_seconds) and not self._queue:
+                    self._closed = True
+                    return None
+
+            deadline = self._queue[0].enqueued_time + self.max_wait_seconds
+            while self._queued_items < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+
+            batch = [self._queue.popleft()]
+            batch_items = len(batch[0].content)
+            while self._queue and batch_items + len(self._queue[0].content) <= self.max_batch_size:
+                batch.append(self._queue.popleft())
+                batch_items += len(batch[-1].content)
+            self._queued_items -= batch_items
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            start_time = time.perf_counter()
+            self.stats.record(
+                batch_size=sum(len(call.content) for call in batch),
+                queue_waits_ms=[1000 * (start_time - call.enqueued_time) for call in batch]
+            )
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_PendingCall]) -> None:
+        if len(batch) == 1:
+            self._run_call(batch[0])
+            return
+        try:
+            vectors = self.encode([item for call in batch for item in call.content])
+        except Exception as e:
+            logger.debug(f"Batch of {len(batch)} vectorise calls failed, running them separately. Reason: {e}")
+            for call in batch:
+                self._run_call(call)
+            return
+        offset = 0
+        for call in batch:
+            call.future.set_result(vectors[offset: offset + len(call.content)])
+            offset += len(call.content)
+
+    def _run_call(self, call: _PendingCall) -> None:
+        try:
+            call.future.set_result(self.encode(call.content))
+        except BaseException as e:
+            call.future.set_exception(e)
+
+
+_batchers: Dict[Hashable, InferenceBatcher] = dict()
+_stats: Dict[str, BatchingStats] = dict()
+_lock = threading.Lock()
+
+
+def submit(key: Hashable, model_cache_key: str, content: list, encode: Callable[[list], np.ndarray],
+           max_batch_size: int, max_wait_seconds: float) -> Future:
+    """Queues content on the batcher for key, creating the batcher if there isn't one.
+
+    Args:
+        key: identifies the model and settings. Calls with the same key are batched together.
+        model_cache_key: the model's cache key, used to group stats
+        content: the items to vectorise
+        encode: vectorises a list of content. Used if a new batcher is created.
+        max_batch_size: max number of items in a batch. Used if a new batcher is created.
+        max_wait_seconds: max time a batch waits for more calls. Used if a new batcher is created.
+
+    Returns:
+        A future of the array of vectors of the content
+    """
+    while True:
+        with _lock:
+            batcher = _batchers.get(key)
+            if batcher is None:
+                stats = _stats.setdefault(model_cache_key, BatchingStats())
+                batcher = InferenceBatcher(encode, max_batch_size, max_wait_seconds, stats)
+                _batchers[key] = batcher
+        future = batcher.submit(content)
+        if future is not None:
+            return future
+        # The batcher closed after being idle
+        with _lock:
+            if _batchers.get(key) is batcher:
+                del _batchers[key]
+
+
+def get_stats() -> dict:
+    """Returns the batching stats of each model, by model cache key."""
+    with _lock:
+        stats = dict(_stats)
+    return {model_cache_key: model_stats.json() for model_cache_key, model_stats in stats.items()}
+
+
+def clear_stats(model_cache_key: Optional[str] = None) -> None:
+    """Clears the stats of a model, or of all models if model_cache_key is None."""
+    with _lock:
+        if model_cache_key is None:
+            _stats.clear()
+        else:
+            _stats.pop(model_cache_key, None)
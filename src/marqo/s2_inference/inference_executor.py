@@ -0,0 +1,51 @@
+"""A dedicated pool of threads that runs model inference for the async request path.
+
+Coroutines serving requests on the event loop must not block it, so the CPU-bound parts of a request (vectorising
+queries and docs, chunking, reranking) are awaited from this pool with run(). Its size, read from
+MARQO_INFERENCE_EXECUTOR_THREAD_COUNT when it is first used, bounds how many requests run inference at once,
+independently of how many requests are in flight.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide inference pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                thread_count = read_env_vars_and_defaults_ints(EnvVars.MARQO_INFERENCE_EXECUTOR_THREAD_COUNT)
+                _executor = ThreadPoolExecutor(max_workers=thread_count, thread_name_prefix="inference")
+    return _executor
+
+
+def shutdown() -> None:
+    """Stops the worker threads. They are recreated (with settings re-read from env vars) on next use."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def run(func: Callable[..., T], *args, **kwargs) -> T:
+    """Calls func(*args, **kwargs) in the inference pool, and waits for its result without blocking the event loop.
+
+    func runs in a copy of the caller's context, so that it records into the metrics of the caller's request.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), functools.partial(context.run, func, *args, **kwargs))
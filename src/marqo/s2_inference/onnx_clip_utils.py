@@ -19,10 +19,11 @@ from zipfile import ZipFile
 from huggingface_hub.utils import RevisionNotFoundError,RepositoryNotFoundError, EntryNotFoundError, LocalEntryNotFoundError
 from marqo.s2_inference.errors import ModelDownloadError
 from marqo.errors import InternalError
+from marqo.s2_inference import onnx_session
 
 # Loading shared functions from clip_utils.py. This part should be decoupled from models in the future
 from marqo.s2_inference.clip_utils import get_allowed_image_types, format_and_load_CLIP_image, \
-    format_and_load_CLIP_images, load_image_from_path, _is_image
+    format_and_load_CLIP_images, load_image_from_path, _is_image, preprocess_images
 
 logger = get_logger(__name__)
 
@@ -113,7 +114,7 @@ class CLIP_ONNX(object):
 
         onnx_input_text = {self.textual_session.get_inputs()[0].name: text_onnx}
         # The onnx output has the shape [1,1,768], we need to squeeze the dimension
-        outputs = torch.squeeze(torch.tensor(np.array(self.textual_session.run(None, onnx_input_text)))).to(
+        outputs = torch.squeeze(torch.tensor(np.array(onnx_session.run(self.textual_session, onnx_input_text)))).to(
             torch.float32)
 
         if normalize:
@@ -129,12 +130,12 @@ class CLIP_ONNX(object):
         else:
             image_input = [format_and_load_CLIP_image(images, {})]
 
-        image_input_processed = torch.stack([self.clip_preprocess(_img) for _img in image_input])
+        image_input_processed = torch.stack(preprocess_images(image_input, self.clip_preprocess))
         images_onnx = image_input_processed.detach().cpu().numpy().astype(self.visual_type)
 
         onnx_input_image = {self.visual_session.get_inputs()[0].name: images_onnx}
         # The onnx output has the shape [1,1,768], we need to squeeze the dimension
-        outputs = torch.squeeze(torch.tensor(np.array(self.visual_session.run(None, onnx_input_image)))).to(
+        outputs = torch.squeeze(torch.tensor(np.array(onnx_session.run(self.visual_session, onnx_input_image)))).to(
             torch.float32)
 
         if normalize:
@@ -178,8 +179,10 @@ class CLIP_ONNX(object):
 
         self.visual_file = self.download_model(self.model_info["repo_id"], self.model_info["visual_file"])
         self.textual_file = self.download_model(self.model_info["repo_id"], self.model_info["textual_file"])
-        self.visual_session = ort.InferenceSession(self.visual_file, providers=self.provider)
-        self.textual_session = ort.InferenceSession(self.textual_file, providers=self.provider)
+        # fp16 models can't be dynamically quantised
+        quantize = onnx_session.quantization_enabled() and self.onnx_type == "onnx32"
+        self.visual_session = onnx_session.create_session(self.visual_file, self.provider, quantize=quantize)
+        self.textual_session = onnx_session.create_session(self.textual_file, self.provider, quantize=quantize)
 
 
     @staticmethod
@@ -0,0 +1,117 @@
+"""Creates and runs the ONNX Runtime sessions of ONNX models (SBERT_ONNX and CLIP_ONNX).
+
+Sessions are created with all graph optimisations enabled, and with MARQO_ONNX_INTRA_OP_THREAD_COUNT and
+MARQO_ONNX_INTER_OP_THREAD_COUNT threads, if they are set. If MARQO_ONNX_QUANTIZE is "TRUE", models run on CPU are
+dynamically quantised to int8 first. Quantised models are cached next to the model, so each model is only
+quantised once.
+"""
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import onnxruntime
+
+from marqo.s2_inference.configs import ModelCache
+from marqo.s2_inference.logger import get_logger
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults, read_env_vars_and_defaults_ints
+
+logger = get_logger(__name__)
+
+CPU_PROVIDER = "CPUExecutionProvider"
+CUDA_PROVIDER = "CUDAExecutionProvider"
+QUANTIZED_MODEL_SUFFIX = "-int8.onnx"
+
+
+def quantization_enabled() -> bool:
+    return read_env_vars_and_defaults(EnvVars.MARQO_ONNX_QUANTIZE) == "TRUE"
+
+
+def get_session_options() -> onnxruntime.SessionOptions:
+    sess_options = onnxruntime.SessionOptions()
+    sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    intra_op_thread_count = read_env_vars_and_defaults_ints(EnvVars.MARQO_ONNX_INTRA_OP_THREAD_COUNT)
+    if intra_op_thread_count is not None:
+        sess_options.intra_op_num_threads = intra_op_thread_count
+    inter_op_thread_count = read_env_vars_and_defaults_ints(EnvVars.MARQO_ONNX_INTER_OP_THREAD_COUNT)
+    if inter_op_thread_count is not None:
+        sess_options.inter_op_num_threads = inter_op_thread_count
+        # Inter-op threads are only used to run independent nodes in parallel
+        if inter_op_thread_count > 1:
+            sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+    return sess_options
+
+
+def quantized_model_path(model_path: str, quantized_folder: Optional[str] = None) -> str:
+    """Returns the path of the dynamically quantised version of the model, quantising it if it isn't cached.
+
+    Args:
+        model_path: the path of the fp32 ONNX model
+        quantized_folder: the folder quantised models are cached in. Defaults to ModelCache.onnx_cache_path
+    """
+    if quantized_folder is None:
+        quantized_folder = ModelCache.onnx_cache_path
+    # The model's own name may be shared by files in different folders, e.g. of the Hugging Face cache
+    model_id = hashlib.sha256(os.path.abspath(model_path).encode("utf-8")).hexdigest()[:16]
+    model_name = os.path.splitext(os.path.basename(model_path))[0]
+    quantized_path = os.path.join(quantized_folder, f"{model_name}-{model_id}{QUANTIZED_MODEL_SUFFIX}")
+
+    if not os.path.exists(quantized_path):
+        # Imported here as the quantisation tools are only needed the first time a model is quantised
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        os.makedirs(quantized_folder, exist_ok=True)
+        temp_path = f"{quantized_path}.{os.getpid()}.tmp"
+        try:
+            quantize_dynamic(model_path, temp_path, weight_type=QuantType.QInt8)
+            os.replace(temp_path, quantized_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        logger.info(f"Quantised ONNX model `{model_path}` to `{quantized_path}`")
+    return quantized_path
+
+
+def create_session(model_path: str, providers: List[str], quantize: Optional[bool] = None
+                   ) -> onnxruntime.InferenceSession:
+    """Creates an optimised session of the ONNX model.
+
+    Args:
+        model_path: the path of the ONNX model
+        providers: the execution providers, in order of preference
+        quantize: whether to run the dynamically quantised model. Defaults to MARQO_ONNX_QUANTIZE. Ignored unless
+            the model is run on CPU, as int8 kernels are only available on CPU
+    """
+    if quantize is None:
+        quantize = quantization_enabled()
+    if quantize and providers[0] == CPU_PROVIDER:
+        model_path = quantized_model_path(model_path)
+    return onnxruntime.InferenceSession(model_path, get_session_options(), providers=providers)
+
+
+def run(session: onnxruntime.InferenceSession, inputs: Dict[str, np.ndarray],
+        output_names: Optional[List[str]] = None) -> List[np.ndarray]:
+    """Runs the session with IO binding, so the outputs are allocated by the session on its device and only the
+    requested outputs are copied back to CPU.
+
+    Args:
+        session: the session to run
+        inputs: the inputs, by name
+        output_names: the outputs to return. Defaults to all of the session's outputs
+
+    Returns:
+        The outputs, in the order of output_names
+    """
+    if output_names is None:
+        output_names = [output.name for output in session.get_outputs()]
+    device = "cuda" if session.get_providers()[0] == CUDA_PROVIDER else "cpu"
+
+    io_binding = session.io_binding()
+    for name, value in inputs.items():
+        io_binding.bind_cpu_input(name, np.ascontiguousarray(value))
+    for name in output_names:
+        io_binding.bind_output(name, device)
+    session.run_with_iobinding(io_binding)
+    return io_binding.copy_outputs_to_cpu()
@@ -1,5 +1,7 @@
+import abc
 import datetime
 from functools import partial
+from typing import NamedTuple
 
 import PIL
 import numpy as np
@@ -7,15 +9,16 @@ import torch
 import torchvision
 from marqo.s2_inference.s2_inference import available_models,_create_model_cache_key
 from marqo.s2_inference.s2_inference import get_logger
-from marqo.s2_inference.types import Dict, List, Union, ImageType, Tuple, ndarray, Literal
+from marqo.s2_inference.types import Dict, List, Union, ImageType, Tuple, ndarray, Literal, FloatTensor
 from marqo.s2_inference.clip_utils import format_and_load_CLIP_image
-from marqo.s2_inference.errors import ChunkerError
-from marqo.tensor_search.enums import AvailableModelsKey
-from marqo.s2_inference.processing.DINO_utils import _load_DINO_model,attention_to_bboxs,DINO_inference
+from marqo.s2_inference.errors import ChunkerError, S2InferenceError
+from marqo.tensor_search.enums import AvailableModelsKey, EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+from marqo.s2_inference.processing.DINO_utils import _load_DINO_model,attention_to_bboxs,DINO_inference_batch
 from marqo.s2_inference.processing.pytorch_utils import load_pytorch
 from marqo.s2_inference.processing.yolox_utils import (
    _process_yolox,
-    _infer_yolox, 
+    _infer_yolox_batch, 
     load_yolox_onnx,
     get_default_yolox_model,
     _download_yolox
@@ -23,16 +26,16 @@ from marqo.s2_inference.processing.yolox_utils import (
 
 from marqo.s2_inference.processing.image_utils import (
     load_rcnn_image, 
-    replace_small_boxes,
-    _keep_topk,
+    replace_small_boxes_array,
     rescale_box,
-    clip_boxes,
+    rescale_boxes,
+    clip_boxes_array,
     _PIL_to_opencv,
     str2bool,
     get_default_size,
     _process_patch_method,
     patchify_image,
-    filter_boxes,
+    _filter_boxes_mask,
     calc_area,
     generate_boxes
 )
@@ -63,18 +66,70 @@ def chunk_image(image: Union[str, ImageType], device: str,
     Returns:
         Tuple[List[ImageType], ndarray]: list of PIL images and the corresponding bounding boxes
     """
+    [chunks] = chunk_images([image], device=device, method=method, size=size)
+    if isinstance(chunks, S2InferenceError):
+        raise chunks
+    return chunks
 
+
+def chunk_images(images: List[Union[str, ImageType]], device: str, 
+                        method: Literal[ 'simple', 'overlap',  'frcnn', 'marqo-yolo', 'yolox', 'dino-v1', 'dino-v2'],
+                        size=get_default_size()) -> List[Union[Tuple[List[ImageType], List], S2InferenceError]]:
+    """chunks a batch of images with the same method. for the model based methods, the images are 
+    run through the model together, in batches of MARQO_IMAGE_CHUNKING_BATCH_SIZE
+
+    Args:
+        images (List[Union[str, ImageType]]): images to process
+        device (str): device to load models onto
+        method (str, optional): the method to use.
+        size (_type_, optional): size the images should be loaded in as. Defaults to get_default_size().
+
+    Raises:
+        TypeError: _description_
+        ValueError: _description_
+
+    Returns:
+        List[Union[Tuple[List[ImageType], List], S2InferenceError]]: for each image, the list of PIL images and 
+            the corresponding bounding boxes, or the error (e.g. a ChunkerError) if the image couldn't be chunked
+    """
+    if method in [None, 'none', '', "None", ' ']:
+        chunks = []
+        for image in images:
+            if isinstance(image, str):
+                chunks.append(([image],[image]))
+            elif isinstance(image, ImageType):
+                chunks.append(([image], [(0, 0, image.size[0], image.size[1])]))
+            else:
+                raise TypeError(f'only pointers to an image or a PIL image are allowed. received {type(image)}')
+        return chunks
+
+    patch = _get_patchifier(method, device=device, size=size)
+
+    # images are loaded one by one, so that an image that can't be loaded only fails its own chunking
+    chunks = [None]*len(images)
+    loaded_images = {}
+    for ind, image in enumerate(images):
+        try:
+            loaded_images[ind] = patch.load_image(image)
+        except PIL.UnidentifiedImageError as e:
+            chunker_error = ChunkerError(str(e))
+            chunker_error.__cause__ = e
+            chunks[ind] = chunker_error
+        except S2InferenceError as e:
+            chunks[ind] = e
+
+    for ind, image_chunks in zip(loaded_images, patch.chunk_loaded_images(list(loaded_images.values()))):
+        chunks[ind] = image_chunks
+
+    return chunks
+
+
+def _get_patchifier(method: str, device: str, size: Tuple) -> Union["PatchifySimple", "PatchifyModel"]:
+    """creates the patchifier for a chunking method 'url', e.g. 'simple?hn=3' or 'frcnn'
+    """
     HN = 3
     WN = 3
 
-    if method in [None, 'none', '', "None", ' ']:
-        if isinstance(image, str):
-            return [image],[image]      
-        elif isinstance(image, ImageType):
-            return [image], [(0, 0, image.size[0], image.size[1])]
-        else:
-            raise TypeError(f'only pointers to an image or a PIL image are allowed. received {type(image)}')
-    
     # get the parameters from the method 'url'
     method, params = _process_patch_method(method)
     logger.debug(f"found method={method} and params={params}")
@@ -84,6 +139,7 @@ def chunk_image(image: Union[str, ImageType], device: str,
     wn = int(params.get('wn', WN))
     nms = str2bool(params.get('nms', 'True'))
     filter_bb = str2bool(params.get('filter_bb', 'True'))
+    batch_size = max(1, read_env_vars_and_defaults_ints(EnvVars.MARQO_IMAGE_CHUNKING_BATCH_SIZE))
 
     if method == 'simple':
         patch = PatchifySimple(size=size, hn=hn, wn=wn)
@@ -93,27 +149,22 @@ def chunk_image(image: Union[str, ImageType], device: str,
         overlap=True)
     
     elif method in ['fastercnn', 'frcnn']:
-        patch = PatchifyPytorch(device=device, size=size, nms=nms, filter_bb=filter_bb)
+        patch = PatchifyPytorch(device=device, size=size, nms=nms, filter_bb=filter_bb, batch_size=batch_size)
 
     elif method in ['marqo-yolo', 'yolox']:
-        patch = PatchifyYolox(device=device, size=size)
+        patch = PatchifyYolox(device=device, size=size, batch_size=batch_size)
     
     elif method in ['dino-v1', 'dino-v2', 'dino/v1', 'dino/v2']:
         if 'v1' in method:
             patch = PatchifyViT(device=device, filter_bb=True, size=size,
-                        attention_method='abs', nms=True, replace_small=True)
+                        attention_method='abs', nms=True, replace_small=True, batch_size=batch_size)
         else:
             patch = PatchifyViT(device=device, filter_bb=True, size=size,
-                        attention_method='pos', nms=True, replace_small=True)
+                        attention_method='pos', nms=True, replace_small=True, batch_size=batch_size)
     else:
         raise ValueError(f"unexpected image chunking type. found {method}")
-    try:
-        patch.infer(image)
-        patch.process()
-    except PIL.UnidentifiedImageError as e:
-        raise ChunkerError from e
 
-    return patch.patches,patch.bboxes_orig
+    return patch
 
 
 class PatchifySimple:
@@ -133,9 +184,12 @@ class PatchifySimple:
         self.wn = wn
         self.overlap = overlap
 
+    def load_image(self, image: Union[str, ImageType]) -> ImageType:
+        return format_and_load_CLIP_image(image, {})
+
     def infer(self, image: Union[str, ImageType]):
 
-        self.image = format_and_load_CLIP_image(image, {})
+        self.image = self.load_image(image)
         self.original_size = self.image.size
         self.image_resized = self.image.resize(self.size)
         self.bboxes_simple = generate_boxes(self.size, self.hn, self.wn, overlap=self.overlap)
@@ -149,13 +203,31 @@ class PatchifySimple:
 
         self.bboxes_orig = [rescale_box(bb, self.size, self.original_size) for bb in self.bboxes]
 
+    def chunk_loaded_images(self, images: List[ImageType]) -> List[Tuple[List[ImageType], List[Tuple]]]:
+        """chunks images returned by load_image. returns the patches and their boxes in the 
+        original coordinates system, for each image
+        """
+        chunks = []
+        for image in images:
+            self.infer(image)
+            self.process()
+            chunks.append((self.patches, self.bboxes_orig))
+        return chunks
+
+
+class LoadedImage(NamedTuple):
+    """an image loaded for the model based chunkers"""
+    image: ImageType
+    image_pt: FloatTensor
+    original_size: Tuple[int, int]
 
-class PatchifyModel:
+
+class PatchifyModel(abc.ABC):
     """class to do the patching. this is the base class for model based chunking
     """
     def __init__(self, device: str = None, size: Tuple = (224, 224), min_area: float = 60*60, 
                 nms: bool = True, replace_small: bool = True, top_k: int = 10, 
-                filter_bb: bool = True, min_area_replace: float = 60*60, **kwargs):
+                filter_bb: bool = True, min_area_replace: float = 60*60, batch_size: int = 16, **kwargs):
         """_summary_
 
         Args:
@@ -169,6 +241,7 @@ class PatchifyModel:
             top_k (int, optional): keep this many boxes after all processin (max). Defaults to 10.
             filter_bb (bool, optional): perform filtering on the proposed boxes. Defaults to True.
             min_area_replace (float, optional): boxes with areas smaller than this are replaced with larger ones. Defaults to 60*60.
+            batch_size (int, optional): the number of images the model is run on at once by chunk_loaded_images. Defaults to 16.
         """
         self.scores = []
 
@@ -185,11 +258,11 @@ class PatchifyModel:
         self.replace_small = replace_small
         self.top_k = top_k
         self.filter_bb = filter_bb
+        self.batch_size = batch_size
         self.new_size = (100,100)
         # consider changins
         self.iou_thresh = 0.6
         self.kwargs = kwargs
-        self.n_postfilter = None
 
         # this one happens at the first stage before processing the bboxes
         self.top_k_scores = 100
@@ -222,83 +295,111 @@ class PatchifyModel:
         else:
             self.model, self.preprocess = available_models[model_cache_key][AvailableModelsKey.model]
 
+    def load_image(self, image: Union[str, ImageType]) -> LoadedImage:
+        return LoadedImage(*load_rcnn_image(image, size=self.size))
+
     def _load_image(self, image):
-        self.image, self.image_pt, self.original_size = load_rcnn_image(image, size=self.size)
+        self.image, self.image_pt, self.original_size = self.load_image(image)
+
+    @abc.abstractmethod
+    def _detect(self, loaded_images: List[LoadedImage]) -> List[Tuple[ndarray, ndarray]]:
+        """runs the model over a batch of images
+
+        Returns:
+            List[Tuple[ndarray, ndarray]]: the unprocessed bounding boxes (N x 4, as x1, y1, x2, y2 in the 
+                resized image's coordinates) and their scores (N), for each image
+        """
 
     def infer(self, image):
         self._load_image(image)
-        # input is image
-        pass
-        # output are unprocessed bounding boxes        
+        [(self.boxes_xyxy, self.scores)] = self._detect([LoadedImage(self.image, self.image_pt, self.original_size)])
 
-    def _filter_bb(self):
-        """filters bounding boxes based on size and aspect ratio
-        """
-        if self.filter_bb:
-            self.n_prefilter = len(self.boxes_xyxy)
-            self.inds = filter_boxes(self.boxes_xyxy, min_area = self.min_area)
-            self.boxes_xyxy = [bb for ind,bb in enumerate(self.boxes_xyxy) if ind in self.inds]
-            if len(self.scores) == self.n_prefilter:
-                self.scores = [bb for ind,bb in enumerate(self.scores) if ind in self.inds]
-            self.n_postfilter = len(self.boxes_xyxy)
-            logger.debug(f"filtered {self.n_prefilter} boxes to {self.n_postfilter}")
-
-    def _replace_small_bb(self):
-        """replaces boxes that are smaller than some area with a minimum sized box centered
-        on the old one. if the box is out of bounds it is clipped to the image boundries
+    def _keep_top_k_sorted(self, boxes_xyxy: ndarray, scores: ndarray) -> Tuple[ndarray, ndarray]:
+        """sort the boxes based on score and keep top k
         """
-        if self.replace_small:
-            if len(self.boxes_xyxy):
-                self.boxes_xyxy = replace_small_boxes(self.boxes_xyxy, min_area=self.min_area_replace, 
-                                new_size=self.new_size)
-                self.boxes_xyxy = clip_boxes(self.boxes_xyxy, 0, 0, self.size[0], self.size[1])
+        if len(scores) > self.top_k_scores:
+            inds = np.argsort(scores)[::-1][:self.top_k_scores]
+            return boxes_xyxy[inds], scores[inds]
+        return boxes_xyxy, scores
 
-    def _nms_bb(self):
-        """performs class agnostic nms over the bounding boxes
-        """
-        if self.nms:
-            if len(self.boxes_xyxy) > 1:
-                logger.debug(f"doing nms for {len(self.boxes_xyxy)} {self.n_postfilter} boxes...")
-                self.scores_pt = torch.tensor(self.scores, dtype=torch.float32)
-                
-                self.inds = torchvision.ops.nms(torch.tensor(self.boxes_xyxy, dtype=torch.float32), 
-                                                                    self.scores_pt.squeeze(), self.iou_thresh)
-                
-                self.boxes_xyxy =  [self.boxes_xyxy[ind] for ind in self.inds]
-                self.scores =  [self.scores[ind] for ind in self.inds]
-
-    def _keep_top_k_sorted(self):
-        """sort the boxes based on score and keep top k
+    def _process_boxes(self, boxes_xyxy: List[ndarray], scores: List[ndarray]) -> List[ndarray]:
+        """filters, replaces small boxes and does nms over the boxes of a batch of images. the boxes of 
+        all the images are processed together as arrays, with nms done per image
+
+        Args:
+            boxes_xyxy (List[ndarray]): N x 4 boxes of each image
+            scores (List[ndarray]): N scores of each image
+
+        Returns:
+            List[ndarray]: the processed boxes of each image
         """
-        if len(self.scores) > self.top_k_scores:
-            self.inds = np.argsort(np.array(self.scores).squeeze())[::-1][:self.top_k_scores]
-            self.boxes_xyxy = [self.boxes_xyxy[ind] for ind in self.inds]
-            self.scores = [self.scores[ind] for ind in self.inds]
+        image_inds = np.repeat(np.arange(len(boxes_xyxy)), [len(bb) for bb in boxes_xyxy])
+        boxes = np.concatenate([np.asarray(bb, dtype=np.float64).reshape(-1, 4) for bb in boxes_xyxy])
+        scores = np.concatenate([np.asarray(sc, dtype=np.float64).reshape(-1) for sc in scores])
 
-    def _keep_top_k(self):
-        if self.top_k is not None and self.top_k > len(self.boxes_xyxy):
-            self.boxes_xyxy = _keep_topk(self.boxes_xyxy, k=self.top_k)
+        if self.filter_bb:
+            keep = _filter_boxes_mask(boxes, min_area=self.min_area)
+            logger.debug(f"filtered {len(boxes)} boxes to {keep.sum()}")
+            boxes, scores, image_inds = boxes[keep], scores[keep], image_inds[keep]
 
-    def process(self):
+        if self.replace_small:
+            boxes = replace_small_boxes_array(boxes, min_area=self.min_area_replace, new_size=self.new_size)
+            boxes = clip_boxes_array(boxes, 0, 0, self.size[0], self.size[1])
 
-        # v1
-        # self._replace_small_bb()
-        # self._filter_bb()
-        # self._nms_bb()
-        # self._keep_top_k()
+        if self.nms and len(boxes) > 1:
+            logger.debug(f"doing nms for {len(boxes)} boxes...")
+            # class agnostic nms, done separately for each image. kept boxes are sorted by score
+            keep = torchvision.ops.batched_nms(torch.tensor(boxes, dtype=torch.float32), 
+                        torch.tensor(scores, dtype=torch.float32), torch.from_numpy(image_inds), self.iou_thresh).numpy()
+            boxes, image_inds = boxes[keep], image_inds[keep]
 
-        self._filter_bb()
-        self._replace_small_bb()
-        self._nms_bb()
-        self._keep_top_k()
+        # a stable sort keeps the order of each image's boxes
+        order = np.argsort(image_inds, kind='stable')
+        counts = np.bincount(image_inds, minlength=len(boxes_xyxy))
+        return np.split(boxes[order], np.cumsum(counts)[:-1])
 
+    def _patchify(self, image: ImageType, boxes_xyxy: ndarray, 
+                    original_size: Tuple[int, int]) -> Tuple[List[Tuple], List[ImageType], List[Tuple]]:
+        """crops the patches of an image
+
+        Returns:
+            Tuple[List[Tuple], List[ImageType], List[Tuple]]: the boxes, the patches and 
+                the boxes in the original coordinates system
+        """
         # we add the original unchanged so that it is always in the index
         # the bb of the original also provides the size which is required for later processing
-        self.bboxes = [(0,0,self.size[0],self.size[1])] + self.boxes_xyxy
-        
-        self.patches = patchify_image(self.image, self.bboxes)
+        boxes = np.concatenate([np.array([[0, 0, self.size[0], self.size[1]]], dtype=np.float64), boxes_xyxy])
+        bboxes = [tuple(bb) for bb in boxes.tolist()]
+        patches = patchify_image(image, bboxes)
+        bboxes_orig = [tuple(bb) for bb in rescale_boxes(boxes, self.size, original_size).tolist()]
+        return bboxes, patches, bboxes_orig
 
-        self.bboxes_orig = [rescale_box(bb, self.size, self.original_size) for bb in self.bboxes]
+    def process(self):
+        [self.boxes_xyxy] = self._process_boxes([self.boxes_xyxy], [self.scores])
+        self.bboxes, self.patches, self.bboxes_orig = self._patchify(self.image, self.boxes_xyxy, self.original_size)
+
+    def chunk_loaded_images(self, loaded_images: List[LoadedImage]) -> List[Tuple[List[ImageType], List[Tuple]]]:
+        """chunks images returned by load_image. the model is run over batch_size images at a time, and the 
+        boxes of all the images are processed together
+
+        Returns:
+            List[Tuple[List[ImageType], List[Tuple]]]: the patches and their boxes in the 
+                original coordinates system, for each image
+        """
+        if not loaded_images:
+            return []
+
+        detections = []
+        for start in range(0, len(loaded_images), self.batch_size):
+            detections += self._detect(loaded_images[start:start + self.batch_size])
+
+        processed_boxes = self._process_boxes([boxes for boxes, _ in detections], [scores for _, scores in detections])
+
+        chunks = []
+        for loaded_image, boxes_xyxy in zip(loaded_images, processed_boxes):
+            _, patches, bboxes_orig = self._patchify(loaded_image.image, boxes_xyxy, loaded_image.original_size)
+            chunks.append((patches, bboxes_orig))
+        return chunks
 
 
 class PatchifyViT(PatchifyModel):
@@ -317,26 +418,28 @@ class PatchifyViT(PatchifyModel):
         self.model_load_function = partial(_load_DINO_model, patch_size=self.patch_size)
         self.allowed_model_types = ('vit_small', 'vit_base')
 
-    def infer(self, image):
-        self._load_image(image)
+    def _detect(self, loaded_images: List[LoadedImage]) -> List[Tuple[ndarray, ndarray]]:
+        attentions_batch = DINO_inference_batch(self.model, self.preprocess, 
+                            [loaded_image.image for loaded_image in loaded_images], self.patch_size, device=self.device)
 
-        self.attentions = DINO_inference(self.model, self.preprocess, self.image, 
-                            self.patch_size, device=self.device)
+        detections = []
+        for attentions in attentions_batch:
+            attentions_processed = self._process_attention(attentions, method=self.attention_method)
 
-        self.attentions_processed = self._process_attention(self.attentions, method=self.attention_method)
-        
-        self.boxes_xyxy = []
-        for attention in self.attentions_processed:
-            self.boxes_xyxy += attention_to_bboxs(attention)
+            boxes_xyxy = []
+            for attention in attentions_processed:
+                boxes_xyxy += attention_to_bboxs(attention)
 
-        self._calc_scores_bb()
-        self._keep_top_k_sorted()
+            scores = self._calc_scores_bb(boxes_xyxy)
+            detections.append(self._keep_top_k_sorted(
+                np.array(boxes_xyxy, dtype=np.float64).reshape(-1, 4), np.array(scores, dtype=np.float64)))
 
-    def _calc_scores_bb(self):
+        return detections
+
+    def _calc_scores_bb(self, boxes_xyxy: List[Tuple]) -> List[float]:
         """we have no scores for the boxes so we go off area
         """
-        if len(self.boxes_xyxy) > 0:        
-            self.scores = calc_area(self.boxes_xyxy, self.size)
+        return calc_area(boxes_xyxy, self.size)
         
     @staticmethod
     def _process_attention(attentions: ndarray, method: Literal['abs', 'pos']) -> List[ndarray]:
@@ -382,22 +485,16 @@ class PatchifyPytorch(PatchifyModel):
         
         self.allowed_model_types = (self.model_name)
         self.input_shape = (384, 384)
-        self.inds = []
         self.iou_thresh = 0.6
 
-    def infer(self, image):
-        self._load_image(image)
-        self.batch = [self.preprocess(self.image_pt.to(self.device))]
+    def _detect(self, loaded_images: List[LoadedImage]) -> List[Tuple[ndarray, ndarray]]:
+        # torchvision detectors take a list of images, which they batch together
+        batch = [self.preprocess(loaded_image.image_pt.to(self.device)) for loaded_image in loaded_images]
         with torch.no_grad():
-            self.results = self.model(self.batch)[0]
-
-        self.boxes_xyxy = self.results['boxes'].detach().cpu().numpy()
-        self.scores = self.results['scores'].detach().cpu().numpy()
-
-        if isinstance(self.scores, (np.ndarray, np.generic)):
-            self.scores = self.scores.tolist()
+            results = self.model(batch)
 
-        self._keep_top_k_sorted()
+        return [self._keep_top_k_sorted(result['boxes'].detach().cpu().numpy(), result['scores'].detach().cpu().numpy()) 
+                    for result in results]
     
 
 class PatchifyYolox(PatchifyModel):
@@ -417,21 +514,18 @@ class PatchifyYolox(PatchifyModel):
         self.model_load_function = load_yolox_onnx
         self.allowed_model_types = (self.model_name)
         self.input_shape = (384, 384)
-        self.inds = []
         self.iou_thresh = 0.6
 
-    def infer(self, image):
-        self._load_image(image)
-
+    def _detect(self, loaded_images: List[LoadedImage]) -> List[Tuple[ndarray, ndarray]]:
         # make cv2 format
-        self.image_cv = _PIL_to_opencv(self.image)
-        
-        self.results, self.ratio = _infer_yolox(session=self.model, 
-                            preprocess=self.preprocess, opencv_image=self.image_cv, 
+        images_cv = [_PIL_to_opencv(loaded_image.image) for loaded_image in loaded_images]
+
+        outputs, ratios = _infer_yolox_batch(session=self.model, 
+                            preprocess=self.preprocess, opencv_images=images_cv, 
                             input_shape=self.input_shape)
 
-        self.boxes_xyxy, self.scores =  _process_yolox(output=self.results, ratio=self.ratio, size=self.input_shape)
-        if isinstance(self.scores, (np.ndarray, np.generic)):
-            self.scores = self.scores.tolist()
-        
-        self._keep_top_k_sorted()
\ No newline at end of file
+        detections = []
+        for output, ratio in zip(outputs, ratios):
+            boxes_xyxy, scores = _process_yolox(output=output, ratio=ratio, size=self.input_shape)
+            detections.append(self._keep_top_k_sorted(boxes_xyxy, scores.reshape(-1)))
+        return detections
@@ -115,6 +115,17 @@ def calc_area(bboxes: Union[List[List], FloatTensor, ndarray], size: Union[None,
 
     return areas
 
+def _filter_boxes_mask(bboxes: Union[List[List[float]], FloatTensor, ndarray], max_aspect_ratio: int = 4,
+                       min_area: int = 40*40) -> ndarray:
+    """the vectorised filtering behind filter_boxes. returns a boolean mask of the boxes to keep
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    w, h = bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1]
+    # zero width or height boxes have an infinite (or undefined) aspect ratio, so are filtered out
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aspect = np.maximum(w, h)/np.minimum(w, h)
+    return (w*h > min_area) & (aspect < max_aspect_ratio)
+
 def filter_boxes(bboxes: Union[FloatTensor, ndarray], max_aspect_ratio: int = 4, 
                     min_area: int = 40*40) -> List[int]:
     """filters a list of bounding boxes given as the 4-tuple (x1, y1, x2, y2)
@@ -128,15 +139,7 @@ def filter_boxes(bboxes: Union[FloatTensor, ndarray], max_aspect_ratio: int = 4,
     Returns:
         List[ind]: list of indices
     """
-    inds = []
-    for ind,bb in enumerate(bboxes):
-        w, h = (bb[2] - bb[0]), (bb[3] - bb[1])
-        area = w*h
-        aspect = max(w,h)/min(w,h)
-        if area > min_area and aspect < max_aspect_ratio:
-            inds.append(ind)
-    
-    return inds
+    return np.flatnonzero(_filter_boxes_mask(bboxes, max_aspect_ratio=max_aspect_ratio, min_area=min_area)).tolist()
 
 def rescale_box(box: Union[List[float], ndarray, FloatTensor], from_size: Tuple, to_size: Tuple) -> Tuple:
     """rescales a bounding box between two different image sizes
@@ -162,6 +165,22 @@ def rescale_box(box: Union[List[float], ndarray, FloatTensor], from_size: Tuple,
 
     return (x1_n, y1_n, x2_n, y2_n)
 
+def rescale_boxes(boxes: ndarray, from_size: Tuple, to_size: Tuple) -> ndarray:
+    """rescales an N x 4 array of bounding boxes between two different image sizes
+
+    Args:
+        boxes (ndarray): bounding boxes as (x1, y1, x2, y2)
+        from_size (Tuple): the original size 
+        to_size (Tuple): the size to rescale to
+
+    Returns:
+        ndarray: the rescaled boxes
+    """
+    Fx = to_size[0]/from_size[0]
+    Fy = to_size[1]/from_size[1]
+
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)*np.array([Fx, Fy, Fx, Fy])
+
 def generate_boxes(image_size: Tuple[int, int], hn: int, wn: int, overlap: bool = False) -> List[Tuple]:
     """does a simple bounding box generation based on the desired number in the 
     horizontal and vertical directions
@@ -264,6 +283,46 @@ def clip_boxes(boxes: Union[List, ndarray], xmin: int, ymin: int, xmax: int, yma
         
     return new_boxes
     
+def replace_small_boxes_array(boxes: ndarray, min_area: float = 40*40, new_size: Tuple = (100,100)) -> ndarray:
+    """the vectorised version of replace_small_boxes, for an N x 4 array of boxes
+
+    Args:
+        boxes (ndarray): bounding boxes as (x1, y1, x2, y2)
+        min_area (float, optional): min area that a box needs to meet to not be 
+                                    replaced with one that is new_size. Defaults to 40*40.
+        new_size (Tuple, optional): the new size the boxes should be if they are 
+                                    less than min_area. Defaults to (100,100).
+
+    Returns:
+        ndarray: the boxes, with small ones replaced with larger ones
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    area = (boxes[:, 2] - boxes[:, 0])*(boxes[:, 3] - boxes[:, 1])
+    small = area < min_area
+    xc = (boxes[small, 2] - boxes[small, 0])/2 + boxes[small, 0]
+    yc = (boxes[small, 3] - boxes[small, 1])/2 + boxes[small, 1]
+
+    new_boxes = boxes.copy()
+    new_boxes[small] = np.stack([xc - new_size[0]/2, yc - new_size[1]/2, xc + new_size[0]/2, yc + new_size[1]/2], axis=1)
+
+    return new_boxes
+
+def clip_boxes_array(boxes: ndarray, xmin: int, ymin: int, xmax: int, ymax: int) -> ndarray:
+    """the vectorised version of clip_boxes, for an N x 4 array of boxes given as x1, y1, x2, y2
+
+    Args:
+        boxes (ndarray): _description_
+        xmin (int): smallest x val
+        ymin (int): smallest y val
+        xmax (int): largest x val
+        ymax (int): largest y val
+
+    Returns:
+        ndarray: _description_
+    """
+    return np.clip(np.asarray(boxes, dtype=np.float64).reshape(-1, 4), 
+                    [xmin, ymin, xmin, ymin], [xmax, ymax, xmax, ymax])
+
 def patchify_image(image: ImageType, bboxes: Union[List[float], FloatTensor, ndarray]) -> List[ImageType]:
     """given a list of 4-tuple rectangles (x1, y1, x2, y2) return a list of 
     cropped images
@@ -1,16 +1,68 @@
+import functools
+import re
 from typing import Any, Dict, List, Optional, Union
 from types import FunctionType
 
-from functools import partial
 from more_itertools import windowed
 
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import NLTKWordTokenizer
 import nltk
 
+# the characters punkt considers as possible sentence ends (PunktLanguageVars.sent_end_chars). punkt can only
+# split a text on one of these, so texts without them are a single sentence and don't need to go through punkt
+_SENTENCE_END_CHARS = re.compile(r"[.?!]")
 
+_treebank_word_tokenizer = NLTKWordTokenizer()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_sentence_tokenizer(language: str) -> Any:
+    """loads the punkt tokenizer that nltk's sent_tokenize() uses for a language, once per process
+
+    Args:
+        language (str): the model name in the Punkt corpus
+
+    Returns:
+        Any: the tokenizer
+    """
+    try:
+        # nltk >= 3.8.2 loads punkt from the punkt_tab resource
+        from nltk.tokenize import PunktTokenizer
+    except ImportError:
+        PunktTokenizer = None
+
+    resource = "punkt" if PunktTokenizer is None else "punkt_tab"
+    try:
+        nltk.data.find(f"tokenizers/{resource}")
+    except LookupError:
+        nltk.download(resource)
+
+    if PunktTokenizer is None:
+        return nltk.data.load(f"tokenizers/punkt/{language}.pickle")
+    return PunktTokenizer(language)
+
+
+def _split_sentences(text: str, language: str = 'english') -> List[str]:
+    """the same as nltk's sent_tokenize(), without running punkt over texts that can't have more than one sentence
+    """
+    if _SENTENCE_END_CHARS.search(text) is None:
+        text = text.rstrip()
+        return [text] if text else []
+    return _get_sentence_tokenizer(language).tokenize(text)
+
+
+def _split_words(text: str, language: str = 'english') -> List[str]:
+    """the same as nltk's word_tokenize(), with the sentence splitting of _split_sentences()
+    """
+    return [token for sentence in _split_sentences(text, language=language) 
+                for token in _treebank_word_tokenizer.tokenize(sentence)]
+
+
+@functools.lru_cache(maxsize=None)
 def _splitting_functions(split_by: str, language: str='english') -> FunctionType:
     """_summary_
-    selects a text splitting function based on the method provided by 'split_by'
+    selects a text splitting function based on the method provided by 'split_by'.
+    the functions are created once per (split_by, language)
     Args:
         split_by (str): method to split the text by, 'character', 'word', 'sentence', 'passage'
                         if not one of those allows for custom characters to split on
@@ -25,15 +77,10 @@ def _splitting_functions(split_by: str, language: str='english') -> FunctionType
     if not isinstance(split_by, str):
         raise TypeError(f"expected str received {type(split_by)}")
 
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt")
-
     MAPPING = {
         'character':list,
-        'word': partial(word_tokenize, language=language),
-        'sentence':partial(sent_tokenize, language=language),
+        'word': functools.partial(_split_words, language=language),
+        'sentence':functools.partial(_split_sentences, language=language),
         'passage':lambda x:x.split("\n\n")
     }
 
@@ -140,16 +187,28 @@ def split_text(text: str, split_by: str = 'sentence', split_length: int = 2, spl
     Returns:
         List[str]: _description_
     """
+    return split_texts([text], split_by=split_by, split_length=split_length, split_overlap=split_overlap,
+                       language=language, custom_seperator=custom_seperator)[0]
 
-    if split_length == 0:
-        raise ValueError("split length must be > 0")
+def split_texts(texts: List[str], split_by: str = 'sentence', split_length: int = 2, split_overlap: int = 1, 
+               language: str = 'english', custom_seperator: str = None) -> List[List[str]]:
+    """ splits many pieces of text with the same settings. the same as calling split_text() on each text, but
+        the splitting function is only looked up once
 
-    # simple validation and correction    
-    text = check_make_string_valid(text, coerce=True)
+    Args:
+        texts (List[str]): the texts to split
+        split_by (str, optional): _description_. Defaults to 'sentence'.
+        split_length (int, optional): _description_. Defaults to 2.
+        split_overlap (int, optional): _description_. Defaults to 1.
+        language (str, optional): _description_. Defaults to 'english'.
+        custom_seperator (str, optional): _description_. Defaults to None.
 
-    # don't split if it is not worth splitting
-    if len(text) <= 1:
-        return [text]
+    Returns:
+        List[List[str]]: the sub-texts of each text
+    """
+
+    if split_length == 0:
+        raise ValueError("split length must be > 0")
 
     # we need to treat character splitting differently
     if custom_seperator is None:
@@ -157,17 +216,29 @@ def split_text(text: str, split_by: str = 'sentence', split_length: int = 2, spl
     else: 
         seperator = custom_seperator
 
-    # determine how we want to split
-    _func = _splitting_functions(split_by, language=language)
+    # determine how we want to split. this is done for the first text worth splitting
+    _func = None
 
-    # do the splitting
-    split_text = _func(text)
-    
-    # concatenate individual elements based on split_length & split_stride
-    segments = list(windowed(split_text, n=split_length, step=split_length - split_overlap))
+    results = []
+    for text in texts:
+        # simple validation and correction    
+        text = check_make_string_valid(text, coerce=True)
 
-    # reconstruct the segments. there is potential for a lossy process here as we
-    # assume a uniform seperator when reconstructing the sentences
-    text_splits = _reconstruct_multi_list(segments, seperator)
-    return text_splits
+        # don't split if it is not worth splitting
+        if len(text) <= 1:
+            results.append([text])
+            continue
 
+        if _func is None:
+            _func = _splitting_functions(split_by, language=language)
+
+        # do the splitting
+        split_text = _func(text)
+
+        # concatenate individual elements based on split_length & split_stride
+        segments = list(windowed(split_text, n=split_length, step=split_length - split_overlap))
+
+        # reconstruct the segments. there is potential for a lossy process here as we
+        # assume a uniform seperator when reconstructing the sentences
+        results.append(_reconstruct_multi_list(segments, seperator))
+    return results
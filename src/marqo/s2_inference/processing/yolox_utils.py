@@ -140,6 +140,33 @@ def _infer_yolox(session: onnxruntime.InferenceSession, preprocess: preprocess_y
 
     return output, ratio
 
+def _infer_yolox_batch(session: onnxruntime.InferenceSession, preprocess: preprocess_yolox, 
+                    opencv_images: List[ndarray], input_shape: Tuple[int, int]) -> Tuple[List[List[ndarray]], List[float]]:
+    """inference for onnx yolox over a batch of images. the images are sent to the session 
+    together, unless the model was exported with a fixed batch size of 1
+
+    Args:
+        session (onnxruntime.InferenceSession): the onnx session of the model
+        preprocess (preprocess_yolox): the preprocess function for the input image
+        opencv_images (List[ndarray]): the opencv formatted input images
+        input_shape (Tuple[int, int]): the shape of the input images
+
+    Returns:
+        Tuple[List[List[ndarray]], List[float]]: the outputs of each image, in the same format as _infer_yolox, 
+            and the ratios
+    """
+    preprocessed = [preprocess(opencv_image, input_shape) for opencv_image in opencv_images]
+    ratios = [ratio for _, ratio in preprocessed]
+
+    session_input = session.get_inputs()[0]
+    if session_input.shape[0] == 1:
+        outputs = [session.run(None, {session_input.name: img[None, :, :, :]}) for img, _ in preprocessed]
+    else:
+        output = session.run(None, {session_input.name: np.stack([img for img, _ in preprocessed])})
+        outputs = [[o[ind:ind + 1] for o in output] for ind in range(len(preprocessed))]
+
+    return outputs, ratios
+
 def _process_yolox(output: ndarray, ratio: float, size: Tuple = (384, 384)) -> Tuple[ndarray, ndarray]:
     """takes the outputs and processes them 
 
@@ -1,13 +1,11 @@
 from functools import partial
-import functools
 import validators
 import uuid
 from collections import defaultdict
+from typing import NamedTuple
 
 import pandas as pd
 pd.options.mode.chained_assignment = None
-import numpy as np
-import torch
 
 from marqo.s2_inference.types import *
 from marqo.s2_inference.reranking.model_utils import (
@@ -22,9 +20,12 @@ from marqo.s2_inference.reranking.model_utils import (
     _keep_top_k
     )
 from marqo.s2_inference.errors import RerankerNameError
+from marqo.s2_inference.s2_inference import _create_model_cache_key
 from marqo.s2_inference.clip_utils import load_image_from_path
 from marqo.s2_inference.reranking.enums import Columns, ResultsFields
 from marqo.s2_inference.reranking.configs import get_default_text_processing_parameters
+from marqo.s2_inference.reranking import image_cache, score_cache
+from marqo.s2_inference import image_download
 from marqo.s2_inference.processing import text as text_processor
 from marqo.s2_inference.processing import image as image_processor
 
@@ -32,6 +33,22 @@ from marqo.s2_inference.logger import get_logger
 logger = get_logger(__name__)
 
 
+class RerankInput(NamedTuple):
+    """a single (query, field content) pair for a reranker, and the hit and field it came from"""
+    query: str
+    field_content: str
+    reranked_id: str
+    original_field_name: str
+
+
+def _get_searchable_fields(hits: List[Dict]) -> List[str]:
+    """the non _ fields of the hits, in the order they first appear"""
+    fields = dict()
+    for hit in hits:
+        fields.update((field, None) for field in hit if not field.startswith('_'))
+    return list(fields)
+
+
 class FormattedResults:
 
     """
@@ -216,6 +233,39 @@ class ReRanker:
 
         self.results[ResultsFields.hits] = sorted(self.results[ResultsFields.hits], key=lambda x:x[ResultsFields.reranker_score], reverse=True)
 
+    def _set_reranked_results(self, results: Dict, model_inputs: List[RerankInput], scores: List[float],
+                              highlights: List[Any] = None) -> None:
+        """keeps the top scoring inputs of each hit as its reranked score and highlights,
+        then sorts the hits by their reranked score. hits with no inputs are kept at the end
+
+        Args:
+            results (Dict): _description_
+            model_inputs (List[RerankInput]): _description_
+            scores (List[float]): the score of each input
+            highlights (List[Any], optional): the highlight of each input. Defaults to the field content of the inputs.
+        """
+        if highlights is None:
+            highlights = [model_input.field_content for model_input in model_inputs]
+
+        top_inputs = defaultdict(list)
+        for score, model_input, highlight in sorted(zip(scores, model_inputs, highlights), key=lambda x: x[0], reverse=True):
+            if len(top_inputs[model_input.reranked_id]) < self.num_highlights:
+                top_inputs[model_input.reranked_id].append((score, {model_input.original_field_name: highlight}))
+
+        for result in results[ResultsFields.hits]:
+            top = top_inputs.get(result[ResultsFields.reranked_id])
+            if not top:
+                continue
+            if self.num_highlights == 1:
+                result[ResultsFields.reranker_score], result[ResultsFields.highlights_reranked] = top[0]
+            else:
+                result[ResultsFields.reranker_score] = [score for score, _ in top]
+                result[ResultsFields.highlights_reranked] = [highlight for _, highlight in top]
+
+        results[ResultsFields.hits] = sorted(
+            results[ResultsFields.hits],
+            key=lambda x: (ResultsFields.reranker_score in x, x.get(ResultsFields.reranker_score, 0)), reverse=True)
+
     def rerank(self, query, results):
         # this gets filled on for the task (text/images)
         pass
@@ -291,51 +341,119 @@ class ReRankerText(ReRanker):
             TypeError: _description_
             RuntimeError: _description_
         """
-        self.results = results
-        self.searchable_attributes = searchable_attributes
+        self.rerank_batch(queries=[query], results_list=[results], searchable_attributes_list=[searchable_attributes])
 
-        if not isinstance(results, (dict, defaultdict)):
-            raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
+    def rerank_batch(self, queries: List[str], results_list: List[Dict],
+                     searchable_attributes_list: List[Optional[List[str]]]) -> None:
+        """reranks the results of several queries. the (query, passage) pairs of all the
+        queries are scored by the model in a single predict call. the results are modified in place
 
-        if len(results[ResultsFields.hits]) == 0:
-            logger.warning("empty results for re-ranking. returning doing nothing...")
-            return 
+        Args:
+            queries (List[str]): the query of each results
+            results_list (List[Dict]): the search results of each query
+            searchable_attributes_list (List[Optional[List[str]]]): the fields to rerank over for each query.
+                None reranks over all non _ fields
+
+        Raises:
+            TypeError: if any of the results is not a dict
+            RuntimeError: if the model inputs are malformed
+        """
+        for results in results_list:
+            if not isinstance(results, (dict, defaultdict)):
+                raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
+
+        model_inputs_list = []
+        for query, results, searchable_attributes in zip(queries, results_list, searchable_attributes_list):
+            if len(results[ResultsFields.hits]) == 0:
+                logger.warning("empty results for re-ranking. returning doing nothing...")
+                model_inputs_list.append([])
+                continue
+            FormattedResults._fill_doc_ids(results)
+            model_inputs_list.append(self._create_model_inputs(query, results[ResultsFields.hits], searchable_attributes))
+
+        self.model_inputs = [model_input for model_inputs in model_inputs_list for model_input in model_inputs]
+        if len(self.model_inputs) == 0:
+            return
 
         if self.model is None:
             self.load_model()
 
-        self.format_results(results)
+        self.scores = self._predict([[model_input.query, model_input.field_content] for model_input in self.model_inputs])
 
-        # we need to create the pairs of data to score over
-        # if searchable attributes is None, then we do all non _ fields, 
-        # otherwise search over the searchable attributes
-        if self.searchable_attributes is None:
-            self.searchable_attributes = self.formatted_results.searchable_fields
+        start = 0
+        for results, model_inputs in zip(results_list, model_inputs_list):
+            if len(model_inputs) > 0:
+                self._set_reranked_results(results, model_inputs, self.scores[start:start + len(model_inputs)])
+                start += len(model_inputs)
+
+    def _create_model_inputs(self, query: str, hits: List[Dict],
+                             searchable_attributes: List[str] = None) -> List[RerankInput]:
+        """creates an input for the model for each field of each hit. if split params are given,
+        the field content is chunked the same way indexing does it, with an input per chunk
+
+        Args:
+            query (str): _description_
+            hits (List[Dict]): the hits, with their rerank ids filled in
+            searchable_attributes (List[str], optional): if None, all the non _ fields of the hits are used.
+
+        Returns:
+            List[RerankInput]: _description_
+        """
+        if searchable_attributes is None:
+            searchable_attributes = _get_searchable_fields(hits)
 
-        # first stage of formatting converts results dict to dataframe
-        self.inputs_df = self.formatted_results.format_for_model(self.formatted_results.results_df, self.searchable_attributes, query=query)
-        
-        # second stage (optionally) add more rows by splitting the content into sub-chunks and
-        # performing the apprpriate filling in of other values
         if self.split_params is not None:
-            _n = len(self.inputs_df)
-            self.inputs_df = self.explode_nested_content_field(self.inputs_df)
-            logger.info(f"chunking field content, went from length {_n} to {len(self.inputs_df)}")
-        
-        # final stage creates list of lists of strings to go straight to the model
-        self.model_inputs = self._prepare_inputs(self.inputs_df)
+            split = partial(text_processor.split_text, split_length=self.split_length,
+                            split_overlap=self.split_overlap, split_by=self.split_method)
+        else:
+            split = lambda content: [content]
+
+        model_inputs = []
+        _n = 0
+        for field in searchable_attributes:
+            for hit in hits:
+                # documents do not need to have all the fields
+                if hit.get(field) is None:
+                    continue
+                _n += 1
+                for content in split(hit[field]):
+                    model_inputs.append(RerankInput(query=query, field_content=content,
+                                                    reranked_id=hit[ResultsFields.reranked_id],
+                                                    original_field_name=field))
+        if self.split_params is not None:
+            logger.debug(f"chunking field content, went from length {_n} to {len(model_inputs)}")
+
+        return model_inputs
+
+    def _predict(self, pairs: List[List[str]]) -> List[float]:
+        """scores the (query, passage) pairs with the model. scores are cached, so each
+        distinct pair is only scored once
+
+        Args:
+            pairs (List[List[str]]): _description_
 
-        if not _verify_model_inputs(self.model_inputs):
-            raise RuntimeError(f"incorrect model inputs, expected list of lists but recevied {type(self.model_inputs)} and {type(self.model_inputs[0])}")
+        Returns:
+            List[float]: a score for each pair
+        """
+        cache = score_cache.get_cache()
+        model_cache_key = _create_model_cache_key(self.model_name, self.device)
+        keys = [score_cache.RerankScoreCache.create_key(model_cache_key, query, content) for query, content in pairs]
+        key_to_score = {key: cache.get(key) for key in keys}
 
-        self.scores = self.model.predict(self.model_inputs)
-        self.scores = _convert_cross_encoder_output(self.scores)
+        # dict keys are unique, so duplicated pairs are only scored once
+        pairs_to_score = {key: pair for key, pair in zip(keys, pairs) if key_to_score[key] is None}
+        if len(pairs_to_score) > 0:
+            model_inputs = list(pairs_to_score.values())
+            if not _verify_model_inputs(model_inputs):
+                raise RuntimeError(f"incorrect model inputs, expected list of lists but recevied {type(model_inputs)} and {type(model_inputs[0])}")
 
-        self.inputs_df[ResultsFields.reranker_score] = self.scores
-        self.inputs_df[ResultsFields.hybrid_score_multiply] = np.clip(self.inputs_df[ResultsFields.original_score], 1e-3, np.inf)*np.clip(self.inputs_df[ResultsFields.reranker_score], 1e-3, np.inf)
-        self.inputs_df[ResultsFields.hybrid_score_add] = self.inputs_df[ResultsFields.original_score] + self.inputs_df[ResultsFields.reranker_score]
+            scores = _convert_cross_encoder_output(self.model.predict(model_inputs))
+            for key, score in zip(pairs_to_score, scores):
+                key_to_score[key] = score
+                cache.put(key, score)
 
-        self.get_reranked_results()
+        logger.debug(f"reranking scored {len(pairs_to_score)} of {len(pairs)} pairs, the rest were cached or duplicates")
+        return [key_to_score[key] for key in keys]
 
 
 class ReRankerOwl(ReRanker):
@@ -343,12 +461,12 @@ class ReRankerOwl(ReRanker):
     """reranker for owl based image reranking
     """
 
-    def __init__(self, model_name: str, device: str, image_size: Tuple):
+    def __init__(self, model_name: str, device: str, image_size: Tuple, batch_size: int = 16):
         super().__init__()
         self.device = device
         self.model_name = model_name
         self.image_size = image_size
-        self.results = []
+        self.batch_size = batch_size
     
         self.model = None
         self.processed_inputs = None
@@ -385,8 +503,11 @@ class ReRankerOwl(ReRanker):
     @staticmethod
     def load_images(content: List[str], size: Tuple[int]) -> Tuple[ImageType, List[Tuple]]:
 
-        # uses same underlying loader as all other image models ffrom clip_utils
-        images, original_size = zip(*[_load_image(f, size=size) for f in content])
+        # uses same underlying loader as all other image models ffrom clip_utils.
+        # images are loaded concurrently in the image download pool
+        loaded = image_download.map_in_pool(
+            lambda group: {f: _load_image(f, size=size) for f in group}, content, max_tasks=len(content))
+        images, original_size = zip(*[loaded[f] for f in content])
 
         # use highlights
         # get parent value to load from highlight key name
@@ -397,84 +518,126 @@ class ReRankerOwl(ReRanker):
         
         # TODO add image based reranking when it is available
         # https://github.com/huggingface/transformers/pull/20136
-        self.results = results
-        self.image_attributes = image_attributes
-        self.num_highlights = num_highlights
-
-        if not isinstance(results, (dict, defaultdict)):
-            raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
+        self.rerank_batch(queries=[query], results_list=[results], image_attributes_list=[image_attributes],
+                          num_highlights=num_highlights)
 
-        if len(results[ResultsFields.hits]) == 0:
-            logger.warning("empty results for re-ranking. returning doing nothing...")
-            return 
+    def rerank_batch(self, queries: List[str], results_list: List[Dict], image_attributes_list: List[List[str]],
+                     num_highlights: int = 1) -> None:
+        """reranks the results of several queries. the (query, image) pairs of all the queries are
+        run through the model in batches of batch_size. the results are modified in place
 
-        if self.model is None:
-            self.load_model()
-
-        self.format_results(results, searchable_fields=image_attributes)
+        Args:
+            queries (List[str]): the query of each results
+            results_list (List[Dict]): the search results of each query
+            image_attributes_list (List[List[str]]): the fields holding the images to rerank over, for each query.
+                hits without these fields are removed from the results
+            num_highlights (int, optional): _description_. Defaults to 1.
 
-        # first stage of formatting converts results dict to dataframe
-        self.inputs_df = self.formatted_results.format_for_model(self.formatted_results.results_df, self.image_attributes, query=query)
-        
-        # final stage creates list of lists of strings to go straight to the model
-        self.model_inputs = self._prepare_inputs(self.inputs_df)
+        Raises:
+            TypeError: if any of the results is not a dict
+        """
+        self.num_highlights = num_highlights
 
-        # todo unzip and get image location
-        queries, image_names = zip(*self.model_inputs)
+        for results in results_list:
+            if not isinstance(results, (dict, defaultdict)):
+                raise TypeError(f"expected a dict or defaultdict, received {type(results)}")
+
+        model_inputs_list = []
+        for query, results, image_attributes in zip(queries, results_list, image_attributes_list):
+            if len(results[ResultsFields.hits]) == 0:
+                logger.warning("empty results for re-ranking. returning doing nothing...")
+                model_inputs_list.append([])
+                continue
+            FormattedResults._fill_doc_ids(results)
+            results[ResultsFields.hits] = [r for r in results[ResultsFields.hits] if all(s in r for s in image_attributes)]
+            model_inputs_list.append([
+                RerankInput(query=query, field_content=hit[field], reranked_id=hit[ResultsFields.reranked_id],
+                            original_field_name=field)
+                for field in image_attributes for hit in results[ResultsFields.hits] if hit[field] is not None
+            ])
+
+        self.model_inputs = [model_input for model_inputs in model_inputs_list for model_input in model_inputs]
+        if len(self.model_inputs) == 0:
+            return
 
-        # try:
-        self.images, self.original_sizes = self.load_images(image_names, self.image_size)
-        
-        # # TODO check query type before making a list
-        _b, _s, _i, _bo = [], [], [], []
-
-        # # TODO find out why batching images does not work 
-        for image, content, _query, orig_size in zip(self.images, image_names, queries, self.original_sizes):
-            self.processed_inputs = _process_owl_inputs(self.processor, _query, image).to(self.device)
-            owl_results = _predict_owl(self.model, self.processed_inputs, 
-                                post_process_function=self.processor.post_process,
-                        size=self.image_size)
-
-            boxes, scores, identifier = _process_owl_result(owl_results, content)
-            boxes, scores, identifier = sort_owl_boxes_scores(boxes, scores, identifier)
-            boxes, scores, identifier = _keep_top_k(boxes, k=num_highlights), _keep_top_k(scores, k=num_highlights), _keep_top_k(identifier, k=num_highlights)
-
-            # just keep top from each image
-            _bo += [list(image_processor.rescale_box(b.detach().cpu().tolist(), self.image_size, orig_size)) for b in boxes]
-            # _os.append()
-            _b.append(boxes)
-            _s.append(scores)
-            _i += identifier
-
-        self.boxes_original = _bo           
-        self.boxes = torch.cat(_b)
-        self.scores = torch.cat(_s)
-        self.identifier = _i
-        
-        self.boxes_scores_df = pd.DataFrame(zip(self.boxes.detach().cpu().tolist(), self.scores.detach().cpu().tolist(), 
-                                            self.identifier, self.boxes_original), 
-                                        columns=[Columns.bbox, ResultsFields.reranker_score, Columns.field_content, Columns.bbox_original])
+        if self.model is None:
+            self.load_model()
 
-        # now merge back with original - filed_content is the image pointer and can be used as the identifier
-        self.inputs_df = self.boxes_scores_df.merge(self.inputs_df, left_on=Columns.field_content, right_on=Columns.field_content)
+        # each distinct (query, image) pair is only run through the model once
+        pairs = list(dict.fromkeys((model_input.query, model_input.field_content) for model_input in self.model_inputs))
+        image_names = list(dict.fromkeys(image_name for _, image_name in pairs))
+        images, original_sizes = self.load_images(image_names, self.image_size)
+        self.images = dict(zip(image_names, zip(images, original_sizes)))
+        pair_to_boxes_scores = dict(zip(pairs, self._predict_boxes_scores(pairs)))
+
+        for results, model_inputs in zip(results_list, model_inputs_list):
+            if len(model_inputs) == 0:
+                continue
+            # an input per box, with the box (in the original image's coordinates) as its highlight
+            box_inputs, scores, boxes = [], [], []
+            for model_input in model_inputs:
+                for score, box in pair_to_boxes_scores[(model_input.query, model_input.field_content)]:
+                    box_inputs.append(model_input)
+                    scores.append(score)
+                    boxes.append(box)
+            self._set_reranked_results(results, box_inputs, scores, highlights=boxes)
+
+    def _predict_boxes_scores(self, pairs: List[Tuple[str, str]]) -> List[List[Tuple[float, List[float]]]]:
+        """finds the boxes in each image that best match its query. the images are run through the model in batches
 
-        self.get_reranked_results(highlight_content_column=Columns.bbox_original)
-        
+        Args:
+            pairs (List[Tuple[str, str]]): (query, image name) pairs. the images must be in self.images
 
-@functools.lru_cache
-def _load_image(filename: str, size: Tuple = None) -> ImageType:
-    """loads a PIL image with optional resizing
+        Returns:
+            List[List[Tuple[float, List[float]]]]: for each pair, the top num_highlights (score, box) of the image,
+                with the boxes rescaled to the original image's size
+        """
+        boxes_scores = []
+        for start in range(0, len(pairs), self.batch_size):
+            batch = pairs[start:start + self.batch_size]
+            # a list of queries per image, so each image is only searched with its own query
+            self.processed_inputs = _process_owl_inputs(
+                self.processor, [[query] for query, _ in batch], [self.images[image_name][0] for _, image_name in batch]
+            ).to(self.device)
+            owl_results = _predict_owl(self.model, self.processed_inputs,
+                                       post_process_function=self.processor.post_process, size=self.image_size)
+
+            for (_, image_name), owl_result in zip(batch, owl_results):
+                boxes, scores, _ = _process_owl_result([owl_result], image_name)
+                boxes, scores, _ = sort_owl_boxes_scores(boxes, scores, None)
+                boxes, scores = _keep_top_k(boxes, k=self.num_highlights), _keep_top_k(scores, k=self.num_highlights)
+                original_size = self.images[image_name][1]
+                boxes_scores.append([
+                    (score, list(image_processor.rescale_box(box, self.image_size, original_size)))
+                    for score, box in zip(scores.detach().cpu().tolist(), boxes.detach().cpu().tolist())
+                ])
+        return boxes_scores
+
+
+def _load_image(filename: str, size: Tuple = None) -> Tuple[ImageType, Tuple]:
+    """loads a PIL image with optional resizing. loaded images are kept in the
+    reranking image cache, which is bounded by MARQO_RERANK_IMAGE_CACHE_MAX_BYTES
 
     Args:
         filename (str): _description_
         size (Tuple, optional): _description_. Defaults to None.
 
     Returns:
-        ImageType: _description_
+        Tuple[ImageType, Tuple]: the image, and its size before resizing
     """
+    cache = image_cache.get_cache()
+    key = (filename, size)
+    loaded_image = cache.get(key)
+    if loaded_image is not None:
+        return loaded_image
+
     im = load_image_from_path(filename, {})
     original_size = im.size
     if size is not None:
         im = im.resize(size).convert('RGB')
-        
-    return im,original_size
+    else:
+        im.load()
+
+    loaded_image = image_cache.LoadedImage(image=im, original_size=original_size)
+    cache.put(key, loaded_image)
+    return loaded_image
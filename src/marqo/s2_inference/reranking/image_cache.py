@@ -0,0 +1,109 @@
+"""In-process cache of the images loaded by ReRankerOwl, so that images reranked by repeated or paginated searches
+don't need to be downloaded and resized again.
+
+Entries are keyed by (image pointer, size the image was resized to), and hold the resized image with the size of
+the original. The cache is bounded by the size of its images' pixel data in bytes (least recently used entries are
+evicted first), read from MARQO_RERANK_IMAGE_CACHE_MAX_BYTES when the cache is first used. Setting
+MARQO_RERANK_IMAGE_CACHE_MAX_BYTES to 0 disables the cache.
+"""
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from marqo.s2_inference.types import ImageType
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+
+RerankImageCacheKey = Tuple[str, Optional[Tuple[int, int]]]
+
+
+class LoadedImage(NamedTuple):
+    image: ImageType
+    original_size: Tuple[int, int]
+
+
+class _CacheEntry(NamedTuple):
+    loaded_image: LoadedImage
+    size_bytes: int
+
+
+class RerankImageCache:
+    """A thread safe LRU cache of loaded images, bounded by the size of their pixel data in bytes."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: max size of the cached images' pixel data. 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[RerankImageCacheKey, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_size_bytes(image: ImageType) -> int:
+        width, height = image.size
+        return width * height * len(image.getbands())
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RerankImageCacheKey) -> Optional[LoadedImage]:
+        """Returns the cached image for the key, or None if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry.loaded_image
+
+    def put(self, key: RerankImageCacheKey, loaded_image: LoadedImage) -> None:
+        """Adds an image to the cache, evicting least recently used entries if the cache is full.
+
+        Images larger than the whole cache are not cached."""
+        size_bytes = self._estimate_size_bytes(loaded_image.image)
+        if size_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self.current_bytes + size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = _CacheEntry(loaded_image=loaded_image, size_bytes=size_bytes)
+            self.current_bytes += size_bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: RerankImageCacheKey) -> None:
+        """Removes an entry. The caller must hold the lock."""
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size_bytes
+
+
+_cache: Optional[RerankImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> RerankImageCache:
+    """Returns the process-wide reranking image cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RerankImageCache(
+                    max_bytes=read_env_vars_and_defaults_ints(EnvVars.MARQO_RERANK_IMAGE_CACHE_MAX_BYTES))
+    return _cache
+
+
+def empty_cache() -> None:
+    """Drops the process-wide cache. It is recreated (with its limit re-read from env vars) on next use."""
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -38,11 +38,12 @@ def _convert_cross_encoder_output(output: Union[FloatTensor, ndarray, List[float
 
     if isinstance(output, (FloatTensor, Tensor)):
         output = output.squeeze()
-        output = _float_tensor_to_list(output)
+        # a single score squeezes to a scalar
+        output = _float_tensor_to_list(output.reshape(1) if output.ndim == 0 else output)
     
     elif isinstance(output, ndarray):
         output = output.squeeze()
-        output = _nd_array_to_list(output)
+        output = _nd_array_to_list(output.reshape(1) if output.ndim == 0 else output)
 
     elif isinstance(output, list):
         if isinstance(output[0], FloatTensor):
@@ -359,7 +360,7 @@ def _predict_owl(model, processed_inputs, post_process_function, size):
         outputs.logits = outputs.logits.to('cpu')
         outputs.pred_boxes = outputs.pred_boxes.to('cpu')
         # Target image sizes (height, width) to rescale box predictions [batch_size, 2]
-        target_sizes = torch.Tensor([size[::-1]])
+        target_sizes = torch.Tensor([size[::-1]] * len(outputs.logits))
         # Convert outputs (bounding boxes and class logits) to COCO API
         results = post_process_function(outputs=outputs, target_sizes=target_sizes)
         return results
@@ -29,14 +29,7 @@ def rerank_search_results(search_result: Dict, query: str, model_name: str, devi
         return search_result
 
     if 'owl' in model_name.lower():
-        # owl needs the image location, while the text based ones can handle different number of fields but concat the text
-        if searchable_attributes in (None, [], (), ''):
-            raise RerankerError(f"found searchable_attributes={searchable_attributes} but expected list of strings for {model_name}")
-        
-        if len(searchable_attributes) > 1:
-            logger.info(f"currently only a single attribute can be reranked over for {model_name}. taking the first field {[searchable_attributes[0]]} from {searchable_attributes}")
-            searchable_attributes = [searchable_attributes[0]]
-
+        searchable_attributes = _get_owl_image_attributes(model_name, searchable_attributes)
         try:
             reranker = ReRankerOwl(model_name=model_name, device=device, image_size=(240,240))
             reranker.rerank(query=query, results=search_result, image_attributes=searchable_attributes)
@@ -53,6 +46,65 @@ def rerank_search_results(search_result: Dict, query: str, model_name: str, devi
     if overwrite_original_scores_highlights:
         cleanup_final_reranked_results(search_result)
 
+def rerank_bulk_search_results(search_results: List[Dict], queries: List[str], model_name: str, device: str,
+                searchable_attributes: List[List[str]] = None, num_highlights: int = 1,
+                overwrite_original_scores_highlights: bool = True) -> None:
+    """reranks the results of several searches with the same model. the results are modified in place.
+    the inputs of all the searches are run through the model together
+
+    Args:
+        search_results (List[Dict]): the results of each search
+        queries (List[str]): the query of each search
+        model_name (str): _description_
+        device (str): _description_
+        searchable_attributes (List[List[str]], optional): the searchable attributes of each search. Defaults to None.
+        num_highlights (int, optional): _description_. Defaults to 1.
+        overwrite_original_scores_highlights (bool, optional): _description_. Defaults to True.
+    """
+    if searchable_attributes is None:
+        searchable_attributes = [None] * len(search_results)
+
+    # skip reranking the results that do not contain the fields
+    to_rerank = [(search_result, query, _searchable_attributes) for search_result, query, _searchable_attributes
+                 in zip(search_results, queries, searchable_attributes)
+                 if _check_searchable_fields_in_results(search_results=search_result, searchable_fields=_searchable_attributes)]
+    if len(to_rerank) == 0:
+        return
+
+    _search_results, _queries, _searchable_attributes = map(list, zip(*to_rerank))
+    if 'owl' in model_name.lower():
+        _searchable_attributes = [_get_owl_image_attributes(model_name, attributes) for attributes in _searchable_attributes]
+        try:
+            reranker = ReRankerOwl(model_name=model_name, device=device, image_size=(240,240))
+            reranker.rerank_batch(queries=_queries, results_list=_search_results, image_attributes_list=_searchable_attributes)
+        except (UnidentifiedImageError, RerankerNameError) as e:
+            raise RerankerError(message=str(e)) from e
+    else:
+        try:
+            reranker = ReRankerText(model_name=model_name, device=device, num_highlights=num_highlights)
+            reranker.rerank_batch(queries=_queries, results_list=_search_results, searchable_attributes_list=_searchable_attributes)
+        except Exception as e:
+            raise RerankerError(message=str(e)) from e
+
+    if overwrite_original_scores_highlights:
+        for search_result in _search_results:
+            cleanup_final_reranked_results(search_result)
+
+def _get_owl_image_attributes(model_name: str, searchable_attributes: List[str] = None) -> List[str]:
+    """owl needs the image location, while the text based ones can handle different number of fields but concat the text.
+    returns the single attribute owl reranks over
+
+    Raises:
+        RerankerError: if there are no searchable attributes
+    """
+    if searchable_attributes in (None, [], (), ''):
+        raise RerankerError(f"found searchable_attributes={searchable_attributes} but expected list of strings for {model_name}")
+
+    if len(searchable_attributes) > 1:
+        logger.info(f"currently only a single attribute can be reranked over for {model_name}. taking the first field {[searchable_attributes[0]]} from {searchable_attributes}")
+        searchable_attributes = [searchable_attributes[0]]
+    return searchable_attributes
+
 def _check_searchable_fields_in_results(search_results: Dict, searchable_fields: List[str] = None) -> bool:
     """
     checks the searchable fileds are in the search result
@@ -0,0 +1,101 @@
+"""In-process cache of cross-encoder scores, used by ReRankerText so that paginated or repeated searches don't
+need the same (query, passage) pairs to be scored by the model again.
+
+Entries are keyed by (model cache key, query, hash of the passage). The cache holds at most
+MARQO_RERANK_SCORE_CACHE_SIZE scores (least recently used entries are evicted first), read when the cache is
+first used. Setting MARQO_RERANK_SCORE_CACHE_SIZE to 0 disables the cache.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+
+RerankScoreCacheKey = Tuple[str, str, bytes]
+
+
+class RerankScoreCache:
+    """A thread safe LRU cache of cross-encoder scores, bounded by its number of entries."""
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size: max number of cached scores. 0 disables the cache.
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[RerankScoreCacheKey, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create_key(model_cache_key: str, query: str, passage: str) -> RerankScoreCacheKey:
+        # passages can be long, so only their hash is kept
+        return model_cache_key, query, hashlib.blake2b(str(passage).encode("utf-8"), digest_size=16).digest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RerankScoreCacheKey) -> Optional[float]:
+        """Returns the cached score for the key, or None if it isn't cached."""
+        with self._lock:
+            score = self._entries.get(key)
+            if score is not None:
+                self._entries.move_to_end(key)
+            return score
+
+    def put(self, key: RerankScoreCacheKey, score: float) -> None:
+        """Adds a score to the cache, evicting the least recently used entry if the cache is full."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_model(self, model_name: str, device: str) -> int:
+        """Removes the scores of a model. Models are matched the same way as s2_inference.eject_model() matches
+        model cache keys.
+
+        Returns:
+            the number of entries removed
+        """
+        with self._lock:
+            keys_to_remove = [
+                key for key in self._entries
+                if key[0].startswith(model_name) and key[0].endswith(device)
+            ]
+            for key in keys_to_remove:
+                del self._entries[key]
+        return len(keys_to_remove)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: Optional[RerankScoreCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> RerankScoreCache:
+    """Returns the process-wide reranking score cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RerankScoreCache(
+                    max_size=read_env_vars_and_defaults_ints(EnvVars.MARQO_RERANK_SCORE_CACHE_SIZE))
+    return _cache
+
+
+def empty_cache() -> None:
+    """Drops the process-wide cache. It is recreated (with its size re-read from env vars) on next use."""
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -13,10 +13,13 @@ from marqo.s2_inference.types import *
 from marqo.s2_inference.logger import get_logger
 import torch
 import datetime
-from marqo.s2_inference import constants
-from marqo.tensor_search.enums import AvailableModelsKey, SpecialModels
+from marqo.s2_inference import constants, inference_batching
+from marqo.s2_inference import cpu_precision as cpu_precision_utils
+from marqo.s2_inference.clip_utils import _is_image
+from marqo.tensor_search.enums import AvailableModelsKey, SpecialModels, ModelProperties
 from marqo.tensor_search.configs import EnvVars
 from marqo.tensor_search.models.private_models import ModelAuth
+import json
 import threading
 from marqo.tensor_search.utils import read_env_vars_and_defaults, generate_batches
 from marqo.tensor_search.configs import EnvVars
@@ -29,6 +32,9 @@ logger = get_logger(__name__)
 available_models = dict()
 # A lock to protect the model loading process
 lock = threading.Lock()
+# The sizes of the models that are being loaded, by model cache key. Models are loaded outside the lock, so several
+# can load at once; their sizes count towards their devices' memory until they are in available_models.
+models_being_loaded = dict()
 MODEL_PROPERTIES = load_model_properties()
 
 
@@ -66,18 +72,14 @@ def vectorise(model_name: str, content: Union[str, List[str]], model_properties:
     )
 
     try:
-        if isinstance(content, str):
+        batching_key = _get_inference_batching_key(model_cache_key, content, normalize_embeddings, **kwargs)
+        if batching_key is not None:
+            vectorised = _vectorise_in_shared_batch(batching_key, model_cache_key, content, normalize_embeddings,
+                                                    **kwargs)
+        elif isinstance(content, str):
             vectorised = available_models[model_cache_key][AvailableModelsKey.model].encode(content, normalize=normalize_embeddings, **kwargs)
         else:
-            vector_batches = []
-            batch_size = _get_max_vectorise_batch_size()
-            for batch in generate_batches(content, batch_size=batch_size):
-                vector_batches.append(_convert_tensor_to_numpy(available_models[model_cache_key][AvailableModelsKey.model].encode(batch, normalize=normalize_embeddings, **kwargs)))
-            if not vector_batches or all(
-                    len(batch) == 0 for batch in vector_batches):  # Check for empty vector_batches or empty arrays
-                raise RuntimeError(f"Vectorise created an empty list of batches! Content: {content}")
-            else:
-                vectorised = np.concatenate(vector_batches, axis=0)
+            vectorised = _encode_in_batches(model_cache_key, content, normalize_embeddings, **kwargs)
     except IllegalVectoriseError as e:
         # This is from attempting to vectorise with no_model.
         raise BadRequestError(str(e)) from e
@@ -87,6 +89,59 @@ def vectorise(model_name: str, content: Union[str, List[str]], model_properties:
     return _convert_vectorized_output(vectorised)
 
 
+def _encode_in_batches(model_cache_key: str, content: List[Union[str, ImageType]], normalize_embeddings: bool,
+                       **kwargs) -> ndarray:
+    """Encodes content with a loaded model, in batches of at most MARQO_MAX_VECTORISE_BATCH_SIZE items."""
+    vector_batches = []
+    batch_size = _get_max_vectorise_batch_size()
+    for batch in generate_batches(content, batch_size=batch_size):
+        vector_batches.append(_convert_tensor_to_numpy(available_models[model_cache_key][AvailableModelsKey.model].encode(batch, normalize=normalize_embeddings, **kwargs)))
+    if not vector_batches or all(
+            len(batch) == 0 for batch in vector_batches):  # Check for empty vector_batches or empty arrays
+        raise RuntimeError(f"Vectorise created an empty list of batches! Content: {content}")
+    return np.concatenate(vector_batches, axis=0)
+
+
+def _get_inference_batching_key(model_cache_key: str, content: Union[str, List[Union[str, ImageType]]],
+                                normalize_embeddings: bool, **kwargs) -> Optional[Tuple]:
+    """Returns the key of the shared batches the content can be vectorised in, or None if it should be vectorised
+    on its own.
+
+    Content is only batched with content that is vectorised the same way: by the same model, with the same
+    settings, and of the same modality (as models infer the modality of a batch from its first item).
+    """
+    if not inference_batching.is_enabled():
+        return None
+    items = [content] if isinstance(content, str) else content
+    if not items or len(items) >= _get_max_vectorise_batch_size():
+        return None
+    try:
+        is_image = _is_image(items)
+        settings = json.dumps(kwargs, sort_keys=True)
+    except (UnidentifiedImageError, TypeError, ValueError):
+        # Vectorised on its own, so that any error is raised as usual
+        return None
+    return model_cache_key, normalize_embeddings, is_image, settings
+
+
+def _vectorise_in_shared_batch(batching_key: Tuple, model_cache_key: str,
+                               content: Union[str, List[Union[str, ImageType]]],
+                               normalize_embeddings: bool, **kwargs) -> ndarray:
+    """Queues the content on the inference batcher for its model and settings, and waits for its vectors."""
+    future = inference_batching.submit(
+        key=batching_key, model_cache_key=model_cache_key,
+        content=[content] if isinstance(content, str) else content,
+        encode=lambda batch: _encode_in_batches(model_cache_key, batch, normalize_embeddings, **kwargs),
+        max_batch_size=_get_max_vectorise_batch_size(),
+        max_wait_seconds=inference_batching.get_max_wait_seconds()
+    )
+    return future.result()
+
+
+def get_inference_batching_stats() -> dict:
+    return inference_batching.get_stats()
+
+
 def _get_max_vectorise_batch_size() -> int:
     """Gets MARQO_MAX_VECTORISE_BATCH_SIZE from the environment, validates it before returning it."""
 
@@ -128,8 +183,13 @@ def _create_model_cache_key(model_name: str, device: str, model_properties: dict
                        model_properties.get('name', '') + "||" +
                        str(model_properties.get('dimensions', '')) + "||" +
                        model_properties.get('type', '') + "||" +
-                       str(model_properties.get('tokens', '')) + "||" +
-                       device)
+                       str(model_properties.get('tokens', '')) + "||")
+    # Models at a lower precision are cached alongside the full precision model. The device stays last, as
+    # eject_model() matches keys by their ending
+    cpu_precision = model_properties.get(ModelProperties.cpu_precision, cpu_precision_utils.FP32)
+    if cpu_precision != cpu_precision_utils.FP32:
+        model_cache_key += cpu_precision + "||"
+    model_cache_key += device
 
     return model_cache_key
 
@@ -141,39 +201,52 @@ def _update_available_models(model_cache_key: str, model_name: str, validated_mo
     """
     if model_cache_key not in available_models:
         model_size = get_model_size(model_name, validated_model_properties)
-        if lock.locked():
-            raise ModelCacheManagementError("Request rejected, as this request attempted to update the model cache, while "
-                                            "another request was updating the model cache at the same time.\n "
-                                            "Please wait for 10 seconds and send the request again.\n "
-                                            "Marqo's documentation can be found here: `https://docs.marqo.ai/latest/`")
         with lock:
+            if model_cache_key in models_being_loaded:
+                raise ModelCacheManagementError("Request rejected, as this request attempted to load a model that "
+                                                "another request is loading at the same time.\n "
+                                                "Please wait for 10 seconds and send the request again.\n "
+                                                "Marqo's documentation can be found here: `https://docs.marqo.ai/latest/`")
+            if model_cache_key in available_models:
+                # Loaded by another request since it was checked
+                available_models[model_cache_key][AvailableModelsKey.most_recently_used_time] = datetime.datetime.now()
+                return
             _validate_model_into_device(model_name, validated_model_properties, device,
                                        calling_func=_update_available_models.__name__)
-            try:
-                most_recently_used_time = datetime.datetime.now()
+            # The model's memory is reserved while it loads, so models can load at the same time
+            models_being_loaded[model_cache_key] = model_size
+        try:
+            # Downloading, deserialising and moving the model to the device happen outside the lock
+            model = _load_model(
+                model_name, validated_model_properties,
+                device=device,
+                calling_func=_update_available_models.__name__,
+                model_auth=model_auth
+            )
+        except Exception as e:
+            logger.error(f"Error loading model {model_name} on device {device} with normalization={normalize_embeddings}. \n"
+                         f"Error message is {str(e)}")
+
+            if isinstance(e, ModelDownloadError):
+                raise e
+            raise ModelLoadError(
+                f"Unable to load model={model_name} on device={device} with normalization={normalize_embeddings}. "
+                f"If you are trying to load a custom model, "
+                f"please check that model_properties={validated_model_properties} is correct "
+                f"and Marqo has access to the weights file.")
+        else:
+            most_recently_used_time = datetime.datetime.now()
+            with lock:
                 available_models[model_cache_key] = {
-                    AvailableModelsKey.model: _load_model(
-                        model_name, validated_model_properties,
-                        device=device,
-                        calling_func=_update_available_models.__name__,
-                        model_auth=model_auth
-                    ),
+                    AvailableModelsKey.model: model,
                     AvailableModelsKey.most_recently_used_time: most_recently_used_time,
                     AvailableModelsKey.model_size: model_size
                 }
-                logger.info(
-                    f'loaded {model_name} on device {device} with normalization={normalize_embeddings} at time={most_recently_used_time}.')
-            except Exception as e:
-                logger.error(f"Error loading model {model_name} on device {device} with normalization={normalize_embeddings}. \n"
-                             f"Error message is {str(e)}")
-
-                if isinstance(e, ModelDownloadError):
-                    raise e
-                raise ModelLoadError(
-                    f"Unable to load model={model_name} on device={device} with normalization={normalize_embeddings}. "
-                    f"If you are trying to load a custom model, "
-                    f"please check that model_properties={validated_model_properties} is correct "
-                    f"and Marqo has access to the weights file.")
+            logger.info(
+                f'loaded {model_name} on device {device} with normalization={normalize_embeddings} at time={most_recently_used_time}.')
+        finally:
+            with lock:
+                models_being_loaded.pop(model_cache_key, None)
 
     else:
         most_recently_used_time = datetime.datetime.now()
@@ -218,6 +291,8 @@ def _validate_model_properties(model_name: str, model_properties: dict) -> dict:
                                                   f"please update your model properties with required key `{key}`"
                                                   f"check `https://docs.marqo.ai/1.4.0/Models-Reference/dense_retrieval/` for more info.")
 
+        cpu_precision_utils.get_cpu_precision(model_properties)
+
     else:
         model_properties = get_model_properties_from_registry(model_name)
 
@@ -287,10 +362,12 @@ def _check_memory_threshold_for_model(device: str, model_size: Union[float, int]
         torch.cuda.empty_cache()
         used_memory = sum([available_models[key].get("model_size", constants.DEFAULT_MODEL_SIZE) for key, values in
                            available_models.items() if key.endswith(device)])
+        used_memory += sum([size for key, size in models_being_loaded.items() if key.endswith(device)])
         threshold = float(read_env_vars_and_defaults(EnvVars.MARQO_MAX_CUDA_MODEL_MEMORY))
     elif device.startswith("cpu"):
         used_memory = sum([available_models[key].get("model_size", constants.DEFAULT_MODEL_SIZE) for key, values in
                            available_models.items() if key.endswith("cpu")])
+        used_memory += sum([size for key, size in models_being_loaded.items() if key.endswith("cpu")])
         threshold = float(read_env_vars_and_defaults(EnvVars.MARQO_MAX_CPU_MODEL_MEMORY))
     else:
         raise ModelCacheManagementError(
@@ -355,7 +432,8 @@ def _load_model(
         max_seq_length=max_sequence_length, model_properties=model_properties, model_auth=model_auth
     )
     model.load()
-    return model
+    return cpu_precision_utils.apply_cpu_precision(
+        model, cpu_precision_utils.get_cpu_precision(model_properties), device)
 
 
 def clear_loaded_models() -> None:
@@ -5,15 +5,20 @@ from statistics import mode
 import torch
 import os
 import onnxruntime
+import transformers
 from transformers import AutoModel, AutoTokenizer
 from pathlib import Path
 
 from marqo.s2_inference.types import *
 from marqo.s2_inference.logger import get_logger
 from marqo.s2_inference.configs import ModelCache
+from marqo.s2_inference import onnx_session
 
 logger = get_logger(__name__)
 
+# The ONNX version models are exported to
+ONNX_OPSET_VERSION = 11
+
 
 
 class SBERT_ONNX(object):
@@ -56,7 +61,8 @@ class SBERT_ONNX(object):
         self._get_onnx_provider()
 
     def load(self) -> None:
-        """this does all the steps to get the onnx model
+        """this does all the steps to get the onnx model. The pytorch model is only loaded if it hasn't already
+        been exported
         """
         self._prepare()
         self._convert_to_onnx()
@@ -74,7 +80,10 @@ class SBERT_ONNX(object):
             self.cache_folder = ModelCache.torch_cache_path
 
         if self.onnx_model_name is None:
-            self.onnx_model_name = f"{os.path.basename(self.model_name_or_path.replace('/', '_'))}.onnx"
+            # The exported graph depends on the versions it was exported with, so a new export is made if they change
+            export_versions = f"opset{ONNX_OPSET_VERSION}-torch{torch.__version__}-transformers{transformers.__version__}"
+            self.onnx_model_name = (f"{os.path.basename(self.model_name_or_path.replace('/', '_'))}-"
+                                    f"{export_versions.replace('+', '_')}.onnx")
     
         self.export_model_name = os.path.join(self.onnx_folder, f"{self.onnx_model_name}") 
 
@@ -94,10 +103,14 @@ class SBERT_ONNX(object):
         logger.info(f"onnx_provider:{self.fast_onnxprovider}")
 
     def _prepare(self) -> None:
-        """load the model and put it in eval mode
+        """load the tokenizer
         """
         self.tokenizer = AutoTokenizer.from_pretrained(
             self.model_name_or_path, do_lower_case=self.do_lower_case)
+
+    def _load_torch_model(self) -> None:
+        """load the model and put it in eval mode
+        """
         self.model = AutoModel.from_pretrained(
             self.model_name_or_path)
 
@@ -112,34 +125,35 @@ class SBERT_ONNX(object):
         https://github.com/microsoft/onnxruntime/blob/master/onnxruntime/python/tools/transformers/bert_perf_test.py
         """
 
-        sess_options = onnxruntime.SessionOptions()
-        # sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
-        self.session = onnxruntime.InferenceSession(
-            self.export_model_name, sess_options, providers=[self.fast_onnxprovider])
+        self.session = onnx_session.create_session(self.export_model_name, providers=[self.fast_onnxprovider])
 
         logger.info(f"loaded session {self.session.get_providers()}")
 
     def _convert_to_onnx(self) -> None:
-        """converts from pytorch to onnx
+        """converts from pytorch to onnx, unless the model has already been exported
         """
-        st = ['hello, how are you']
-        inputs = self.tokenizer(
-            st,
-            padding=True,
-            truncation=True,
-            max_length=self.max_seq_length,
-            return_tensors="pt")
-
         if self.enable_overwrite or not os.path.exists(self.export_model_name):
+            if self.model is None:
+                self._load_torch_model()
+            st = ['hello, how are you']
+            inputs = self.tokenizer(
+                st,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="pt")
+
+            # Exported to a temporary file first, so a partly written export is never loaded
+            temp_model_name = f"{self.export_model_name}.{os.getpid()}.tmp"
             with torch.no_grad():
                 symbolic_names = {0: 'batch_size', 1: 'max_seq_len'}
                 torch.onnx.export(self.model,                                            # model being run
                                   # model input (or a tuple for multiple inputs)
                                   args=tuple(inputs.values()),
                                   # where to save the model (can be a file or file-like object)
-                                  f=self.export_model_name,
+                                  f=temp_model_name,
                                   # the ONNX version to export the model to
-                                  opset_version=11,
+                                  opset_version=ONNX_OPSET_VERSION,
                                   # whether to execute constant folding for optimization
                                   do_constant_folding=True,
                                   input_names=['input_ids',                         # the model's input names
@@ -152,6 +166,7 @@ class SBERT_ONNX(object):
                                                 'token_type_ids': symbolic_names,
                                                 'start': symbolic_names,
                                                 'end': symbolic_names})
+            os.replace(temp_model_name, self.export_model_name)
             logger.info(f"Model exported at: {self.export_model_name}")
 
             # from onnxruntime.transformers import optimizer
@@ -209,7 +224,8 @@ class SBERT_ONNX(object):
         )
         ort_inputs = {k: v.cpu().numpy() for k, v in inputs.items()}
 
-        ort_outputs = self.session.run(None, ort_inputs)
+        # Only the token embeddings are needed, not the pooler output
+        ort_outputs = onnx_session.run(self.session, ort_inputs, output_names=[self.session.get_outputs()[0].name])
         result = self.mean_pooling(token_embeddings=torch.FloatTensor(ort_outputs[0]),
                                                         attention_mask=inputs.get('attention_mask'))
         if normalize:
@@ -0,0 +1,169 @@
+"""Optional on-disk cache of model weights, converted to safetensors.
+
+Enabled by setting MARQO_WEIGHTS_CACHE_DIR. The first time a model is loaded, its weights are written to the cache
+as a safetensors file, keyed by the model it was loaded as (e.g. `open_clip||ViT-B-32||laion2b_s34b_b79k`). Later
+loads, including those of other processes, build the model's architecture without its pretrained weights and read
+the weights from the cache instead of downloading and unpickling the original checkpoint. That is all the cache
+saves: the weights are copied from the file into the model's own memory, so each process loading a model still holds
+a full copy of its weights.
+
+Weights are only cached for models loaded by name; models loaded from a custom path, url or model_location are not.
+Files are written atomically, and a file that can't be read, or whose weights don't match the model, is removed, so
+the model is loaded as usual and the file is written again. Errors building the model itself (e.g. a network error
+fetching its config) aren't the file's fault, and don't remove it. Cached weights aren't updated if a model's upstream weights change: clear the directory to
+pick up new weights.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Callable, Dict, Optional
+
+import safetensors.torch
+import torch
+from safetensors import safe_open
+
+from marqo.s2_inference.logger import get_logger
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults
+
+logger = get_logger(__name__)
+
+WEIGHTS_FILE_EXTENSION = ".safetensors"
+# The metadata field holding the key a file was written for, so hash collisions are detected
+KEY_METADATA_FIELD = "marqo_weights_key"
+_TEMP_FILE_PREFIX = ".tmp"
+
+
+def get_cache_dir() -> Optional[str]:
+    """Returns the directory of the weights cache, or None if the weights cache is disabled."""
+    return read_env_vars_and_defaults(EnvVars.MARQO_WEIGHTS_CACHE_DIR)
+
+
+def is_enabled() -> bool:
+    return get_cache_dir() is not None
+
+
+def weights_path(key: str) -> Optional[str]:
+    """Returns the path of the weights file for the key, or None if the weights cache is disabled."""
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    return os.path.join(cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + WEIGHTS_FILE_EXTENSION)
+
+
+def _cached_weights_path(key: str) -> Optional[str]:
+    """Returns the path of the weights file for the key, or None if it isn't cached."""
+    path = weights_path(key)
+    if path is None or not os.path.isfile(path):
+        return None
+    try:
+        with safe_open(path, framework="pt") as f:
+            metadata = f.metadata() or dict()
+    except Exception as e:
+        _remove_invalid_file(key, path, e)
+        return None
+    if metadata.get(KEY_METADATA_FIELD) != key:
+        return None
+    return path
+
+
+def load_state_dict(key: str, device: str = "cpu") -> Optional[Dict[str, torch.Tensor]]:
+    """Returns the cached weights of the key, read onto the device, or None if they aren't cached."""
+    path = _cached_weights_path(key)
+    if path is None:
+        return None
+    try:
+        return safetensors.torch.load_file(path, device=device)
+    except Exception as e:
+        _remove_invalid_file(key, path, e)
+        return None
+
+
+def load_model_from_state_dict(key: str, build_model: Callable[[Dict[str, torch.Tensor]], torch.nn.Module]
+                               ) -> Optional[torch.nn.Module]:
+    """Builds a model from the cached weights of the key, for models whose architecture is inferred from their weights.
+
+    Args:
+        key: the key the weights were saved with
+        build_model: returns the model, with its weights, built from the cached state dict (read onto cpu)
+
+    Returns:
+        The model built by build_model, or None if the weights aren't cached or a model can't be built from them.
+        The file is only removed if it can't be read: a model that can't be built is loaded from the original
+        checkpoint, and its weights are then written over the file.
+    """
+    path = _cached_weights_path(key)
+    if path is None:
+        return None
+    try:
+        state_dict = safetensors.torch.load_file(path, device="cpu")
+    except Exception as e:
+        _remove_invalid_file(key, path, e)
+        return None
+    try:
+        model = build_model(state_dict)
+    except Exception as e:
+        logger.warning(f"Could not build `{key}` from its cached weights in `{path}`, so it will be loaded from the "
+                       f"original checkpoint. Reason: {e}")
+        return None
+    logger.info(f"Loaded the weights of `{key}` from the weights cache")
+    return model
+
+
+def load_model(key: str, build_model: Callable[[], torch.nn.Module], device: str) -> Optional[torch.nn.Module]:
+    """Loads the cached weights of the key into a model.
+
+    Args:
+        key: the key the weights were saved with
+        build_model: returns the model's architecture, on the device. Its weights are overwritten, so don't need to
+            be initialised. Only called if the weights are cached. Its errors are raised
+        device: the device the weights are read onto
+
+    Returns:
+        The model built by build_model, with the cached weights, or None if they aren't cached or don't fit it.
+    """
+    path = _cached_weights_path(key)
+    if path is None:
+        return None
+    model = build_model()
+    try:
+        # Strict, so the weights must match the architecture exactly
+        safetensors.torch.load_model(model, path, strict=True, device=device)
+    except Exception as e:
+        _remove_invalid_file(key, path, e)
+        return None
+    logger.info(f"Loaded the weights of `{key}` from the weights cache")
+    return model
+
+
+def save_model(key: str, model: torch.nn.Module) -> None:
+    """Writes the model's weights to the cache under the key. Does nothing if the weights cache is disabled.
+
+    Errors are logged rather than raised, as the model has already been loaded."""
+    path = weights_path(key)
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=_TEMP_FILE_PREFIX,
+                                         suffix=WEIGHTS_FILE_EXTENSION, delete=False) as f:
+            temp_path = f.name
+        try:
+            safetensors.torch.save_model(model, temp_path, metadata={KEY_METADATA_FIELD: key})
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    except Exception as e:
+        logger.warning(f"Could not write the weights of `{key}` to the weights cache. Reason: {e}")
+        return
+    logger.info(f"Saved the weights of `{key}` to the weights cache")
+
+
+def _remove_invalid_file(key: str, path: str, error: Exception) -> None:
+    logger.warning(f"Could not load the cached weights of `{key}` from `{path}`, so they will be loaded from the "
+                   f"original checkpoint. Reason: {error}")
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,15 +1,11 @@
 """Functions used to fulfill the add_documents endpoint"""
-import copy
-from contextlib import contextmanager
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
 
-import math
-import threading
-import random
-
-from typing import List, Optional, Tuple, ContextManager, Union
+from typing import AsyncContextManager, List, Optional, Tuple, ContextManager, Union
 import PIL
 from PIL.ImageFile import ImageFile
-from marqo.s2_inference import clip_utils
+from marqo.s2_inference import clip_utils, image_download
 from marqo.tensor_search.telemetry import RequestMetricsStore, RequestMetrics
 import marqo.errors as errors
 from marqo.tensor_search import utils
@@ -18,17 +14,61 @@ from marqo.tensor_search import constants
 from marqo.tensor_search.models.index_info import IndexInfo
 
 
+def _get_image_urls(docs: List[dict], tensor_fields: Optional[List[str]],
+                    non_tensor_fields: Optional[List[str]]) -> List[str]:
+    """Finds the image URLs/pointers in the tensor fields of docs, including the values of multimodal fields.
+
+    Returns:
+        The unique image pointers, in the order they first appear
+    """
+    urls = dict()
+    for doc in docs:
+        for field, value in doc.items():
+            if not utils.is_tensor_field(field, tensor_fields, non_tensor_fields):
+                continue
+            if isinstance(value, str) and clip_utils._is_image(value):
+                urls[value] = None
+            # For multimodal tensor combination
+            elif isinstance(value, dict):
+                for sub_field in value.values():
+                    if isinstance(sub_field, str) and clip_utils._is_image(sub_field):
+                        urls[sub_field] = None
+    return list(urls)
+
+
+def _load_images(urls: List[str], image_download_headers: dict, metric_obj: RequestMetrics) -> dict:
+    """Loads each image, one after the other.
+
+    Returns:
+        A dict of image pointer to PIL image, or to the UnidentifiedImageError raised while loading it
+    """
+    images = dict()
+    for url in urls:
+        try:
+            images[url] = clip_utils.load_image_from_path(url, image_download_headers, metrics_obj=metric_obj)
+        except PIL.UnidentifiedImageError as e:
+            images[url] = e
+            metric_obj.increment_counter(f"{url}.UnidentifiedImageError")
+    return images
+
+
+def _validate_tensor_fields_args(tensor_fields: Optional[List[str]], non_tensor_fields: Optional[List[str]]) -> None:
+    if tensor_fields is not None and non_tensor_fields is not None \
+            or tensor_fields is None and non_tensor_fields is None:
+        raise errors.InternalError("Must provide exactly one of tensor_fields or non_tensor_fields")
+
+
 def threaded_download_images(allocated_docs: List[dict], image_repo: dict, tensor_fields: Optional[List[str]],
                              non_tensor_fields: Optional[List[str]], image_download_headers: dict,
                              metric_obj: Optional[RequestMetrics] = None) -> None:
-    """A thread calls this function to download images for its allocated documents
+    """Downloads the images of the allocated documents in the calling thread, one after the other
 
     This should be called only if treat URLs as images is True.
 
     Args:
-        allocated_docs: docs with images to be downloaded by this thread,
-        image_repo: dictionary that will be mutated by this thread. It will add PIL images
-            as values and the URLs as keys
+        allocated_docs: docs with images to be downloaded,
+        image_repo: dictionary that will be mutated by this function. It will add PIL images
+            as values and the URLs as keys. URLs already in the image_repo are not downloaded again.
         tensor_fields: A tuple of tensor_fields. Images will be downloaded for these fields only. Cannot be provided
             at the same time as `non_tensor_fields`.
         non_tensor_fields: A tuple of non_tensor_fields. No images will be downloaded for
@@ -51,59 +91,27 @@ def threaded_download_images(allocated_docs: List[dict], image_repo: dict, tenso
         take place at API level and such invalid arguments are not expected to reach this function.
 
     """
+    _validate_tensor_fields_args(tensor_fields, non_tensor_fields)
 
-    if tensor_fields is not None and non_tensor_fields is not None \
-            or tensor_fields is None and non_tensor_fields is None:
-        raise errors.InternalError("Must provide exactly one of tensor_fields or non_tensor_fields")
-
-    # Generate pseudo-unique ID for thread metrics.
-    _id = hash("".join([d.get("_id", str(random.getrandbits(64))) for d in allocated_docs])) % 1000
-    _id = f"image_download.{_id}"
-    TIMEOUT_SECONDS=3
     if metric_obj is None: # Occurs predominately in testing.
         metric_obj = RequestMetricsStore.for_request()
         RequestMetricsStore.set_in_request(metrics=metric_obj)
 
-    with metric_obj.time(f"{_id}.thread_time"):
-        for doc in allocated_docs:
-            for field in list(doc):
-                if not utils.is_tensor_field(field, tensor_fields, non_tensor_fields):
-                    continue
-                if isinstance(doc[field], str) and clip_utils._is_image(doc[field]):
-                    if doc[field] in image_repo:
-                        continue
-                    try:
-                        image_repo[doc[field]] = clip_utils.load_image_from_path(doc[field], image_download_headers, timeout=TIMEOUT_SECONDS, metrics_obj=metric_obj)
-                    except PIL.UnidentifiedImageError as e:
-                        image_repo[doc[field]] = e
-                        metric_obj.increment_counter(f"{doc.get(field, '')}.UnidentifiedImageError")
-                        continue
-                # For multimodal tensor combination
-                elif isinstance(doc[field], dict):
-                    for sub_field in list(doc[field].values()):
-                        if isinstance(sub_field, str) and clip_utils._is_image(sub_field):
-                            if sub_field in image_repo:
-                                continue
-                            try:
-                                image_repo[sub_field] = clip_utils.load_image_from_path(
-                                    sub_field,
-                                    image_download_headers,
-                                    timeout=TIMEOUT_SECONDS,
-                                    metrics_obj=metric_obj
-                                )
-                            except PIL.UnidentifiedImageError as e:
-                                image_repo[sub_field] = e
-                                metric_obj.increment_counter(f"{doc.get(field, '')}.UnidentifiedImageError")
-                                continue
+    urls = [url for url in _get_image_urls(allocated_docs, tensor_fields, non_tensor_fields) if url not in image_repo]
+    image_repo.update(_load_images(urls, image_download_headers, metric_obj))
 
 
 @contextmanager
 def download_images(docs: List[dict], thread_count: int, tensor_fields: Optional[List[str]],
                     non_tensor_fields: Optional[List[str]], image_download_headers: dict) -> ContextManager[dict]:
     """Concurrently downloads images from each doc, storing them into the image_repo dict
+
+    Each unique image pointer is downloaded once, even if it appears in several docs or multimodal fields. Downloads
+    run in the process-wide image download pool (see marqo.s2_inference.image_download), sharing its connections.
+
     Args:
-        docs: docs with images to be downloaded. These will be allocated to each thread
-        thread_count: number of threads to spin up
+        docs: docs with images to be downloaded.
+        thread_count: max number of images of these docs that are downloaded concurrently
         tensor_fields: A tuple of tensor_fields. Images will be downloaded for these fields only. Cannot be provided
             at the same time as `non_tensor_fields`.
         non_tensor_fields: A tuple of non_tensor_fields. No images will be downloaded for
@@ -118,33 +126,22 @@ def download_images(docs: List[dict], thread_count: int, tensor_fields: Optional
         - InternalError if both or neither of tensor_fields and non_tensor_fields are provided. This validation should
         take place at API level and such invalid arguments are not expected to reach this function.
     """
+    _validate_tensor_fields_args(tensor_fields, non_tensor_fields)
 
-    if tensor_fields is not None and non_tensor_fields is not None \
-            or tensor_fields is None and non_tensor_fields is None:
-        raise errors.InternalError("Must provide exactly one of tensor_fields or non_tensor_fields")
-
-    docs_per_thread = math.ceil(len(docs)/thread_count)
-    copied = copy.deepcopy(docs)
     image_repo = dict()
-
     try:
-        m = [RequestMetrics() for i in range(thread_count)]
-        thread_allocated_docs = [copied[i: i + docs_per_thread] for i in range(len(copied))[::docs_per_thread]]
-        threads = [threading.Thread(target=threaded_download_images, args=(allocation, image_repo,
-                                                                           tensor_fields, non_tensor_fields,
-                                                                           image_download_headers, m[i]))
-                   for i, allocation in enumerate(thread_allocated_docs)]
+        # RequestMetrics aren't thread safe, so each group of downloads records into its own, merged below.
+        thread_metrics = []
 
-        for th in threads:
-            th.start()
+        def load_group(urls: List[str]) -> dict:
+            metric_obj = RequestMetrics()
+            thread_metrics.append(metric_obj)
+            return _load_images(urls, image_download_headers, metric_obj)
 
-        for th in threads:
-            th.join()
+        image_repo = image_download.map_in_pool(
+            load_group, _get_image_urls(docs, tensor_fields, non_tensor_fields), max_tasks=thread_count)
 
-        # Fix up metric_obj to make it not mention thread-ids
-        metric_obj = RequestMetricsStore.for_request()
-        metric_obj = RequestMetrics.reduce_from_list([metric_obj] + m)
-        metric_obj.times = reduce_thread_metrics(metric_obj.times)
+        RequestMetrics.reduce_from_list([RequestMetricsStore.for_request()] + thread_metrics)
         yield image_repo
     finally:
         for p in image_repo.values():
@@ -152,40 +149,40 @@ def download_images(docs: List[dict], thread_count: int, tensor_fields: Optional
                 p.close()
 
 
-def reduce_thread_metrics(data):
-    """Reduce the metrics from each thread, as if they were run in a single thread.
-
-    e.g.
-    ```
-    {
-        "image_download.700.thread_time": 1373.271582997404,
-        "image_download.700.https://www.ai-nc.com/images/pages/heat-map.png": 52.985392,
-        "image_download.729.thread_time": 53.297404,
-        "image_download.729.https://www.ai-nc.com/images/pages/heat-map.png": 2052.617332985392,
-    }
-    ```
-    Becomes
-    ```
-    {
-        "image_download.thread_time": [1373.271582997404, 53.297404],
-        "image_download.https://www.ai-nc.com/images/pages/heat-map.png": [2052.617332985392, 52.985392],
-    }
-    ```
-    Only applies to times that start with `image_download`.
+@asynccontextmanager
+async def download_images_async(docs: List[dict], thread_count: int, tensor_fields: Optional[List[str]],
+                                non_tensor_fields: Optional[List[str]],
+                                image_download_headers: dict) -> AsyncContextManager[dict]:
+    """Concurrently downloads images from each doc on the running event loop, like download_images()
+
+    At most `thread_count` images of these docs are downloaded at once. No threads are used, so downloads waiting on
+    image hosts don't take threads from other requests.
+
+    Returns:
+         An image repo: a dict <image pointer>:<image data>, or the UnidentifiedImageError raised while loading it
     """
-    result = {}
-    for key, value in data.items():
-        if key.startswith("image_download."):
-            parts = key.split('.')
-            new_key = '.'.join(parts[0:1] + parts[2:]) if parts[1] != 'full_time' else key
-            if new_key in result:
-                if isinstance(result[new_key], list):
-                    result[new_key].append(value)
-                else:
-                    result[new_key] = [result[new_key], value]
-            else:
-                result[new_key] = value
-    return result
+    _validate_tensor_fields_args(tensor_fields, non_tensor_fields)
+
+    image_repo = dict()
+    try:
+        metric_obj = RequestMetricsStore.for_request()
+        semaphore = asyncio.Semaphore(max(1, thread_count))
+
+        async def load(url: str) -> None:
+            async with semaphore:
+                try:
+                    image_repo[url] = await clip_utils.load_image_from_path_async(
+                        url, image_download_headers, metrics_obj=metric_obj)
+                except PIL.UnidentifiedImageError as e:
+                    image_repo[url] = e
+                    metric_obj.increment_counter(f"{url}.UnidentifiedImageError")
+
+        await asyncio.gather(*[load(url) for url in _get_image_urls(docs, tensor_fields, non_tensor_fields)])
+        yield image_repo
+    finally:
+        for p in image_repo.values():
+            if isinstance(p, ImageFile):
+                p.close()
 
 
 def create_chunk_metadata(raw_document: dict) -> dict:
@@ -0,0 +1,107 @@
+"""
+Adds docs received as an NDJSON stream, for the streaming add_documents endpoint.
+
+The docs are added in micro-batches as the request body is received, through tensor_search.add_documents_pipelined(),
+so neither the body nor its docs are ever held in memory at once. The result of each doc is written, as a line of
+NDJSON, to a spooled temporary file that is moved to disk once it grows past RESULTS_SPOOL_MAX_MEMORY, and the
+results are sent back once the body has been received: the request body and a streamed response can't be read and
+written at the same time through the API's middleware.
+"""
+import asyncio
+import contextvars
+import json
+import tempfile
+from timeit import default_timer as timer
+from typing import Any, AsyncIterator, BinaryIO, Iterator, List
+
+from marqo.config import Config
+from marqo.tensor_search import tensor_search, utils
+from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+from marqo.tensor_search.models.indexing_job_objects import IndexingJobParams
+from marqo.tensor_search.tensor_search_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Results beyond this many bytes are spooled to disk
+RESULTS_SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+async def add_documents(config: Config, params: IndexingJobParams, doc_batches: AsyncIterator[List[Any]]) -> BinaryIO:
+    """Adds the docs of each batch, as it is received, with params.
+
+    Args:
+        config: Config object
+        params: the add_documents() parameters each batch is added with
+        doc_batches: the docs of the request body, in batches of params.batch_size (see api_utils.parse_ndjson())
+
+    Returns:
+        A file, positioned at its start, holding the add_documents() item of each doc as a line of NDJSON, followed by
+        a summary line: {"summary": {"errors", "processedDocuments", "failedDocuments", "processingTimeMs",
+        "index_name"}}. If an error stopped the docs from being added, the summary has its body as "error".
+
+    Raises:
+        the error that stopped the docs from being added, if no docs were added before it
+    """
+    loop = asyncio.get_running_loop()
+
+    async def next_batch():
+        try:
+            return await doc_batches.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def batches() -> Iterator[AddDocsParams]:
+        # Runs in the pipeline's thread, receiving each batch on the event loop
+        while True:
+            docs = asyncio.run_coroutine_threadsafe(next_batch(), loop).result()
+            if docs is None:
+                return
+            yield params.to_add_docs_params(docs)
+
+    results = tempfile.SpooledTemporaryFile(max_size=RESULTS_SPOOL_MAX_MEMORY)
+    try:
+        # The batches are added in the caller's request metrics
+        summary = await loop.run_in_executor(
+            None, contextvars.copy_context().run, _add_batches, config, params.index_name, batches(), results)
+    except BaseException:
+        results.close()
+        raise
+
+    results.write(_to_ndjson_line({"summary": summary}))
+    results.seek(0)
+    return results
+
+
+def _add_batches(config: Config, index_name: str, batches: Iterator[AddDocsParams], results: BinaryIO) -> dict:
+    """Adds the batches, writing each doc's result to results. Returns the summary of the results."""
+    t0 = timer()
+    processed_count = 0
+    failed_count = 0
+    error = None
+    try:
+        for response in tensor_search.add_documents_pipelined(config=config, batches=batches):
+            for item in response["items"]:
+                results.write(_to_ndjson_line(item))
+                processed_count += 1
+                if "error" in item:
+                    failed_count += 1
+    except Exception as e:
+        if processed_count == 0:
+            raise
+        logger.warning(f"Streamed add documents request stopped after {processed_count} documents. Reason: {e}")
+        error = utils.format_error(e)
+
+    summary = {
+        "errors": failed_count > 0 or error is not None,
+        "processedDocuments": processed_count,
+        "failedDocuments": failed_count,
+        "processingTimeMs": (timer() - t0) * 1000,
+        "index_name": index_name,
+    }
+    if error is not None:
+        summary["error"] = error
+    return summary
+
+
+def _to_ndjson_line(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8") + b"\n"
@@ -30,19 +30,21 @@ from typing import List, Dict, Optional
 import pydantic
 from fastapi import FastAPI, Query
 from fastapi import Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 from marqo import config
 from marqo import version
-from marqo.errors import InvalidArgError, MarqoWebError, MarqoError, BadRequestError
-from marqo.tensor_search import tensor_search
+from marqo.errors import InvalidArgError, MarqoWebError, MarqoError, BadRequestError, IndexingJobNotFoundError
+from marqo.tensor_search import add_docs_stream, async_tensor_search, indexing_jobs, tensor_search
 from marqo.tensor_search.backend import get_index_info
 from marqo.tensor_search.enums import RequestType
 from marqo.tensor_search.models.add_docs_objects import (AddDocsParams, ModelAuth,
                                                          AddDocsBodyParams)
 from marqo.tensor_search.models.api_models import BulkSearchQuery, SearchQuery
+from marqo.tensor_search import on_start_script
 from marqo.tensor_search.on_start_script import on_start
-from marqo.tensor_search.telemetry import RequestMetricsStore, TelemetryMiddleware
+from marqo.tensor_search.telemetry import METRICS_AGGREGATOR, RequestMetricsStore, TelemetryMiddleware
 from marqo.tensor_search.throttling.redis_throttle import throttle
 from marqo.tensor_search.utils import add_timing
 from marqo.tensor_search.web import api_validation, api_utils
@@ -168,31 +170,33 @@ def bulk_search(query: BulkSearchQuery, device: str = Depends(api_validation.val
 
 @app.post("/indexes/{index_name}/search")
 @throttle(RequestType.SEARCH)
-def search(search_query: SearchQuery, index_name: str, device: str = Depends(api_validation.validate_device),
-           marqo_config: config.Config = Depends(generate_config)):
-    
+async def search(search_query: SearchQuery, index_name: str, device: str = Depends(api_validation.validate_device),
+                 marqo_config: config.Config = Depends(generate_config)):
+    search_kwargs = dict(
+        config=marqo_config, text=search_query.q,
+        index_name=index_name, highlights=search_query.showHighlights,
+        searchable_attributes=search_query.searchableAttributes,
+        search_method=search_query.searchMethod,
+        result_count=search_query.limit, offset=search_query.offset,
+        reranker=search_query.reRanker,
+        filter=search_query.filter, device=device,
+        attributes_to_retrieve=search_query.attributesToRetrieve, boost=search_query.boost,
+        image_download_headers=search_query.image_download_headers,
+        context=search_query.context,
+        score_modifiers=search_query.scoreModifiers,
+        model_auth=search_query.modelAuth,
+        text_query_prefix=search_query.textQueryPrefix,
+        hybrid_parameters=search_query.hybridParameters
+    )
     with RequestMetricsStore.for_request().time(f"POST /indexes/{index_name}/search"):
-        return tensor_search.search(
-            config=marqo_config, text=search_query.q,
-            index_name=index_name, highlights=search_query.showHighlights,
-            searchable_attributes=search_query.searchableAttributes,
-            search_method=search_query.searchMethod,
-            result_count=search_query.limit, offset=search_query.offset,
-            reranker=search_query.reRanker, 
-            filter=search_query.filter, device=device,
-            attributes_to_retrieve=search_query.attributesToRetrieve, boost=search_query.boost,
-            image_download_headers=search_query.image_download_headers,
-            context=search_query.context,
-            score_modifiers=search_query.scoreModifiers,
-            model_auth=search_query.modelAuth,
-            text_query_prefix=search_query.textQueryPrefix
-        )
-
+        if async_tensor_search.is_enabled():
+            return await async_tensor_search.search(**search_kwargs)
+        return await run_in_threadpool(tensor_search.search, **search_kwargs)
 
 
 @app.post("/indexes/{index_name}/documents")
 @throttle(RequestType.INDEX)
-def add_or_replace_documents(
+async def add_or_replace_documents(
         request: Request,
         body: typing.Union[AddDocsBodyParams, List[Dict]],
         index_name: str,
@@ -219,12 +223,110 @@ def add_or_replace_documents(
                                                              query_parameters=request.query_params)
 
     with RequestMetricsStore.for_request().time(f"POST /indexes/{index_name}/documents"):
-        return tensor_search.add_documents(
-            config=marqo_config, add_docs_params=add_docs_params
+        if async_tensor_search.is_enabled():
+            return await async_tensor_search.add_documents(config=marqo_config, add_docs_params=add_docs_params)
+        return await run_in_threadpool(
+            tensor_search.add_documents, config=marqo_config, add_docs_params=add_docs_params
         )
 
 
 
+@app.post("/indexes/{index_name}/documents/stream")
+@throttle(RequestType.INDEX)
+async def add_documents_stream(
+        request: Request,
+        index_name: str,
+        refresh: bool = False,
+        batch_size: Optional[int] = None,
+        marqo_config: config.Config = Depends(generate_config),
+        tensor_fields: Optional[List[str]] = Query(default=None),
+        non_tensor_fields: Optional[List[str]] = Query(default=None),
+        device: str = Depends(api_validation.validate_device),
+        use_existing_tensors: Optional[bool] = False,
+        image_download_headers: Optional[dict] = Depends(
+            api_utils.decode_image_download_headers
+        ),
+        model_auth: Optional[ModelAuth] = Depends(
+            api_utils.decode_query_string_model_auth
+        ),
+        mappings: Optional[dict] = Depends(api_utils.decode_mappings)):
+    """add_documents endpoint for docs sent as NDJSON (Content-Type: application/x-ndjson), with the parameters in
+    the query string.
+
+    The docs are added in batches of batch_size as they are received, and the result of each doc is returned as a
+    line of NDJSON, followed by a summary line.
+    """
+    params = api_utils.indexing_job_params_orchestrator(
+        index_name=index_name, body=None, device=device, auto_refresh=refresh, batch_size=batch_size,
+        tensor_fields=tensor_fields, non_tensor_fields=non_tensor_fields, mappings=mappings, model_auth=model_auth,
+        image_download_headers=image_download_headers, use_existing_tensors=use_existing_tensors,
+        query_parameters=request.query_params)
+
+    with RequestMetricsStore.for_request().time(f"POST /indexes/{index_name}/documents/stream"):
+        results = await add_docs_stream.add_documents(
+            config=marqo_config, params=params,
+            doc_batches=api_utils.parse_ndjson(request.stream(), batch_size=params.batch_size))
+    return StreamingResponse(api_utils.iterate_and_close(results), media_type=api_utils.NDJSON_MEDIA_TYPE)
+
+
+@app.post("/indexes/{index_name}/documents/jobs", status_code=202)
+async def submit_add_documents_job(
+        request: Request,
+        index_name: str,
+        refresh: bool = False,
+        batch_size: Optional[int] = None,
+        marqo_config: config.Config = Depends(generate_config),
+        tensor_fields: Optional[List[str]] = Query(default=None),
+        non_tensor_fields: Optional[List[str]] = Query(default=None),
+        device: str = Depends(api_validation.validate_device),
+        use_existing_tensors: Optional[bool] = False,
+        image_download_headers: Optional[dict] = Depends(
+            api_utils.decode_image_download_headers
+        ),
+        model_auth: Optional[ModelAuth] = Depends(
+            api_utils.decode_query_string_model_auth
+        ),
+        mappings: Optional[dict] = Depends(api_utils.decode_mappings)):
+    """Queues docs to be added in the background, in batches of batch_size, returning the job's id straight away.
+
+    The body is either an add_documents body, or the docs as NDJSON (Content-Type: application/x-ndjson) with the
+    parameters in the query string. An NDJSON body is written to the queue as it is received.
+
+    Docs without an _id are given one when they are queued, so a batch added again when the job is resumed after
+    Marqo restarts overwrites its docs rather than adding them twice.
+    """
+    if api_utils.is_ndjson_request(request):
+        body = None
+    else:
+        body = await api_utils.read_add_docs_body(request)
+    job_params = api_utils.indexing_job_params_orchestrator(
+        index_name=index_name, body=body, device=device, auto_refresh=refresh, batch_size=batch_size,
+        tensor_fields=tensor_fields, non_tensor_fields=non_tensor_fields, mappings=mappings, model_auth=model_auth,
+        image_download_headers=image_download_headers, use_existing_tensors=use_existing_tensors,
+        query_parameters=request.query_params)
+    # Raises an IndexNotFoundError now, rather than once the job is processed
+    await run_in_threadpool(get_index_info, config=marqo_config, index_name=index_name)
+
+    job_queue = indexing_jobs.get_queue(marqo_config)
+    if body is not None:
+        job = await run_in_threadpool(job_queue.submit, params=job_params, docs=body.documents)
+    else:
+        with await run_in_threadpool(job_queue.create_job, params=job_params) as writer:
+            async for docs in api_utils.parse_ndjson(request.stream(), batch_size=job_params.batch_size):
+                await run_in_threadpool(writer.write, docs)
+        job = job_queue.get_job(writer.job.job_id)
+    return indexing_jobs.format_indexing_job_response(job)
+
+
+@app.get("/indexes/{index_name}/documents/jobs/{job_id}")
+def get_add_documents_job(index_name: str, job_id: str, marqo_config: config.Config = Depends(generate_config)):
+    """Returns the status and progress of an add documents job"""
+    job = indexing_jobs.get_queue(marqo_config).get_job(job_id)
+    if job.index_name != index_name:
+        raise IndexingJobNotFoundError(message=f"Add documents job `{job_id}` not found in index `{index_name}`.")
+    return indexing_jobs.format_indexing_job_response(job)
+
+
 @app.get("/indexes/{index_name}/documents/{document_id}")
 def get_document_by_id(index_name: str, document_id: str,
                              marqo_config: config.Config = Depends(generate_config),
@@ -281,6 +383,14 @@ def check_health(marqo_config: config.Config = Depends(generate_config)):
     return tensor_search.check_health(config=marqo_config)
 
 
+@app.get("/readiness")
+def check_readiness():
+    """Whether Marqo is ready to serve requests without loading the models it preloads. Responds with 503 while the
+    models are still loading (when MARQO_SERVE_BEFORE_MODELS_LOADED is "TRUE")."""
+    readiness = on_start_script.get_readiness()
+    return JSONResponse(content=readiness, status_code=200 if readiness["ready"] else 503)
+
+
 @app.get("/indexes/{index_name}/health")
 def check_index_health(index_name: str, marqo_config: config.Config = Depends(generate_config)):
     return tensor_search.check_index_health(config=marqo_config, index_name=index_name)
@@ -302,6 +412,11 @@ def get_loaded_models():
     return tensor_search.get_loaded_models()
 
 
+@app.get("/models/batching")
+def get_inference_batching_stats():
+    return tensor_search.get_inference_batching_stats()
+
+
 @app.delete("/models")
 def eject_model(model_name:str, model_device:str):
     return tensor_search.eject_model(model_name = model_name, device = model_device)
@@ -316,6 +431,18 @@ def get_cpu_info():
 def get_cuda_info():
     return tensor_search.get_cuda_info()
 
+
+@app.get("/backend/connection-pool")
+def get_backend_connection_pool_stats():
+    return tensor_search.get_backend_connection_pool_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Latency histograms and counters of each request stage, aggregated over all requests, in the Prometheus text
+    format."""
+    return PlainTextResponse(METRICS_AGGREGATOR.prometheus_text(), media_type="text/plain; version=0.0.4")
+
 # try these curl commands:
 
 # ADD DOCS:
@@ -0,0 +1,100 @@
+"""Async communication with Marqo-OS, for the async request path (see marqo.tensor_search.async_tensor_search)
+
+Each function sends the same request as its counterpart in backend or tensor_search, through AsyncHttpRequests.
+"""
+import json
+from typing import Dict, Iterable, List, Tuple
+
+from marqo._async_httprequests import AsyncHttpRequests
+from marqo.config import Config
+from marqo.tensor_search import backend, enums, utils
+from marqo.tensor_search.index_meta_cache import get_cache
+from marqo.tensor_search.models.index_info import IndexInfo
+
+
+async def get_index_info(config: Config, index_name: str, max_retry_attempts: int = None,
+                         max_retry_backoff_seconds: int = None) -> IndexInfo:
+    """Gets useful information about the index. Also updates the IndexInfo cache
+
+    Raises:
+        NonTensorIndexError: If the index's mapping doesn't conform to a Tensor Search index.
+        IndexNotFoundError: If index does not exist.
+    """
+    res = await AsyncHttpRequests(config).get(
+        path=F"{index_name}/_mapping",
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+    return backend._cache_index_info_from_mapping(index_name=index_name, res=res)
+
+
+async def add_customer_field_properties(config: Config, index_name: str,
+                                        customer_field_names: Iterable[Tuple[str, enums.OpenSearchDataType]],
+                                        multimodal_combination_fields: Dict[str, Iterable[Tuple[str, enums.OpenSearchDataType]]],
+                                        max_retry_attempts: int = None,
+                                        max_retry_backoff_seconds: int = None) -> dict:
+    """Adds new customer fields to index mapping.
+
+    Pushes the updated mapping to OpenSearch, and updates the local cache.
+    """
+    existing_info = get_cache().get(index_name)
+    if existing_info is None:
+        existing_info = await get_index_info(config=config, index_name=index_name)
+    body = backend._create_customer_field_properties_body(
+        customer_field_names=customer_field_names, multimodal_combination_fields=multimodal_combination_fields)
+
+    mapping_res = await AsyncHttpRequests(config).put(
+        path=F"{index_name}/_mapping",
+        body=json.dumps(body),
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+
+    backend._cache_customer_field_properties(
+        index_name=index_name, existing_info=existing_info, body=body, customer_field_names=customer_field_names,
+        multimodal_combination_fields=multimodal_combination_fields)
+    return mapping_res
+
+
+async def search(config: Config, index_name: str, body: dict, max_retry_attempts: int = None,
+                 max_retry_backoff_seconds: int = None) -> dict:
+    """Sends a `/_search` request to the index"""
+    return await AsyncHttpRequests(config).get(
+        path=f"{index_name}/_search",
+        body=body,
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+
+
+async def msearch(config: Config, body: List[Dict], max_retry_attempts: int = None,
+                  max_retry_backoff_seconds: int = None) -> dict:
+    """Sends a `/_msearch` request. body is a list of alternating headers and search bodies"""
+    return await AsyncHttpRequests(config).get(
+        path=F"_msearch",
+        body=utils.dicts_to_jsonl(body),
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+
+
+async def mget(config: Config, body: dict, max_retry_attempts: int = None,
+               max_retry_backoff_seconds: int = None) -> dict:
+    """Sends a `/_mget` request"""
+    return await AsyncHttpRequests(config).get(
+        path=f'_mget/',
+        body=body,
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+
+
+async def bulk(config: Config, serialised_body: str, auto_refresh: bool, max_retry_attempts: int = None,
+               max_retry_backoff_seconds: int = None) -> dict:
+    """Sends a `/_bulk` request. serialised_body is the JSON lines of the bulk actions"""
+    return await AsyncHttpRequests(config).post(
+        path="_bulk?refresh=true" if auto_refresh else "_bulk?refresh=false",
+        body=serialised_body,
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
@@ -0,0 +1,232 @@
+"""The async request path of search and add_documents, used by the API when MARQO_ENABLE_ASYNC_REQUEST_PATH is "TRUE"
+
+search() and add_documents() return the same results as their counterparts in tensor_search, sharing their
+validation, query creation and response formatting. They differ in how they wait:
+    - requests to Marqo-OS are sent on the event loop (see marqo.tensor_search.async_backend)
+    - images are downloaded on the event loop (see add_docs.download_images_async())
+    - vectorising, chunking and reranking run in the inference pool (see marqo.s2_inference.inference_executor)
+so a request waiting on Marqo-OS, an image host or a model doesn't hold a thread.
+"""
+from contextlib import AsyncExitStack
+from timeit import default_timer as timer
+from typing import Dict, Iterable, List, Optional, Union
+
+from marqo import errors
+from marqo.config import Config
+from marqo.s2_inference import inference_executor
+from marqo.tensor_search import add_docs, async_backend, index_meta_cache, tensor_search, utils, validation
+from marqo.tensor_search.enums import EnvVars, SearchMethod
+from marqo.tensor_search.enums import IndexSettingsField as NsField
+from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+from marqo.tensor_search.models.api_models import ScoreModifier
+from marqo.tensor_search.models.private_models import ModelAuth
+from marqo.tensor_search.models.search import HybridParameters, SearchContext
+from marqo.tensor_search.telemetry import RequestMetricsStore
+from marqo.tensor_search.tensor_search_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def is_enabled() -> bool:
+    return utils.read_env_vars_and_defaults(EnvVars.MARQO_ENABLE_ASYNC_REQUEST_PATH) == "TRUE"
+
+
+async def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = None,
+                 result_count: int = 3, offset: int = 0, highlights=True,
+                 search_method: Union[str, SearchMethod, None] = SearchMethod.TENSOR,
+                 searchable_attributes: Iterable[str] = None, verbose: int = 0,
+                 reranker: Union[str, Dict] = None, filter: str = None,
+                 attributes_to_retrieve: Optional[List[str]] = None,
+                 device: str = None, boost: Optional[Dict] = None,
+                 image_download_headers: Optional[Dict] = None,
+                 context: Optional[SearchContext] = None,
+                 score_modifiers: Optional[ScoreModifier] = None,
+                 model_auth: Optional[ModelAuth] = None,
+                 text_query_prefix: Optional[str] = None,
+                 hybrid_parameters: Optional[HybridParameters] = None) -> Dict:
+    """Searches the index. Takes the same args, and returns the same results, as tensor_search.search()"""
+    tensor_search._validate_search_request(
+        text=text, result_count=result_count, offset=offset, search_method=search_method,
+        searchable_attributes=searchable_attributes, attributes_to_retrieve=attributes_to_retrieve,
+        context=context, boost=boost, hybrid_parameters=hybrid_parameters, verbose=verbose)
+
+    t0 = timer()
+    max_search_retry_attempts, max_search_retry_backoff = tensor_search._get_search_retry_settings()
+
+    # if we can't see the index name in cache, we request it and wait for the info
+    if index_name not in index_meta_cache.get_cache():
+        await async_backend.get_index_info(
+            config=config,
+            index_name=index_name,
+            max_retry_attempts=max_search_retry_attempts,
+            max_retry_backoff_seconds=max_search_retry_backoff
+        )
+
+    # update cache in the background
+    index_meta_cache.mark_index_hot(config=config, index_name=index_name)
+
+    selected_device = tensor_search._select_search_device(device)
+
+    if search_method.upper() == SearchMethod.TENSOR:
+        body = await inference_executor.run(
+            tensor_search._create_vector_text_search_body,
+            config=config, index_name=index_name, query=text, result_count=result_count, offset=offset,
+            searchable_attributes=searchable_attributes, verbose=verbose,
+            filter_string=filter, device=selected_device, attributes_to_retrieve=attributes_to_retrieve, boost=boost,
+            image_download_headers=image_download_headers, context=context, score_modifiers=score_modifiers,
+            model_auth=model_auth, max_retry_attempts=max_search_retry_attempts,
+            max_retry_backoff_seconds=max_search_retry_backoff, text_query_prefix=text_query_prefix
+        )
+        responses = await bulk_msearch(config=config, body=body, max_retry_attempts=max_search_retry_attempts,
+                                       max_retry_backoff=max_search_retry_backoff)
+        search_result = tensor_search._format_vector_text_search_response(
+            responses=responses, result_count=result_count, boost=boost,
+            searchable_attributes=searchable_attributes, verbose=verbose)
+
+    elif search_method.upper() == SearchMethod.LEXICAL:
+        # Reads the index info, which can be a request to Marqo-OS, so it isn't built on the event loop
+        body = await inference_executor.run(
+            tensor_search._create_lexical_search_body,
+            config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
+            searchable_attributes=searchable_attributes, filter_string=filter,
+            attributes_to_retrieve=attributes_to_retrieve, max_retry_attempts=max_search_retry_attempts,
+            max_retry_backoff_seconds=max_search_retry_backoff
+        )
+        if body is None:
+            search_result = {"hits": []}
+        else:
+            start_search_http_time = timer()
+            with RequestMetricsStore.for_request().time("search.opensearch._search"):
+                search_res = await async_backend.search(
+                    config=config, index_name=index_name, body=body, max_retry_attempts=max_search_retry_attempts,
+                    max_retry_backoff_seconds=max_search_retry_backoff)
+            search_result = tensor_search._format_lexical_search_response(
+                search_res=search_res, total_search_http_time=timer() - start_search_http_time)
+
+    elif search_method.upper() == SearchMethod.HYBRID:
+        body = await inference_executor.run(
+            tensor_search._create_hybrid_search_body,
+            config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
+            searchable_attributes=searchable_attributes, verbose=verbose,
+            filter_string=filter, device=selected_device, attributes_to_retrieve=attributes_to_retrieve,
+            image_download_headers=image_download_headers, score_modifiers=score_modifiers,
+            model_auth=model_auth, max_retry_attempts=max_search_retry_attempts,
+            max_retry_backoff_seconds=max_search_retry_backoff, text_query_prefix=text_query_prefix
+        )
+        if body is None:
+            search_result = {"hits": []}
+        else:
+            responses = await bulk_msearch(config=config, body=body, max_retry_attempts=max_search_retry_attempts,
+                                           max_retry_backoff=max_search_retry_backoff)
+            search_result = tensor_search._format_hybrid_search_response(
+                responses=responses, result_count=result_count, offset=offset, hybrid_parameters=hybrid_parameters)
+    else:
+        raise errors.InvalidArgError(f"Search called with unknown search method: {search_method}")
+
+    if reranker is not None:
+        await inference_executor.run(
+            tensor_search._rerank_search_result, search_result=search_result, text=text, reranker=reranker,
+            device=selected_device, searchable_attributes=searchable_attributes, search_method=search_method)
+
+    return tensor_search._finalise_search_result(
+        search_result=search_result, text=text, result_count=result_count, offset=offset,
+        highlights=highlights, search_method=search_method, t0=t0)
+
+
+async def bulk_msearch(config: Config, body: List[Dict], max_retry_attempts: int = None,
+                       max_retry_backoff: int = None) -> List[List[Dict]]:
+    """Sends an `/_msearch` request to Marqo-OS, returning the hits of each search. See tensor_search.bulk_msearch()"""
+    start_search_http_time = timer()
+    with RequestMetricsStore.for_request().time("search.opensearch._msearch"):
+        response = await async_backend.msearch(
+            config=config, body=body, max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff)
+    return tensor_search._get_msearch_hits(response=response,
+                                           total_search_http_time=timer() - start_search_http_time)
+
+
+async def add_documents(config: Config, add_docs_params: AddDocsParams) -> dict:
+    """Adds the docs to the index. Takes the same args, and returns the same results, as tensor_search.add_documents()
+    """
+    max_add_docs_retry_attempts = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_ATTEMPTS)
+    max_add_docs_retry_backoff = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF)
+
+    RequestMetricsStore.for_request().start("add_documents.processing_before_opensearch")
+
+    if add_docs_params.mappings is not None:
+        validation.validate_mappings_object(mappings_object=add_docs_params.mappings)
+
+    t0 = timer()
+
+    try:
+        index_info = await async_backend.get_index_info(
+            config=config,
+            index_name=add_docs_params.index_name,
+            max_retry_attempts=max_add_docs_retry_attempts,
+            max_retry_backoff_seconds=max_add_docs_retry_backoff
+        )
+    except errors.IndexNotFoundError:
+        raise errors.IndexNotFoundError(f"Cannot add documents to non-existent index {add_docs_params.index_name}")
+
+    image_repo = {}
+    doc_count = len(add_docs_params.docs)
+
+    async with AsyncExitStack() as exit_stack:
+        if index_info.index_settings[NsField.index_defaults][NsField.treat_urls_and_pointers_as_images]:
+            with RequestMetricsStore.for_request().time(
+                "image_download.full_time",
+                lambda t: logger.debug(
+                    f"add_documents image download: took {t:.3f}ms to concurrently download "
+                    f"images for {doc_count} docs, {add_docs_params.image_download_thread_count} at a time"
+                )
+            ):
+                image_repo = await exit_stack.enter_async_context(
+                    add_docs.download_images_async(**tensor_search._get_image_download_args(add_docs_params)))
+
+        existing_docs_by_id = None
+        if add_docs_params.use_existing_tensors:
+            existing_docs_by_id = tensor_search._index_documents_for_upsert_by_id(await _get_documents_for_upsert(
+                config=config, index_name=add_docs_params.index_name,
+                document_ids=tensor_search._get_document_ids_for_upsert(add_docs_params.docs)))
+
+        bulk_parent_dicts, new_fields, new_obj_fields, unsuccessful_docs, total_vectorise_time = \
+            await inference_executor.run(
+                tensor_search._create_bulk_parent_dicts, add_docs_params=add_docs_params, index_info=index_info,
+                image_repo=image_repo, existing_docs_by_id=existing_docs_by_id)
+        tensor_search._log_add_documents_preprocessing(doc_count=doc_count, total_vectorise_time=total_vectorise_time)
+
+        if bulk_parent_dicts:
+            await async_backend.add_customer_field_properties(
+                config=config, index_name=add_docs_params.index_name, customer_field_names=new_fields,
+                multimodal_combination_fields=new_obj_fields, max_retry_attempts=max_add_docs_retry_attempts,
+                max_retry_backoff_seconds=max_add_docs_retry_backoff)
+
+            start_time_5 = timer()
+            with RequestMetricsStore.for_request().time("add_documents.opensearch._bulk"):
+                # Serialising the vectors of a batch takes long enough to hold up the event loop
+                serialised_body = await inference_executor.run(utils.dicts_to_jsonl, bulk_parent_dicts)
+                index_parent_response = await async_backend.bulk(
+                    config=config, serialised_body=serialised_body, auto_refresh=add_docs_params.auto_refresh,
+                    max_retry_attempts=max_add_docs_retry_attempts,
+                    max_retry_backoff_seconds=max_add_docs_retry_backoff
+                )
+            tensor_search._log_bulk_response(response=index_parent_response, doc_count=doc_count,
+                                             total_http_time=timer() - start_time_5)
+        else:
+            index_parent_response = None
+
+        with RequestMetricsStore.for_request().time("add_documents.postprocess"):
+            return tensor_search._translate_add_documents_response(
+                response=index_parent_response, unsuccessful_docs=unsuccessful_docs,
+                index_name=add_docs_params.index_name, time_diff=timer() - t0)
+
+
+async def _get_documents_for_upsert(config: Config, index_name: str, document_ids: List[str]) -> dict:
+    """Gets the chunks and content of the existing docs. See tensor_search._get_documents_for_upsert()"""
+    valid_doc_ids, body = tensor_search._create_documents_for_upsert_query(
+        index_name=index_name, document_ids=document_ids)
+    if len(valid_doc_ids) <= 0:
+        return {"docs": []}
+
+    res = await async_backend.mget(config=config, body=body)
+    return tensor_search._combine_documents_for_upsert(valid_doc_ids=valid_doc_ids, res=res)
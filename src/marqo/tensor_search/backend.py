@@ -41,7 +41,15 @@ def get_index_info(
         max_retry_attempts=max_retry_attempts,
         max_retry_backoff_seconds=max_retry_backoff_seconds
     )
+    return _cache_index_info_from_mapping(index_name=index_name, res=res)
 
+
+def _cache_index_info_from_mapping(index_name: str, res: dict) -> IndexInfo:
+    """Parses the `/_mapping` response of an index into its IndexInfo, and updates the IndexInfo cache
+
+    Raises:
+        NonTensorIndexError: If the index's mapping doesn't conform to a Tensor Search index.
+    """
     if not (index_name in res and "mappings" in res[index_name]
             and "_meta" in res[index_name]["mappings"]):
         raise errors.NonTensorIndexError(
@@ -96,7 +104,26 @@ def add_customer_field_properties(config: Config, index_name: str,
         HTTP Response
     """
     existing_info = get_cached_index_info(config=config, index_name=index_name)
+    body = _create_customer_field_properties_body(
+        customer_field_names=customer_field_names, multimodal_combination_fields=multimodal_combination_fields)
+
+    mapping_res = HttpRequests(config).put(
+        path=F"{index_name}/_mapping",
+        body=json.dumps(body),
+        max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+
+    _cache_customer_field_properties(
+        index_name=index_name, existing_info=existing_info, body=body, customer_field_names=customer_field_names,
+        multimodal_combination_fields=multimodal_combination_fields)
+    return mapping_res
+
 
+def _create_customer_field_properties_body(
+        customer_field_names: Iterable[Tuple[str, enums.OpenSearchDataType]],
+        multimodal_combination_fields: Dict[str, Iterable[Tuple[str, enums.OpenSearchDataType]]]) -> dict:
+    """Creates the `/_mapping` body that adds the new customer fields to the chunks of an index"""
     body = {
         "properties": {
             enums.TensorField.chunks: {
@@ -105,7 +132,6 @@ def add_customer_field_properties(config: Config, index_name: str,
             }
         }
     }
-    new_index_properties = existing_info.properties.copy()
 
     # copy fields to the chunk for prefiltering. If it is text, convert it to a keyword type to save space
     # if it's not text, ignore it, and leave it up to OpenSearch (e.g: if it's a number)
@@ -127,12 +153,15 @@ def add_customer_field_properties(config: Config, index_name: str,
         },
     }
 
-    mapping_res = HttpRequests(config).put(
-        path=F"{index_name}/_mapping",
-        body=json.dumps(body),
-        max_retry_attempts=max_retry_attempts,
-        max_retry_backoff_seconds=max_retry_backoff_seconds
-    )
+    return body
+
+
+def _cache_customer_field_properties(
+        index_name: str, existing_info: IndexInfo, body: dict,
+        customer_field_names: Iterable[Tuple[str, enums.OpenSearchDataType]],
+        multimodal_combination_fields: Dict[str, Iterable[Tuple[str, enums.OpenSearchDataType]]]) -> None:
+    """Updates the cached IndexInfo of an index once the mapping `body` has been pushed to OpenSearch"""
+    new_index_properties = existing_info.properties.copy()
 
     merged_chunk_properties = {
         **existing_info.properties[enums.TensorField.chunks]["properties"],
@@ -171,7 +200,6 @@ def add_customer_field_properties(config: Config, index_name: str,
         properties=new_index_properties,
         index_settings=existing_info.index_settings.copy()
     )
-    return mapping_res
 
 
 def get_cluster_indices(config: Config) -> set:
@@ -69,6 +69,38 @@ def default_env_vars() -> dict:
         EnvVars.MARQO_MAX_BACKEND_SEARCH_RETRY_ATTEMPTS: 0,
         EnvVars.MARQO_MAX_BACKEND_SEARCH_RETRY_BACKOFF: 1,
         EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_ATTEMPTS: 0,
-        EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF: 1
+        EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF: 1,
+        EnvVars.MARQO_OS_CONNECTION_POOL_SIZE: 50,     # Max connections kept alive per Marqo-OS host
+        EnvVars.MARQO_OS_CONNECTION_POOL_HOSTS: 10,    # Number of Marqo-OS hosts to keep a connection pool for
+        EnvVars.MARQO_OS_CONNECTION_POOL_BLOCK: "FALSE",    # If "TRUE", never open more than MARQO_OS_CONNECTION_POOL_SIZE connections per host
+        EnvVars.MARQO_QUERY_VECTOR_CACHE_MAX_BYTES: 100000000,     # 100 MB. 0 disables the query vector cache
+        EnvVars.MARQO_QUERY_VECTOR_CACHE_TTL_SECONDS: 3600,
+        EnvVars.MARQO_IMAGE_DOWNLOAD_THREAD_COUNT: 20,     # Image download threads shared by all requests
+        EnvVars.MARQO_IMAGE_DOWNLOAD_POOL_SIZE: 20,        # Max connections kept alive per image host
+        EnvVars.MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS: 3,
+        EnvVars.MARQO_IMAGE_DOWNLOAD_MAX_RETRIES: 0,
+        EnvVars.MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS: 0.5,
+        EnvVars.MARQO_IMAGE_CACHE_DIR: None,    # Directory of the on-disk image caches. None disables them
+        EnvVars.MARQO_IMAGE_CACHE_MAX_BYTES: 1000000000,     # 1 GB of downloaded images
+        EnvVars.MARQO_PREPROCESSED_IMAGE_CACHE_MAX_BYTES: 1000000000,     # 1 GB of preprocessed image tensors
+        EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT: None,   # None uses the number of CPUs, up to 8
+        EnvVars.MARQO_ENABLE_INFERENCE_BATCHING: "FALSE",   # If "TRUE", concurrent vectorise calls to a model are batched together
+        EnvVars.MARQO_INFERENCE_BATCHING_MAX_WAIT_MS: 5,    # Max time a shared batch waits for more calls
+        EnvVars.MARQO_ENABLE_ASYNC_REQUEST_PATH: "FALSE",   # If "TRUE", search and add_documents requests are served on the event loop
+        EnvVars.MARQO_INFERENCE_EXECUTOR_THREAD_COUNT: 4,   # Threads running inference for the async request path
+        EnvVars.MARQO_INDEXING_JOBS_DIR: None,  # Directory of the add_documents job queue. None uses cache/indexing_jobs under the Marqo root
+        EnvVars.MARQO_INDEXING_JOB_WORKER_COUNT: 1,     # Jobs processed concurrently
+        EnvVars.MARQO_INDEXING_JOB_MAX_QUEUED: 100,     # Further jobs are rejected with a 429 until the queue drains
+        EnvVars.MARQO_INDEXING_JOB_RETENTION_SECONDS: 604800,   # 7 days. Finished jobs' statuses are kept this long
+        EnvVars.MARQO_ADD_DOCS_PIPELINE_QUEUE_SIZE: 2,  # Vectorised batches waiting for their _bulk write, when add_documents is pipelined
+        EnvVars.MARQO_MODEL_PRELOAD_THREAD_COUNT: 4,    # (model, device) pairs of MARQO_MODELS_TO_PRELOAD loaded at the same time
+        EnvVars.MARQO_SERVE_BEFORE_MODELS_LOADED: "FALSE",  # If "TRUE", models are preloaded in the background. GET /readiness reports their progress
+        EnvVars.MARQO_WEIGHTS_CACHE_DIR: None,  # Directory of model weights converted to safetensors. None disables the weights cache
+        EnvVars.MARQO_ONNX_QUANTIZE: "FALSE",   # If "TRUE", ONNX models run on CPU are dynamically quantised to int8
+        EnvVars.MARQO_ONNX_INTRA_OP_THREAD_COUNT: None,     # Threads each ONNX Runtime node runs on. None uses ONNX Runtime's default
+        EnvVars.MARQO_ONNX_INTER_OP_THREAD_COUNT: None,     # Threads independent ONNX Runtime nodes run on in parallel. None uses ONNX Runtime's default
+        EnvVars.MARQO_RERANK_SCORE_CACHE_SIZE: 100000,     # (query, passage) scores kept per process by text rerankers. 0 disables the score cache
+        EnvVars.MARQO_RERANK_IMAGE_CACHE_MAX_BYTES: 100000000,     # 100 MB of images loaded by image rerankers. 0 disables the image cache
+        EnvVars.MARQO_IMAGE_CHUNKING_BATCH_SIZE: 16                # images per forward pass of the image chunking detectors (frcnn, yolox, dino)
     }
 
@@ -56,9 +56,10 @@ def delete_documents_marqo_os(config: Config, deletion_instruction: MqDeleteDocs
     """Deletes documents """
 
     # Prepare bulk delete request body
-    bulk_request_body = ""
-    for doc_id in deletion_instruction.document_ids:
-        bulk_request_body += json.dumps({"delete": {"_index": deletion_instruction.index_name, "_id": doc_id}}) + "\n"
+    bulk_request_body = utils.dicts_to_jsonl([
+        {"delete": {"_index": deletion_instruction.index_name, "_id": doc_id}}
+        for doc_id in deletion_instruction.document_ids
+    ])
 
     # Send bulk delete request
     t0 = datetime.datetime.utcnow()
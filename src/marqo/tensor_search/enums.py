@@ -18,6 +18,15 @@ class SearchMethod(str, Enum):
     LEXICAL = "LEXICAL"
     # chunk_embeddings
     TENSOR = "TENSOR"
+    # LEXICAL and TENSOR results, fused into one ranking
+    HYBRID = "HYBRID"
+
+
+class HybridFusionMethod(str, Enum):
+    # Reciprocal rank fusion
+    RRF = "RRF"
+    # Weighted sum of min-max normalised scores
+    NORMALIZED_SCORE = "NORMALIZED_SCORE"
 
 
 class TensorField:
@@ -121,6 +130,45 @@ class EnvVars:
     MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF = "MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF"
     DEFAULT_MARQO_MAX_BACKEND_RETRY_ATTEMPTS = "DEFAULT_MARQO_MAX_BACKEND_RETRY_ATTEMPTS"
     DEFAULT_MARQO_MAX_BACKEND_RETRY_BACKOFF = "DEFAULT_MARQO_MAX_BACKEND_RETRY_BACKOFF"
+    MARQO_OS_CONNECTION_POOL_SIZE = "MARQO_OS_CONNECTION_POOL_SIZE"
+    MARQO_OS_CONNECTION_POOL_HOSTS = "MARQO_OS_CONNECTION_POOL_HOSTS"
+    MARQO_OS_CONNECTION_POOL_BLOCK = "MARQO_OS_CONNECTION_POOL_BLOCK"
+    MARQO_QUERY_VECTOR_CACHE_MAX_BYTES = "MARQO_QUERY_VECTOR_CACHE_MAX_BYTES"
+    MARQO_QUERY_VECTOR_CACHE_TTL_SECONDS = "MARQO_QUERY_VECTOR_CACHE_TTL_SECONDS"
+    MARQO_IMAGE_DOWNLOAD_THREAD_COUNT = "MARQO_IMAGE_DOWNLOAD_THREAD_COUNT"
+    MARQO_IMAGE_DOWNLOAD_POOL_SIZE = "MARQO_IMAGE_DOWNLOAD_POOL_SIZE"
+    MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS = "MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS"
+    MARQO_IMAGE_DOWNLOAD_MAX_RETRIES = "MARQO_IMAGE_DOWNLOAD_MAX_RETRIES"
+    MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS = "MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS"
+    MARQO_IMAGE_CACHE_DIR = "MARQO_IMAGE_CACHE_DIR"
+    MARQO_IMAGE_CACHE_MAX_BYTES = "MARQO_IMAGE_CACHE_MAX_BYTES"
+    MARQO_PREPROCESSED_IMAGE_CACHE_MAX_BYTES = "MARQO_PREPROCESSED_IMAGE_CACHE_MAX_BYTES"
+    MARQO_IMAGE_PREPROCESSING_THREAD_COUNT = "MARQO_IMAGE_PREPROCESSING_THREAD_COUNT"
+    MARQO_ENABLE_INFERENCE_BATCHING = "MARQO_ENABLE_INFERENCE_BATCHING"
+    MARQO_INFERENCE_BATCHING_MAX_WAIT_MS = "MARQO_INFERENCE_BATCHING_MAX_WAIT_MS"
+    MARQO_ENABLE_ASYNC_REQUEST_PATH = "MARQO_ENABLE_ASYNC_REQUEST_PATH"
+    MARQO_INFERENCE_EXECUTOR_THREAD_COUNT = "MARQO_INFERENCE_EXECUTOR_THREAD_COUNT"
+    MARQO_INDEXING_JOBS_DIR = "MARQO_INDEXING_JOBS_DIR"
+    MARQO_INDEXING_JOB_WORKER_COUNT = "MARQO_INDEXING_JOB_WORKER_COUNT"
+    MARQO_INDEXING_JOB_MAX_QUEUED = "MARQO_INDEXING_JOB_MAX_QUEUED"
+    MARQO_INDEXING_JOB_RETENTION_SECONDS = "MARQO_INDEXING_JOB_RETENTION_SECONDS"
+    MARQO_ADD_DOCS_PIPELINE_QUEUE_SIZE = "MARQO_ADD_DOCS_PIPELINE_QUEUE_SIZE"
+    MARQO_MODEL_PRELOAD_THREAD_COUNT = "MARQO_MODEL_PRELOAD_THREAD_COUNT"
+    MARQO_SERVE_BEFORE_MODELS_LOADED = "MARQO_SERVE_BEFORE_MODELS_LOADED"
+    MARQO_WEIGHTS_CACHE_DIR = "MARQO_WEIGHTS_CACHE_DIR"
+    MARQO_ONNX_QUANTIZE = "MARQO_ONNX_QUANTIZE"
+    MARQO_ONNX_INTRA_OP_THREAD_COUNT = "MARQO_ONNX_INTRA_OP_THREAD_COUNT"
+    MARQO_ONNX_INTER_OP_THREAD_COUNT = "MARQO_ONNX_INTER_OP_THREAD_COUNT"
+    MARQO_RERANK_SCORE_CACHE_SIZE = "MARQO_RERANK_SCORE_CACHE_SIZE"
+    MARQO_RERANK_IMAGE_CACHE_MAX_BYTES = "MARQO_RERANK_IMAGE_CACHE_MAX_BYTES"
+    MARQO_IMAGE_CHUNKING_BATCH_SIZE = "MARQO_IMAGE_CHUNKING_BATCH_SIZE"
+
+
+class IndexingJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
 
 
 class RequestType:
@@ -160,6 +208,7 @@ class ModelProperties:
     model_location = 'model_location'
     text_chunk_prefix = 'text_chunk_prefix'
     text_query_prefix = 'text_query_prefix'
+    cpu_precision = 'cpu_precision'
 
 
 class SpecialModels:
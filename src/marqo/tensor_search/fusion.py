@@ -0,0 +1,73 @@
+"""Fuses the ranked hits of the LEXICAL and TENSOR halves of a HYBRID search into a single ranking.
+
+Both functions take the hits of each search method, best first, as returned by _lexical_search and
+_vector_text_search (dicts with at least `_id` and `_score`), and return the fused hits, best first. A doc found by
+both methods appears once, with the fields and highlights of its TENSOR hit. Each fused hit's `_score` is its fused
+score. Ties keep the order in which docs are first found, TENSOR hits before LEXICAL hits.
+"""
+from typing import Dict, List
+
+from marqo.tensor_search.enums import HybridFusionMethod
+from marqo.tensor_search.models.search import HybridParameters
+
+
+def reciprocal_rank_fusion(lexical_hits: List[dict], tensor_hits: List[dict], alpha: float = 0.5,
+                           k: int = 60) -> List[dict]:
+    """Scores each doc by alpha / (k + tensor rank) + (1 - alpha) / (k + lexical rank), with 1-based ranks.
+
+    A method that didn't find a doc adds nothing to its score. Only ranks are used, so the scales of BM25 and
+    tensor scores don't matter.
+    """
+    scores = _new_scores(lexical_hits, tensor_hits)
+    for weight, hits in ((alpha, tensor_hits), (1 - alpha, lexical_hits)):
+        for rank, hit in enumerate(hits, start=1):
+            scores[hit["_id"]] += weight / (k + rank)
+    return _ranked(lexical_hits, tensor_hits, scores)
+
+
+def normalized_score_fusion(lexical_hits: List[dict], tensor_hits: List[dict], alpha: float = 0.5) -> List[dict]:
+    """Scores each doc by alpha * tensor score + (1 - alpha) * lexical score, after min-max normalising the scores
+    of each method's hits to [0, 1].
+
+    A method that didn't find a doc adds nothing to its score. If all of a method's hits have the same score, they
+    are each normalised to 1.
+    """
+    scores = _new_scores(lexical_hits, tensor_hits)
+    for weight, hits in ((alpha, tensor_hits), (1 - alpha, lexical_hits)):
+        if not hits:
+            continue
+        min_score = min(hit["_score"] for hit in hits)
+        score_range = max(hit["_score"] for hit in hits) - min_score
+        for hit in hits:
+            normalised = (hit["_score"] - min_score) / score_range if score_range > 0 else 1.0
+            scores[hit["_id"]] += weight * normalised
+    return _ranked(lexical_hits, tensor_hits, scores)
+
+
+def fuse(lexical_hits: List[dict], tensor_hits: List[dict], hybrid_parameters: HybridParameters) -> List[dict]:
+    """Fuses the hits with the fusion method and weights of hybrid_parameters."""
+    if hybrid_parameters.fusionMethod == HybridFusionMethod.RRF:
+        return reciprocal_rank_fusion(lexical_hits, tensor_hits, alpha=hybrid_parameters.alpha,
+                                      k=hybrid_parameters.rrfK)
+    return normalized_score_fusion(lexical_hits, tensor_hits, alpha=hybrid_parameters.alpha)
+
+
+def _new_scores(lexical_hits: List[dict], tensor_hits: List[dict]) -> Dict[str, float]:
+    """Returns a zero score per doc, in the order docs are first found (TENSOR hits first)."""
+    return {hit["_id"]: 0.0 for hit in tensor_hits + lexical_hits}
+
+
+def _ranked(lexical_hits: List[dict], tensor_hits: List[dict], scores: Dict[str, float]) -> List[dict]:
+    hits_by_id = {hit["_id"]: hit for hit in lexical_hits}
+    hits_by_id.update({hit["_id"]: hit for hit in tensor_hits})
+
+    fused = []
+    # sorted() is stable, so ties keep the order of scores
+    for doc_id in sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True):
+        hit = dict(hits_by_id[doc_id])
+        hit["_score"] = scores[doc_id]
+        if not isinstance(hit.get("_highlights"), dict):
+            # LEXICAL hits have no highlights
+            hit["_highlights"] = dict()
+        fused.append(hit)
+    return fused
@@ -5,11 +5,13 @@ index in the search DB via a plugin.
 """
 import asyncio
 import datetime
+import random
+import threading
 import time
 import traceback
 from multiprocessing import Process, Manager
 from marqo.tensor_search.models.index_info import IndexInfo
-from typing import Dict
+from typing import Dict, List, Optional
 from marqo import errors
 from marqo.tensor_search import backend
 from marqo.config import Config
@@ -20,12 +22,19 @@ logger = get_logger(__name__)
 
 index_info_cache = dict()
 
-# the following is a non thread safe dict. Its purpose to be used by request
-# threads to calculate whether to refresh an index's cached index_info.
-# Because it is non thread safe, there is a chance multiple threads push out
-# multiple refresh requests at the same. It isn't a critical problem if that
-# happens.
+# The time each index's index_info was last refreshed by refresh_index_info_on_interval().
+# It is checked and updated under index_last_refreshed_time_lock, so only one thread refreshes an
+# index per interval.
 index_last_refreshed_time = dict()
+index_last_refreshed_time_lock = threading.Lock()
+
+# Searched indexes have their index_info refreshed in the background every
+# INDEX_INFO_REFRESH_INTERVAL_SECONDS (plus up to INDEX_INFO_REFRESH_JITTER_SECONDS, so that
+# workers don't all refresh at the same time), until they haven't been searched for
+# HOT_INDEX_EXPIRY_SECONDS.
+INDEX_INFO_REFRESH_INTERVAL_SECONDS = 2
+INDEX_INFO_REFRESH_JITTER_SECONDS = 0.2
+HOT_INDEX_EXPIRY_SECONDS = 60
 
 
 def empty_cache():
@@ -73,20 +82,23 @@ def get_cache() -> Dict[str, IndexInfo]:
 def refresh_index_info_on_interval(config: Config, index_name: str, interval_seconds: int) -> None:
     """Refreshes an index's index_info if interval_seconds have elapsed since the last time it was refreshed
 
-    Non-thread safe, so there is a chance two threads both refresh index_info at the same time.
+    If several threads call this at the same time, only one of them refreshes index_info.
     """
-    try:
-        last_refreshed_time = index_last_refreshed_time[index_name]
-    except KeyError:
-        last_refreshed_time = datetime.datetime.min
+    interval_as_time_delta = datetime.timedelta(seconds=interval_seconds)
+    with index_last_refreshed_time_lock:
+        try:
+            last_refreshed_time = index_last_refreshed_time[index_name]
+        except KeyError:
+            last_refreshed_time = datetime.datetime.min
 
-    now = datetime.datetime.now()
+        now = datetime.datetime.now()
+        is_due = now - last_refreshed_time >= interval_as_time_delta
+        if is_due:
+            # We assume that we will successfully refresh index info. We set the time to now ()
+            # so that other threads don't refresh the cache at the same time
+            index_last_refreshed_time[index_name] = now
 
-    interval_as_time_delta = datetime.timedelta(seconds=interval_seconds)
-    if now - last_refreshed_time >= interval_as_time_delta:
-        # We assume that we will successfully refresh index info. We set the time to now ()
-        # to lower the chance of other threads simultaneously refreshing the cache
-        index_last_refreshed_time[index_name] = now
+    if is_due:
         try:
             backend.get_index_info(config=config, index_name=index_name)
 
@@ -107,6 +119,122 @@ def refresh_index_info_on_interval(config: Config, index_name: str, interval_sec
             raise e2
 
 
+class IndexInfoRefresher:
+    """Refreshes the index_info of recently searched ("hot") indexes on a schedule, from a single
+    long-lived daemon thread.
+
+    Searches call mark_index_hot(), which only records the search. The refresher thread refreshes each hot
+    index every `interval_seconds` (plus a random jitter of up to `jitter_seconds`), one index at a time, so
+    there is at most one refresh in flight per index. Indexes that haven't been searched for
+    `hot_index_expiry_seconds` are no longer refreshed.
+    """
+
+    def __init__(self, interval_seconds: float = INDEX_INFO_REFRESH_INTERVAL_SECONDS,
+                 jitter_seconds: float = INDEX_INFO_REFRESH_JITTER_SECONDS,
+                 hot_index_expiry_seconds: float = HOT_INDEX_EXPIRY_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.hot_index_expiry_seconds = hot_index_expiry_seconds
+
+        # index_name -> config used to refresh it, time it was last searched and time of its next refresh
+        self._hot_indexes: Dict[str, Dict] = dict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # Incremented by stop(). A refresher thread exits once the generation it was started with is outdated.
+        self._generation = 0
+
+    def mark_index_hot(self, config: Config, index_name: str) -> None:
+        """Records a search on the index. The index's index_info is refreshed immediately if it isn't
+        already being refreshed on a schedule."""
+        now = time.monotonic()
+        with self._condition:
+            hot_index = self._hot_indexes.get(index_name)
+            if hot_index is not None:
+                hot_index["config"] = config
+                hot_index["last_searched"] = now
+                return
+            self._hot_indexes[index_name] = {"config": config, "last_searched": now, "next_refresh": now}
+            self._start_thread_if_needed()
+            self._condition.notify()
+
+    def get_hot_indexes(self) -> List[str]:
+        with self._condition:
+            return list(self._hot_indexes)
+
+    def stop(self) -> None:
+        """Forgets the hot indexes and tells the refresher thread to exit, without waiting for it.
+        A new thread is started by the next call to mark_index_hot()."""
+        with self._condition:
+            self._generation += 1
+            self._thread = None
+            self._hot_indexes.clear()
+            self._condition.notify_all()
+
+    def _start_thread_if_needed(self) -> None:
+        """Starts the refresher thread. The caller must hold the condition's lock.
+
+        The thread is restarted if it isn't alive, e.g. in a process forked from the one that started it."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, args=(self._generation,),
+                                            name="index-info-refresher", daemon=True)
+            self._thread.start()
+
+    def _next_index_to_refresh(self, generation: int) -> Optional[tuple]:
+        """Waits until an index is due a refresh and returns (index_name, config), or None once stopped."""
+        with self._condition:
+            while generation == self._generation:
+                now = time.monotonic()
+                for index_name in [name for name, hot_index in self._hot_indexes.items()
+                                   if now - hot_index["last_searched"] > self.hot_index_expiry_seconds]:
+                    del self._hot_indexes[index_name]
+
+                next_refresh = None
+                for index_name, hot_index in self._hot_indexes.items():
+                    if next_refresh is None or hot_index["next_refresh"] < next_refresh[1]["next_refresh"]:
+                        next_refresh = (index_name, hot_index)
+
+                if next_refresh is None:
+                    self._condition.wait()
+                elif next_refresh[1]["next_refresh"] > now:
+                    self._condition.wait(timeout=next_refresh[1]["next_refresh"] - now)
+                else:
+                    index_name, hot_index = next_refresh
+                    hot_index["next_refresh"] = (now + self.interval_seconds
+                                                 + random.uniform(0, self.jitter_seconds))
+                    return index_name, hot_index["config"]
+        return None
+
+    def _run(self, generation: int) -> None:
+        while True:
+            next_index = self._next_index_to_refresh(generation)
+            if next_index is None:
+                return
+            index_name, config = next_index
+            try:
+                backend.get_index_info(config=config, index_name=index_name)
+            except (errors.IndexNotFoundError, errors.NonTensorIndexError):
+                # There's nothing to refresh. If the index is created later, a search will mark it hot again.
+                with self._condition:
+                    self._hot_indexes.pop(index_name, None)
+            except Exception as e:
+                # The refresh is retried on the next interval.
+                logger.warning(f"IndexInfoRefresher: error during background index_info refresh of index "
+                               f"`{index_name}`. Reason: \n{e}")
+
+
+_index_info_refresher = IndexInfoRefresher()
+
+
+def mark_index_hot(config: Config, index_name: str) -> None:
+    """Keeps the index's cached index_info up to date while it's being searched.
+    See IndexInfoRefresher."""
+    _index_info_refresher.mark_index_hot(config=config, index_name=index_name)
+
+
+def get_index_info_refresher() -> IndexInfoRefresher:
+    return _index_info_refresher
+
+
 def refresh_index(config: Config, index_name: str) -> IndexInfo:
     """function to update an index, from the cluster.
 
@@ -0,0 +1,365 @@
+"""
+This module handles add_documents jobs: docs that are queued to be added in the background, so that clients can
+submit more docs than fit in one add_documents request without waiting for them to be added.
+
+The queue is file-backed. Each job is a directory under MARQO_INDEXING_JOBS_DIR, holding its docs (as JSON lines),
+its add_documents parameters and its status. A job's id is returned as soon as its docs are written. Background
+worker threads (MARQO_INDEXING_JOB_WORKER_COUNT of them) take jobs off the queue in the order they were submitted,
+and add their docs in batches with tensor_search.add_documents_pipelined(), so a job's next batch is vectorised while
+its last one is written to Marqo-OS. The status is saved after each batch is written, so a job left queued or running
+when Marqo stopped is resumed from its last completed batch when Marqo starts again. A batch that was written but not
+yet recorded when Marqo stopped is added again, so docs without an _id are given one when the job's docs are written:
+the batch's docs are then overwritten rather than added twice.
+
+At most MARQO_INDEXING_JOB_MAX_QUEUED jobs wait to be processed; further jobs are rejected with a
+TooManyRequestsError until the workers catch up. Finished jobs' statuses are kept for
+MARQO_INDEXING_JOB_RETENTION_SECONDS.
+
+The queue isn't shared between processes: each jobs directory should be used by a single Marqo process.
+"""
+import collections
+import datetime
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from marqo import errors
+from marqo.config import Config
+from marqo.tensor_search import tensor_search, utils
+from marqo.tensor_search.enums import EnvVars, IndexingJobStatus
+from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+from marqo.tensor_search.models.indexing_job_objects import IndexingJob, IndexingJobParams
+from marqo.tensor_search.telemetry import METRICS_AGGREGATOR, RequestMetricsStore
+from marqo.tensor_search.tensor_search_logging import get_logger
+
+logger = get_logger(__name__)
+
+DOCS_FILE = "docs.jsonl"
+PARAMS_FILE = "params.json"
+JOB_FILE = "job.json"
+_TEMP_FILE_PREFIX = ".tmp"
+
+# The failed docs recorded in a job's status are capped, as a job can have any number of them
+MAX_RECORDED_ERRORS = 100
+
+
+def format_indexing_job_response(job: IndexingJob) -> dict:
+    """This formats a job's status for users"""
+    response = {
+        "jobId": job.job_id,
+        "index_name": job.index_name,
+        "status": job.status.value,
+        "type": "addDocuments",
+        "details": {
+            "receivedDocuments": job.received_documents,
+            "processedDocuments": job.processed_documents,
+            "failedDocuments": job.failed_documents,
+            "completedBatches": job.completed_batches,
+            "batchSize": job.batch_size,
+        },
+        "errors": job.errors,
+        "createdAt": utils.format_timestamp(job.created_at),
+    }
+    if job.started_at is not None:
+        response["startedAt"] = utils.format_timestamp(job.started_at)
+    if job.finished_at is not None:
+        response["finishedAt"] = utils.format_timestamp(job.finished_at)
+        response["duration"] = utils.create_duration_string(job.finished_at - (job.started_at or job.created_at))
+    if job.error is not None:
+        response["error"] = job.error
+    return response
+
+
+class IndexingJobWriter:
+    """Writes the docs of a new job. Used as a context manager: the job is queued on exit, or discarded if an error
+    was raised while writing it."""
+
+    def __init__(self, job_queue: "IndexingJobQueue", job: IndexingJob, params: IndexingJobParams):
+        self.job = job
+        self.params = params
+        self._queue = job_queue
+        self._directory = job_queue.job_directory(job.job_id)
+        # The params can hold credentials (model_auth), so only Marqo can read them
+        os.makedirs(self._directory, mode=0o700)
+        self._docs_file = open(os.path.join(self._directory, DOCS_FILE), "w", encoding="utf-8")
+
+    def write(self, docs: Iterable[Any]) -> None:
+        for doc in docs:
+            # A batch added again when the job is resumed overwrites its docs, rather than adding them with new ids
+            if isinstance(doc, dict) and "_id" not in doc:
+                doc = {**doc, "_id": str(uuid.uuid4())}
+            self._docs_file.write(json.dumps(doc))
+            self._docs_file.write("\n")
+            self.job.received_documents += 1
+
+    def __enter__(self) -> "IndexingJobWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._docs_file.close()
+        if exc_type is None and self.job.received_documents == 0:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            raise errors.BadRequestError(message="Received empty add documents job")
+        if exc_type is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            return
+        self._queue._enqueue(job=self.job, params=self.params)
+
+
+class IndexingJobQueue:
+    """The jobs in a directory, and the worker threads that process them.
+
+    Jobs found in the directory (e.g. left by a previous process) are picked up when the queue is created: unfinished
+    jobs are queued again, and the statuses of finished jobs are kept until they expire.
+    """
+
+    def __init__(self, config: Config, directory: str, worker_count: int, max_queued_jobs: int,
+                 retention_seconds: int):
+        self.config = config
+        self.directory = directory
+        self.worker_count = worker_count
+        self.max_queued_jobs = max_queued_jobs
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, IndexingJob] = dict()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_jobs()
+
+    def start(self) -> None:
+        """Starts the worker threads"""
+        for i in range(self.worker_count):
+            worker = threading.Thread(target=self._work, name=f"indexing-job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        """Stops the worker threads once they have finished their current job. Unfinished jobs stay in the directory,
+        to be resumed by the next queue created for it."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def job_directory(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def create_job(self, params: IndexingJobParams) -> IndexingJobWriter:
+        """Creates a job, whose docs are then written with the returned writer.
+
+        Raises:
+            TooManyRequestsError: if MARQO_INDEXING_JOB_MAX_QUEUED jobs are already waiting to be processed
+        """
+        self._remove_expired_jobs()
+        with self._lock:
+            queued_jobs = sum(job.status == IndexingJobStatus.queued for job in self._jobs.values())
+        if queued_jobs >= self.max_queued_jobs:
+            raise errors.TooManyRequestsError(
+                message=f"There are already {queued_jobs} add documents jobs waiting to be processed. "
+                        f"Try submitting this job again once some of them have finished.")
+        job = IndexingJob(job_id=str(uuid.uuid4()), index_name=params.index_name, status=IndexingJobStatus.queued,
+                          batch_size=params.batch_size, created_at=datetime.datetime.utcnow())
+        return IndexingJobWriter(job_queue=self, job=job, params=params)
+
+    def submit(self, params: IndexingJobParams, docs: Iterable[Any]) -> IndexingJob:
+        """Queues the docs to be added with params. Returns the job's status."""
+        with self.create_job(params) as writer:
+            writer.write(docs)
+        return self.get_job(writer.job.job_id)
+
+    def get_job(self, job_id: str) -> IndexingJob:
+        """Returns a snapshot of the job's status
+
+        Raises:
+            IndexingJobNotFoundError: if there is no such job (or it has expired)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise errors.IndexingJobNotFoundError(message=f"Add documents job `{job_id}` not found.")
+            return job.copy(deep=True)
+
+    def _enqueue(self, job: IndexingJob, params: IndexingJobParams) -> None:
+        self._write_file(job.job_id, PARAMS_FILE, params.json())
+        self._write_file(job.job_id, JOB_FILE, job.json())
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._queue.put(job.job_id)
+
+    def _write_file(self, job_id: str, name: str, content: str) -> None:
+        """Writes the file atomically, so a process that stops while writing it doesn't leave it corrupted"""
+        directory = self.job_directory(job_id)
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=_TEMP_FILE_PREFIX, delete=False,
+                                         encoding="utf-8") as f:
+            f.write(content)
+        os.replace(f.name, os.path.join(directory, name))
+
+    def _save(self, job: IndexingJob) -> None:
+        with self._lock:
+            content = job.json()
+        self._write_file(job.job_id, JOB_FILE, content)
+
+    def _load_jobs(self) -> None:
+        unfinished_jobs = []
+        for job_id in os.listdir(self.directory):
+            job_file = os.path.join(self.job_directory(job_id), JOB_FILE)
+            if not os.path.isfile(job_file):
+                # A job whose docs were still being written when its process stopped
+                shutil.rmtree(self.job_directory(job_id), ignore_errors=True)
+                continue
+            try:
+                job = IndexingJob.parse_file(job_file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read add documents job {job_id}, skipping it. Reason: {e}")
+                continue
+            self._jobs[job.job_id] = job
+            if not job.is_finished:
+                job.status = IndexingJobStatus.queued
+                unfinished_jobs.append(job)
+
+        for job in sorted(unfinished_jobs, key=lambda job: job.created_at):
+            logger.info(f"Resuming add documents job {job.job_id} from document {job.processed_documents} "
+                        f"of {job.received_documents}")
+            self._queue.put(job.job_id)
+        self._remove_expired_jobs()
+
+    def _remove_expired_jobs(self) -> None:
+        expiry = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.retention_seconds)
+        with self._lock:
+            expired_job_ids = [job_id for job_id, job in self._jobs.items()
+                               if job.is_finished and job.finished_at is not None and job.finished_at < expiry]
+            for job_id in expired_job_ids:
+                del self._jobs[job_id]
+        for job_id in expired_job_ids:
+            shutil.rmtree(self.job_directory(job_id), ignore_errors=True)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Add documents job {job_id} could not be processed. Reason: {e}")
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.status = IndexingJobStatus.running
+            job.started_at = job.started_at or datetime.datetime.utcnow()
+        self._save(job)
+        params = IndexingJobParams.parse_file(os.path.join(self.job_directory(job_id), PARAMS_FILE))
+
+        # The job is recorded as a request of its own in the metrics
+        job_request = object()
+        RequestMetricsStore.set_in_request(r=job_request)
+        try:
+            with RequestMetricsStore.for_request().time("indexing_job.run"):
+                self._add_batches(job=job, params=params)
+            status, error = IndexingJobStatus.completed, None
+        except Exception as e:
+            logger.warning(f"Add documents job {job_id} failed after {job.processed_documents} of "
+                           f"{job.received_documents} documents. Reason: {e}")
+            status, error = IndexingJobStatus.failed, utils.format_error(e)
+        finally:
+            metrics = RequestMetricsStore.clear_metrics_for(job_request)
+            if metrics is not None:
+                METRICS_AGGREGATOR.record(metrics)
+
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.datetime.utcnow()
+        self._save(job)
+        # Only the status of a finished job is kept
+        for name in (DOCS_FILE, PARAMS_FILE):
+            try:
+                os.remove(os.path.join(self.job_directory(job_id), name))
+            except OSError:
+                pass
+
+    def _read_batches(self, job_id: str, batch_size: int, start: int) -> Iterator[List[Any]]:
+        """Reads the job's docs from position `start` onwards, in lists of batch_size"""
+        batch = []
+        with open(os.path.join(self.job_directory(job_id), DOCS_FILE), encoding="utf-8") as f:
+            for position, line in enumerate(f):
+                if position < start:
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _add_batches(self, job: IndexingJob, params: IndexingJobParams) -> None:
+        """Adds the job's remaining docs, vectorising each batch while the previous one is written to Marqo-OS"""
+        batches = self._read_batches(job_id=job.job_id, batch_size=params.batch_size, start=job.processed_documents)
+        # Batches are read ahead of the one being written, so their sizes are kept until it is recorded
+        batch_sizes = collections.deque()
+
+        def batch_params() -> Iterator[AddDocsParams]:
+            for docs in batches:
+                batch_sizes.append(len(docs))
+                yield params.to_add_docs_params(docs)
+
+        for response in tensor_search.add_documents_pipelined(config=self.config, batches=batch_params()):
+            self._record_batch(job=job, doc_count=batch_sizes.popleft(), response=response)
+            self._save(job)
+
+    def _record_batch(self, job: IndexingJob, doc_count: int, response: dict) -> None:
+        # add_documents returns the items in the same order as the docs
+        failed_items = [{"position": position, **item}
+                        for position, item in enumerate(response["items"], start=job.processed_documents)
+                        if "error" in item]
+        with self._lock:
+            job.processed_documents += doc_count
+            job.failed_documents += len(failed_items)
+            job.completed_batches += 1
+            job.errors.extend(failed_items[:max(0, MAX_RECORDED_ERRORS - len(job.errors))])
+
+
+def get_jobs_directory() -> str:
+    directory = utils.read_env_vars_and_defaults(EnvVars.MARQO_INDEXING_JOBS_DIR)
+    if not directory:
+        directory = os.path.join(utils.get_marqo_root_from_env(), "cache", "indexing_jobs")
+    return directory
+
+
+_queue: Optional[IndexingJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue(config: Config) -> IndexingJobQueue:
+    """Returns the process-wide job queue, creating it and starting its workers on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                job_queue = IndexingJobQueue(
+                    config=config, directory=get_jobs_directory(),
+                    worker_count=utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_INDEXING_JOB_WORKER_COUNT),
+                    max_queued_jobs=utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_INDEXING_JOB_MAX_QUEUED),
+                    retention_seconds=utils.read_env_vars_and_defaults_ints(
+                        EnvVars.MARQO_INDEXING_JOB_RETENTION_SECONDS)
+                )
+                job_queue.start()
+                _queue = job_queue
+    return _queue
+
+
+def shutdown() -> None:
+    """Stops the workers. The queue is recreated (with settings re-read from env vars) on next use."""
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.stop()
+            _queue = None
@@ -11,7 +11,7 @@ from marqo.tensor_search import validation
 from marqo.tensor_search.enums import SearchMethod
 from marqo.tensor_search.models.private_models import ModelAuth
 from marqo.tensor_search.models.score_modifiers_object import ScoreModifier
-from marqo.tensor_search.models.search import SearchContext, SearchContextTensor
+from marqo.tensor_search.models.search import SearchContext, SearchContextTensor, HybridParameters
 from marqo import errors
 
 
@@ -37,6 +37,7 @@ class SearchQuery(BaseMarqoModel):
     scoreModifiers: Optional[ScoreModifier] = None
     modelAuth: Optional[ModelAuth] = None
     textQueryPrefix: Optional[str] = None
+    hybridParameters: Optional[HybridParameters] = None
 
     @pydantic.validator('searchMethod')
     def validate_search_method(cls, value):
@@ -48,7 +49,7 @@ class SearchQuery(BaseMarqoModel):
     @pydantic.root_validator
     def validate_query_and_context(cls, values):
         """
-        Validates that if LEXICAL search, query must be present.
+        Validates that if LEXICAL or HYBRID search, query must be present.
         If TENSOR search, either query or context must be present.
         """
         search_method = values.get("searchMethod")
@@ -58,6 +59,9 @@ class SearchQuery(BaseMarqoModel):
         if search_method == SearchMethod.LEXICAL:
             if query is None:
                 raise errors.InvalidArgError("Query must be provided when using lexical search.")
+        elif search_method == SearchMethod.HYBRID:
+            if query is None:
+                raise errors.InvalidArgError("Query must be provided when using hybrid search.")
         elif search_method == SearchMethod.TENSOR:
             if query is None and context is None:
                 raise errors.InvalidArgError("At least one of query (`q`) or context vectors (`context`) must be provided when using tensor search.")
@@ -0,0 +1,60 @@
+"""
+This module holds the classes of add_documents jobs, which are queued and processed in the background (see
+marqo.tensor_search.indexing_jobs).
+"""
+import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+from marqo.tensor_search.enums import IndexingJobStatus
+from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+from marqo.tensor_search.models.private_models import ModelAuth
+
+
+class IndexingJobParams(BaseModel):
+    """The add_documents() parameters each batch of a job is added with, and the size of the batches.
+
+    These are the fields of AddDocsParams, other than the docs.
+    """
+    class Config:
+        allow_mutation = False
+
+    index_name: str
+    auto_refresh: bool
+    device: Optional[str]
+    batch_size: int
+    non_tensor_fields: Optional[List] = None
+    tensor_fields: Optional[List] = None
+    image_download_headers: dict = Field(default_factory=dict)
+    use_existing_tensors: bool = False
+    mappings: Optional[dict] = None
+    model_auth: Optional[ModelAuth] = None
+    text_chunk_prefix: Optional[str] = None
+
+    def to_add_docs_params(self, docs: Sequence[Any]) -> AddDocsParams:
+        return AddDocsParams(docs=docs, **self.dict(exclude={"batch_size", "model_auth"}), model_auth=self.model_auth)
+
+
+class IndexingJob(BaseModel):
+    """The status and progress of a job"""
+    job_id: str
+    index_name: str
+    status: IndexingJobStatus
+    batch_size: int
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    received_documents: int = 0
+    # Docs of the completed batches, and how many of them couldn't be added
+    processed_documents: int = 0
+    failed_documents: int = 0
+    completed_batches: int = 0
+    # The first of the failed docs' items in the add_documents responses, with their position in the job
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
+    # The error that stopped the job, as the API would have returned it
+    error: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (IndexingJobStatus.completed, IndexingJobStatus.failed)
@@ -4,6 +4,7 @@ from pydantic import BaseModel, validator, ValidationError
 from typing import Any, Union, List, Dict, Optional, NewType, Literal
 
 from marqo.errors import InvalidArgError
+from marqo.tensor_search.enums import HybridFusionMethod
 from marqo.tensor_search.models.private_models import ModelAuth
 
 Qidx = NewType('Qidx', int) # Indicates the position of a search query in a bulk search request
@@ -75,4 +76,36 @@ class SearchContext(BaseModel):
     def check_vector_length(cls, v):
         if not (1 <= len(v) <= 64):
             raise InvalidArgError('The number of tensors must be between 1 and 64')
-        return v
\ No newline at end of file
+        return v
+
+
+class HybridParameters(BaseModel):
+    """How the LEXICAL and TENSOR results of a HYBRID search are fused.
+
+    alpha is the weight of the TENSOR results, and 1 - alpha the weight of the LEXICAL results. rrfK is the rank
+    constant of reciprocal rank fusion; larger values flatten the difference between high and low ranks.
+    """
+    fusionMethod: HybridFusionMethod = HybridFusionMethod.RRF
+    alpha: float = 0.5
+    rrfK: int = 60
+
+    class Config:
+        extra: str = "forbid"
+
+    def __init__(self, **data):
+        try:
+            super().__init__(**data)
+        except ValidationError as e:
+            raise InvalidArgError(message=e.json())
+
+    @validator('alpha')
+    def check_alpha(cls, v):
+        if not (0 <= v <= 1):
+            raise InvalidArgError(f'hybridParameters.alpha must be between 0 and 1. Received {v}')
+        return v
+
+    @validator('rrfK')
+    def check_rrf_k(cls, v):
+        if v < 1:
+            raise InvalidArgError(f'hybridParameters.rrfK must be at least 1. Received {v}')
+        return v
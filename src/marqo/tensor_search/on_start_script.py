@@ -1,11 +1,15 @@
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Union
 from marqo.tensor_search import enums
 from marqo.tensor_search.tensor_search_logging import get_logger
 import time
 from marqo.tensor_search.enums import EnvVars
 # we need to import backend before index_meta_cache to prevent circular import error:
 from marqo.tensor_search import backend, index_meta_cache, utils
+from marqo.tensor_search import indexing_jobs
 from marqo import config
 from marqo.tensor_search import constants
 from marqo.tensor_search.web import api_utils
@@ -25,13 +29,69 @@ def on_start(marqo_os_url: str):
                         SetBestAvailableDevice(),
                         ModelsForCacheing(),
                         InitializeRedis("localhost", 6379),    # TODO, have these variable
+                        ResumeIndexingJobs(marqo_os_url),
                         DownloadFinishText(),
                         MarqoWelcome(),
                         MarqoPhrase(),
                         )
 
+    logger = get_logger('OnStart')
     for thing_to_start in to_run_on_start:
+        phase = type(thing_to_start).__name__
+        t0 = time.time()
         thing_to_start.run()
+        startup_times_ms[phase] = 1000 * (time.time() - t0)
+        logger.debug(f"startup phase {phase} took {startup_times_ms[phase]:.1f}ms")
+    logger.info(f"startup phase times (ms): {json.dumps({k: round(v, 1) for k, v in startup_times_ms.items()})}")
+
+
+# The time each phase of on_start() took, by phase
+startup_times_ms: Dict[str, float] = dict()
+
+
+class ModelPreloadStatus:
+    """The progress of preloading the models in MARQO_MODELS_TO_PRELOAD, as reported by the readiness endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, str], dict] = dict()
+        self._finished = False
+        self._preload_time_ms = None
+
+    def start(self, models: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            self._models = {(model_name, device): {"model": model_name, "device": device, "status": "queued"}
+                            for model_name, device in models}
+            self._finished = False
+            self._preload_time_ms = None
+
+    def update(self, model_name: str, device: str, **fields) -> None:
+        with self._lock:
+            self._models[(model_name, device)].update(fields)
+
+    def finish(self, preload_time_ms: float) -> None:
+        with self._lock:
+            self._finished = True
+            self._preload_time_ms = preload_time_ms
+
+    def json(self) -> dict:
+        with self._lock:
+            readiness = {
+                "ready": self._finished,
+                "models": [dict(model) for model in self._models.values()],
+            }
+            if self._preload_time_ms is not None:
+                readiness["preloadTimeMs"] = self._preload_time_ms
+        return readiness
+
+
+model_preload_status = ModelPreloadStatus()
+
+
+def get_readiness() -> dict:
+    """Whether Marqo has finished starting (including preloading its models), the status of each preloaded model,
+    and the time each startup phase took"""
+    return {**model_preload_status.json(), "startupTimesMs": dict(startup_times_ms)}
 
 
 class PopulateCache:
@@ -145,13 +205,14 @@ class ModelsForCacheing:
         # TBD to include cross-encoder/ms-marco-TinyBERT-L-2-v2
 
         self.default_devices = ['cpu'] if not torch.cuda.is_available() else ['cpu', 'cuda']
+        self.thread_count = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MODEL_PRELOAD_THREAD_COUNT)
+        self.serve_before_models_loaded = \
+            utils.read_env_vars_and_defaults(EnvVars.MARQO_SERVE_BEFORE_MODELS_LOADED) == "TRUE"
 
         self.logger.info(f"pre-loading {self.models} onto devices={self.default_devices}")
 
     def run(self):
-        test_string = 'this is a test string'
-        N = 10
-        messages = []
+        to_preload = []
         for model in self.models:
             # Skip preloading of models that can't be preloaded (eg. no_model)
             if isinstance(model, str):
@@ -169,25 +230,75 @@ class ModelsForCacheing:
                 continue
 
             for device in self.default_devices:
-                self.logger.debug(f"Beginning loading for model: {model} on device: {device}")
-                
-                # warm it up
-                _ = _preload_model(model=model, content=test_string, device=device)
+                if (model_name, device) in [(name, d) for _, name, d in to_preload]:
+                    self.logger.info(f"Skipping duplicate preloading of `{model_name}` on device {device}.")
+                    continue
+                to_preload.append((model, model_name, device))
+
+        model_preload_status.start([(model_name, device) for _, model_name, device in to_preload])
+        if self.serve_before_models_loaded:
+            self.logger.info("serving requests while models are loaded. Their progress is reported by GET /readiness")
+            threading.Thread(target=self._preload, args=(to_preload,), name="model-preload", daemon=True).start()
+        else:
+            self._preload(to_preload)
 
-                t = 0
-                for n in range(N):
-                    t0 = time.time()
-                    _ = _preload_model(model=model, content=test_string, device=device)
-                    t1 = time.time()
-                    t += (t1 - t0)
-                message = f"{(t)/float((N))} for {model} and {device}"
-                messages.append(message)
-                self.logger.debug(f"{model} {device} vectorise run {N} times.")
-                self.logger.info(f"{model} {device} run succesfully!")
+    def _preload(self, to_preload: List[Tuple[Union[str, dict], str, str]]) -> None:
+        """Loads and warms up the models, `thread_count` (model, device) pairs at a time, so that downloading,
+        deserialising and moving models to devices overlap.
+
+        Raises:
+            the first error raised while preloading a model, once all the models have been preloaded (unless they
+            are being preloaded in the background, where errors are reported by GET /readiness instead)
+        """
+        t0 = time.time()
+        messages = []
+        first_error = None
+        with ThreadPoolExecutor(max_workers=self.thread_count, thread_name_prefix="model-preload") as executor:
+            futures = [executor.submit(self._preload_model_on_device, model, model_name, device)
+                       for model, model_name, device in to_preload]
+            for future in futures:
+                try:
+                    messages.append(future.result())
+                except Exception as e:
+                    first_error = first_error or e
 
         for message in messages:
             self.logger.info(message)
-        self.logger.info("completed loading models")
+        preload_time_ms = 1000 * (time.time() - t0)
+        model_preload_status.finish(preload_time_ms)
+        self.logger.info(f"completed loading models in {preload_time_ms:.1f}ms")
+
+        if first_error is not None:
+            if not self.serve_before_models_loaded:
+                raise first_error
+            self.logger.error(f"could not preload all models. Reason: {first_error}")
+
+    def _preload_model_on_device(self, model: Union[str, dict], model_name: str, device: str) -> str:
+        """Loads the model onto the device, then times N vectorise calls. Returns the timing message."""
+        test_string = 'this is a test string'
+        N = 10
+        self.logger.debug(f"Beginning loading for model: {model} on device: {device}")
+        model_preload_status.update(model_name, device, status="loading")
+        try:
+            # warm it up
+            t0 = time.time()
+            _ = _preload_model(model=model, content=test_string, device=device)
+            load_time = time.time() - t0
+
+            t = 0
+            for n in range(N):
+                t0 = time.time()
+                _ = _preload_model(model=model, content=test_string, device=device)
+                t1 = time.time()
+                t += (t1 - t0)
+        except Exception as e:
+            model_preload_status.update(model_name, device, status="failed", error=str(e))
+            raise
+        model_preload_status.update(model_name, device, status="warm", loadTimeMs=1000 * load_time,
+                                    warmupTimeMs=1000 * t)
+        self.logger.debug(f"{model} {device} vectorise run {N} times.")
+        self.logger.info(f"{model} {device} run succesfully!")
+        return f"{(t)/float((N))} for {model} and {device} (loaded in {load_time:.3f}s)"
 
 
 def _preload_model(model, content, device):
@@ -232,6 +343,19 @@ class InitializeRedis:
             redis_driver.init_from_app(self.host, self.port)
 
 
+class ResumeIndexingJobs:
+    """Starts the add documents job workers, which resume the jobs left unfinished by the last run"""
+
+    def __init__(self, marqo_os_url: str):
+        self.marqo_os_url = marqo_os_url
+
+    def run(self):
+        c = config.Config(api_utils.upconstruct_authorized_url(
+            opensearch_url=self.marqo_os_url
+        ))
+        indexing_jobs.get_queue(c)
+
+
 class DownloadStartText:
 
     def run(self):
@@ -0,0 +1,136 @@
+"""In-process cache of query vectors, used by tensor_search.vectorise_jobs() so that repeated search queries
+don't need to be run through the model again.
+
+Entries are keyed by (model cache key, normalize_embeddings, content type, content), where content is the
+content that was vectorised (i.e. with any prefix added). The cache is bounded by the approximate size of its
+entries in bytes (least recently used entries are evicted first) and entries expire after a TTL.
+
+Limits are read from the env vars MARQO_QUERY_VECTOR_CACHE_MAX_BYTES and MARQO_QUERY_VECTOR_CACHE_TTL_SECONDS
+when the cache is first used. Setting MARQO_QUERY_VECTOR_CACHE_MAX_BYTES to 0 disables the cache.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, List, NamedTuple, Optional, Tuple
+
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+
+QueryVectorCacheKey = Tuple[str, bool, str, Hashable]
+
+
+class _CacheEntry(NamedTuple):
+    vector: List[float]
+    size_bytes: int
+    expiry_time: Optional[float]
+
+
+class QueryVectorCache:
+    """A thread safe LRU cache of query vectors, bounded by size in bytes, with a TTL per entry."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[int] = None):
+        """
+        Args:
+            max_bytes: approximate max memory used by cached entries. 0 disables the cache.
+            ttl_seconds: time after which an entry expires. None or 0 means entries don't expire.
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds if ttl_seconds else None
+        self.current_bytes = 0
+        self._entries: "OrderedDict[QueryVectorCacheKey, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create_key(model_cache_key: str, normalize_embeddings: bool, content_type: str,
+                   content: Hashable) -> QueryVectorCacheKey:
+        return model_cache_key, normalize_embeddings, content_type, content
+
+    @staticmethod
+    def _estimate_size_bytes(key: QueryVectorCacheKey, vector: List[float]) -> int:
+        return sys.getsizeof(vector) + len(vector) * sys.getsizeof(0.0) + sum(sys.getsizeof(k) for k in key)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: QueryVectorCacheKey) -> Optional[List[float]]:
+        """Returns the cached vector for the key, or None if it isn't cached (or has expired)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expiry_time is not None and entry.expiry_time <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.vector
+
+    def put(self, key: QueryVectorCacheKey, vector: List[float]) -> None:
+        """Adds a vector to the cache, evicting least recently used entries if the cache is full.
+
+        Vectors larger than the whole cache are not cached."""
+        size_bytes = self._estimate_size_bytes(key, vector)
+        if size_bytes > self.max_bytes:
+            return
+        expiry_time = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self.current_bytes + size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = _CacheEntry(vector=vector, size_bytes=size_bytes, expiry_time=expiry_time)
+            self.current_bytes += size_bytes
+
+    def invalidate_model(self, model_name: str, device: str) -> int:
+        """Removes the vectors created by a model. Models are matched the same way as
+        s2_inference.eject_model() matches model cache keys.
+
+        Returns:
+            the number of entries removed
+        """
+        with self._lock:
+            keys_to_remove = [
+                key for key in self._entries
+                if key[0].startswith(model_name) and key[0].endswith(device)
+            ]
+            for key in keys_to_remove:
+                self._remove(key)
+        return len(keys_to_remove)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: QueryVectorCacheKey) -> None:
+        """Removes an entry. The caller must hold the lock."""
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size_bytes
+
+
+_cache: Optional[QueryVectorCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> QueryVectorCache:
+    """Returns the process-wide query vector cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryVectorCache(
+                    max_bytes=read_env_vars_and_defaults_ints(EnvVars.MARQO_QUERY_VECTOR_CACHE_MAX_BYTES),
+                    ttl_seconds=read_env_vars_and_defaults_ints(EnvVars.MARQO_QUERY_VECTOR_CACHE_TTL_SECONDS)
+                )
+    return _cache
+
+
+def empty_cache() -> None:
+    """Drops the process-wide cache. It is recreated (with limits re-read from env vars) on next use."""
+    global _cache
+    with _cache_lock:
+        _cache = None
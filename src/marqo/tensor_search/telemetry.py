@@ -3,6 +3,8 @@ from starlette.requests import Request
 from starlette.responses import Response
 from typing import Any, Callable, Dict, List, Optional, Union
 import json
+import re
+import threading
 from collections import defaultdict
 from contextlib import contextmanager
 import time
@@ -120,6 +122,10 @@ class RequestMetricsStore():
     
     METRIC_STORES: Dict[Request, RequestMetrics] = {}
 
+    # Metrics are cleared when their request finishes. This bounds the store if that is ever missed, by evicting the
+    # metrics of the oldest requests.
+    MAX_METRIC_STORES = 10000
+
     @classmethod
     def _set_request(cls, r: Request):
         cls.current_request.set(r)
@@ -142,11 +148,157 @@ class RequestMetricsStore():
         """
         r = r if r is not None else cls._get_request()
         cls._set_request(r)
+        if r not in cls.METRIC_STORES and len(cls.METRIC_STORES) >= cls.MAX_METRIC_STORES:
+            logger.warning(f"More than {cls.MAX_METRIC_STORES} requests have metrics stored. "
+                           f"Evicting the metrics of the oldest request.")
+            cls.METRIC_STORES.pop(next(iter(cls.METRIC_STORES)), None)
         cls.METRIC_STORES[r] = metrics if metrics is not None else RequestMetrics()
 
     @classmethod
-    def clear_metrics_for(cls, r: Request) -> None:
-        cls.METRIC_STORES.pop(r, None)
+    def clear_metrics_for(cls, r: Request) -> Optional[RequestMetrics]:
+        """Removes the metrics of the request from the store, returning them (or None if there weren't any)."""
+        return cls.METRIC_STORES.pop(r, None)
+
+
+# Upper bounds of the stage latency histogram buckets, in ms
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+
+# Metric keys that embed a per-request value (an image pointer, an index name, a position in a bulk search) are folded
+# into a single series per stage. Applied in order, to the first match only.
+_METRIC_KEY_NORMALISATIONS = [
+    (re.compile(r"^image_download\.(?!full_time$).+$", re.DOTALL), "image_download.image"),
+    (re.compile(r"^.+\.UnidentifiedImageError$", re.DOTALL), "image_download.UnidentifiedImageError"),
+    (re.compile(r"^(\w+) /indexes/(?!bulk/)[^/]+/", re.DOTALL), r"\1 /indexes/{index_name}/"),
+    (re.compile(r"^bulk_search\.\d+\."), "bulk_search.{i}."),
+]
+
+
+def normalise_metric_key(k: str) -> str:
+    """Returns the name of the series that a RequestMetrics key is aggregated into."""
+    for pattern, replacement in _METRIC_KEY_NORMALISATIONS:
+        normalised, n = pattern.subn(replacement, k, count=1)
+        if n:
+            return normalised
+    return k
+
+
+class _Histogram:
+    __slots__ = ("bucket_counts", "sum", "count")
+
+    def __init__(self, num_buckets: int):
+        self.bucket_counts = [0] * num_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsAggregator:
+    """Process-wide latency histograms and counters, folded from the RequestMetrics of each finished request.
+
+    Each timer key becomes a latency histogram, and each counter key a counter. The number of series is capped at
+    max_series; keys beyond that are dropped (and counted), so unexpected high-cardinality keys can't grow it without
+    bound.
+    """
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS, max_series: int = 1000):
+        self.buckets_ms = tuple(buckets_ms)
+        self.max_series = max_series
+        self._histograms: Dict[str, _Histogram] = dict()
+        self._counters: Dict[str, float] = dict()
+        self._requests = 0
+        self._dropped_keys = 0
+        self._lock = threading.Lock()
+
+    def _has_room_for(self, series: Dict, key: str) -> bool:
+        if key in series or len(self._histograms) + len(self._counters) < self.max_series:
+            return True
+        self._dropped_keys += 1
+        return False
+
+    def record(self, metrics: RequestMetrics) -> None:
+        """Folds the times and counters of a finished request into the aggregates."""
+        with self._lock:
+            self._requests += 1
+            for k, times in list(metrics.times.items()):
+                key = normalise_metric_key(k)
+                if not self._has_room_for(self._histograms, key):
+                    continue
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = _Histogram(len(self.buckets_ms))
+                for t in (times if isinstance(times, list) else [times]):
+                    histogram.bucket_counts[next(i for i, b in enumerate(self.buckets_ms) if t <= b)] += 1
+                    histogram.sum += t
+                    histogram.count += 1
+
+            for k, count in list(metrics.counter.items()):
+                key = normalise_metric_key(k)
+                if self._has_room_for(self._counters, key):
+                    self._counters[key] = self._counters.get(key, 0) + count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._requests = 0
+            self._dropped_keys = 0
+
+    def json(self) -> dict:
+        """Returns the aggregates, with cumulative histogram bucket counts keyed by their upper bound in ms."""
+        with self._lock:
+            histograms = dict()
+            for key, histogram in sorted(self._histograms.items()):
+                cumulative, buckets = 0, dict()
+                for bound, count in zip(self.buckets_ms, histogram.bucket_counts):
+                    cumulative += count
+                    buckets[_format_bound(bound)] = cumulative
+                histograms[key] = {"buckets": buckets, "sum": histogram.sum, "count": histogram.count}
+            return {
+                "requests": self._requests,
+                "droppedKeys": self._dropped_keys,
+                "timesMs": histograms,
+                "counter": dict(sorted(self._counters.items())),
+            }
+
+    def prometheus_text(self) -> str:
+        """Returns the aggregates in the Prometheus text exposition format."""
+        aggregates = self.json()
+        lines = [
+            "# HELP marqo_requests_total Requests processed.",
+            "# TYPE marqo_requests_total counter",
+            f"marqo_requests_total {aggregates['requests']}",
+            "# HELP marqo_request_stage_duration_milliseconds Time spent in each stage of a request, in ms.",
+            "# TYPE marqo_request_stage_duration_milliseconds histogram",
+        ]
+        for key, histogram in aggregates["timesMs"].items():
+            stage = _escape_label_value(key)
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'marqo_request_stage_duration_milliseconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'marqo_request_stage_duration_milliseconds_sum{{stage="{stage}"}} {histogram["sum"]}')
+            lines.append(f'marqo_request_stage_duration_milliseconds_count{{stage="{stage}"}} {histogram["count"]}')
+        lines += [
+            "# HELP marqo_request_stage_events_total Events counted during requests.",
+            "# TYPE marqo_request_stage_events_total counter",
+        ]
+        for key, count in aggregates["counter"].items():
+            lines.append(f'marqo_request_stage_events_total{{name="{_escape_label_value(key)}"}} {count}')
+        lines += [
+            "# HELP marqo_metrics_dropped_keys_total Metric keys not aggregated, as the max number of series was reached.",
+            "# TYPE marqo_metrics_dropped_keys_total counter",
+            f"marqo_metrics_dropped_keys_total {aggregates['droppedKeys']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# Aggregates the metrics of every request processed by TelemetryMiddleware
+METRICS_AGGREGATOR = MetricsAggregator()
 
 
 class TelemetryMiddleware(BaseHTTPMiddleware):
@@ -176,19 +328,36 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable[[], Any]):
         """Wraps the request chain for a given request.
 
+        The request's metrics are folded into METRICS_AGGREGATOR, and cleared, once it finishes.
+
         Args:
             request: The request being processed
             call_next: A callable to the remaining request call-chain.
 
         """
         RequestMetricsStore.set_in_request(request)
+        try:
+            return await self._dispatch(request, call_next)
+        finally:
+            # Always cleared, so the store doesn't grow with each request that hasn't asked for telemetry.
+            metrics = RequestMetricsStore.clear_metrics_for(request)
+            if metrics is not None:
+                METRICS_AGGREGATOR.record(metrics)
 
+    async def _dispatch(self, request: Request, call_next: Callable[[], Any]):
         response = await call_next(request)
 
         # Early exit if opentelemetry is not to be injected into response.
         if not self.telemetry_enabled_for_request(request):
             return response
 
+        # Telemetry can only be injected into a JSON payload (not, e.g., a stream of NDJSON)
+        if not response.headers.get("content-type", "").startswith("application/json"):
+            get_logger(__name__).warning(
+                f"{self.telemetry_flag} set but response payload is not JSON. telemetry not returned"
+            )
+            return response
+
         data = await self.get_response_json(response)
 
         # Inject telemetry and fix content-length header
@@ -205,8 +374,6 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
             )
             get_logger(__name__).info(f"Telemetry data={json.dumps(RequestMetricsStore.for_request(request).json(), indent=2)}")
 
-        RequestMetricsStore.clear_metrics_for(request)
-
         body = json.dumps(data).encode()
         response.headers["content-length"] = str(len(body))
         
@@ -215,4 +382,4 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
             status_code=response.status_code,
             headers=dict(response.headers),
             media_type=response.media_type
-        )
\ No newline at end of file
+        )
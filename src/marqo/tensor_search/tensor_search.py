@@ -30,8 +30,11 @@ Notes on search behaviour with caching and searchable attributes:
             won’t be searched)
 
 """
+import contextvars
 import copy
 import json
+import queue
+import threading
 from collections import defaultdict
 from contextlib import ExitStack
 from timeit import default_timer as timer
@@ -51,12 +54,15 @@ from marqo.tensor_search.enums import (
     EnvVars, MappingsObjectType, DocumentFieldType, ModelProperties
 )
 from marqo.tensor_search.enums import IndexSettingsField as NsField
-from marqo.tensor_search import utils, backend, validation, configs, add_docs, filtering, create_index
+from marqo.tensor_search import utils, backend, validation, configs, add_docs, filtering, create_index, fusion
 from marqo.tensor_search.formatting import _clean_doc
 from marqo.tensor_search.index_meta_cache import get_cache, get_index_info
 from marqo.tensor_search import index_meta_cache
+from marqo.tensor_search import query_vector_cache
 from marqo.tensor_search.models.api_models import BulkSearchQuery, BulkSearchQueryEntity, ScoreModifier
-from marqo.tensor_search.models.search import Qidx, JHash, SearchContext, VectorisedJobs, VectorisedJobPointer
+from marqo.tensor_search.models.search import (
+    Qidx, JHash, SearchContext, VectorisedJobs, VectorisedJobPointer, HybridParameters
+)
 from marqo.tensor_search.models.index_info import IndexInfo, get_model_properties_from_index_defaults
 from marqo.tensor_search.models.external_apis.abstract_classes import ExternalAuth
 from marqo.tensor_search.telemetry import RequestMetricsStore
@@ -67,16 +73,17 @@ from marqo.s2_inference.processing import text as text_processor
 from marqo.s2_inference.processing import image as image_processor
 from marqo.s2_inference.clip_utils import _is_image
 from marqo.s2_inference.reranking import rerank
+from marqo.s2_inference.reranking import score_cache as rerank_score_cache
 from marqo.s2_inference import s2_inference
 import torch.cuda
 import psutil
 # We depend on _httprequests.py for now, but this may be replaced in the future, as
 # _httprequests.py is designed for the client
 from marqo._httprequests import HttpRequests
+from marqo import _httprequests
 from marqo.config import Config
 from marqo import errors
 from marqo.s2_inference import errors as s2_inference_errors
-import threading
 from dataclasses import replace
 from marqo.tensor_search.tensor_search_logging import get_logger
 
@@ -364,19 +371,132 @@ def add_documents(config: Config, add_docs_params: AddDocsParams):
         config: Config object
         add_docs_params: add_documents()'s parameters
     """
-    
+    prepared_batch = _prepare_add_documents_batch(config=config, add_docs_params=add_docs_params)
+    return _write_add_documents_batch(config=config, prepared_batch=prepared_batch)
+
+
+def add_documents_pipelined(config: Config, batches: Iterable[AddDocsParams],
+                            queue_size: Optional[int] = None) -> typing.Iterator[dict]:
+    """Adds batches of docs, preparing each batch while the previous one is written to Marqo-OS.
+
+    Each batch is added as add_documents() would add it, but the work is split into two stages that run at the
+    same time: a background thread downloads images, chunks and vectorises batch N+1 (the CPU/GPU-bound part),
+    while the calling thread updates the mappings and sends the `/_bulk` request of batch N (the IO-bound part).
+    Up to queue_size prepared batches wait to be written, so the vectors held in memory are bounded.
+
+    Batches are written in order, and the times of both stages are recorded in the caller's request metrics.
+    If a batch raises an error, the batches before it are written first and no batch after it is.
+
+    With use_existing_tensors, a batch's existing docs must be read after the previous batch was written, so those
+    batches are added one at a time, by the calling thread. The next batch isn't prepared meanwhile, as both would
+    record the same request metrics.
+
+    Args:
+        config: Config object
+        batches: add_documents()'s parameters, for each batch
+        queue_size: how many prepared batches can wait to be written. Defaults to
+            MARQO_ADD_DOCS_PIPELINE_QUEUE_SIZE
+
+    Yields:
+        add_documents()'s response, for each batch
+    """
+    if queue_size is None:
+        queue_size = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_ADD_DOCS_PIPELINE_QUEUE_SIZE)
+    if queue_size < 1:
+        raise errors.InternalError(f"The add documents pipeline's queue size must be at least 1, not {queue_size}")
+
+    prepared_batches = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+    # Set by the calling thread once it has added a use_existing_tensors batch
+    batch_added = threading.Event()
+
+    def put(item) -> bool:
+        """Waits for room in the queue, returning False if the pipeline was stopped first"""
+        while not stopped.is_set():
+            try:
+                prepared_batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def wait_until_added() -> bool:
+        """Waits for the calling thread to add a use_existing_tensors batch, returning False if the pipeline was
+        stopped first"""
+        while not stopped.is_set():
+            if batch_added.wait(timeout=0.1):
+                return True
+        return False
+
+    def prepare_batches():
+        try:
+            for add_docs_params in batches:
+                if stopped.is_set():
+                    return
+                if add_docs_params.use_existing_tensors:
+                    # Prepared and written by the calling thread, when the batches before it are written
+                    batch_added.clear()
+                    if not put(add_docs_params) or not wait_until_added():
+                        return
+                    continue
+                with RequestMetricsStore.for_request().time("add_documents.pipeline.prepare"):
+                    prepared_batch = _prepare_add_documents_batch(config=config, add_docs_params=add_docs_params)
+                with RequestMetricsStore.for_request().time("add_documents.pipeline.wait_for_write"):
+                    if not put(prepared_batch):
+                        return
+        except Exception as e:
+            put(e)
+        else:
+            put(None)
+
+    # The thread records its metrics in the caller's request
+    preparer = threading.Thread(target=contextvars.copy_context().run, args=(prepare_batches,),
+                                name="add-documents-pipeline", daemon=True)
+    preparer.start()
+    try:
+        while True:
+            with RequestMetricsStore.for_request().time("add_documents.pipeline.wait_for_prepare"):
+                prepared_batch = prepared_batches.get()
+            if prepared_batch is None:
+                return
+            if isinstance(prepared_batch, Exception):
+                raise prepared_batch
+            with RequestMetricsStore.for_request().time("add_documents.pipeline.write"):
+                if isinstance(prepared_batch, AddDocsParams):
+                    response = add_documents(config=config, add_docs_params=prepared_batch)
+                    batch_added.set()
+                else:
+                    response = _write_add_documents_batch(config=config, prepared_batch=prepared_batch)
+            yield response
+    finally:
+        stopped.set()
+        preparer.join()
+
+
+class _PreparedAddDocumentsBatch(typing.NamedTuple):
+    """An add_documents batch that is ready to be written to Marqo-OS (see _prepare_add_documents_batch())"""
+    add_docs_params: AddDocsParams
+    bulk_parent_dicts: List[dict]
+    new_fields: set
+    new_obj_fields: Dict[str, set]
+    unsuccessful_docs: List[Tuple[int, dict]]
+    # When add_documents() started on the batch
+    t0: float
+
+
+def _prepare_add_documents_batch(config: Config, add_docs_params: AddDocsParams) -> _PreparedAddDocumentsBatch:
+    """Downloads the images of the docs, then validates, chunks and vectorises them. The first stage of
+    add_documents(): nothing is written to Marqo-OS."""
     max_add_docs_retry_attempts = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_ATTEMPTS)
     max_add_docs_retry_backoff = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF)
     # ADD DOCS TIMER-LOGGER (3)
 
     RequestMetricsStore.for_request().start("add_documents.processing_before_opensearch")
-    start_time_3 = timer()
 
     if add_docs_params.mappings is not None:
         validation.validate_mappings_object(mappings_object=add_docs_params.mappings)
 
     t0 = timer()
-    bulk_parent_dicts = []
 
     try:
         index_info = backend.get_index_info(
@@ -385,11 +505,139 @@ def add_documents(config: Config, add_docs_params: AddDocsParams):
             max_retry_attempts=max_add_docs_retry_attempts,
             max_retry_backoff_seconds=max_add_docs_retry_backoff
         )
-        # Retrieve model dimensions from index info
-        index_model_dimensions = index_info.get_model_properties()["dimensions"]
     except errors.IndexNotFoundError:
         raise errors.IndexNotFoundError(f"Cannot add documents to non-existent index {add_docs_params.index_name}")
 
+    image_repo = {}
+    doc_count = len(add_docs_params.docs)
+    
+    with ExitStack() as exit_stack:
+        if index_info.index_settings[NsField.index_defaults][NsField.treat_urls_and_pointers_as_images]:
+            with RequestMetricsStore.for_request().time(
+                "image_download.full_time",
+                lambda t: logger.debug(
+                    f"add_documents image download: took {t:.3f}ms to concurrently download "
+                    f"images for {doc_count} docs using {add_docs_params.image_download_thread_count} threads"
+                )
+            ):
+                image_repo = exit_stack.enter_context(
+                    add_docs.download_images(**_get_image_download_args(add_docs_params)))
+
+        existing_docs_by_id = None
+        if add_docs_params.use_existing_tensors:
+            existing_docs_by_id = _index_documents_for_upsert_by_id(_get_documents_for_upsert(
+                config=config, index_name=add_docs_params.index_name,
+                document_ids=_get_document_ids_for_upsert(add_docs_params.docs)))
+
+        bulk_parent_dicts, new_fields, new_obj_fields, unsuccessful_docs, total_vectorise_time = \
+            _create_bulk_parent_dicts(add_docs_params=add_docs_params, index_info=index_info,
+                                      image_repo=image_repo, existing_docs_by_id=existing_docs_by_id)
+    _log_add_documents_preprocessing(doc_count=doc_count, total_vectorise_time=total_vectorise_time)
+
+    return _PreparedAddDocumentsBatch(
+        add_docs_params=add_docs_params, bulk_parent_dicts=bulk_parent_dicts, new_fields=new_fields,
+        new_obj_fields=new_obj_fields, unsuccessful_docs=unsuccessful_docs, t0=t0)
+
+
+def _write_add_documents_batch(config: Config, prepared_batch: _PreparedAddDocumentsBatch) -> dict:
+    """Adds any new fields to the index's mappings, then indexes the prepared docs with a `/_bulk` request. The
+    second stage of add_documents(), returning its response."""
+    max_add_docs_retry_attempts = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_ATTEMPTS)
+    max_add_docs_retry_backoff = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_ADD_DOCS_RETRY_BACKOFF)
+    add_docs_params = prepared_batch.add_docs_params
+
+    if prepared_batch.bulk_parent_dicts:
+        # the HttpRequest wrapper handles error logic
+        update_mapping_response = backend.add_customer_field_properties(
+            config=config, index_name=add_docs_params.index_name, customer_field_names=prepared_batch.new_fields,
+            multimodal_combination_fields=prepared_batch.new_obj_fields,
+            max_retry_attempts=max_add_docs_retry_attempts, max_retry_backoff_seconds=max_add_docs_retry_backoff)
+
+        # ADD DOCS TIMER-LOGGER (5)
+        start_time_5 = timer()
+        with RequestMetricsStore.for_request().time("add_documents.opensearch._bulk"):
+            serialised_body = utils.dicts_to_jsonl(prepared_batch.bulk_parent_dicts)
+            index_parent_response = HttpRequests(config).post(
+                path=_get_bulk_path(add_docs_params.auto_refresh),
+                body=serialised_body,
+                max_retry_attempts=max_add_docs_retry_attempts,
+                max_retry_backoff_seconds=max_add_docs_retry_backoff
+            )
+        _log_bulk_response(response=index_parent_response, doc_count=len(add_docs_params.docs),
+                           total_http_time=timer() - start_time_5)
+    else:
+        index_parent_response = None
+
+    with RequestMetricsStore.for_request().time("add_documents.postprocess"):
+        return _translate_add_documents_response(
+            response=index_parent_response, unsuccessful_docs=prepared_batch.unsuccessful_docs,
+            index_name=add_docs_params.index_name, time_diff=timer() - prepared_batch.t0)
+
+
+def _get_image_download_args(add_docs_params: AddDocsParams) -> dict:
+    """The args add_docs.download_images() downloads the images of an add_documents batch with"""
+    if add_docs_params.tensor_fields and '_id' in add_docs_params.tensor_fields:
+        raise errors.BadRequestError(message="`_id` field cannot be a tensor field.")
+    return dict(docs=add_docs_params.docs,
+                thread_count=add_docs_params.image_download_thread_count,
+                tensor_fields=add_docs_params.tensor_fields
+                if add_docs_params.tensor_fields is not None else None,
+                non_tensor_fields=add_docs_params.non_tensor_fields + ['_id']
+                if add_docs_params.non_tensor_fields is not None else None,
+                image_download_headers=add_docs_params.image_download_headers)
+
+
+def _get_document_ids_for_upsert(docs: List[dict]) -> List[str]:
+    """The unique IDs of docs, whose existing docs are looked up when use_existing_tensors=True"""
+    # A dict is used as an ordered set of IDs.
+    doc_ids = dict()
+
+    # Iterate through the list in reverse, only latest doc with dupe id gets added.
+    for doc in reversed(docs):
+        if "_id" in doc:
+            try:
+                doc_ids[doc["_id"]] = None
+            except TypeError:
+                # Unhashable IDs are invalid, and are rejected when the doc is validated
+                pass
+    return list(doc_ids)
+
+
+def _index_documents_for_upsert_by_id(existing_docs: dict) -> Dict[str, dict]:
+    existing_docs_by_id = dict()
+    for existing_doc in existing_docs["docs"]:
+        if existing_doc["_id"] in existing_docs_by_id:
+            raise errors.InternalError(
+                message=f"Upsert: found more than 1 matching doc for {existing_doc['_id']} when only 1 or 0 "
+                        f"should have been found.")
+        existing_docs_by_id[existing_doc["_id"]] = existing_doc
+    return existing_docs_by_id
+
+
+def _create_bulk_parent_dicts(
+        add_docs_params: AddDocsParams, index_info: IndexInfo, image_repo: dict,
+        existing_docs_by_id: Optional[Dict[str, dict]] = None
+) -> Tuple[List[dict], set, Dict[str, set], List[Tuple[int, dict]], float]:
+    """Validates, chunks and vectorises the docs of an add_documents batch.
+
+    This is the CPU-bound part of add_documents(): it doesn't send any requests to Marqo-OS.
+
+    Args:
+        add_docs_params: add_documents()'s parameters
+        index_info: the index's IndexInfo
+        image_repo: the downloaded images of the docs (see add_docs.download_images())
+        existing_docs_by_id: the existing docs, by ID, if use_existing_tensors=True
+
+    Returns:
+        A tuple of:
+            - the `/_bulk` body: an indexing instruction followed by the doc, for each doc to be indexed
+            - the new fields of the docs, as (field name, OpenSearch type) tuples
+            - the new child fields of each multimodal field
+            - (position in the batch, error) of each doc that couldn't be indexed, in batch order
+            - the time spent vectorising, in seconds
+    """
+    index_model_dimensions = index_info.get_model_properties()["dimensions"]
+
     # Determine chunk prefix at the request level
     text_chunk_prefix = add_docs.determine_text_chunk_prefix(
         request_level_prefix=add_docs_params.text_chunk_prefix,
@@ -398,6 +646,7 @@ def add_documents(config: Config, add_docs_params: AddDocsParams):
     if text_chunk_prefix is None:
         text_chunk_prefix = ""
 
+    bulk_parent_dicts = []
     existing_fields = set(index_info.properties.keys())
     new_fields = set()
 
@@ -409,385 +658,516 @@ def add_documents(config: Config, add_docs_params: AddDocsParams):
 
     unsuccessful_docs = []
     total_vectorise_time = 0
-    
-    image_repo = {}
-    doc_count = len(add_docs_params.docs)
-    
-    with ExitStack() as exit_stack:
-        if index_info.index_settings[NsField.index_defaults][NsField.treat_urls_and_pointers_as_images]:
-            with RequestMetricsStore.for_request().time(
-                "image_download.full_time",
-                lambda t: logger.debug(
-                    f"add_documents image download: took {t:.3f}ms to concurrently download "
-                    f"images for {doc_count} docs using {add_docs_params.image_download_thread_count} threads"
-                )
-            ):
-                if add_docs_params.tensor_fields and '_id' in add_docs_params.tensor_fields:
-                    raise errors.BadRequestError(message="`_id` field cannot be a tensor field.")
 
-                image_repo = exit_stack.enter_context(
-                    add_docs.download_images(docs=add_docs_params.docs, thread_count=20,
-                                             tensor_fields=add_docs_params.tensor_fields
-                                             if add_docs_params.tensor_fields is not None else None,
-                                             non_tensor_fields=add_docs_params.non_tensor_fields + ['_id']
-                                             if add_docs_params.non_tensor_fields is not None else None,
-                                             image_download_headers=add_docs_params.image_download_headers)
-                )
+    normalize_embeddings = index_info.index_settings[NsField.index_defaults][NsField.normalize_embeddings]
+    infer_if_image = index_info.index_settings[NsField.index_defaults][NsField.treat_urls_and_pointers_as_images]
+    # TODO put the logic for getting field parameters into a function and add per field options
+    image_method = index_info.index_settings[NsField.index_defaults][NsField.image_preprocessing][
+        NsField.patch_method]
 
-        if add_docs_params.use_existing_tensors:
-            doc_ids = []
-
-            # Iterate through the list in reverse, only latest doc with dupe id gets added.
-            for i in range(doc_count-1, -1, -1):
-                if ("_id" in add_docs_params.docs[i]) and (add_docs_params.docs[i]["_id"] not in doc_ids):
-                    doc_ids.append(add_docs_params.docs[i]["_id"])
-            existing_docs = _get_documents_for_upsert(
-                config=config, index_name=add_docs_params.index_name, document_ids=doc_ids)
-        
-        for i, doc in enumerate(add_docs_params.docs):
+    # Docs that passed validation and chunking, in request order. Their standard tensor fields are not
+    # vectorised one by one: the chunks of every doc are collected into `chunks_to_vectorise` and encoded
+    # together by _vectorise_chunks_across_docs() once all docs are chunked.
+    docs_to_index = []
+    chunks_to_vectorise = []
 
-            indexing_instructions = {'index': {"_index": add_docs_params.index_name}}
-            copied = copy.deepcopy(doc)
+    for i, doc in enumerate(add_docs_params.docs):
 
-            document_is_valid = True
-            new_fields_from_doc = set()
+        indexing_instructions = {'index': {"_index": add_docs_params.index_name}}
+        copied = copy.deepcopy(doc)
 
-            doc_id = None
-            try:
-                validation.validate_doc(doc)
+        document_is_valid = True
+        new_fields_from_doc = set()
+        doc_chunks_to_vectorise = []
 
-                if "_id" in doc:
-                    doc_id = validation.validate_id(doc["_id"])
-                    del copied["_id"]
-                else:
-                    doc_id = str(uuid.uuid4())
+        doc_id = None
+        try:
+            validation.validate_doc(doc)
+
+            if "_id" in doc:
+                doc_id = validation.validate_id(doc["_id"])
+                del copied["_id"]
+            else:
+                doc_id = str(uuid.uuid4())
 
-                [validation.validate_field_name(field) for field in copied]
-            except errors.__InvalidRequestError as err:
+            [validation.validate_field_name(field) for field in copied]
+        except errors.__InvalidRequestError as err:
+            unsuccessful_docs.append(
+                (i, {'_id': doc_id if doc_id is not None else '',
+                     'error': err.message, 'status': int(err.status_code), 'code': err.code})
+            )
+            continue
+
+        indexing_instructions["index"]["_id"] = doc_id
+        if add_docs_params.use_existing_tensors:
+            # Docs without a matching doc are those without IDs (they get a generated ID), so a request
+            # isn't sent to get them.
+            existing_doc = existing_docs_by_id.get(doc_id, {"found": False})
+
+        # One list of chunks per field, in field order. Lists of fields awaiting vectorisation are
+        # filled in after the cross-document vectorisation step.
+        doc_field_chunks = []
+        for field in copied:
+            # Validation phase for field
+            try:
+                field_content = validation.validate_field_content(
+                    field_content=copied[field],
+                    is_non_tensor_field=not utils.is_tensor_field(field, add_docs_params.tensor_fields, add_docs_params.non_tensor_fields)
+                )
+                if isinstance(field_content, dict):
+                    field_content = validation.validate_dict(
+                        field=field, field_content=field_content,
+                        is_non_tensor_field=not utils.is_tensor_field(field, add_docs_params.tensor_fields,
+                                                                      add_docs_params.non_tensor_fields),
+                        mappings=add_docs_params.mappings,
+                        index_model_dimensions=index_model_dimensions)
+            except errors.InvalidArgError as err:
+                document_is_valid = False
                 unsuccessful_docs.append(
-                    (i, {'_id': doc_id if doc_id is not None else '',
-                         'error': err.message, 'status': int(err.status_code), 'code': err.code})
+                    (i, {'_id': doc_id, 'error': err.message, 'status': int(err.status_code),
+                         'code': err.code})
                 )
+                break
+
+            # Document field type used for:
+            # 1. Determining how to add field to OpenSearch index
+            # 2. Determining chunk and vectorise behavior
+            # Multimodal fields not here because they will get added later (with nesting)
+            document_field_type = add_docs.determine_document_field_type(field, field_content, add_docs_params.mappings)
+            if field not in existing_fields:
+                if document_field_type == DocumentFieldType.standard:
+                    # Normal field (str, int, float, bool, or list)
+                    new_fields_from_doc.add((field, _infer_opensearch_data_type(field_content)))
+                elif document_field_type == DocumentFieldType.custom_vector:
+                    # Custom vector field type in OpenSearch assimilates type of its content
+                    new_fields_from_doc.add((field, _infer_opensearch_data_type(field_content["content"])))
+
+            # Don't process text/image fields when explicitly told not to.
+            if not utils.is_tensor_field(field, add_docs_params.tensor_fields, add_docs_params.non_tensor_fields):
                 continue
 
-            indexing_instructions["index"]["_id"] = doc_id
-            if add_docs_params.use_existing_tensors:
-                matching_doc = [doc for doc in existing_docs["docs"] if doc["_id"] == doc_id]
-                # Should only have 1 result, as only 1 id matches
-                if len(matching_doc) == 1:
-                    existing_doc = matching_doc[0]
-                # When a request isn't sent to get matching docs, because the added docs don't
-                # have IDs:
-                elif len(matching_doc) == 0:
-                    existing_doc = {"found": False}
+            # 4 current options for chunking/vectorisation behavior:
+            # A) field type is custom_vector -> no chunking or vectorisation
+            # B) use_existing_tensors=True and field content hasn't changed -> no chunking or vectorisation
+            # C) field type is standard -> chunking and vectorisation
+            # D) field type is multimodal -> use vectorise_multimodal_combination_field (does chunking and vectorisation)
+
+            field_chunks_to_append = []     # Used by all cases. chunks generated by processing this field for this doc:
+
+            # A) custom_vector fields -> no chunking or vectorisation
+            if document_field_type == DocumentFieldType.custom_vector:
+                # No real vectorisation or chunking will happen for custom vector fields.
+                # No error handling, dict validation happens before this.
+                # Adding chunk (Only 1 chunk gets added for a custom vector field). No metadata yet.
+                field_chunks_to_append.append({
+                    TensorField.marqo_knn_field: field_content["vector"],
+                    TensorField.field_content: field_content["content"],
+                    TensorField.field_name: field
+                })
+                # Update parent document (copied) to fit new format. Use content (text) to replace input dict
+                copied[field] = field_content["content"]
+
+            # B) If field content hasn't changed -> use existing tensors, no chunking or vectorisation
+            elif (add_docs_params.use_existing_tensors
+                    and existing_doc["found"]
+                    and (field in existing_doc["_source"]) and (existing_doc["_source"][field] == field_content)):
+                field_chunks_to_append = _get_chunks_for_field(field_name=field, doc_id=doc_id, doc=existing_doc)
+
+            # Chunking and vectorising phase (only if content changed).
+            # C) Standard document field type
+            elif isinstance(field_content, (str, Image.Image)):
+
+                # TODO: better/consistent handling of a no-op for processing (but still vectorize)
+
+                # 1. check if urls should be downloaded -> "treat_pointers_and_urls_as_images":True
+                # 2. check if it is a url or pointer
+                # 3. If yes in 1 and 2, download blindly (without type)
+                # 4. Determine media type of downloaded
+                # 5. load correct media type into memory -> PIL (images), videos (), audio (torchaudio)
+                # 6. if chunking -> then add the extra chunker
+
+                text_to_split = None
+                image_to_chunk = None
+                if isinstance(field_content, str) and not _is_image(field_content):
+                    # text processing pipeline:
+                    # Deferred: the texts of all docs are split together (see below).
+                    text_to_split = field_content
+                    text_chunks, content_chunks = [], []
+
                 else:
-                    raise errors.InternalError(message= f"Upsert: found {len(matching_doc)} matching docs for {doc_id} when only 1 or 0 should have been found.")
+                    try:
+                        # in the future, if we have different chunking methods, make sure we catch possible
+                        # errors of different types generated here, too.
+                        if isinstance(field_content, str) and index_info.index_settings[NsField.index_defaults][
+                            NsField.treat_urls_and_pointers_as_images]:
+                            if not isinstance(image_repo[field_content], Exception):
+                                image_data = image_repo[field_content]
+                            else:
+                                raise s2_inference_errors.S2InferenceError(
+                                    f"Could not find image found at `{field_content}`. \n"
+                                    f"Reason: {str(image_repo[field_content])}"
+                                )
+                        elif isinstance(field_content, str):
+                            image_data = text_chunk_prefix + field_content     # Add prefix to URL if it's to be treated as-is.
+                        else:
+                            image_data = field_content      # If it's actual image data, just pass it through.
 
-            doc_chunks = []
-            for field in copied:
-                # Validation phase for field
-                try:
-                    field_content = validation.validate_field_content(
-                        field_content=copied[field],
-                        is_non_tensor_field=not utils.is_tensor_field(field, add_docs_params.tensor_fields, add_docs_params.non_tensor_fields)
-                    )
-                    if isinstance(field_content, dict):
-                        field_content = validation.validate_dict(
-                            field=field, field_content=field_content,
-                            is_non_tensor_field=not utils.is_tensor_field(field, add_docs_params.tensor_fields,
-                                                                          add_docs_params.non_tensor_fields),
-                            mappings=add_docs_params.mappings,
-                            index_model_dimensions=index_model_dimensions)
-                except errors.InvalidArgError as err:
+                        if image_method not in [None, 'none', '', "None", ' ']:
+                            # Deferred: the images of all docs are chunked together (see below).
+                            image_to_chunk = image_data
+                            content_chunks, text_chunks = [], []
+                        else:
+                            # if we are not chunking, then we set the chunks as 1-len lists
+                            # content_chunk is the PIL image
+                            # text_chunk refers to URL
+                            content_chunks, text_chunks = [image_data], [field_content]
+                    except s2_inference_errors.S2InferenceError as e:
+                        document_is_valid = False
+                        unsuccessful_docs.append(
+                            (i, {'_id': doc_id, 'error': e.message,
+                                 'status': int(errors.InvalidArgError.status_code),
+                                 'code': errors.InvalidArgError.code})
+                        )
+                        break
+
+                # Deferred: vectors are created in a single pass over all docs (see below).
+                is_text_field = isinstance(field_content, str) and not _is_image(field_content)
+                doc_chunks_to_vectorise.append({
+                    "field": field,
+                    "field_content": field_content,
+                    "text_chunks": text_chunks,
+                    "content_chunks": content_chunks,
+                    "content_type": 'image' if (infer_if_image and not is_text_field) else 'text',
+                    "field_chunks": field_chunks_to_append,
+                    "text_to_split": text_to_split,
+                    "image_to_chunk": image_to_chunk
+                })
+
+            # D) Multimodal chunking and vectorisation
+            elif document_field_type == DocumentFieldType.multimodal_combination:
+                (combo_chunk, combo_document_is_valid,
+                    unsuccessful_doc_to_append, combo_vectorise_time_to_add,
+                    new_fields_from_multimodal_combination) = vectorise_multimodal_combination_field(
+                        field, field_content, copied, i, doc_id, add_docs_params.device, index_info,
+                        image_repo, add_docs_params.mappings[field], 
+                        text_chunk_prefix=text_chunk_prefix,
+                        model_auth=add_docs_params.model_auth)
+                total_vectorise_time = total_vectorise_time + combo_vectorise_time_to_add
+
+                if combo_document_is_valid is False:
                     document_is_valid = False
-                    unsuccessful_docs.append(
-                        (i, {'_id': doc_id, 'error': err.message, 'status': int(err.status_code),
-                             'code': err.code})
-                    )
+                    unsuccessful_docs.append(unsuccessful_doc_to_append)
                     break
+                else:
+                    if field not in new_obj_fields:
+                        new_obj_fields[field] = set()
+                    new_obj_fields[field] = new_obj_fields[field].union(new_fields_from_multimodal_combination)
+                    # Multimodal combo chunk added to field_chunks_to_append (no metadata yet)
+                    field_chunks_to_append.append(combo_chunk)
+
+            # Executes REGARDLESS of document field type.
+            # Add field_chunks_to_append to total document chunk list
+            doc_field_chunks.append(field_chunks_to_append)
+
+        if document_is_valid:
+            doc_to_index = {
+                "doc_index": i,
+                "doc_id": doc_id,
+                "indexing_instructions": indexing_instructions,
+                "copied": copied,
+                "field_chunks": doc_field_chunks,
+                "new_fields": new_fields_from_doc,
+                "is_valid": True
+            }
+            docs_to_index.append(doc_to_index)
+            for chunk_to_vectorise in doc_chunks_to_vectorise:
+                chunk_to_vectorise["doc"] = doc_to_index
+            chunks_to_vectorise.extend(doc_chunks_to_vectorise)
+
+    _split_texts_across_docs(
+        chunks_to_vectorise=chunks_to_vectorise, index_info=index_info, text_chunk_prefix=text_chunk_prefix)
+    unchunked_images = _chunk_images_across_docs(
+        chunks_to_vectorise=chunks_to_vectorise, image_method=image_method, device=add_docs_params.device)
+    for unchunked_image, chunker_error in unchunked_images:
+        failed_doc = unchunked_image["doc"]
+        if failed_doc["is_valid"]:
+            failed_doc["is_valid"] = False
+            unsuccessful_docs.append(
+                (failed_doc["doc_index"], {'_id': failed_doc["doc_id"], 'error': chunker_error.message,
+                                           'status': int(errors.InvalidArgError.status_code),
+                                           'code': errors.InvalidArgError.code})
+            )
+    # Docs with an image that couldn't be chunked aren't indexed, so their other fields aren't vectorised
+    chunks_to_vectorise = [chunk for chunk in chunks_to_vectorise if chunk["doc"]["is_valid"]]
+
+    # ADD DOCS TIMER-LOGGER (4)
+    start_time = timer()
+    failed_chunks = _vectorise_chunks_across_docs(
+        chunks_to_vectorise=chunks_to_vectorise, index_info=index_info, device=add_docs_params.device,
+        normalize_embeddings=normalize_embeddings, infer_if_image=infer_if_image,
+        model_auth=add_docs_params.model_auth
+    )
+    total_vectorise_time += (timer() - start_time)
+
+    for failed_chunk in failed_chunks:
+        failed_doc = failed_chunk["doc"]
+        if failed_doc["is_valid"]:
+            failed_doc["is_valid"] = False
+            image_err = errors.InvalidArgError(
+                message=f'Could not process given image: {failed_chunk["field_content"]}')
+            unsuccessful_docs.append(
+                (failed_doc["doc_index"], {'_id': failed_doc["doc_id"], 'error': image_err.message,
+                                           'status': int(image_err.status_code), 'code': image_err.code})
+            )
+    # Vectorisation errors are found after all docs are chunked. Keep errors in request order.
+    unsuccessful_docs.sort(key=lambda unsuccessful_doc: unsuccessful_doc[0])
 
-                # Document field type used for:
-                # 1. Determining how to add field to OpenSearch index
-                # 2. Determining chunk and vectorise behavior
-                # Multimodal fields not here because they will get added later (with nesting)
-                document_field_type = add_docs.determine_document_field_type(field, field_content, add_docs_params.mappings)
-                if field not in existing_fields:
-                    if document_field_type == DocumentFieldType.standard:
-                        # Normal field (str, int, float, bool, or list)
-                        new_fields_from_doc.add((field, _infer_opensearch_data_type(field_content)))
-                    elif document_field_type == DocumentFieldType.custom_vector:
-                        # Custom vector field type in OpenSearch assimilates type of its content
-                        new_fields_from_doc.add((field, _infer_opensearch_data_type(field_content["content"])))
-
-                # Don't process text/image fields when explicitly told not to.
-                if not utils.is_tensor_field(field, add_docs_params.tensor_fields, add_docs_params.non_tensor_fields):
-                    continue
+    for doc_to_index in docs_to_index:
+        if not doc_to_index["is_valid"]:
+            continue
+        new_fields = new_fields.union(doc_to_index["new_fields"])
 
-                # 4 current options for chunking/vectorisation behavior:
-                # A) field type is custom_vector -> no chunking or vectorisation
-                # B) use_existing_tensors=True and field content hasn't changed -> no chunking or vectorisation
-                # C) field type is standard -> chunking and vectorisation
-                # D) field type is multimodal -> use vectorise_multimodal_combination_field (does chunking and vectorisation)
-                
-                field_chunks_to_append = []     # Used by all cases. chunks generated by processing this field for this doc:
-                
-                # A) custom_vector fields -> no chunking or vectorisation
-                if document_field_type == DocumentFieldType.custom_vector:
-                    # No real vectorisation or chunking will happen for custom vector fields.
-                    # No error handling, dict validation happens before this.
-                    # Adding chunk (Only 1 chunk gets added for a custom vector field). No metadata yet.
-                    field_chunks_to_append.append({
-                        TensorField.marqo_knn_field: field_content["vector"],
-                        TensorField.field_content: field_content["content"],
-                        TensorField.field_name: field
-                    })
-                    # Update parent document (copied) to fit new format. Use content (text) to replace input dict
-                    copied[field] = field_content["content"]
-
-                # B) If field content hasn't changed -> use existing tensors, no chunking or vectorisation
-                elif (add_docs_params.use_existing_tensors
-                        and existing_doc["found"]
-                        and (field in existing_doc["_source"]) and (existing_doc["_source"][field] == field_content)):
-                    field_chunks_to_append = _get_chunks_for_field(field_name=field, doc_id=doc_id, doc=existing_doc)
-
-                # Chunking and vectorising phase (only if content changed).
-                # C) Standard document field type
-                elif isinstance(field_content, (str, Image.Image)):
-
-                    # TODO: better/consistent handling of a no-op for processing (but still vectorize)
-
-                    # 1. check if urls should be downloaded -> "treat_pointers_and_urls_as_images":True
-                    # 2. check if it is a url or pointer
-                    # 3. If yes in 1 and 2, download blindly (without type)
-                    # 4. Determine media type of downloaded
-                    # 5. load correct media type into memory -> PIL (images), videos (), audio (torchaudio)
-                    # 6. if chunking -> then add the extra chunker
-
-                    if isinstance(field_content, str) and not _is_image(field_content):
-                        # text processing pipeline:
-                        split_by = index_info.index_settings[NsField.index_defaults][NsField.text_preprocessing][
-                            NsField.split_method]
-                        split_length = index_info.index_settings[NsField.index_defaults][NsField.text_preprocessing][
-                            NsField.split_length]
-                        split_overlap = index_info.index_settings[NsField.index_defaults][NsField.text_preprocessing][
-                            NsField.split_overlap]
-                        
-                        
-                        # text chunks: WITHOUT prefix, stored in backend chunk list
-                        text_chunks = text_processor.split_text(field_content, split_by=split_by,
-                                                                   split_length=split_length, split_overlap=split_overlap)
-                        
-                        # content chunks: WITH prefix, used to generate vectors (text prefix not actually stored in backend)
-                        content_chunks = text_processor.prefix_text_chunks(text_chunks, text_chunk_prefix)
+        copied = doc_to_index["copied"]
+        doc_chunks = [chunk for field_chunks in doc_to_index["field_chunks"] for chunk in field_chunks]
 
-                    else:
-                        # TODO put the logic for getting field parameters into a function and add per field options
-                        image_method = index_info.index_settings[NsField.index_defaults][NsField.image_preprocessing][
-                            NsField.patch_method]
-                        # the chunk_image contains the no-op logic as of now - method = None will be a no-op
-                        try:
-                            # in the future, if we have different chunking methods, make sure we catch possible
-                            # errors of different types generated here, too.
-                            if isinstance(field_content, str) and index_info.index_settings[NsField.index_defaults][
-                                NsField.treat_urls_and_pointers_as_images]:
-                                if not isinstance(image_repo[field_content], Exception):
-                                    image_data = image_repo[field_content]
-                                else:
-                                    raise s2_inference_errors.S2InferenceError(
-                                        f"Could not find image found at `{field_content}`. \n"
-                                        f"Reason: {str(image_repo[field_content])}"
-                                    )
-                            elif isinstance(field_content, str):
-                                image_data = text_chunk_prefix + field_content     # Add prefix to URL if it's to be treated as-is.
-                            else:
-                                image_data = field_content      # If it's actual image data, just pass it through.
-                            
-                            if image_method not in [None, 'none', '', "None", ' ']:
-                                content_chunks, text_chunks = image_processor.chunk_image(
-                                    image_data, device=add_docs_params.device, method=image_method)
-                            else:
-                                # if we are not chunking, then we set the chunks as 1-len lists
-                                # content_chunk is the PIL image
-                                # text_chunk refers to URL
-                                content_chunks, text_chunks = [image_data], [field_content]
-                        except s2_inference_errors.S2InferenceError as e:
-                            document_is_valid = False
-                            unsuccessful_docs.append(
-                                (i, {'_id': doc_id, 'error': e.message,
-                                     'status': int(errors.InvalidArgError.status_code),
-                                     'code': errors.InvalidArgError.code})
-                            )
-                            break
+        # Create metadata to put in doc chunks (from altered doc)
+        chunk_values_for_filtering = add_docs.create_chunk_metadata(raw_document=copied)
+        for chunk in doc_chunks:
+            # Add metadata to each doc chunk
+            chunk.update(chunk_values_for_filtering)
+        copied[TensorField.chunks] = doc_chunks
 
-                    normalize_embeddings = index_info.index_settings[NsField.index_defaults][
-                        NsField.normalize_embeddings]
-                    infer_if_image = index_info.index_settings[NsField.index_defaults][
-                        NsField.treat_urls_and_pointers_as_images]
+        bulk_parent_dicts.append(doc_to_index["indexing_instructions"])
+        bulk_parent_dicts.append(copied)
 
-                    try:
-                        # in the future, if we have different underlying vectorising methods, make sure we catch possible
-                        # errors of different types generated here, too.
+    return bulk_parent_dicts, new_fields, new_obj_fields, unsuccessful_docs, total_vectorise_time
 
-                        # ADD DOCS TIMER-LOGGER (4)
-                        start_time = timer()
-                        with RequestMetricsStore.for_request().time(f"add_documents.create_vectors"):
-                            vector_chunks = s2_inference.vectorise(
-                                model_name=index_info.model_name,
-                                model_properties=index_info.get_model_properties(), content=content_chunks,
-                                device=add_docs_params.device, normalize_embeddings=normalize_embeddings,
-                                infer=infer_if_image, model_auth=add_docs_params.model_auth
-                            )
 
-                        end_time = timer()
-                        total_vectorise_time += (end_time - start_time)
-                    except (s2_inference_errors.UnknownModelError,
-                            s2_inference_errors.InvalidModelPropertiesError,
-                            s2_inference_errors.ModelLoadError,
-                            s2_inference.ModelDownloadError) as model_error:
-                        raise errors.BadRequestError(
-                            message=f'Problem vectorising query. Reason: {str(model_error)}',
-                            link="https://marqo.pages.dev/latest/Models-Reference/dense_retrieval/"
-                        )
-                    except s2_inference_errors.S2InferenceError:
-                        document_is_valid = False
-                        image_err = errors.InvalidArgError(message=f'Could not process given image: {field_content}')
-                        unsuccessful_docs.append(
-                            (i, {'_id': doc_id, 'error': image_err.message, 'status': int(image_err.status_code),
-                                 'code': image_err.code})
-                        )
-                        break
-                    if (len(vector_chunks) != len(text_chunks)):
-                        raise RuntimeError(
-                            f"the input content after preprocessing and its vectorized counterparts must be the same length."
-                            f"received text_chunks={len(text_chunks)} and vector_chunks={len(vector_chunks)}. "
-                            f"check the preprocessing functions and try again. ")
-
-                    for text_chunk, vector_chunk in zip(text_chunks, vector_chunks):
-                        # Chunk added to field chunks_to_append (no metadata yet).
-                        field_chunks_to_append.append({
-                            TensorField.marqo_knn_field: vector_chunk,
-                            TensorField.field_content: text_chunk,
-                            TensorField.field_name: field
-                        })
-
-                # D) Multimodal chunking and vectorisation
-                elif document_field_type == DocumentFieldType.multimodal_combination:
-                    (combo_chunk, combo_document_is_valid,
-                        unsuccessful_doc_to_append, combo_vectorise_time_to_add,
-                        new_fields_from_multimodal_combination) = vectorise_multimodal_combination_field(
-                            field, field_content, copied, i, doc_id, add_docs_params.device, index_info,
-                            image_repo, add_docs_params.mappings[field], 
-                            text_chunk_prefix=text_chunk_prefix,
-                            model_auth=add_docs_params.model_auth)
-                    total_vectorise_time = total_vectorise_time + combo_vectorise_time_to_add
-                    
-                    if combo_document_is_valid is False:
-                        document_is_valid = False
-                        unsuccessful_docs.append(unsuccessful_doc_to_append)
-                        break
-                    else:
-                        if field not in new_obj_fields:
-                            new_obj_fields[field] = set()
-                        new_obj_fields[field] = new_obj_fields[field].union(new_fields_from_multimodal_combination)
-                        # Multimodal combo chunk added to field_chunks_to_append (no metadata yet)
-                        field_chunks_to_append.append(combo_chunk)
-
-                # Executes REGARDLESS of document field type.
-                # Add field_chunks_to_append to total document chunk list
-                for chunk in field_chunks_to_append:
-                    doc_chunks.append(chunk)
-
-            if document_is_valid:
-                new_fields = new_fields.union(new_fields_from_doc)
-
-                # Create metadata to put in doc chunks (from altered doc)
-                chunk_values_for_filtering = add_docs.create_chunk_metadata(raw_document=copied)
-                for chunk in doc_chunks:
-                    # Add metadata to each doc chunk
-                    chunk.update(chunk_values_for_filtering)
-                copied[TensorField.chunks] = doc_chunks
-
-                bulk_parent_dicts.append(indexing_instructions)
-                bulk_parent_dicts.append(copied)
-
-        total_preproc_time = 0.001 * RequestMetricsStore.for_request().stop("add_documents.processing_before_opensearch")
-        logger.debug(f"      add_documents pre-processing: took {(total_preproc_time):.3f}s total for {doc_count} docs, "
-                    f"for an average of {(total_preproc_time / doc_count):.3f}s per doc.")
-
-        logger.debug(f"          add_documents vectorise: took {(total_vectorise_time):.3f}s for {doc_count} docs, "
-                    f"for an average of {(total_vectorise_time / doc_count):.3f}s per doc.")
-        if bulk_parent_dicts:
-            # the HttpRequest wrapper handles error logic
-            update_mapping_response = backend.add_customer_field_properties(
-                config=config, index_name=add_docs_params.index_name, customer_field_names=new_fields,
-                multimodal_combination_fields=new_obj_fields, max_retry_attempts=max_add_docs_retry_attempts,
-                max_retry_backoff_seconds=max_add_docs_retry_backoff)
-
-            # ADD DOCS TIMER-LOGGER (5)
-            start_time_5 = timer()
-            with RequestMetricsStore.for_request().time("add_documents.opensearch._bulk"):
-                serialised_body = utils.dicts_to_jsonl(bulk_parent_dicts)
-                
-                bulk_path = "_bulk"
-                if add_docs_params.auto_refresh:
-                    bulk_path += "?refresh=true"
-                else:
-                    bulk_path += "?refresh=false"
-                
-                index_parent_response = HttpRequests(config).post(
-                    path=bulk_path,
-                    body=serialised_body,
-                    max_retry_attempts=max_add_docs_retry_attempts,
-                    max_retry_backoff_seconds=max_add_docs_retry_backoff
-                )
-            RequestMetricsStore.for_request().add_time("add_documents.opensearch._bulk.internal", float(index_parent_response["took"]))
-
-            end_time_5 = timer()
-            total_http_time = end_time_5 - start_time_5
-            total_index_time = index_parent_response["took"] * 0.001
-            logger.debug(
-                f"      add_documents roundtrip: took {(total_http_time):.3f}s to send {doc_count} docs (roundtrip) to Marqo-os, "
-                f"for an average of {(total_http_time / doc_count):.3f}s per doc.")
-
-            logger.debug(
-                f"          add_documents Marqo-os index: took {(total_index_time):.3f}s for Marqo-os to index {doc_count} docs, "
-                f"for an average of {(total_index_time / doc_count):.3f}s per doc.")
+def _log_add_documents_preprocessing(doc_count: int, total_vectorise_time: float) -> None:
+    total_preproc_time = 0.001 * RequestMetricsStore.for_request().stop("add_documents.processing_before_opensearch")
+    logger.debug(f"      add_documents pre-processing: took {(total_preproc_time):.3f}s total for {doc_count} docs, "
+                f"for an average of {(total_preproc_time / doc_count):.3f}s per doc.")
+
+    logger.debug(f"          add_documents vectorise: took {(total_vectorise_time):.3f}s for {doc_count} docs, "
+                f"for an average of {(total_vectorise_time / doc_count):.3f}s per doc.")
+
+
+def _get_bulk_path(auto_refresh: bool) -> str:
+    bulk_path = "_bulk"
+    if auto_refresh:
+        bulk_path += "?refresh=true"
+    else:
+        bulk_path += "?refresh=false"
+    return bulk_path
+
+
+def _log_bulk_response(response: dict, doc_count: int, total_http_time: float) -> None:
+    RequestMetricsStore.for_request().add_time("add_documents.opensearch._bulk.internal", float(response["took"]))
+
+    total_index_time = response["took"] * 0.001
+    logger.debug(
+        f"      add_documents roundtrip: took {(total_http_time):.3f}s to send {doc_count} docs (roundtrip) to Marqo-os, "
+        f"for an average of {(total_http_time / doc_count):.3f}s per doc.")
+
+    logger.debug(
+        f"          add_documents Marqo-os index: took {(total_index_time):.3f}s for Marqo-os to index {doc_count} docs, "
+        f"for an average of {(total_index_time / doc_count):.3f}s per doc.")
+
+
+def _translate_add_documents_response(response: Optional[dict], unsuccessful_docs: List[Tuple[int, dict]],
+                                      index_name: str, time_diff: float) -> dict:
+    """translates OpenSearch response dict into Marqo dict"""
+    item_fields_to_remove = ['_index', '_primary_term', '_seq_no', '_shards', '_version']
+    result_dict = {}
+    new_items = []
+
+    if response is not None:
+        copied_res = copy.deepcopy(response)
+
+        result_dict['errors'] = copied_res['errors']
+        actioned = "index"
+
+        for item in copied_res["items"]:
+            for to_remove in item_fields_to_remove:
+                if to_remove in item[actioned]:
+                    del item[actioned][to_remove]
+            new_items.append(item[actioned])
+
+    if unsuccessful_docs:
+        result_dict['errors'] = True
+
+    for loc, error_info in unsuccessful_docs:
+        new_items.insert(loc, error_info)
+
+    result_dict["processingTimeMs"] = time_diff * 1000
+    result_dict["index_name"] = index_name
+    result_dict["items"] = new_items
+    return result_dict
+
+
+def _split_texts_across_docs(
+        chunks_to_vectorise: List[Dict[str, Any]], index_info: IndexInfo, text_chunk_prefix: str
+) -> None:
+    """Splits the text fields of an add_documents batch with the index's text_preprocessing settings.
+
+    The texts of the batch are split by a single text_processor.split_texts() call, so that the splitter is looked up
+    once per batch rather than once per field. The chunks are written to the `text_chunks` (without the prefix, stored
+    in the backend chunk list) and `content_chunks` (with the prefix, used to generate vectors) of the field each
+    text came from.
+
+    Args:
+        chunks_to_vectorise: one entry per field (see _vectorise_chunks_across_docs()). Entries with a
+            `text_to_split` are split
+        index_info: index_info of the index being added to
+        text_chunk_prefix: the prefix added to the content chunks
+    """
+    to_split = [entry for entry in chunks_to_vectorise if entry.get("text_to_split") is not None]
+    if not to_split:
+        return
+
+    text_preprocessing = index_info.index_settings[NsField.index_defaults][NsField.text_preprocessing]
+    text_chunks_list = text_processor.split_texts(
+        [entry["text_to_split"] for entry in to_split], split_by=text_preprocessing[NsField.split_method],
+        split_length=text_preprocessing[NsField.split_length], split_overlap=text_preprocessing[NsField.split_overlap])
+
+    for entry, text_chunks in zip(to_split, text_chunks_list):
+        entry["text_chunks"] = text_chunks
+        entry["content_chunks"] = text_processor.prefix_text_chunks(text_chunks, text_chunk_prefix)
+
+
+def _chunk_images_across_docs(
+        chunks_to_vectorise: List[Dict[str, Any]], image_method: Optional[str], device: str
+) -> List[Tuple[Dict[str, Any], s2_inference_errors.S2InferenceError]]:
+    """Chunks the images of an add_documents batch with the index's patch_method.
+
+    Instead of one image_processor.chunk_image() call per field per document, the images of the batch are chunked by
+    a single image_processor.chunk_images() call, so that model based methods (e.g. frcnn, yolox) run their detector
+    over batches of images. The patches and boxes are written to the `content_chunks` and `text_chunks` of the field
+    each image came from.
+
+    Args:
+        chunks_to_vectorise: one entry per field (see _vectorise_chunks_across_docs()). Entries with an
+            `image_to_chunk` are chunked
+        image_method: the index's patch_method
+        device: device to run the chunking models on
+
+    Returns:
+        The entries whose image could not be chunked, with the reason.
+    """
+    to_chunk = [entry for entry in chunks_to_vectorise if entry.get("image_to_chunk") is not None]
+    if not to_chunk:
+        return []
+
+    image_chunks = image_processor.chunk_images(
+        [entry["image_to_chunk"] for entry in to_chunk], device=device, method=image_method)
+
+    unchunked = []
+    for entry, chunks in zip(to_chunk, image_chunks):
+        if isinstance(chunks, s2_inference_errors.S2InferenceError):
+            unchunked.append((entry, chunks))
         else:
-            index_parent_response = None
+            entry["content_chunks"], entry["text_chunks"] = chunks
+    return unchunked
 
-        with RequestMetricsStore.for_request().time("add_documents.postprocess"):
-            t1 = timer()
 
-            def translate_add_doc_response(response: Optional[dict], time_diff: float) -> dict:
-                """translates OpenSearch response dict into Marqo dict"""
-                item_fields_to_remove = ['_index', '_primary_term', '_seq_no', '_shards', '_version']
-                result_dict = {}
-                new_items = []
+def _vectorise_chunks_across_docs(
+        chunks_to_vectorise: List[Dict[str, Any]], index_info: IndexInfo, device: str,
+        normalize_embeddings: bool, infer_if_image: bool, model_auth: Optional[ModelAuth] = None
+) -> List[Dict[str, Any]]:
+    """Vectorises the chunked fields of an add_documents batch, grouped by modality.
 
-                if response is not None:
-                    copied_res = copy.deepcopy(response)
+    Instead of one s2_inference.vectorise() call per field per document, all text chunks (and all image chunks)
+    of the batch are sent in a single call, which s2_inference splits by MARQO_MAX_VECTORISE_BATCH_SIZE. Vectors
+    are then scattered back to the `field_chunks` list of the field they came from.
 
-                    result_dict['errors'] = copied_res['errors']
-                    actioned = "index"
+    If a grouped call raises an S2InferenceError (e.g. an image that can't be processed), that group is
+    vectorised again one field at a time, so that only the offending documents are rejected.
 
-                    for item in copied_res["items"]:
-                        for to_remove in item_fields_to_remove:
-                            if to_remove in item[actioned]:
-                                del item[actioned][to_remove]
-                        new_items.append(item[actioned])
+    Args:
+        chunks_to_vectorise: one entry per field, with the keys `content_chunks` (what is vectorised),
+            `text_chunks` (what is stored), `content_type` ('text' or 'image'), `field_chunks` (filled by this
+            function) and `doc` (state of the document the field belongs to)
+        index_info: index_info of the index being added to
+        device: device to vectorise on
+        normalize_embeddings: index setting, passed to vectorise
+        infer_if_image: index setting treat_urls_and_pointers_as_images, passed to vectorise
+        model_auth: Authorisation details for downloading a model (if required)
+
+    Returns:
+        The entries of `chunks_to_vectorise` that could not be vectorised.
 
-                if unsuccessful_docs:
-                    result_dict['errors'] = True
+    Raises:
+        BadRequestError if the model can't be loaded.
+    """
+    def vectorise_content(content: List) -> List[List[float]]:
+        try:
+            with RequestMetricsStore.for_request().time(f"add_documents.create_vectors"):
+                return s2_inference.vectorise(
+                    model_name=index_info.model_name,
+                    model_properties=index_info.get_model_properties(), content=content,
+                    device=device, normalize_embeddings=normalize_embeddings,
+                    infer=infer_if_image, model_auth=model_auth
+                )
+        except (s2_inference_errors.UnknownModelError,
+                s2_inference_errors.InvalidModelPropertiesError,
+                s2_inference_errors.ModelLoadError,
+                s2_inference.ModelDownloadError) as model_error:
+            raise errors.BadRequestError(
+                message=f'Problem vectorising query. Reason: {str(model_error)}',
+                link="https://marqo.pages.dev/latest/Models-Reference/dense_retrieval/"
+            )
 
-                for loc, error_info in unsuccessful_docs:
-                    new_items.insert(loc, error_info)
+    def add_vectors_to_field_chunks(chunk_to_vectorise: Dict[str, Any], vector_chunks: List[List[float]]) -> None:
+        text_chunks = chunk_to_vectorise["text_chunks"]
+        if len(vector_chunks) != len(text_chunks):
+            raise RuntimeError(
+                f"the input content after preprocessing and its vectorized counterparts must be the same length."
+                f"received text_chunks={len(text_chunks)} and vector_chunks={len(vector_chunks)}. "
+                f"check the preprocessing functions and try again. ")
+        for text_chunk, vector_chunk in zip(text_chunks, vector_chunks):
+            # Chunk added to field chunks (no metadata yet).
+            chunk_to_vectorise["field_chunks"].append({
+                TensorField.marqo_knn_field: vector_chunk,
+                TensorField.field_content: text_chunk,
+                TensorField.field_name: chunk_to_vectorise["field"]
+            })
+
+    grouped_by_content_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for chunk_to_vectorise in chunks_to_vectorise:
+        grouped_by_content_type[chunk_to_vectorise["content_type"]].append(chunk_to_vectorise)
+
+    failed_chunks = []
+    for content_type, group in grouped_by_content_type.items():
+        content = [content_chunk for entry in group for content_chunk in entry["content_chunks"]]
+        try:
+            vectors = vectorise_content(content)
+        except s2_inference_errors.S2InferenceError:
+            logger.debug(f"add_documents: batched {content_type} vectorisation failed. "
+                         f"Retrying {len(group)} fields one at a time.")
+            failed_doc_indexes = {failed_chunk["doc"]["doc_index"] for failed_chunk in failed_chunks}
+            for entry in group:
+                # One failed field is enough to reject its doc, its other fields needn't be vectorised.
+                if entry["doc"]["doc_index"] in failed_doc_indexes:
+                    continue
+                try:
+                    add_vectors_to_field_chunks(entry, vectorise_content(entry["content_chunks"]))
+                except s2_inference_errors.S2InferenceError:
+                    failed_chunks.append(entry)
+                    failed_doc_indexes.add(entry["doc"]["doc_index"])
+            continue
 
-                result_dict["processingTimeMs"] = time_diff * 1000
-                result_dict["index_name"] = add_docs_params.index_name
-                result_dict["items"] = new_items
-                return result_dict
+        if len(vectors) != len(content):
+            raise RuntimeError(
+                f"the input content after preprocessing and its vectorized counterparts must be the same length."
+                f"received content={len(content)} and vectors={len(vectors)}. "
+                f"check the preprocessing functions and try again. ")
+        start_idx = 0
+        for entry in group:
+            end_idx = start_idx + len(entry["content_chunks"])
+            add_vectors_to_field_chunks(entry, vectors[start_idx:end_idx])
+            start_idx = end_idx
 
-            return translate_add_doc_response(response=index_parent_response, time_diff=t1 - t0)
+    return failed_chunks
 
 
 def get_document_by_id(
@@ -854,20 +1234,37 @@ def _get_documents_for_upsert(
         show_vectors: bool = False,
 ):
     """returns document chunks and content"""
+    valid_doc_ids, body = _create_documents_for_upsert_query(index_name=index_name, document_ids=document_ids)
+    if len(valid_doc_ids) <= 0:
+        return {"docs": []}
+
+    res = HttpRequests(config).get(
+        f'_mget/',
+        body=body
+    )
+    return _combine_documents_for_upsert(valid_doc_ids=valid_doc_ids, res=res)
+
+
+def _create_documents_for_upsert_query(index_name: str, document_ids: List[str]) -> Tuple[List[str], Optional[dict]]:
+    """Creates the `/_mget` body that gets the chunks and the content of each valid ID of document_ids
+
+    Returns:
+        The valid IDs, each once, and the body. The body is None if there are no valid IDs.
+    """
     if not isinstance(document_ids, typing.Collection):
         raise errors.InvalidArgError("Get documents must be passed a collection of IDs!")
 
-    # If we receive an invalid ID, we skip it
-    valid_doc_ids = []
+    # If we receive an invalid ID, we skip it. A dict is used as an ordered set, so each doc is only fetched once.
+    valid_doc_ids = dict()
     for d_id in document_ids:
         try:
             validation.validate_id(d_id)
-            valid_doc_ids.append(d_id)
+            valid_doc_ids[d_id] = None
         except errors.InvalidDocumentIdError:
             pass
 
     if len(valid_doc_ids) <= 0:
-        return {"docs": []}
+        return [], None
     max_docs_limit = utils.read_env_vars_and_defaults(EnvVars.MARQO_MAX_RETRIEVABLE_DOCS)
     if max_docs_limit is not None and len(document_ids) > int(max_docs_limit):
         raise errors.IllegalRequestedDocCount(
@@ -887,19 +1284,23 @@ def _get_documents_for_upsert(
         for doc_id in valid_doc_ids
     ]
 
-    res = HttpRequests(config).get(
-        f'_mget/',
-        body={
-            "docs": chunk_docs + data_docs,
-        }
-    )
+    return list(valid_doc_ids), {"docs": chunk_docs + data_docs}
+
+
+def _combine_documents_for_upsert(valid_doc_ids: List[str], res: dict) -> dict:
+    """Combines the chunks and the content of each doc in the `/_mget` response of
+    _create_documents_for_upsert_query()'s body"""
+    # Group the results of the 2 queries by doc id, in a single pass
+    results_by_id = dict()
+    for doc in res["docs"]:
+        results_by_id.setdefault(doc["_id"], []).append(doc)
 
     # Combine the 2 query results (loop through each doc id)
     combined_result = []
 
     for doc_id in valid_doc_ids:
         # There should always be 2 results per doc.
-        result_list = [doc for doc in res["docs"] if doc["_id"] == doc_id]
+        result_list = results_by_id.get(doc_id, [])
 
         if len(result_list) == 0:
             continue
@@ -951,7 +1352,8 @@ def bulk_search(query: BulkSearchQuery, marqo_config: config.Config, verbose: in
 
     Notes:
         Current limitations:
-          - Lexical and tensor search done in serial.
+          - Hybrid searches are done in serial, each in its own `/_msearch` request. Tensor and lexical searches
+            are combined into a single `/_msearch` request.
           - A single error (e.g. validation errors) on any one of the search queries returns an error and does not
             process non-erroring queries.
     """
@@ -977,13 +1379,16 @@ def bulk_search(query: BulkSearchQuery, marqo_config: config.Config, verbose: in
 
     tensor_queries: Dict[int, BulkSearchQueryEntity] = dict(filter(lambda e: e[1].searchMethod == SearchMethod.TENSOR, enumerate(query.queries)))
     lexical_queries: Dict[int, BulkSearchQueryEntity] = dict(filter(lambda e: e[1].searchMethod == SearchMethod.LEXICAL, enumerate(query.queries)))
+    hybrid_queries: Dict[int, BulkSearchQueryEntity] = dict(filter(lambda e: e[1].searchMethod == SearchMethod.HYBRID, enumerate(query.queries)))
 
-    tensor_search_results = dict(
+    # Tensor and lexical queries are sent to Marqo-OS in a single `/_msearch` request
+    msearch_queries: Dict[int, BulkSearchQueryEntity] = dict(sorted({**tensor_queries, **lexical_queries}.items()))
+    msearch_results = dict(
         zip(
-            tensor_queries.keys(),
+            msearch_queries.keys(),
             _bulk_vector_text_search(
                 marqo_config,
-                list(tensor_queries.values()),
+                list(msearch_queries.values()),
                 device=selected_device,
                 max_retry_attempts=max_search_retry_attempts,
                 max_retry_backoff_seconds=max_search_retry_backoff
@@ -991,19 +1396,24 @@ def bulk_search(query: BulkSearchQuery, marqo_config: config.Config, verbose: in
         )
     )
 
-    # TODO: combine lexical + tensor queries into /_msearch
-    lexical_search_results = dict(zip(lexical_queries.keys(), [_lexical_search(
+    hybrid_search_results = dict(zip(hybrid_queries.keys(), [_hybrid_search(
         config=marqo_config, index_name=q.index, text=q.q, result_count=q.limit, offset=q.offset,
-        searchable_attributes=q.searchableAttributes, verbose=verbose,
-        filter_string=q.filter, attributes_to_retrieve=q.attributesToRetrieve
-    ) for q in lexical_queries.values()]))
-
-    # Recombine lexical and tensor in order
-    combined_results = list({**tensor_search_results, **lexical_search_results}.items())
+        searchable_attributes=q.searchableAttributes, verbose=verbose, filter_string=q.filter,
+        device=selected_device, attributes_to_retrieve=q.attributesToRetrieve,
+        image_download_headers=q.image_download_headers, score_modifiers=q.scoreModifiers,
+        model_auth=q.modelAuth, hybrid_parameters=q.hybridParameters,
+        max_retry_attempts=max_search_retry_attempts, max_retry_backoff_seconds=max_search_retry_backoff,
+        text_query_prefix=q.textQueryPrefix
+    ) for q in hybrid_queries.values()]))
+
+    # Recombine lexical, tensor and hybrid in order
+    combined_results = list({**msearch_results, **hybrid_search_results}.items())
     combined_results.sort()
     search_results = [r[1] for r in combined_results]
 
     with RequestMetricsStore.for_request().time(f"bulk_search.rerank"):
+        # Queries with the same reranker are reranked together, so their inputs are batched
+        reranker_to_qidxs: Dict[str, List[int]] = dict()
         for i, s in enumerate(search_results):
             q = query.queries[i]
             s["query"] = q.q
@@ -1016,24 +1426,29 @@ def bulk_search(query: BulkSearchQuery, marqo_config: config.Config, verbose: in
                     del hit["_highlights"]
 
             if q.reRanker is not None:
-                logger.debug(f"reranking {i}th query using {q.reRanker}")
-                with RequestMetricsStore.for_request().time(f"bulk_search.{i}.rerank"):
-                    rerank_query(q, s, q.reRanker, selected_device, 1)
+                reranker_to_qidxs.setdefault(q.reRanker, []).append(i)
+
+        for reranker, qidxs in reranker_to_qidxs.items():
+            logger.debug(f"reranking queries {qidxs} using {reranker}")
+            rerank_bulk_query(
+                [query.queries[i] for i in qidxs], [search_results[i] for i in qidxs], reranker, selected_device, 1)
 
     return {
         "result": search_results
     }
 
 
-def rerank_query(query: BulkSearchQueryEntity, result: Dict[str, Any], reranker: Union[str, Dict], device: str, num_highlights: int):
-    if query.searchableAttributes is None:
+def rerank_bulk_query(queries: List[BulkSearchQueryEntity], results: List[Dict[str, Any]], reranker: str, device: str, num_highlights: int):
+    """Reranks the results of several bulk search queries that use the same reranker. The results are modified in place."""
+    if any(q.searchableAttributes is None for q in queries):
         raise errors.InvalidArgError(f"searchable_attributes cannot be None when re-ranking. Specify which fields to search and rerank over.")
     try:
         start_rerank_time = timer()
-        rerank.rerank_search_results(search_result=result, query=query.q,
-                                     model_name=reranker, device=device,
-                                     searchable_attributes=query.searchableAttributes, num_highlights=num_highlights)
-        logger.debug(f"search ({query.searchMethod.lower()}) reranking using {reranker}: took {(timer() - start_rerank_time):.3f}s to rerank results.")
+        rerank.rerank_bulk_search_results(search_results=results, queries=[q.q for q in queries],
+                                          model_name=reranker, device=device,
+                                          searchable_attributes=[q.searchableAttributes for q in queries],
+                                          num_highlights=num_highlights)
+        logger.debug(f"bulk search reranking of {len(queries)} queries using {reranker}: took {(timer() - start_rerank_time):.3f}s to rerank results.")
     except Exception as e:
         raise errors.BadRequestError(f"reranking failure due to {str(e)}")
 
@@ -1045,12 +1460,8 @@ def refresh_indexes_in_background(config: Config, index_names: List[str]) -> Non
         if idx not in index_meta_cache.get_cache():
             backend.get_index_info(config=config, index_name=idx)
 
-        REFRESH_INTERVAL_SECONDS = 2
         # update cache in the background
-        cache_update_thread = threading.Thread(
-            target=index_meta_cache.refresh_index_info_on_interval,
-            args=(config, idx, REFRESH_INTERVAL_SECONDS))
-        cache_update_thread.start()
+        index_meta_cache.mark_index_hot(config=config, index_name=idx)
 
 
 def determine_text_query_prefix(request_level_prefix: str, index_info: IndexInfo) -> str:
@@ -1097,7 +1508,8 @@ def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = N
            context: Optional[SearchContext] = None,
            score_modifiers: Optional[ScoreModifier] = None,
            model_auth: Optional[ModelAuth] = None, 
-           text_query_prefix: Optional[str] = None) -> Dict:
+           text_query_prefix: Optional[str] = None,
+           hybrid_parameters: Optional[HybridParameters] = None) -> Dict:
     """The root search method. Calls the specific search method
 
     Validation should go here. Validations include:
@@ -1124,10 +1536,76 @@ def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = N
         score_modifiers: a dictionary to modify the score based on field values, for tensor search only
         model_auth: Authorisation details for downloading a model (if required)
         text_query_prefix: prefix to add to all text queries for TENSOR search. Do not use out of the box. Needs to be overridden with model properties.
+        hybrid_parameters: how LEXICAL and TENSOR results are fused, for HYBRID search only
     Returns:
 
     """
 
+    _validate_search_request(
+        text=text, result_count=result_count, offset=offset, search_method=search_method,
+        searchable_attributes=searchable_attributes, attributes_to_retrieve=attributes_to_retrieve,
+        context=context, boost=boost, hybrid_parameters=hybrid_parameters, verbose=verbose)
+
+    t0 = timer()
+    max_search_retry_attempts, max_search_retry_backoff = _get_search_retry_settings()
+
+    # if we can't see the index name in cache, we request it and wait for the info
+    if index_name not in index_meta_cache.get_cache():
+        backend.get_index_info(
+            config=config,
+            index_name=index_name,
+            max_retry_attempts=max_search_retry_attempts,
+            max_retry_backoff_seconds=max_search_retry_backoff
+        )
+
+    # update cache in the background
+    index_meta_cache.mark_index_hot(config=config, index_name=index_name)
+
+    selected_device = _select_search_device(device)
+
+    if search_method.upper() == SearchMethod.TENSOR:
+        search_result = _vector_text_search(
+            config=config, index_name=index_name, query=text, result_count=result_count, offset=offset,
+            searchable_attributes=searchable_attributes, verbose=verbose,
+            filter_string=filter, device=selected_device, attributes_to_retrieve=attributes_to_retrieve, boost=boost,
+            image_download_headers=image_download_headers, context=context, score_modifiers=score_modifiers,
+            model_auth=model_auth, max_retry_attempts=max_search_retry_attempts, max_retry_backoff_seconds=max_search_retry_backoff,
+            text_query_prefix=text_query_prefix
+        )
+    elif search_method.upper() == SearchMethod.LEXICAL:
+        search_result = _lexical_search(
+            config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
+            searchable_attributes=searchable_attributes, verbose=verbose,
+            filter_string=filter, attributes_to_retrieve=attributes_to_retrieve,
+            max_retry_attempts=max_search_retry_attempts, max_retry_backoff_seconds=max_search_retry_backoff
+        )
+    elif search_method.upper() == SearchMethod.HYBRID:
+        search_result = _hybrid_search(
+            config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
+            searchable_attributes=searchable_attributes, verbose=verbose,
+            filter_string=filter, device=selected_device, attributes_to_retrieve=attributes_to_retrieve,
+            image_download_headers=image_download_headers, score_modifiers=score_modifiers,
+            model_auth=model_auth, hybrid_parameters=hybrid_parameters,
+            max_retry_attempts=max_search_retry_attempts, max_retry_backoff_seconds=max_search_retry_backoff,
+            text_query_prefix=text_query_prefix
+        )
+    else:
+        raise errors.InvalidArgError(f"Search called with unknown search method: {search_method}")
+
+    if reranker is not None:
+        _rerank_search_result(search_result=search_result, text=text, reranker=reranker, device=selected_device,
+                              searchable_attributes=searchable_attributes, search_method=search_method)
+
+    return _finalise_search_result(search_result=search_result, text=text, result_count=result_count, offset=offset,
+                                   highlights=highlights, search_method=search_method, t0=t0)
+
+
+def _validate_search_request(
+        text: Optional[Union[str, dict]], result_count: int, offset: int, search_method: Union[str, SearchMethod],
+        searchable_attributes: Optional[Iterable[str]], attributes_to_retrieve: Optional[List[str]],
+        context: Optional[SearchContext], boost: Optional[Dict], hybrid_parameters: Optional[HybridParameters],
+        verbose: int = 0) -> None:
+    """Validates the args of a search() call, raising an InvalidArgError (or IllegalRequestedDocCount) if invalid"""
     # Validation for: result_count (limit) & offset
     # Validate neither is negative
     if result_count <= 0:
@@ -1137,9 +1615,6 @@ def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = N
 
     validation.validate_query(q=text, search_method=search_method)
 
-    max_search_retry_attempts = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_SEARCH_RETRY_ATTEMPTS)
-    max_search_retry_backoff = utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_SEARCH_RETRY_BACKOFF)
-
     # Validate result_count + offset <= int(max_docs_limit)
     max_docs_limit = utils.read_env_vars_and_defaults(EnvVars.MARQO_MAX_RETRIEVABLE_DOCS)
     check_upper = True if max_docs_limit is None else result_count + offset <= int(max_docs_limit)
@@ -1151,9 +1626,9 @@ def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = N
             f"{upper_bound_explanation} Marqo received search result limit of `{result_count}` "
             f"and offset of `{offset}`.")
 
-    t0 = timer()
     validation.validate_context(context=context, query=text, search_method=search_method)
     validation.validate_boost(boost=boost, search_method=search_method)
+    validation.validate_hybrid_parameters(hybrid_parameters=hybrid_parameters, search_method=search_method)
     validation.validate_searchable_attributes(searchable_attributes=searchable_attributes, search_method=search_method)
     if searchable_attributes is not None:
         [validation.validate_field_name(attribute) for attribute in searchable_attributes]
@@ -1163,22 +1638,15 @@ def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = N
         [validation.validate_field_name(attribute) for attribute in attributes_to_retrieve]
     if verbose:
         print(f"determined_search_method: {search_method}, text query: {text}")
-    # if we can't see the index name in cache, we request it and wait for the info
-    if index_name not in index_meta_cache.get_cache():
-        backend.get_index_info(
-            config=config,
-            index_name=index_name,
-            max_retry_attempts=max_search_retry_attempts,
-            max_retry_backoff_seconds=max_search_retry_backoff
-        )
 
-    REFRESH_INTERVAL_SECONDS = 2
-    # update cache in the background
-    cache_update_thread = threading.Thread(
-        target=index_meta_cache.refresh_index_info_on_interval,
-        args=(config, index_name, REFRESH_INTERVAL_SECONDS))
-    cache_update_thread.start()
 
+def _get_search_retry_settings() -> Tuple[int, int]:
+    """The max retry attempts and max retry backoff (in seconds) of search requests to Marqo-OS"""
+    return (utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_SEARCH_RETRY_ATTEMPTS),
+            utils.read_env_vars_and_defaults_ints(EnvVars.MARQO_MAX_BACKEND_SEARCH_RETRY_BACKOFF))
+
+
+def _select_search_device(device: Optional[str]) -> str:
     if device is None:
         selected_device = utils.read_env_vars_and_defaults("MARQO_BEST_AVAILABLE_DEVICE")
         if selected_device is None:
@@ -1186,46 +1654,35 @@ def search(config: Config, index_name: str, text: Optional[Union[str, dict]] = N
         logger.debug(f"No device given for search. Defaulting to best available device: {selected_device}")
     else:
         selected_device = device
+    return selected_device
 
-    if search_method.upper() == SearchMethod.TENSOR:
-        search_result = _vector_text_search(
-            config=config, index_name=index_name, query=text, result_count=result_count, offset=offset,
-            searchable_attributes=searchable_attributes, verbose=verbose,
-            filter_string=filter, device=selected_device, attributes_to_retrieve=attributes_to_retrieve, boost=boost,
-            image_download_headers=image_download_headers, context=context, score_modifiers=score_modifiers,
-            model_auth=model_auth, max_retry_attempts=max_search_retry_attempts, max_retry_backoff_seconds=max_search_retry_backoff,
-            text_query_prefix=text_query_prefix
-        )
-    elif search_method.upper() == SearchMethod.LEXICAL:
-        search_result = _lexical_search(
-            config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
-            searchable_attributes=searchable_attributes, verbose=verbose,
-            filter_string=filter, attributes_to_retrieve=attributes_to_retrieve,
-            max_retry_attempts=max_search_retry_attempts, max_retry_backoff_seconds=max_search_retry_backoff
+
+def _rerank_search_result(search_result: dict, text: Union[str, dict], reranker: Union[str, Dict], device: str,
+                          searchable_attributes: Optional[Iterable[str]], search_method: Union[str, SearchMethod]) -> None:
+    """Reranks the hits of search_result in place"""
+    logger.info("reranking using {}".format(reranker))
+    if searchable_attributes is None:
+        raise errors.InvalidArgError(
+            f"searchable_attributes cannot be None when re-ranking. Specify which fields to search and rerank over.")
+    try:
+        # SEARCH TIMER-LOGGER (reranking)
+        RequestMetricsStore.for_request().start(f"search.rerank")
+        rerank.rerank_search_results(search_result=search_result, query=text,
+                                     model_name=reranker,
+                                     device=device,
+                                     searchable_attributes=searchable_attributes,
+                                     num_highlights=1)
+        total_rerank_time = RequestMetricsStore.for_request().stop(f"search.rerank")
+        logger.debug(
+            f"search ({search_method.lower()}) reranking using {reranker}: took {(total_rerank_time):.3f}ms to rerank results."
         )
-    else:
-        raise errors.InvalidArgError(f"Search called with unknown search method: {search_method}")
+    except Exception as e:
+        raise errors.BadRequestError(f"reranking failure due to {str(e)}")
 
-    if reranker is not None:
-        logger.info("reranking using {}".format(reranker))
-        if searchable_attributes is None:
-            raise errors.InvalidArgError(
-                f"searchable_attributes cannot be None when re-ranking. Specify which fields to search and rerank over.")
-        try:
-            # SEARCH TIMER-LOGGER (reranking)
-            RequestMetricsStore.for_request().start(f"search.rerank")
-            rerank.rerank_search_results(search_result=search_result, query=text,
-                                         model_name=reranker,
-                                         device=selected_device,
-                                         searchable_attributes=searchable_attributes,
-                                         num_highlights=1)
-            total_rerank_time = RequestMetricsStore.for_request().stop(f"search.rerank")
-            logger.debug(
-                f"search ({search_method.lower()}) reranking using {reranker}: took {(total_rerank_time):.3f}ms to rerank results."
-            )
-        except Exception as e:
-            raise errors.BadRequestError(f"reranking failure due to {str(e)}")
 
+def _finalise_search_result(search_result: dict, text: Union[str, dict], result_count: int, offset: int,
+                            highlights: bool, search_method: Union[str, SearchMethod], t0: float) -> dict:
+    """Adds the request's details and its processing time (since t0) to search_result"""
     search_result["query"] = text
     search_result["limit"] = result_count
     search_result["offset"] = offset
@@ -1266,18 +1723,44 @@ def _lexical_search(
     TODO:
         - Test raise_for_searchable_attribute=False
     """
+    body = _create_lexical_search_body(
+        config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
+        searchable_attributes=searchable_attributes, filter_string=filter_string,
+        attributes_to_retrieve=attributes_to_retrieve, expose_facets=expose_facets,
+        max_retry_attempts=max_retry_attempts, max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+    if body is None:
+        return {"hits": []}
+
+    start_search_http_time = timer()
+    with RequestMetricsStore.for_request().time("search.opensearch._search"):
+        search_res = HttpRequests(config).get(
+            path=f"{index_name}/_search",
+            body=body,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff_seconds
+        )
+    return _format_lexical_search_response(search_res=search_res, total_search_http_time=timer() - start_search_http_time)
+
+
+def _create_lexical_search_body(
+        config: Config, index_name: str, text: str, result_count: int = 3, offset: int = 0,
+        searchable_attributes: Sequence[str] = None, filter_string: str = None,
+        attributes_to_retrieve: Optional[List[str]] = None, expose_facets: bool = False,
+        max_retry_attempts: int = None, max_retry_backoff_seconds: int = None) -> Optional[dict]:
+    """Creates the `/_search` body of a lexical search, or None if the search can't find anything"""
     if not isinstance(text, str):
         raise errors.InvalidArgError(
             f"Lexical search query arg must be of type `str`! text arg is of type {type(text)}. "
             f"Query arg: {text}")
 
+    # Empty searchable attributes should produce empty results.
+    if searchable_attributes is not None and len(searchable_attributes) == 0:
+        return None
+
     # SEARCH TIMER-LOGGER (pre-processing)
     RequestMetricsStore.for_request().start("search.lexical.processing_before_opensearch")
     if searchable_attributes is not None:
-        # Empty searchable attributes should produce empty results.
-        if len(searchable_attributes) == 0:
-            return {"hits": []}
-
         fields_to_search = searchable_attributes
     else:
         fields_to_search = index_meta_cache.get_index_info(
@@ -1286,6 +1769,42 @@ def _lexical_search(
             max_retry_backoff_seconds=max_retry_backoff_seconds
         ).get_true_text_properties()
 
+    body = _create_lexical_search_query(
+        text=text, fields_to_search=fields_to_search, result_count=result_count, offset=offset,
+        filter_string=filter_string, attributes_to_retrieve=attributes_to_retrieve, expose_facets=expose_facets
+    )
+
+    total_preprocess_time = RequestMetricsStore.for_request().stop("search.lexical.processing_before_opensearch")
+    logger.debug(f"search (lexical) pre-processing: took {(total_preprocess_time):.3f}ms to process query.")
+    return body
+
+
+def _format_lexical_search_response(search_res: dict, total_search_http_time: float) -> dict:
+    """Formats the `/_search` response of a lexical search as Marqo search results"""
+    RequestMetricsStore.for_request().add_time("search.opensearch._search.internal", search_res["took"] * 0.001) # internal, not round trip time
+
+    total_os_process_time = search_res["took"] * 0.001
+    num_results = len(search_res['hits']['hits'])
+    logger.debug(
+        f"search (lexical) roundtrip: took {(total_search_http_time):.3f}s to send search query (roundtrip) to Marqo-os and received {num_results} results.")
+    logger.debug(
+        f"  search (lexical) Marqo-os processing time: took {(total_os_process_time):.3f}s for Marqo-os to execute the search.")
+
+    # SEARCH TIMER-LOGGER (post-processing)
+    RequestMetricsStore.for_request().start("search.lexical.postprocess")
+    res_list = _format_lexical_hits(search_res['hits']['hits'])
+
+    total_postprocess_time = RequestMetricsStore.for_request().stop("search.lexical.postprocess")
+    logger.debug(
+        f"search (lexical) post-processing: took {(total_postprocess_time):.3f}ms to format {len(res_list)} results.")
+
+    return {'hits': res_list}
+
+
+def _create_lexical_search_query(
+        text: str, fields_to_search: Sequence[str], result_count: int, offset: int, filter_string: str = None,
+        attributes_to_retrieve: Optional[List[str]] = None, expose_facets: bool = False) -> dict:
+    """Creates the Marqo-OS query body of a lexical (BM25) search over fields_to_search."""
     # Parse text into required and optional terms.
     (required_terms, optional_blob) = utils.parse_lexical_query(text)
 
@@ -1329,43 +1848,18 @@ def _lexical_search(
             body["_source"] = dict()
         if body["_source"] is not False:
             body["_source"]["exclude"] = [f"*{TensorField.vector_prefix}*"]
+    return body
 
-    total_preprocess_time = RequestMetricsStore.for_request().stop("search.lexical.processing_before_opensearch")
-    logger.debug(f"search (lexical) pre-processing: took {(total_preprocess_time):.3f}ms to process query.")
-
-    start_search_http_time = timer()
-    with RequestMetricsStore.for_request().time("search.opensearch._search"):
-        search_res = HttpRequests(config).get(
-            path=f"{index_name}/_search",
-            body=body,
-            max_retry_attempts=max_retry_attempts,
-            max_retry_backoff_seconds=max_retry_backoff_seconds
-        )
-    RequestMetricsStore.for_request().add_time("search.opensearch._search.internal", search_res["took"] * 0.001) # internal, not round trip time
-
-    end_search_http_time = timer()
-    total_search_http_time = end_search_http_time - start_search_http_time
-    total_os_process_time = search_res["took"] * 0.001
-    num_results = len(search_res['hits']['hits'])
-    logger.debug(
-        f"search (lexical) roundtrip: took {(total_search_http_time):.3f}s to send search query (roundtrip) to Marqo-os and received {num_results} results.")
-    logger.debug(
-        f"  search (lexical) Marqo-os processing time: took {(total_os_process_time):.3f}s for Marqo-os to execute the search.")
 
-    # SEARCH TIMER-LOGGER (post-processing)
-    RequestMetricsStore.for_request().start("search.lexical.postprocess")
+def _format_lexical_hits(hits: List[dict]) -> List[dict]:
+    """Formats the hits of a lexical search's Marqo-OS response as Marqo search hits."""
     res_list = []
-    for doc in search_res['hits']['hits']:
+    for doc in hits:
         just_doc = _clean_doc(doc["_source"].copy()) if "_source" in doc else dict()
         just_doc["_id"] = doc["_id"]
         just_doc["_score"] = doc["_score"]
         res_list.append({**just_doc, "_highlights": []})
-
-    total_postprocess_time = RequestMetricsStore.for_request().stop("search.lexical.postprocess")
-    logger.debug(
-        f"search (lexical) post-processing: took {(total_postprocess_time):.3f}ms to format {len(res_list)} results.")
-
-    return {'hits': res_list}
+    return res_list
 
 
 def construct_vector_input_batches(query: Union[str, Dict, None], index_info: IndexInfo) -> Tuple[List[str], List[str]]:
@@ -1461,19 +1955,26 @@ def bulk_msearch(
     ) -> List[Dict]:
     """Send an `/_msearch` request to MarqoOS and translate errors into a user-friendly format."""
     start_search_http_time = timer()
+    with RequestMetricsStore.for_request().time("search.opensearch._msearch"):
+        serialised_search_body = utils.dicts_to_jsonl(body)
+        response = HttpRequests(config).get(
+            path=F"_msearch",
+            body=serialised_search_body,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff
+        )
+    return _get_msearch_hits(response=response, total_search_http_time=timer() - start_search_http_time)
+
+
+def _get_msearch_hits(response: dict, total_search_http_time: float) -> List[List[Dict]]:
+    """Returns the hits of each search of an `/_msearch` response, in order.
+
+    Raises:
+        A Marqo error translated from the first failed search, if any failed
+    """
     try:
-        with RequestMetricsStore.for_request().time("search.opensearch._msearch"):
-            serialised_search_body = utils.dicts_to_jsonl(body)
-            response = HttpRequests(config).get(
-                path=F"_msearch",
-                body=serialised_search_body,
-                max_retry_attempts=max_retry_attempts,
-                max_retry_backoff_seconds=max_retry_backoff
-            )
         RequestMetricsStore.for_request().add_time("search.opensearch._msearch.internal", float(response["took"])) # internal, not round trip time
 
-        end_search_http_time = timer()
-        total_search_http_time = end_search_http_time - start_search_http_time
         total_os_process_time = response["took"] * 0.001
         num_responses = len(response["responses"])
         logger.debug(f"search (tensor) roundtrip: took {total_search_http_time:.3f}s to send {num_responses} search queries (roundtrip) to Marqo-os.")
@@ -1483,10 +1984,14 @@ def bulk_msearch(
     except KeyError as e:
         # KeyError indicates we have received a non-successful result
         try:
-            root_cause_reason = response["responses"][0]["error"]["root_cause"][0]["reason"]
-            root_cause_type: Optional[str] = response["responses"][0]["error"]["root_cause"][0].get("type")
-
-            if "index.max_result_window" in root_cause_reason:
+            # The first failed search, as a request can combine several searches (e.g. HYBRID search)
+            failed_response = next((r for r in response["responses"] if "error" in r), response["responses"][0])
+            root_cause_reason = failed_response["error"]["root_cause"][0]["reason"]
+            root_cause_type: Optional[str] = failed_response["error"]["root_cause"][0].get("type")
+
+            if failed_response["error"].get("type") == "index_not_found_exception":
+                raise errors.IndexNotFoundError(message=f"Index `{failed_response['error']['index']}` not found.") from e
+            elif "index.max_result_window" in root_cause_reason:
                 raise errors.IllegalRequestedDocCount("Marqo-OS rejected the response due to too many requested results. Try reducing the query's limit parameter") from e
             elif 'parse_exception' in root_cause_reason:
                 raise errors.InvalidArgError("Syntax error, could not parse filter string") from e
@@ -1630,14 +2135,7 @@ def vectorise_jobs(jobs: List[VectorisedJobs]) -> Dict[JHash, Dict[str, List[flo
         # TODO: Handle exception for single job, and allow others to run.
         try:
             if v.content:
-                vectors = s2_inference.vectorise(
-                    model_name=v.model_name, model_properties=v.model_properties,
-                    content=v.content, device=v.device,
-                    normalize_embeddings=v.normalize_embeddings,
-                    image_download_headers=v.image_download_headers,
-                    model_auth=v.model_auth
-                )
-                result[v.groupby_key()] = dict(zip(v.content, vectors))
+                result[v.groupby_key()] = _vectorise_job_content(v)
 
         # TODO: This is a temporary addition.
         except (s2_inference_errors.UnknownModelError,
@@ -1655,6 +2153,58 @@ def vectorise_jobs(jobs: List[VectorisedJobs]) -> Dict[JHash, Dict[str, List[flo
     return result
 
 
+def _vectorise_job_content(job: VectorisedJobs) -> Dict[str, List[float]]:
+    """Vectorises the content of a job, using the query vector cache for content that was vectorised recently.
+    Only content missing from the cache is sent to s2_inference.vectorise().
+
+    Returns:
+        a mapping of content to vector
+    """
+    cache = query_vector_cache.get_cache()
+    if not cache.enabled:
+        vectors = s2_inference.vectorise(
+            model_name=job.model_name, model_properties=job.model_properties,
+            content=job.content, device=job.device,
+            normalize_embeddings=job.normalize_embeddings,
+            image_download_headers=job.image_download_headers,
+            model_auth=job.model_auth
+        )
+        return dict(zip(job.content, vectors))
+
+    model_cache_key = s2_inference._create_model_cache_key(job.model_name, job.device, job.model_properties)
+    # Images are fetched with the request's headers, so a cached image vector is only reused with the same headers.
+    content_type_key = job.content_type if job.content_type == 'text' \
+        else f"{job.content_type}||{json.dumps(job.image_download_headers, sort_keys=True)}"
+
+    content_to_vector: Dict[str, List[float]] = dict()
+    # dict.fromkeys() removes duplicate content, keeping the order.
+    content_to_vectorise = []
+    for content in dict.fromkeys(job.content):
+        cached_vector = cache.get(query_vector_cache.QueryVectorCache.create_key(
+            model_cache_key, job.normalize_embeddings, content_type_key, content))
+        if cached_vector is not None:
+            content_to_vector[content] = cached_vector
+        else:
+            content_to_vectorise.append(content)
+
+    RequestMetricsStore.for_request().increment_counter("search.query_vector_cache.hits", len(content_to_vector))
+    RequestMetricsStore.for_request().increment_counter("search.query_vector_cache.misses", len(content_to_vectorise))
+
+    if content_to_vectorise:
+        vectors = s2_inference.vectorise(
+            model_name=job.model_name, model_properties=job.model_properties,
+            content=content_to_vectorise, device=job.device,
+            normalize_embeddings=job.normalize_embeddings,
+            image_download_headers=job.image_download_headers,
+            model_auth=job.model_auth
+        )
+        for content, vector in zip(content_to_vectorise, vectors):
+            content_to_vector[content] = vector
+            cache.put(query_vector_cache.QueryVectorCache.create_key(
+                model_cache_key, job.normalize_embeddings, content_type_key, content), vector)
+    return content_to_vector
+
+
 def get_query_vectors_from_jobs(
         queries: List[BulkSearchQueryEntity], qidx_to_job: Dict[Qidx, List[VectorisedJobPointer]],
         job_to_vectors: Dict[JHash, Dict[str, List[float]]], config: Config,
@@ -1859,11 +2409,12 @@ def _bulk_vector_text_search(
         max_retry_attempts: int = None,
         max_retry_backoff_seconds: int = None
     ) -> List[Dict]:
-    """Resolve a batch of search queries in parallel.
+    """Resolve a batch of search queries in parallel, in a single `/_msearch` request.
 
     Args:
         - config:
-        - queries: A list of independent search queries. Can be across multiple indexes, but are all expected to have `searchMethod = "TENSOR"`
+        - queries: A list of independent search queries. Can be across multiple indexes, and are all expected to have
+            `searchMethod = "TENSOR"` or `searchMethod = "LEXICAL"`
     Returns:
         A list of search query responses (see `_format_ordered_docs_simple` for structure of individual entities).
     Note:
@@ -1880,25 +2431,34 @@ def _bulk_vector_text_search(
     with RequestMetricsStore.for_request().time("bulk_search.vector.processing_before_opensearch",
         lambda t : logger.debug(f"bulk search (tensor) pre-processing: took {t:.3f}ms")
     ):
-
-        with RequestMetricsStore.for_request().time(f"bulk_search.vector_inference_full_pipeline"):
-            qidx_to_vectors: Dict[Qidx, List[float]] = run_vectorise_pipeline(
-                config=config, 
-                queries=queries, 
-                device=device
-            )
+        tensor_qidxs = [qidx for qidx, q in enumerate(queries) if q.searchMethod != SearchMethod.LEXICAL]
+        qidx_to_vectors: Dict[Qidx, List[float]] = dict()
+        if tensor_qidxs:
+            with RequestMetricsStore.for_request().time(f"bulk_search.vector_inference_full_pipeline"):
+                tensor_qidx_to_vectors: Dict[Qidx, List[float]] = run_vectorise_pipeline(
+                    config=config,
+                    queries=[queries[qidx] for qidx in tensor_qidxs],
+                    device=device
+                )
+            qidx_to_vectors = {qidx: tensor_qidx_to_vectors[i] for i, qidx in enumerate(tensor_qidxs)}
 
         ## 4. Create msearch request bodies and combine to aggregate.
         query_to_body_parts: Dict[Qidx, List[Dict]] = dict()
         query_to_body_count: Dict[Qidx, int] = dict() # Keep track of count, so we can separate after msearch call.
         for qidx, q in enumerate(queries):
-            index_info = get_index_info(config=config, index_name=q.index, max_retry_attempts=max_retry_attempts, max_retry_backoff_seconds=max_retry_backoff_seconds)
-            body = construct_msearch_body_elements(q.searchableAttributes, q.offset, q.filter, index_info, q.limit, qidx_to_vectors[qidx], q.attributesToRetrieve, q.index, q.scoreModifiers)
+            if q.searchMethod == SearchMethod.LEXICAL:
+                body = _create_lexical_msearch_body_elements(
+                    config, q, max_retry_attempts=max_retry_attempts,
+                    max_retry_backoff_seconds=max_retry_backoff_seconds
+                )
+            else:
+                index_info = get_index_info(config=config, index_name=q.index, max_retry_attempts=max_retry_attempts, max_retry_backoff_seconds=max_retry_backoff_seconds)
+                body = construct_msearch_body_elements(q.searchableAttributes, q.offset, q.filter, index_info, q.limit, qidx_to_vectors[qidx], q.attributesToRetrieve, q.index, q.scoreModifiers)
             query_to_body_parts[qidx] = body
             query_to_body_count[qidx] = len(body)
 
         # Combine all msearch request bodies into one request body.
-        aggregate_body = functools.reduce(lambda x, y: x + y, query_to_body_parts.values())
+        aggregate_body = [body_part for body in query_to_body_parts.values() for body_part in body]
         if not aggregate_body:
             # Must return empty response, per search query
             return create_empty_query_response(queries)
@@ -1913,6 +2473,23 @@ def _bulk_vector_text_search(
         return create_bulk_search_response(queries, query_to_body_count, responses)
 
 
+def _create_lexical_msearch_body_elements(
+        config: Config, query: BulkSearchQueryEntity, max_retry_attempts: int = None,
+        max_retry_backoff_seconds: int = None) -> List[Dict[str, Any]]:
+    """Constructs the body payload of a `/_msearch` request for a single lexical bulk search query.
+
+    Returns an empty list if the search can't find anything (e.g. empty searchable attributes)."""
+    body = _create_lexical_search_body(
+        config=config, index_name=query.index, text=query.q, result_count=query.limit, offset=query.offset,
+        searchable_attributes=query.searchableAttributes, filter_string=query.filter,
+        attributes_to_retrieve=query.attributesToRetrieve,
+        max_retry_attempts=max_retry_attempts, max_retry_backoff_seconds=max_retry_backoff_seconds
+    )
+    if body is None:
+        return []
+    return [{"index": query.index}, body]
+
+
 def create_bulk_search_response(queries: List[BulkSearchQueryEntity], query_to_body_count: Dict[Qidx, int], responses) -> List[Dict]:
     """
         Create Marqo search responses by extracting the appropriate elements from the batched /_msearch response. Also handles:
@@ -1920,6 +2497,7 @@ def create_bulk_search_response(queries: List[BulkSearchQueryEntity], query_to_b
             - Sorting chunks
             - Formatting style
             - (no) highlights
+        Lexical queries' responses are formatted as lexical search results.
         Does not mutate `responses` param.
 
     """
@@ -1931,6 +2509,10 @@ def create_bulk_search_response(queries: List[BulkSearchQueryEntity], query_to_b
         msearch_resp = msearch_resp[num_of_docs:]  # remove docs from response for next query
 
         query = queries[qidx]
+        if query.searchMethod == SearchMethod.LEXICAL:
+            results.append({"hits": _format_lexical_hits(result[0]) if result else []})
+            continue
+
         gathered_docs = gather_documents_from_response(result)
         if query.boost is not None:
             gathered_docs = boost_score(gathered_docs, query.boost, query.searchableAttributes)
@@ -1993,6 +2575,33 @@ def _vector_text_search(
         - max result count should be in a config somewhere
         - searching a non existent index should return a HTTP-type error
     """
+    body = _create_vector_text_search_body(
+        config=config, index_name=index_name, query=query, result_count=result_count, offset=offset,
+        searchable_attributes=searchable_attributes, verbose=verbose, filter_string=filter_string, device=device,
+        attributes_to_retrieve=attributes_to_retrieve, boost=boost, image_download_headers=image_download_headers,
+        context=context, score_modifiers=score_modifiers, model_auth=model_auth,
+        max_retry_attempts=max_retry_attempts, max_retry_backoff_seconds=max_retry_backoff_seconds,
+        text_query_prefix=text_query_prefix
+    )
+
+    # SEARCH TIMER-LOGGER (roundtrip)
+    responses = bulk_msearch(config=config, body=body, max_retry_attempts=max_retry_attempts, max_retry_backoff=max_retry_backoff_seconds)
+
+    return _format_vector_text_search_response(
+        responses=responses, result_count=result_count, boost=boost,
+        searchable_attributes=searchable_attributes, verbose=verbose)
+
+
+def _create_vector_text_search_body(
+        config: Config, index_name: str, query: Union[str, dict, None], result_count: int = 5, offset: int = 0,
+        searchable_attributes: Iterable[str] = None, verbose=0, filter_string: str = None, device: str = None,
+        attributes_to_retrieve: Optional[List[str]] = None, boost: Optional[Dict] = None,
+        image_download_headers: Optional[Dict] = None, context: Optional[Dict] = None,
+        score_modifiers: Optional[ScoreModifier] = None, model_auth: Optional[ModelAuth] = None,
+        max_retry_attempts: int = None, max_retry_backoff_seconds: int = None,
+        text_query_prefix: Optional[str] = None) -> List[Dict]:
+    """Vectorises the query of a tensor search, and creates its `/_msearch` body. This is the CPU-bound part of
+    _vector_text_search()."""
     # # SEARCH TIMER-LOGGER (pre-processing)
     if not device:
         raise errors.InternalError("_vector_text_search cannot be called without `device`!")
@@ -2042,9 +2651,12 @@ def _vector_text_search(
     total_preprocess_time = RequestMetricsStore.for_request().stop("search.vector.processing_before_opensearch")
     logger.debug(f"search (tensor) pre-processing: took {(total_preprocess_time):.3f}ms to vectorize and process query.")
 
-    # SEARCH TIMER-LOGGER (roundtrip)
-    responses = bulk_msearch(config=config, body=body, max_retry_attempts=max_retry_attempts, max_retry_backoff=max_retry_backoff_seconds)
+    return body
 
+
+def _format_vector_text_search_response(responses: List[List[Dict]], result_count: int, boost: Optional[Dict] = None,
+                                        searchable_attributes: Iterable[str] = None, verbose=0) -> dict:
+    """Formats the `/_msearch` hits of a tensor search as Marqo search results"""
     # SEARCH TIMER-LOGGER (post-processing)
     RequestMetricsStore.for_request().start("search.vector.postprocess")
     gathered_docs = gather_documents_from_response(responses)
@@ -2068,6 +2680,149 @@ def _vector_text_search(
         f"search (tensor) post-processing: took {(total_postprocess_time):.3f}ms to sort and format {len(completely_sorted)} results from Marqo-os.")
     return res
 
+
+def _hybrid_search(
+        config: Config, index_name: str, text: str, result_count: int = 5, offset: int = 0,
+        searchable_attributes: Iterable[str] = None, verbose=0, filter_string: str = None, device: str = None,
+        attributes_to_retrieve: Optional[List[str]] = None, image_download_headers: Optional[Dict] = None,
+        score_modifiers: Optional[ScoreModifier] = None, model_auth: Optional[ModelAuth] = None,
+        hybrid_parameters: Optional[HybridParameters] = None, max_retry_attempts: int = None,
+        max_retry_backoff_seconds: int = None, text_query_prefix: Optional[str] = None):
+    """Searches lexically and by tensor, fusing the results of both into a single ranking.
+
+    The lexical (BM25) query and the tensor (knn) query are sent to Marqo-OS in a single `/_msearch` request. Both
+    are restricted by filter_string and searchable_attributes. Each retrieves its top `offset + result_count` hits,
+    which are fused (see marqo.tensor_search.fusion) before the page `offset:offset + result_count` is taken.
+
+    Args:
+        text: the query. Used as is for the lexical query, and vectorised for the tensor query.
+        hybrid_parameters: the fusion method and weights. Defaults to reciprocal rank fusion, weighting both
+            search methods equally.
+        (other args as for _lexical_search and _vector_text_search)
+
+    Returns:
+        {"hits": [...]}, with the fused score of each hit as its `_score`
+
+    Note:
+        - Should not be directly called by client - the search() method should be called.
+        - device should ALWAYS be set
+    """
+    body = _create_hybrid_search_body(
+        config=config, index_name=index_name, text=text, result_count=result_count, offset=offset,
+        searchable_attributes=searchable_attributes, verbose=verbose, filter_string=filter_string, device=device,
+        attributes_to_retrieve=attributes_to_retrieve, image_download_headers=image_download_headers,
+        score_modifiers=score_modifiers, model_auth=model_auth, max_retry_attempts=max_retry_attempts,
+        max_retry_backoff_seconds=max_retry_backoff_seconds, text_query_prefix=text_query_prefix
+    )
+    if body is None:
+        return {"hits": []}
+
+    responses = bulk_msearch(
+        config=config, body=body, max_retry_attempts=max_retry_attempts, max_retry_backoff=max_retry_backoff_seconds)
+    return _format_hybrid_search_response(
+        responses=responses, result_count=result_count, offset=offset, hybrid_parameters=hybrid_parameters)
+
+
+def _create_hybrid_search_body(
+        config: Config, index_name: str, text: str, result_count: int = 5, offset: int = 0,
+        searchable_attributes: Iterable[str] = None, verbose=0, filter_string: str = None, device: str = None,
+        attributes_to_retrieve: Optional[List[str]] = None, image_download_headers: Optional[Dict] = None,
+        score_modifiers: Optional[ScoreModifier] = None, model_auth: Optional[ModelAuth] = None,
+        max_retry_attempts: int = None, max_retry_backoff_seconds: int = None,
+        text_query_prefix: Optional[str] = None) -> Optional[List[Dict]]:
+    """Vectorises the query of a hybrid search, and creates its `/_msearch` body: the lexical search followed by the
+    tensor search. Returns None if the search can't find anything. This is the CPU-bound part of _hybrid_search()."""
+    if not device:
+        raise errors.InternalError("_hybrid_search cannot be called without `device`!")
+    if not isinstance(text, str):
+        raise errors.InvalidArgError(
+            f"Hybrid search query arg must be of type `str`! text arg is of type {type(text)}. "
+            f"Query arg: {text}")
+
+    RequestMetricsStore.for_request().start("search.hybrid.processing_before_opensearch")
+    if searchable_attributes is not None and len(searchable_attributes) == 0:
+        # Empty searchable attributes should produce empty results.
+        RequestMetricsStore.for_request().stop("search.hybrid.processing_before_opensearch")
+        return None
+
+    try:
+        index_info = get_index_info(
+            config=config,
+            index_name=index_name,
+            max_retry_attempts=max_retry_attempts,
+            max_retry_backoff_seconds=max_retry_backoff_seconds
+        )
+    except KeyError as e:
+        raise errors.IndexNotFoundError(message="Tried to search a non-existent index: {}".format(index_name))
+
+    # Fusion needs each search method's hits from the first rank, down to the last rank of the requested page.
+    rank_window = offset + result_count
+
+    lexical_body = _create_lexical_search_query(
+        text=text,
+        fields_to_search=searchable_attributes if searchable_attributes is not None
+        else index_info.get_true_text_properties(),
+        result_count=rank_window, offset=0, filter_string=filter_string,
+        attributes_to_retrieve=attributes_to_retrieve
+    )
+
+    queries = [BulkSearchQueryEntity(
+        q=text,
+        searchableAttributes=searchable_attributes,
+        searchMethod=SearchMethod.TENSOR,
+        limit=rank_window, offset=0,
+        showHighlights=False,
+        filter=filter_string,
+        attributesToRetrieve=attributes_to_retrieve,
+        image_download_headers=image_download_headers,
+        scoreModifiers=score_modifiers,
+        index=index_name, modelAuth=model_auth,
+        textQueryPrefix=text_query_prefix
+    )]
+    with RequestMetricsStore.for_request().time(f"search.vector_inference_full_pipeline"):
+        qidx_to_vectors: Dict[Qidx, List[float]] = run_vectorise_pipeline(
+            config=config,
+            queries=queries,
+            device=device,
+        )
+    tensor_body = construct_msearch_body_elements(
+        searchable_attributes, 0, filter_string, index_info, rank_window, qidx_to_vectors[0],
+        attributes_to_retrieve, index_name, score_modifiers
+    )
+
+    body = [{"index": index_name}, lexical_body] + tensor_body
+    if verbose:
+        _vector_text_search_query_verbose(verbose=verbose, body=body)
+
+    total_preprocess_time = RequestMetricsStore.for_request().stop("search.hybrid.processing_before_opensearch")
+    logger.debug(f"search (hybrid) pre-processing: took {(total_preprocess_time):.3f}ms to vectorize and process query.")
+
+    return body
+
+
+def _format_hybrid_search_response(responses: List[List[Dict]], result_count: int, offset: int,
+                                   hybrid_parameters: Optional[HybridParameters] = None) -> dict:
+    """Fuses the `/_msearch` hits of a hybrid search into Marqo search results"""
+    if hybrid_parameters is None:
+        hybrid_parameters = HybridParameters()
+    rank_window = offset + result_count
+    lexical_response, tensor_response = responses
+
+    RequestMetricsStore.for_request().start("search.hybrid.postprocess")
+    lexical_hits = _format_lexical_hits(lexical_response)
+    tensor_hits = _format_ordered_docs_simple(
+        ordered_docs_w_chunks=sort_chunks(gather_documents_from_response([tensor_response])),
+        result_count=rank_window
+    )["hits"]
+    fused_hits = fusion.fuse(lexical_hits, tensor_hits, hybrid_parameters)
+
+    total_postprocess_time = RequestMetricsStore.for_request().stop("search.hybrid.postprocess")
+    logger.debug(
+        f"search (hybrid) post-processing: took {(total_postprocess_time):.3f}ms to fuse {len(lexical_hits)} lexical "
+        f"and {len(tensor_hits)} tensor results.")
+    return {"hits": fused_hits[offset:rank_window]}
+
+
 def _format_ordered_docs_simple(ordered_docs_w_chunks: List[dict], result_count: int) -> dict:
     """Only one highlight is returned
     Args:
@@ -2187,11 +2942,18 @@ def get_loaded_models() -> dict:
     return message
 
 
+def get_inference_batching_stats() -> dict:
+    """Returns the batch size distribution and queue wait times of vectorise calls batched together, per model."""
+    return {"models": s2_inference.get_inference_batching_stats()}
+
+
 def eject_model(model_name: str, device: str) -> dict:
     try:
         result = s2_inference.eject_model(model_name, device)
     except s2_inference_errors.ModelNotInCacheError as e:
         raise errors.ModelNotInCacheError(message=str(e))
+    query_vector_cache.get_cache().invalidate_model(model_name=model_name, device=device)
+    rerank_score_cache.get_cache().invalidate_model(model_name=model_name, device=device)
     return result
 
 
@@ -2205,6 +2967,10 @@ def get_cpu_info() -> dict:
     }
 
 
+def get_backend_connection_pool_stats() -> dict:
+    return _httprequests.get_connection_pool_stats()
+
+
 def get_cuda_info() -> dict:
     if torch.cuda.is_available():
         return {"cuda_devices": [{"device_id": _device_id, "device_name": torch.cuda.get_device_name(_device_id),
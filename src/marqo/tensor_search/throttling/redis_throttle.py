@@ -3,8 +3,11 @@ from marqo.tensor_search.enums import RequestType, EnvVars
 from marqo.tensor_search import utils
 from marqo.tensor_search.tensor_search_logging import get_logger
 from marqo.errors import TooManyRequestsError
+from fastapi.concurrency import run_in_threadpool
 from functools import wraps
 from threading import Thread
+from typing import Any, Optional, Tuple
+import inspect
 import uuid
 
 # for logging
@@ -24,73 +27,97 @@ def throttle(request_type: str):
 
     Implemented in a failsafe manner. If redis cannot be connected to or causes an error for any reason, this function is escaped and marqo operation will proceed as normal.
     Can be manually turned off with env var: $MARQO_ENABLE_THROTTLING='FALSE'
+
+    Decorates both functions and coroutine functions. A coroutine function's request counts towards the limit until
+    it has been awaited. Its thread is acquired in the threadpool (redis calls block), and released in the background,
+    so neither blocks the event loop.
     """
     def decorator(function):
-        
+
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)        # needed to preserve function metadata, or else FastAPI throws a 422.
+            async def async_wrapper(*args, **kwargs):
+                thread = await run_in_threadpool(_acquire_thread, request_type)
+                if thread is None:
+                    return await function(*args, **kwargs)
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    _release_thread(*thread)
+
+            return async_wrapper
+
         @wraps(function)        # needed to preserve function metadata, or else FastAPI throws a 422.
         def wrapper(*args, **kwargs):
-
-            if utils.read_env_vars_and_defaults(EnvVars.MARQO_ENABLE_THROTTLING) != "TRUE":
+            thread = _acquire_thread(request_type)
+            if thread is None:
+                return function(*args, **kwargs)
+            # Delete thread key whether function succeeds or fails
+            try:
                 return function(*args, **kwargs)
+            finally:
+                _release_thread(*thread)
 
-            redis = redis_driver.get_db()  # redis instance
-            lua_shas = redis_driver.get_lua_shas()
+        return wrapper
+    return decorator
 
-            # Define maximum thread counts
-            throttling_max_threads = {
-                RequestType.INDEX: utils.read_env_vars_and_defaults(EnvVars.MARQO_MAX_CONCURRENT_INDEX),
-                RequestType.SEARCH: utils.read_env_vars_and_defaults(EnvVars.MARQO_MAX_CONCURRENT_SEARCH) 
-            }
-            
-            set_key = f"set:{request_type}"
-            thread_name = f"thread:{uuid.uuid4()}"
 
-            t0 = time.time()
+def _acquire_thread(request_type: str) -> Optional[Tuple[Any, str, str]]:
+    """Counts a request towards the thread limit of its request type
 
-            def remove_thread_from_set(key, name):
-                try:
-                    redis.zrem(key, name)
-                except Exception as e:
-                    logger.warn(generate_redis_warning(skipped_operation="throttling thread count decrement", exc=e))
-                    redis_driver.set_faulty(True)
+    Returns:
+        The (redis instance, sorted set key, member name) to pass to _release_thread() once the request is done, or None if the
+        request isn't counted (throttling is disabled, or redis couldn't be reached).
+    Raises:
+        TooManyRequestsError: if the limit has been reached
+    """
+    if utils.read_env_vars_and_defaults(EnvVars.MARQO_ENABLE_THROTTLING) != "TRUE":
+        return None
 
-            # Check current thread count / increment using LUA script
-            try:
-                check_result = redis.evalsha(
-                    lua_shas["check_and_increment"], 
-                    1,          
-                    set_key,                                 # sorted set key (by request type)
-                    thread_name,                             # name of member for the thread
-                    throttling_max_threads[request_type],    # thread_limit
-                    utils.read_env_vars_and_defaults(EnvVars.MARQO_THREAD_EXPIRY_TIME)  # expire_time
-                )
-            except Exception as e:
-                logger.warn(generate_redis_warning(skipped_operation="throttling thread count check", exc=e))
-                redis_driver.set_faulty(True)
-                return function(*args, **kwargs)
+    redis = redis_driver.get_db()  # redis instance
+    lua_shas = redis_driver.get_lua_shas()
 
-            t1 = time.time()
-            redis_time = (t1 - t0)*1000
+    # Define maximum thread counts
+    throttling_max_threads = {
+        RequestType.INDEX: utils.read_env_vars_and_defaults(EnvVars.MARQO_MAX_CONCURRENT_INDEX),
+        RequestType.SEARCH: utils.read_env_vars_and_defaults(EnvVars.MARQO_MAX_CONCURRENT_SEARCH) 
+    }
+    
+    set_key = f"set:{request_type}"
+    thread_name = f"thread:{uuid.uuid4()}"
 
-            # Thread limit exceeded, throw 429
-            if check_result != 0:
-                throttling_message = f"Throttled because maximum thread count ({throttling_max_threads[request_type]}) for request type '{request_type}' has been exceeded. Try your request again later."
-                raise TooManyRequestsError(message=throttling_message)
+    # Check current thread count / increment using LUA script
+    try:
+        check_result = redis.evalsha(
+            lua_shas["check_and_increment"], 
+            1,          
+            set_key,                                 # sorted set key (by request type)
+            thread_name,                             # name of member for the thread
+            throttling_max_threads[request_type],    # thread_limit
+            utils.read_env_vars_and_defaults(EnvVars.MARQO_THREAD_EXPIRY_TIME)  # expire_time
+        )
+    except Exception as e:
+        logger.warn(generate_redis_warning(skipped_operation="throttling thread count check", exc=e))
+        redis_driver.set_faulty(True)
+        return None
 
-            else:
-                # Execute function
-                try:
-                    result = function(*args, **kwargs)
-                    return result
+    # Thread limit exceeded, throw 429
+    if check_result != 0:
+        throttling_message = f"Throttled because maximum thread count ({throttling_max_threads[request_type]}) for request type '{request_type}' has been exceeded. Try your request again later."
+        raise TooManyRequestsError(message=throttling_message)
 
-                except Exception as e:
-                    raise e
-                
-                # Delete thread key whether function succeeds or fails (async)
-                finally:
-                    # Remove key from sorted set (async)
-                    remove_thread = Thread(target = remove_thread_from_set, args = (set_key, thread_name))
-                    remove_thread.start()
-                    
-        return wrapper
-    return decorator
\ No newline at end of file
+    return redis, set_key, thread_name
+
+
+def _release_thread(redis, set_key: str, thread_name: str) -> None:
+    """Removes the request's key from the sorted set, in the background"""
+
+    def remove_thread_from_set(key, name):
+        try:
+            redis.zrem(key, name)
+        except Exception as e:
+            logger.warn(generate_redis_warning(skipped_operation="throttling thread count decrement", exc=e))
+            redis_driver.set_faulty(True)
+
+    remove_thread = Thread(target = remove_thread_from_set, args = (set_key, thread_name))
+    remove_thread.start()
\ No newline at end of file
@@ -17,11 +17,12 @@ from marqo.tensor_search.enums import EnvVars
 
 
 def dicts_to_jsonl(dicts: List[dict]) -> str:
-    """Turns a list of dicts into a JSONL string"""
-    return functools.reduce(
-        lambda x, y: "{}\n{}".format(x, json.dumps(y)),
-        dicts, ""
-    ) + "\n"
+    """Turns a list of dicts into a JSONL string, as expected by the _bulk and _msearch endpoints.
+
+    Each dict is encoded once and the lines are joined in a single pass, so this is linear in
+    the size of the output. Bulk bodies with vectors can be tens of MB.
+    """
+    return "\n".join([json.dumps(d) for d in dicts]) + "\n"
 
 
 def generate_vector_name(field_name: str) -> str:
@@ -70,6 +71,14 @@ def format_timestamp(timestamp: datetime.datetime):
     return f"{timestamp.isoformat()}Z"
 
 
+def format_error(e: Exception) -> dict:
+    """The body the API returns for the error, for errors reported after a response has been given (in a job's status,
+    or in a streamed response)"""
+    if isinstance(e, errors.MarqoWebError):
+        return {"message": e.message, "code": e.code, "type": e.error_type, "link": e.link}
+    return {"message": getattr(e, "message", str(e)), "code": 500, "type": "internal_error", "link": ""}
+
+
 def construct_authorized_url(url_base: str, username: str, password: str) -> str:
     """
     Args:
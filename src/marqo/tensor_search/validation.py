@@ -11,7 +11,7 @@ from marqo.errors import (
     IllegalRequestedDocCount)
 from marqo.tensor_search.enums import TensorField, SearchMethod, IndexSettingsField
 from marqo.tensor_search import constants
-from marqo.tensor_search.models.search import SearchContext
+from marqo.tensor_search.models.search import SearchContext, HybridParameters
 
 from marqo.tensor_search.models.delete_docs_objects import MqDeleteDocsRequest
 from marqo.tensor_search.models.settings_object import settings_schema
@@ -86,6 +86,7 @@ def validate_bulk_query_input(q: 'BulkSearchQueryEntity') -> Optional[MarqoError
         )
 
     validate_boost(boost=q.boost, search_method=q.searchMethod)
+    validate_hybrid_parameters(hybrid_parameters=q.hybridParameters, search_method=q.searchMethod)
     if q.searchableAttributes is not None:
         if not isinstance(q.searchableAttributes, (List, Tuple)):
             raise InvalidArgError("searchableAttributes must be a sequence!")
@@ -103,7 +104,7 @@ def validate_searchable_attributes(searchable_attributes: Optional[List[str]], s
     NOTE: There is only a maximum number of searchable attributes allowed for tensor search methods.
 
     """
-    if search_method != SearchMethod.TENSOR:
+    if search_method not in (SearchMethod.TENSOR, SearchMethod.HYBRID):
         return
 
     maximum_searchable_attributes: Optional[str] = utils.read_env_vars_and_defaults(enums.EnvVars.MARQO_MAX_SEARCHABLE_TENSOR_ATTRIBUTES)
@@ -200,6 +201,19 @@ def validate_context(context: Optional[SearchContext], search_method: SearchMeth
             f"If you aim to search with your custom vectors, reformat the query as a dictionary.\n"
             f"Please check `https://docs.marqo.ai/0.0.16/API-Reference/search/#context` for more information."
         )
+    if context is not None and search_method == SearchMethod.HYBRID:
+        raise InvalidArgError(
+            f"Marqo received a parameter `context` for a search with search_method=`{search_method}`. "
+            f"Context is only supported for TENSOR search."
+        )
+
+
+def validate_hybrid_parameters(hybrid_parameters: Optional[HybridParameters], search_method: Union[str, SearchMethod]):
+    if hybrid_parameters is not None and search_method.upper() != SearchMethod.HYBRID:
+        raise InvalidArgError(
+            f'Hybrid parameters are only supported for search_method="HYBRID". '
+            f'Received search_method={search_method}'
+        )
 
 
 def validate_boost(boost: Dict, search_method: Union[str, SearchMethod]):
@@ -7,8 +7,11 @@ from marqo.tensor_search.utils import construct_authorized_url
 from marqo.tensor_search.models.add_docs_objects import ModelAuth
 from marqo.tensor_search.models.add_docs_objects import AddDocsParams, AddDocsBodyParams
 from marqo.errors import BadRequestError
-from typing import Union, List, Optional, Dict
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Iterator, Union, List, Optional, Dict
 from fastapi import Request
+from marqo.tensor_search.models.indexing_job_objects import IndexingJobParams
+from marqo.tensor_search.utils import read_env_vars_and_defaults_ints
+from marqo.tensor_search.validation import validate_mappings_object
 
 
 def upconstruct_authorized_url(opensearch_url: str) -> str:
@@ -151,14 +154,7 @@ def add_docs_params_orchestrator(index_name: str, body: Union[AddDocsBodyParams,
     if isinstance(body, AddDocsBodyParams):
         docs = body.documents
 
-        # Check for query parameters that are not supported in the new API
-        deprecated_fields = ["non_tensor_fields", "use_existing_tensors", "image_download_headers", "model_auth", "mappings"]
-        if any(field in query_parameters for field in deprecated_fields):
-            raise BadRequestError("Marqo is not accepting any of the following parameters in the query string: "
-                                  "`non_tensor_fields`, `use_existing_tensors`, `image_download_headers`, `model_auth`, `mappings`. "
-                                  "Please move these parameters to the request body as "
-                                  "`nonTensorFields`,` useExistingTensors`, `imageDownloadHeaders`, `modelAuth`, `mappings`. and try again. "
-                                  "Please check `https://docs.marqo.ai/latest/API-Reference/documents/` for the correct APIs.")
+        _validate_no_deprecated_query_parameters(query_parameters)
 
         mappings = body.mappings
         non_tensor_fields = body.nonTensorFields
@@ -168,14 +164,7 @@ def add_docs_params_orchestrator(index_name: str, body: Union[AddDocsBodyParams,
         image_download_headers = body.imageDownloadHeaders
         text_chunk_prefix = body.textChunkPrefix
 
-        if tensor_fields is not None and non_tensor_fields is not None:
-            raise BadRequestError('Cannot provide `nonTensorFields` when `tensorFields` is defined. '
-                                  '`nonTensorField`s has been deprecated and will be removed in Marqo 2.0.0. '
-                                  'Its use is discouraged.')
-
-        if tensor_fields is None and non_tensor_fields is None:
-            raise BadRequestError('Required parameter `tensorFields` is missing from the request body. '
-                                  'Use `tensorFields=[]` to index for lexical-only search.')
+        _validate_tensor_fields_and_non_tensor_fields(tensor_fields=tensor_fields, non_tensor_fields=non_tensor_fields)
 
         return AddDocsParams(
             index_name=index_name, docs=docs, auto_refresh=auto_refresh,
@@ -204,3 +193,145 @@ def add_docs_params_orchestrator(index_name: str, body: Union[AddDocsBodyParams,
 
     else:
         raise InternalError(f"Unexpected request body type `{type(body).__name__} for `/documents` API. ")
+
+
+def _validate_no_deprecated_query_parameters(query_parameters: Dict) -> None:
+    """Check for query parameters that are not supported in the new API"""
+    deprecated_fields = ["non_tensor_fields", "use_existing_tensors", "image_download_headers", "model_auth", "mappings"]
+    if any(field in query_parameters for field in deprecated_fields):
+        raise BadRequestError("Marqo is not accepting any of the following parameters in the query string: "
+                              "`non_tensor_fields`, `use_existing_tensors`, `image_download_headers`, `model_auth`, `mappings`. "
+                              "Please move these parameters to the request body as "
+                              "`nonTensorFields`,` useExistingTensors`, `imageDownloadHeaders`, `modelAuth`, `mappings`. and try again. "
+                              "Please check `https://docs.marqo.ai/latest/API-Reference/documents/` for the correct APIs.")
+
+
+def _validate_tensor_fields_and_non_tensor_fields(tensor_fields: Optional[List[str]],
+                                                  non_tensor_fields: Optional[List[str]]) -> None:
+    if tensor_fields is not None and non_tensor_fields is not None:
+        raise BadRequestError('Cannot provide `nonTensorFields` when `tensorFields` is defined. '
+                              '`nonTensorField`s has been deprecated and will be removed in Marqo 2.0.0. '
+                              'Its use is discouraged.')
+
+    if tensor_fields is None and non_tensor_fields is None:
+        raise BadRequestError('Required parameter `tensorFields` is missing from the request body. '
+                              'Use `tensorFields=[]` to index for lexical-only search.')
+
+
+def indexing_job_params_orchestrator(index_name: str, body: Optional[AddDocsBodyParams], device: str,
+                                     auto_refresh: bool = False, batch_size: Optional[int] = None,
+                                     tensor_fields: Optional[List[str]] = None,
+                                     non_tensor_fields: Optional[List[str]] = None,
+                                     mappings: Optional[dict] = dict(), model_auth: Optional[ModelAuth] = None,
+                                     image_download_headers: Optional[dict] = dict(),
+                                     use_existing_tensors: Optional[bool] = False,
+                                     query_parameters: Optional[Dict] = dict()) -> IndexingJobParams:
+    """An orchestrator for the add documents jobs and NDJSON stream APIs, which add docs in batches of batch_size.
+    As with add_documents, the parameters are taken from the body. If there is no body (the docs are sent as NDJSON),
+    they are taken from the query string instead.
+
+    Returns:
+        IndexingJobParams: the parameters each batch of the job is added with
+    """
+    max_batch_size = read_env_vars_and_defaults_ints(enums.EnvVars.MARQO_MAX_ADD_DOCS_COUNT)
+    if batch_size is None:
+        batch_size = max_batch_size
+    elif not 1 <= batch_size <= max_batch_size:
+        raise BadRequestError(f"`batch_size` must be between 1 and {max_batch_size}. "
+                              f"The max can be increased by setting the environment variable "
+                              f"`{enums.EnvVars.MARQO_MAX_ADD_DOCS_COUNT}`.")
+
+    text_chunk_prefix = None
+    if body is not None:
+        _validate_no_deprecated_query_parameters(query_parameters)
+        if "tensor_fields" in query_parameters:
+            raise BadRequestError("Please move `tensor_fields` to the request body as `tensorFields`, and try again.")
+        mappings = body.mappings
+        non_tensor_fields = body.nonTensorFields
+        tensor_fields = body.tensorFields
+        use_existing_tensors = body.useExistingTensors
+        model_auth = body.modelAuth
+        image_download_headers = body.imageDownloadHeaders
+        text_chunk_prefix = body.textChunkPrefix
+
+    _validate_tensor_fields_and_non_tensor_fields(tensor_fields=tensor_fields, non_tensor_fields=non_tensor_fields)
+    if mappings:
+        validate_mappings_object(mappings_object=mappings)
+
+    return IndexingJobParams(
+        index_name=index_name, auto_refresh=auto_refresh, device=device, batch_size=batch_size,
+        non_tensor_fields=non_tensor_fields, tensor_fields=tensor_fields,
+        use_existing_tensors=use_existing_tensors, image_download_headers=image_download_headers,
+        mappings=mappings or None, model_auth=model_auth, text_chunk_prefix=text_chunk_prefix
+    )
+
+
+async def read_add_docs_body(request: Request) -> AddDocsBodyParams:
+    """Parses an add_documents body, for endpoints that also accept other bodies (so can't declare it)
+
+    Raises:
+        BadRequestError: if the body isn't a JSON object
+        ValidationError: if the object isn't a valid add_documents body
+    """
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise BadRequestError(f"The request body is not valid JSON. Reason: {e}")
+    if not isinstance(body, dict):
+        raise BadRequestError("The request body must be an object with the documents and their parameters, "
+                              "e.g. `{\"documents\": [...], \"tensorFields\": [...]}`")
+    return AddDocsBodyParams(**body)
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# The size of the chunks a streamed response is sent in
+STREAMED_RESPONSE_CHUNK_SIZE = 64 * 1024
+
+
+def is_ndjson_request(request: Request) -> bool:
+    return request.headers.get("content-type", "").split(";")[0].strip().lower() == NDJSON_MEDIA_TYPE
+
+
+async def parse_ndjson(stream: AsyncIterable[bytes], batch_size: int) -> AsyncIterator[List[Any]]:
+    """Parses an NDJSON request body as it is received, so that it never has to be held in memory at once.
+
+    Yields:
+        The values of the body's lines, in lists of up to batch_size. Blank lines are skipped.
+
+    Raises:
+        BadRequestError: if a line isn't valid JSON
+    """
+    def parse_line(line: bytes, line_number: int) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise BadRequestError(f"Line {line_number} of the NDJSON body is not valid JSON. Reason: {e}")
+
+    remainder = b""
+    batch = []
+    line_number = 0
+    async for chunk in stream:
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                batch.append(parse_line(line, line_number))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if remainder.strip():
+        batch.append(parse_line(remainder, line_number + 1))
+    if batch:
+        yield batch
+
+
+def iterate_and_close(f: BinaryIO, chunk_size: int = STREAMED_RESPONSE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Reads the file in chunks, for a StreamingResponse, closing it once it's been read (or the client has gone)"""
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
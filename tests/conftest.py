@@ -1,5 +1,7 @@
 import pytest
 
+from marqo.tensor_search import tensor_search, index_meta_cache, query_vector_cache
+
 def pytest_addoption(parser):
     parser.addoption("--largemodel", action="store_true", default = False)
     parser.addoption("--slow", action="store_true", default = False)
@@ -18,4 +20,16 @@ def pytest_collection_modifyitems(config, items):
         if "largemodel" in item.keywords and not config.getoption("--largemodel"):
             item.add_marker(skip_largemodel)
         if "slow" in item.keywords and not config.getoption("--slow"):
-            item.add_marker(skip_slow)
\ No newline at end of file
+            item.add_marker(skip_slow)
+
+@pytest.fixture(autouse=True)
+def empty_query_vector_cache():
+    """Query vectors cached by one test (possibly from a mocked model) shouldn't be reused by another."""
+    query_vector_cache.empty_cache()
+
+
+@pytest.fixture(autouse=True)
+def stop_index_info_refresher():
+    """Indexes searched by one test shouldn't keep being refreshed (e.g. through mocked requests) in another."""
+    yield
+    index_meta_cache.get_index_info_refresher().stop()
@@ -1,18 +1,26 @@
+import datetime
 import unittest
 import tempfile
 import os
+from unittest import mock
 
 import numpy as np
+import torch
 from PIL import Image
-from marqo.s2_inference.s2_inference import clear_loaded_models
+from marqo.s2_inference.s2_inference import clear_loaded_models, available_models, _create_model_cache_key
+from marqo.s2_inference.errors import ChunkerError
+from marqo.s2_inference.processing.DINO_utils import DINO_inference, DINO_inference_batch, _get_DINO_transform
 from marqo.errors import InternalError
+from marqo.tensor_search.enums import AvailableModelsKey, EnvVars
 
 from marqo.s2_inference.processing.image import (
+    PatchifyModel,
     PatchifySimple,
     PatchifyPytorch,
     PatchifyViT,
     PatchifyYolox,
     chunk_image,
+    chunk_images,
 )
 
 
@@ -324,3 +332,98 @@ class TestImageChunking(unittest.TestCase):
             assert len(patches) >= 1
             assert patches[0].size == SIZE
 
+
+class RandomBoxesDetector:
+    """a stand in for a torchvision detector. returns random boxes, seeded by the image, and records its batches"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        self.batch_sizes.append(len(batch))
+        results = []
+        for image_pt in batch:
+            generator = torch.Generator().manual_seed(int(image_pt.sum().item() * 1000) % 2**31)
+            xy = torch.rand(150, 2, generator=generator) * 200
+            wh = torch.rand(150, 2, generator=generator) * 120 + 1
+            results.append({'boxes': torch.cat([xy, xy + wh], dim=1), 'scores': torch.rand(150, generator=generator)})
+        return results
+
+
+class TestBatchedImageChunking(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.detector = RandomBoxesDetector()
+        available_models[_create_model_cache_key('faster_rcnn', 'cpu')] = {
+            AvailableModelsKey.model: (self.detector, lambda image_pt: image_pt),
+            AvailableModelsKey.most_recently_used_time: datetime.datetime.now()}
+        rng = np.random.default_rng(0)
+        self.images = [Image.fromarray((rng.random((h, w, 3)) * 255).astype(np.uint8))
+                       for h, w in [(300, 400), (256, 256), (500, 200), (120, 640), (240, 240)]]
+
+    def tearDown(self) -> None:
+        clear_loaded_models()
+
+    def test_detector_required(self):
+        class NoDetector(PatchifyModel):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoDetector(device="cpu")
+
+    def test_chunk_images_same_as_chunk_image(self):
+        for method in ['frcnn', 'frcnn?nms=False', 'frcnn?filter_bb=False']:
+            with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_CHUNKING_BATCH_SIZE: "2"}):
+                batched = chunk_images(self.images, device='cpu', method=method)
+            # 5 images, in batches of 2
+            assert self.detector.batch_sizes[-3:] == [2, 2, 1]
+
+            for image, (patches, bboxes) in zip(self.images, batched):
+                expected_patches, expected_bboxes = chunk_image(image, device='cpu', method=method)
+                assert np.allclose(bboxes, expected_bboxes)
+                assert len(patches) == len(expected_patches) > 1
+                for patch, expected_patch in zip(patches, expected_patches):
+                    assert np.array_equal(np.array(patch), np.array(expected_patch))
+
+    def test_nms_per_image(self):
+        """the boxes of an image aren't suppressed by overlapping boxes of other images in the batch"""
+        patcher = PatchifyPytorch(device='cpu', size=(240, 240))
+        boxes = np.array([[10, 10, 150, 150], [12, 12, 152, 152]], dtype=np.float64)
+        processed = patcher._process_boxes([boxes, boxes, np.zeros((0, 4))],
+                                           [np.array([0.9, 0.5]), np.array([0.4, 0.8]), np.zeros(0)])
+        assert [len(image_boxes) for image_boxes in processed] == [1, 1, 0]
+        assert np.allclose(processed[0], boxes[0]) and np.allclose(processed[1], boxes[1])
+
+    def test_unloadable_image_fails_alone(self):
+        with tempfile.TemporaryDirectory() as d:
+            not_an_image = os.path.join(d, 'not_an_image.png')
+            with open(not_an_image, 'w') as f:
+                f.write('not an image')
+            chunks = chunk_images([self.images[0], not_an_image, self.images[1]], device='cpu', method='frcnn')
+            assert isinstance(chunks[1], ChunkerError)
+            assert len(chunks[0][0]) > 1 and len(chunks[2][0]) > 1
+            assert self.detector.batch_sizes == [2]
+
+            with self.assertRaises(ChunkerError):
+                chunk_image(not_an_image, device='cpu', method='frcnn')
+
+    def test_no_chunking(self):
+        assert chunk_images(['https://a.png', self.images[0]], device='cpu', method=None) == [
+            (['https://a.png'], ['https://a.png']), ([self.images[0]], [(0, 0, 400, 300)])]
+
+    def test_dino_inference_batch(self):
+        class FakeDINO:
+            def get_last_selfattention(self, img):
+                # batch x heads x tokens x tokens, where each image's attentions only depend on the image
+                tokens = (img.shape[2] // 16) * (img.shape[3] // 16) + 1
+                per_image = img.mean(dim=(1, 2, 3))
+                return per_image[:, None, None, None] * torch.arange(2 * tokens * tokens, dtype=torch.float32).reshape(
+                    1, 2, tokens, tokens)
+
+        transform = _get_DINO_transform(image_size=(64, 64))
+        attentions = DINO_inference_batch(FakeDINO(), transform, self.images[:3], patch_size=16, device='cpu')
+        assert len(attentions) == 3
+        for image, image_attentions in zip(self.images, attentions):
+            assert image_attentions.shape == (2, 64, 64)
+            assert np.allclose(image_attentions,
+                               DINO_inference(FakeDINO(), transform, image, patch_size=16, device='cpu'))
@@ -11,9 +11,12 @@ from marqo.s2_inference.types import List, Tuple, ImageType
 from marqo.s2_inference.processing.image_utils import (
     load_rcnn_image, 
     replace_small_boxes,
+    replace_small_boxes_array,
     _keep_topk,
     rescale_box,
+    rescale_boxes,
     clip_boxes,
+    clip_boxes_array,
     _PIL_to_opencv, 
     str2bool,
     get_default_size,
@@ -179,6 +182,23 @@ class TestImageUtils(unittest.TestCase):
         inds = filter_boxes(boxes, max_aspect_ratio=100, min_area=1e6)
         assert inds == []
 
+    def test_filter_boxes_zero_size(self):
+        boxes = np.array([[0, 0, 0, 100], [0, 0, 0, 0], [0, 0, 50, 50]], dtype=np.float32)
+        assert filter_boxes(boxes, max_aspect_ratio=100, min_area=-1) == [2]
+        assert filter_boxes(np.zeros((0, 4))) == []
+
+    def test_box_arrays_same_as_lists(self):
+        rng = np.random.default_rng(0)
+        xy = rng.random((50, 2))*200
+        boxes = np.concatenate([xy, xy + rng.random((50, 2))*120], axis=1)
+
+        assert np.allclose(replace_small_boxes_array(boxes, min_area=40*40, new_size=(100, 100)),
+                           replace_small_boxes(boxes, min_area=40*40, new_size=(100, 100)))
+        assert np.allclose(clip_boxes_array(boxes, 0, 0, 150, 100), clip_boxes(boxes, 0, 0, 150, 100))
+        assert np.allclose(rescale_boxes(boxes, (240, 240), (480, 120)),
+                           [rescale_box(box, (240, 240), (480, 120)) for box in boxes])
+        assert replace_small_boxes_array(np.zeros((0, 4))).shape == (0, 4)
+
     def test_rescale_box(self):
 
         boxes = [[0,0,100,100], [0,0,200,100], [5,3,50,70]]
@@ -1,8 +1,27 @@
-from marqo.s2_inference.processing.text import split_text, prefix_text_chunks
+from marqo.s2_inference.processing import text
+from marqo.s2_inference.processing.text import split_text, split_texts, prefix_text_chunks
+from nltk.tokenize import sent_tokenize, word_tokenize
 import unittest
+from unittest import mock
 import copy
 
 
+SPLIT_TEXT_CORPUS = [
+    "short",
+    "a product title without any sentence ends",
+    "  leading and trailing whitespace \n\t ",
+    "Can't stop, won't stop: \"quoted\" (bracketed) words & symbols #1 $20 50%",
+    "multi line\ntext without\n\nsentence ends",
+    "This is a sentence. This is another one! And is this a third?",
+    "Mr. Smith bought cheapsite.com for 1.5 million dollars, i.e. he paid a lot for it. Did he mind?",
+    "Ends with a period.",
+    "...",
+    "What?! No way... really.",
+    "e.g. abbreviations, U.S.A. and 3.14 are not sentence ends",
+    "Trailing spaces after a sentence.   ",
+]
+
+
 class TestSplitText(unittest.TestCase):
 
     def setUp(self) -> None:
@@ -96,4 +115,36 @@ class TestPrefixTextChunks(unittest.TestCase):
         text_splits = ["a", "b", "c", ""]
         # None prefix should do nothing
         assert prefix_text_chunks(text_splits, None) == \
-            ["a", "b", "c", ""]
\ No newline at end of file
+            ["a", "b", "c", ""]
+
+
+class TestSplitTextNltk(unittest.TestCase):
+    """The splitting functions are the same as nltk's tokenizers, without running punkt when it isn't needed"""
+
+    def test_same_as_nltk(self):
+        for corpus_text in SPLIT_TEXT_CORPUS:
+            assert text._splitting_functions('sentence')(corpus_text) == sent_tokenize(corpus_text), corpus_text
+            assert text._splitting_functions('word')(corpus_text) == word_tokenize(corpus_text), corpus_text
+
+    def test_punkt_not_used_without_sentence_ends(self):
+        with mock.patch("marqo.s2_inference.processing.text._get_sentence_tokenizer") as mock_get_tokenizer:
+            assert split_text("no sentence ends here", split_by='sentence') == ["no sentence ends here"]
+            assert split_text("no sentence ends here", split_by='word', split_length=2, split_overlap=0) == [
+                "no sentence", "ends here"]
+        mock_get_tokenizer.assert_not_called()
+
+    def test_splitting_functions_cached(self):
+        assert text._splitting_functions('word', language='english') is text._splitting_functions(
+            'word', language='english')
+        assert text._splitting_functions('word', language='english') is not text._splitting_functions(
+            'sentence', language='english')
+
+    def test_split_texts(self):
+        for split_by in ['character', 'word', 'sentence', 'passage']:
+            for split_length, split_overlap in [(1, 0), (2, 1), (3, 0)]:
+                expected = [split_text(corpus_text, split_by=split_by, split_length=split_length,
+                                       split_overlap=split_overlap) for corpus_text in SPLIT_TEXT_CORPUS]
+                assert split_texts(SPLIT_TEXT_CORPUS, split_by=split_by, split_length=split_length,
+                                   split_overlap=split_overlap) == expected
+        assert split_texts([]) == []
+        assert split_texts(["", "a"], split_by='unknown') == [[" "], ["a"]]
@@ -250,3 +250,79 @@ class TestAutomaticModelEject(unittest.TestCase):
         while not q_1.empty():
             assert q_1.get() == "success"
 
+
+
+class TestConcurrentModelLoading(unittest.TestCase):
+    """Models are loaded outside the model cache lock. Loading is mocked."""
+
+    def setUp(self) -> None:
+        clear_loaded_models()
+        self.model_properties = {"name": "mock", "dimensions": 3, "type": "sbert", "model_size": 1}
+
+    def tearDown(self) -> None:
+        clear_loaded_models()
+
+    def _load(self, model_name: str, q: queue.Queue):
+        try:
+            s2_inference._update_available_models(
+                model_cache_key=s2_inference._create_model_cache_key(model_name, "cpu", self.model_properties),
+                model_name=model_name, validated_model_properties=self.model_properties, device="cpu",
+                normalize_embeddings=True)
+            q.put("success")
+        except Exception as e:
+            q.put(e)
+
+    def test_different_models_loaded_at_the_same_time(self):
+        both_loading = threading.Barrier(2, timeout=5)
+
+        def load_model(model_name, *args, **kwargs):
+            both_loading.wait()
+            return unittest.mock.MagicMock()
+
+        q = queue.Queue()
+        with patch("marqo.s2_inference.s2_inference._load_model", side_effect=load_model):
+            threads = [threading.Thread(target=self._load, args=(model_name, q)) for model_name in ("a", "b")]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert [q.get(), q.get()] == ["success", "success"]
+        assert len(s2_inference.available_models) == 2
+        assert s2_inference.models_being_loaded == {}
+
+    def test_same_model_rejected_while_loading(self):
+        loading = threading.Event()
+        release = threading.Event()
+
+        def load_model(model_name, *args, **kwargs):
+            loading.set()
+            assert release.wait(timeout=5)
+            return unittest.mock.MagicMock()
+
+        q_1, q_2 = queue.Queue(), queue.Queue()
+        with patch("marqo.s2_inference.s2_inference._load_model", side_effect=load_model):
+            t = threading.Thread(target=self._load, args=("a", q_1))
+            t.start()
+            assert loading.wait(timeout=5)
+            self._load("a", q_2)
+            release.set()
+            t.join()
+
+        assert q_1.get() == "success"
+        assert isinstance(q_2.get(), ModelCacheManagementError)
+
+    def test_loading_models_count_towards_memory(self):
+        key = s2_inference._create_model_cache_key("a", "cpu", self.model_properties)
+        with patch.dict(s2_inference.models_being_loaded, {key: 5}), \
+                patch("marqo.s2_inference.s2_inference.read_env_vars_and_defaults", return_value="6"):
+            assert _check_memory_threshold_for_model("cpu", 0.5, calling_func="unit_test") is True
+            assert _check_memory_threshold_for_model("cpu", 1.5, calling_func="unit_test") is False
+
+    def test_failed_load_releases_reservation(self):
+        q = queue.Queue()
+        with patch("marqo.s2_inference.s2_inference._load_model", side_effect=RuntimeError("corrupt weights")):
+            self._load("a", q)
+        assert isinstance(q.get(), s2_inference.ModelLoadError)
+        assert s2_inference.models_being_loaded == {}
+        assert s2_inference.available_models == {}
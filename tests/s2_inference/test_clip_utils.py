@@ -2,16 +2,20 @@ import copy
 import io
 import itertools
 import os
+import tempfile
+import threading
 
 import PIL
 import requests.exceptions
-from marqo.s2_inference import clip_utils, types
+from marqo.s2_inference import clip_utils, image_download, types
 import unittest
 from unittest import mock
 import requests
 from marqo.s2_inference.clip_utils import CLIP, download_model, OPEN_CLIP, FP16_CLIP, MULTILINGUAL_CLIP
 
-from marqo.tensor_search.enums import ModelProperties
+from marqo.tensor_search.enums import ModelProperties, EnvVars
+import numpy as np
+import torch
 from marqo.tensor_search.models.private_models import ModelLocation, ModelAuth
 from unittest.mock import patch
 import pytest
@@ -47,7 +51,7 @@ class TestEncoding(unittest.TestCase):
             mock_get = mock.MagicMock()
             mock_get.side_effect = err
 
-            @mock.patch('requests.get', mock_get)
+            @mock.patch.object(image_download.get_session(), 'get', mock_get)
             def run():
                 try:
                     clip_utils.load_image_from_path(good_url, {})
@@ -72,7 +76,7 @@ class TestEncoding(unittest.TestCase):
             bad_response.status_code = status_code
             mock_get.return_value = bad_response
 
-            @mock.patch('requests.get', mock_get)
+            @mock.patch.object(image_download.get_session(), 'get', mock_get)
             def run():
                 try:
                     clip_utils.load_image_from_path(good_url, {})
@@ -88,8 +92,10 @@ class TestEncoding(unittest.TestCase):
 
         mock_resp = mock.MagicMock()
         mock_resp.ok = True
+        mock_resp.__enter__.return_value = mock_resp
+        mock_resp.raw = io.BytesIO(b"image bytes")
 
-        with mock.patch('requests.get', return_value=mock_resp) as mock_get:
+        with mock.patch.object(image_download.get_session(), 'get', return_value=mock_resp) as mock_get:
             with mock.patch('PIL.Image.open') as mock_open:
                 mock_open.side_effect = Exception()
 
@@ -101,6 +107,77 @@ class TestEncoding(unittest.TestCase):
                 mock_resp.__exit__.assert_called_once()
 
 
+class TestPreprocessImages(unittest.TestCase):
+
+    def setUp(self) -> None:
+        clip_utils.shutdown_preprocessing_executor()
+        self.images = [PIL.Image.new("RGB", (32 + i, 48), color=(i * 10, 0, 0)) for i in range(10)]
+        self.preprocess = clip_utils._get_transform(16)
+
+    def tearDown(self) -> None:
+        clip_utils.shutdown_preprocessing_executor()
+
+    def test_preprocess_images_matches_sequential(self):
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT: "4"}):
+            processed = clip_utils.preprocess_images(self.images, self.preprocess)
+        assert clip_utils._get_preprocessing_executor()[1] == 4
+        assert len(processed) == len(self.images)
+        for image, tensor in zip(self.images, processed):
+            assert torch.equal(tensor, self.preprocess(image))
+
+    def test_preprocess_images_runs_in_pool(self):
+        thread_names = set()
+
+        def preprocess(image):
+            thread_names.add(threading.current_thread().name)
+            return self.preprocess(image)
+
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT: "2"}):
+            clip_utils.preprocess_images(self.images, preprocess)
+        assert all(name.startswith("image_preprocessing") for name in thread_names)
+
+    def test_repeated_image_preprocessed_once(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        path = os.path.join(temp_dir.name, "image.png")
+        self.images[0].save(path)
+        # the same lazily decoded image, as format_and_load_CLIP_images returns for a repeated url
+        image = PIL.Image.open(path)
+        preprocess = mock.MagicMock(side_effect=self.preprocess)
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT: "4"}):
+            processed = clip_utils.preprocess_images([image, self.images[1], image, image], preprocess)
+        assert preprocess.call_count == 2
+        assert processed[0] is processed[2] and processed[0] is processed[3]
+        assert torch.equal(processed[0], self.preprocess(self.images[0]))
+        assert torch.equal(processed[1], self.preprocess(self.images[1]))
+
+    def test_single_thread_preprocesses_in_caller(self):
+        thread_names = set()
+
+        def preprocess(image):
+            thread_names.add(threading.current_thread().name)
+            return self.preprocess(image)
+
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_PREPROCESSING_THREAD_COUNT: "1"}):
+            clip_utils.preprocess_images(self.images, preprocess)
+        assert thread_names == {threading.current_thread().name}
+
+    def test_format_and_load_CLIP_images_keeps_order(self):
+        urls = [f"https://example.com/{i}.png" for i in range(5)]
+        inputs = [urls[0], self.images[0], urls[1], urls[0], np.zeros((4, 4, 3), dtype=np.uint8)] + urls[2:]
+
+        def load_image(image_path, image_download_headers, **kwargs):
+            return PIL.Image.new("RGB", (int(image_path[-5]) + 1, 1))
+
+        with mock.patch("marqo.s2_inference.clip_utils.load_image_from_path", side_effect=load_image) as mock_load:
+            results = clip_utils.format_and_load_CLIP_images(inputs, {})
+
+        # each url is loaded once
+        assert mock_load.call_count == 5
+        assert [image.size for image in results] == [(1, 1), self.images[0].size, (2, 1), (1, 1), (4, 4),
+                                                     (3, 1), (4, 1), (5, 1)]
+
+
 class TestDownloadFromRepo(unittest.TestCase):
 
     @patch('marqo.s2_inference.clip_utils.download_model')
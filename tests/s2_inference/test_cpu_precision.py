@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+from transformers import BertConfig, BertModel, BertTokenizer
+
+from marqo.s2_inference import cpu_precision, s2_inference
+from marqo.s2_inference.errors import InvalidModelPropertiesError
+
+
+class TestCpuPrecisionModelProperties(unittest.TestCase):
+
+    def test_cache_key(self):
+        model_properties = {"name": "sentence-transformers/all-MiniLM-L6-v2", "dimensions": 384, "tokens": 128,
+                            "type": "sbert"}
+        fp32_key = s2_inference._create_model_cache_key("my-model", "cpu", model_properties)
+        assert fp32_key == "my-model||sentence-transformers/all-MiniLM-L6-v2||384||sbert||128||cpu"
+        assert s2_inference._create_model_cache_key(
+            "my-model", "cpu", {**model_properties, "cpu_precision": "fp32"}) == fp32_key
+
+        int8_key = s2_inference._create_model_cache_key("my-model", "cpu", {**model_properties, "cpu_precision": "int8"})
+        bf16_key = s2_inference._create_model_cache_key("my-model", "cpu", {**model_properties, "cpu_precision": "bf16"})
+        assert len({fp32_key, int8_key, bf16_key}) == 3
+        # eject_model() matches keys by the model name and device
+        assert int8_key.startswith("my-model") and int8_key.endswith("||cpu")
+
+    def test_invalid_precision(self):
+        model_properties = {"name": "sentence-transformers/all-MiniLM-L6-v2", "dimensions": 384,
+                            "cpu_precision": "int4"}
+        with self.assertRaises(InvalidModelPropertiesError):
+            s2_inference._validate_model_properties("my-model", model_properties)
+
+    def test_onnx_models_not_supported(self):
+        for model_type in ("sbert_onnx", "clip_onnx"):
+            with self.assertRaises(InvalidModelPropertiesError):
+                cpu_precision.get_cpu_precision({"type": model_type, "cpu_precision": "int8"})
+        assert cpu_precision.get_cpu_precision({"type": "sbert_onnx"}) == "fp32"
+
+
+class FakeModel:
+
+    def __init__(self):
+        torch.manual_seed(0)
+        self.model = torch.nn.Sequential(torch.nn.Linear(16, 32), torch.nn.ReLU(), torch.nn.Linear(32, 8))
+
+    def encode(self, inputs: torch.Tensor) -> np.ndarray:
+        with torch.no_grad():
+            return self.model(inputs).numpy()
+
+
+class TestApplyCpuPrecision(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.inputs = torch.randn(4, 16, generator=torch.Generator().manual_seed(1))
+        self.expected = FakeModel().encode(self.inputs)
+
+    def test_int8(self):
+        model = cpu_precision.apply_cpu_precision(FakeModel(), "int8", device="cpu")
+        assert isinstance(model.model[0], torch.nn.quantized.dynamic.Linear)
+        assert np.allclose(model.encode(self.inputs), self.expected, atol=0.05)
+
+    def test_bf16(self):
+        model = cpu_precision.apply_cpu_precision(FakeModel(), "bf16", device="cpu")
+        outputs = model.encode(self.inputs)
+        assert outputs.dtype == np.float32
+        assert np.allclose(outputs, self.expected, atol=0.05)
+
+    def test_fp32_and_gpu_unchanged(self):
+        for precision, device in (("fp32", "cpu"), ("int8", "cuda"), ("bf16", "cuda:0")):
+            model = cpu_precision.apply_cpu_precision(FakeModel(), precision, device=device)
+            assert isinstance(model.model[0], torch.nn.Linear)
+            assert "forward" not in vars(model.model)
+
+    def test_model_without_torch_modules(self):
+        model = mock.Mock(spec=["session", "encode"])
+        with self.assertRaises(InvalidModelPropertiesError):
+            cpu_precision.apply_cpu_precision(model, "int8", device="cpu")
+
+    def test_dict_outputs_cast_to_fp32(self):
+        outputs = cpu_precision._to_fp32({"token_embeddings": torch.ones(2, dtype=torch.bfloat16),
+                                          "input_ids": torch.ones(2, dtype=torch.int64)})
+        assert outputs["token_embeddings"].dtype == torch.float32
+        assert outputs["input_ids"].dtype == torch.int64
+
+
+class TestHfModelCpuPrecision(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.model_dir.cleanup)
+        vocab_file = os.path.join(self.model_dir.name, "vocab.txt")
+        with open(vocab_file, "w") as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "hello", "world"]))
+        BertTokenizer(vocab_file).save_pretrained(self.model_dir.name)
+        torch.manual_seed(0)
+        config = BertConfig(vocab_size=7, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                            intermediate_size=64)
+        BertModel(config).save_pretrained(self.model_dir.name)
+
+    def _load(self, precision: str):
+        model_properties = {"name": self.model_dir.name, "dimensions": 32, "type": "hf", "cpu_precision": precision}
+        return s2_inference._load_model(self.model_dir.name, model_properties, device="cpu",
+                                        calling_func="unit_test")
+
+    def test_lower_precision_encodings_close_to_fp32(self):
+        texts = ["hello world", "hello", "world world hello"]
+        expected = self._load("fp32").encode(texts)
+        for precision in ("int8", "bf16"):
+            outputs = self._load(precision).encode(texts)
+            assert outputs.dtype == np.float32
+            cosine_similarities = (outputs * expected).sum(axis=1)
+            assert (cosine_similarities > 0.98).all(), precision
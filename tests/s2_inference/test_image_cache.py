@@ -0,0 +1,239 @@
+import collections
+import http.server
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+from PIL import Image
+from torchvision.transforms import Compose, Normalize, Resize, ToTensor
+
+from marqo.s2_inference import clip_utils, image_cache, image_download
+from marqo.s2_inference.image_cache import DiskLRUCache
+from marqo.tensor_search.enums import EnvVars
+
+
+class TestDiskLRUCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_put(self):
+        cache = DiskLRUCache(self.directory, max_bytes=100)
+        assert cache.get("a") is None
+        cache.put("a", b"hello")
+        assert cache.get("a") == b"hello"
+        assert cache.current_bytes == 5
+        assert os.listdir(self.directory) == ["a"]
+
+    def test_put_existing_key_does_not_double_count(self):
+        cache = DiskLRUCache(self.directory, max_bytes=100)
+        cache.put("a", b"hello")
+        cache.put("a", b"hi")
+        assert len(cache) == 1
+        assert cache.current_bytes == 2
+        assert cache.get("a") == b"hi"
+
+    def test_lru_eviction_by_bytes(self):
+        cache = DiskLRUCache(self.directory, max_bytes=10)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        # "a" becomes the most recently used
+        assert cache.get("a") == b"aaaa"
+        cache.put("c", b"cccc")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"aaaa"
+        assert cache.get("c") == b"cccc"
+        assert cache.current_bytes == 8
+        assert sorted(os.listdir(self.directory)) == ["a", "c"]
+
+    def test_entry_larger_than_cache_not_added(self):
+        cache = DiskLRUCache(self.directory, max_bytes=3)
+        cache.put("a", b"aaaa")
+        assert len(cache) == 0
+        assert os.listdir(self.directory) == []
+
+    def test_loads_existing_files_in_lru_order(self):
+        cache = DiskLRUCache(self.directory, max_bytes=100)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.put(key, b"xxxx")
+            os.utime(os.path.join(self.directory, key), (1000 + i, 1000 + i))
+        # a temp file left by a crashed write is removed
+        with open(os.path.join(self.directory, ".tmp123"), "wb") as f:
+            f.write(b"partial")
+
+        reloaded = DiskLRUCache(self.directory, max_bytes=8)
+        assert reloaded.current_bytes == 8
+        assert sorted(os.listdir(self.directory)) == ["b", "c"]
+        assert reloaded.get("b") == b"xxxx"
+
+    def test_file_removed_by_another_process(self):
+        cache = DiskLRUCache(self.directory, max_bytes=100)
+        cache.put("a", b"aaaa")
+        os.remove(os.path.join(self.directory, "a"))
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_clear(self):
+        cache = DiskLRUCache(self.directory, max_bytes=100)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+        assert os.listdir(self.directory) == []
+
+
+class TestImageCache(unittest.TestCase):
+    """Runs against a local HTTP server that supports conditional requests."""
+
+    class ImageHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            server = self.server
+            with server.lock:
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+            image = server.images[self.path]
+            etag = f'"{hash(image)}"'
+            headers = {"ETag": etag} if not self.path.startswith("/no_validators") else {}
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+            else:
+                status, body = 200, image
+
+            self.send_response(status)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    @staticmethod
+    def _png_bytes(color: str) -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGB", (8, 8), color=color).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def setUp(self) -> None:
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self.ImageHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.images = collections.defaultdict(lambda: self._png_bytes("red"))
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.env_patcher = mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_CACHE_DIR: self.temp_dir.name})
+        self.env_patcher.start()
+        image_cache.reset_caches()
+        image_download.shutdown()
+
+    def tearDown(self) -> None:
+        self.env_patcher.stop()
+        image_cache.reset_caches()
+        image_download.shutdown()
+        self.temp_dir.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_disabled_by_default(self):
+        self.env_patcher.stop()
+        image_cache.reset_caches()
+        try:
+            assert image_cache.get_download_cache() is None
+            assert image_cache.get_preprocessed_cache() is None
+            assert image_cache.get_download(f"{self.base_url}/a.png") is None
+        finally:
+            self.env_patcher.start()
+
+    def test_download_revalidated(self):
+        url = f"{self.base_url}/a.png"
+        first = clip_utils.load_image_from_path(url, {"Authorization": "key"})
+        second = clip_utils.load_image_from_path(url, {"Authorization": "key"})
+
+        assert np.array_equal(np.array(first), np.array(second))
+        assert self.server.requests[0] == ("/a.png", None)
+        # the second request is conditional, and the server doesn't send the body again
+        assert self.server.requests[1][1] is not None
+        assert len(image_cache.get_download_cache()) == 2  # the url entry and the body
+
+    def test_download_cached_per_headers(self):
+        url = f"{self.base_url}/a.png"
+        clip_utils.load_image_from_path(url, {"Authorization": "key"})
+        assert image_cache.get_download(url, {"authorization": "key"}) is not None
+        assert image_cache.get_download(url, {"Authorization": "another key"}) is None
+        assert image_cache.get_download(url) is None
+
+        # the image is downloaded again for other headers, rather than revalidated
+        clip_utils.load_image_from_path(url, {"Authorization": "another key"})
+        assert self.server.requests[1] == ("/a.png", None)
+        # the headers aren't written to disk
+        for root, _, files in os.walk(self.temp_dir.name):
+            for name in files:
+                with open(os.path.join(root, name), "rb") as f:
+                    assert b"key" not in f.read()
+
+    def test_changed_image_downloaded_again(self):
+        url = f"{self.base_url}/a.png"
+        clip_utils.load_image_from_path(url, {})
+        self.server.images["/a.png"] = self._png_bytes("blue")
+        img = clip_utils.load_image_from_path(url, {})
+        assert img.getpixel((0, 0)) == (0, 0, 255)
+        assert image_cache.get_download(url).content == self._png_bytes("blue")
+
+    def test_bodies_are_content_addressed(self):
+        clip_utils.load_image_from_path(f"{self.base_url}/a.png", {})
+        clip_utils.load_image_from_path(f"{self.base_url}/b.png", {})
+        # two url entries pointing to the same body
+        assert len(image_cache.get_download_cache()) == 3
+
+    def test_response_without_validators_not_cached(self):
+        url = f"{self.base_url}/no_validators.png"
+        clip_utils.load_image_from_path(url, {})
+        clip_utils.load_image_from_path(url, {})
+        assert image_cache.get_download(url) is None
+        assert [headers for _, headers in self.server.requests] == [None, None]
+
+    def test_preprocessed_images_cached(self):
+        transform = Compose([Resize(4), ToTensor(), Normalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5))])
+        preprocess = mock.MagicMock(side_effect=transform)
+        preprocess.__repr__ = lambda _: repr(transform)
+        red = Image.new("RGB", (8, 8), color="red")
+
+        first = clip_utils.preprocess_images([red, red.copy()], preprocess)
+        assert preprocess.call_count == 1
+        assert torch.equal(first[0], first[1])
+        assert torch.equal(first[0], transform(red))
+
+        # a different image or a different transform isn't a hit
+        clip_utils.preprocess_images([Image.new("RGB", (8, 8), color="blue")], preprocess)
+        assert preprocess.call_count == 2
+        other_transform = Compose([Resize(2), ToTensor()])
+        assert clip_utils.preprocess_images([red], other_transform)[0].shape == (3, 2, 2)
+
+    def test_preprocess_without_cache(self):
+        self.env_patcher.stop()
+        image_cache.reset_caches()
+        try:
+            preprocess = mock.MagicMock(return_value=torch.zeros(3))
+            red = Image.new("RGB", (8, 8), color="red")
+            clip_utils.preprocess_images([red, red.copy()], preprocess)
+            assert preprocess.call_count == 2
+        finally:
+            self.env_patcher.start()
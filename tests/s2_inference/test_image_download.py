@@ -0,0 +1,243 @@
+import asyncio
+import collections
+import gzip
+import http.server
+import io
+import os
+import threading
+import unittest
+from unittest import mock
+
+import PIL
+from PIL import Image
+
+from marqo.s2_inference import clip_utils, image_download
+from marqo.tensor_search import add_docs
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.telemetry import RequestMetrics, RequestMetricsStore
+
+
+def _png_bytes(size=(8, 8), color="red") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestImageDownload(unittest.TestCase):
+    """Runs against a local HTTP server serving generated images."""
+
+    class ImageHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            server = self.server
+            with server.lock:
+                server.path_counts[self.path] += 1
+                server.client_ports.add(self.client_address[1])
+                count = server.path_counts[self.path]
+
+            if self.path.startswith("/flaky") and count == 1:
+                status, body, headers = 503, b"", {}
+            elif self.path.startswith("/missing"):
+                status, body, headers = 404, b"", {}
+            elif self.path.startswith("/gzip"):
+                status, body, headers = 200, gzip.compress(server.image), {"Content-Encoding": "gzip"}
+            else:
+                status, body, headers = 200, server.image, {}
+
+            self.send_response(status)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    def setUp(self) -> None:
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self.ImageHandler)
+        self.server.lock = threading.Lock()
+        self.server.path_counts = collections.Counter()
+        self.server.client_ports = set()
+        self.server.image = _png_bytes()
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        image_download.shutdown()
+        RequestMetricsStore.set_in_request(mock.Mock())
+
+    def tearDown(self) -> None:
+        image_download.shutdown()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_load_image_reuses_connection(self):
+        for i in range(3):
+            img = clip_utils.load_image_from_path(f"{self.base_url}/{i}.png", {})
+            assert img.size == (8, 8)
+        assert len(self.server.client_ports) == 1
+
+    def test_load_gzip_encoded_image(self):
+        img = clip_utils.load_image_from_path(f"{self.base_url}/gzip.png", {})
+        assert img.size == (8, 8)
+
+    def test_load_image_error_status(self):
+        with self.assertRaises(PIL.UnidentifiedImageError) as e:
+            clip_utils.load_image_from_path(f"{self.base_url}/missing.png", {})
+        assert "404" in str(e.exception)
+
+    def test_retries_from_env_vars(self):
+        url = f"{self.base_url}/flaky.png"
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_DOWNLOAD_MAX_RETRIES: "1",
+                                          EnvVars.MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS: "0"}):
+            img = clip_utils.load_image_from_path(url, {})
+        assert img.size == (8, 8)
+        assert self.server.path_counts["/flaky.png"] == 2
+
+    def test_no_retries_by_default(self):
+        with self.assertRaises(PIL.UnidentifiedImageError) as e:
+            clip_utils.load_image_from_path(f"{self.base_url}/flaky.png", {})
+        assert "503" in str(e.exception)
+        assert self.server.path_counts["/flaky.png"] == 1
+
+    def test_timeout_from_env_var(self):
+        session = image_download.get_session()
+        with mock.patch.object(session, "get", side_effect=session.get) as mock_get, \
+                mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_DOWNLOAD_TIMEOUT_SECONDS: "1.5"}):
+            clip_utils.load_image_from_path(f"{self.base_url}/a.png", {"Authorization": "key"})
+        _, call_kwargs = mock_get.call_args
+        assert call_kwargs["timeout"] == 1.5
+        assert call_kwargs["headers"] == {"Authorization": "key"}
+
+    def test_map_in_pool(self):
+        calls = []
+
+        def func(urls):
+            calls.append(urls)
+            return {url: url.upper() for url in urls}
+
+        result = image_download.map_in_pool(func, ["a", "b", "a", "c", "b", "d"], max_tasks=2)
+        assert result == {"a": "A", "b": "B", "c": "C", "d": "D"}
+        assert len(calls) == 2
+        assert sorted(url for group in calls for url in group) == ["a", "b", "c", "d"]
+
+        assert image_download.map_in_pool(func, [], max_tasks=2) == dict()
+
+    def test_map_in_pool_from_pool_thread_runs_inline(self):
+        def func(urls):
+            return {url: threading.current_thread().name for url in urls}
+
+        def nested(urls):
+            # every pool thread is busy running this, so the nested call can't wait on the pool
+            return image_download.map_in_pool(func, [url + "_nested" for url in urls], max_tasks=2)
+
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_DOWNLOAD_THREAD_COUNT: "2"}):
+            result = image_download.map_in_pool(nested, ["a", "b"], max_tasks=2)
+        assert set(result) == {"a_nested", "b_nested"}
+        assert all(name.startswith("image_download") for name in result.values())
+
+    def test_executor_is_persistent_and_bounded(self):
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_DOWNLOAD_THREAD_COUNT: "3"}):
+            executor = image_download.get_executor()
+        assert executor._max_workers == 3
+        assert image_download.get_executor() is executor
+
+    def test_download_images_dedups_urls(self):
+        url_1 = f"{self.base_url}/1.png"
+        url_2 = f"{self.base_url}/2.png"
+        url_3 = f"{self.base_url}/3.png"
+        docs = [
+            {"_id": "1", "image": url_1, "text": "hello"},
+            {"_id": "2", "image": url_1, "other_image": url_2},
+            {"_id": "3", "combo": {"img": url_2, "img_2": url_3, "text": "hi"}},
+            {"_id": "4", "nt_image": f"{self.base_url}/not_downloaded.png"},
+        ]
+        RequestMetricsStore.set_in_request(metrics=RequestMetrics())
+        with add_docs.download_images(docs=docs, thread_count=2, tensor_fields=None,
+                                      non_tensor_fields=["_id", "nt_image"], image_download_headers={}) as image_repo:
+            assert set(image_repo) == {url_1, url_2, url_3}
+            for img in image_repo.values():
+                assert isinstance(img, Image.Image)
+        assert self.server.path_counts == {"/1.png": 1, "/2.png": 1, "/3.png": 1}
+        # the download times of every thread are recorded in the request's metrics
+        times = RequestMetricsStore.for_request().times
+        assert {f"image_download.{url}" for url in (url_1, url_2, url_3)}.issubset(times)
+
+    def test_threaded_download_images_skips_downloaded(self):
+        url_1 = f"{self.base_url}/1.png"
+        url_2 = f"{self.base_url}/2.png"
+        image_repo = {url_1: "already downloaded"}
+        add_docs.threaded_download_images(
+            allocated_docs=[{"a": url_1, "b": url_2}, {"c": {"d": url_2}}], image_repo=image_repo,
+            tensor_fields=None, non_tensor_fields=[], image_download_headers={}, metric_obj=RequestMetrics())
+        assert image_repo[url_1] == "already downloaded"
+        assert isinstance(image_repo[url_2], Image.Image)
+        assert self.server.path_counts == {"/2.png": 1}
+
+    def _run_async(self, coroutine):
+        async def run_and_close_client():
+            try:
+                return await coroutine
+            finally:
+                await image_download.close_async_client()
+        return asyncio.run(run_and_close_client())
+
+    def test_load_image_async_reuses_connection(self):
+        async def load_images():
+            return [await clip_utils.load_image_from_path_async(f"{self.base_url}/{i}.png", {}) for i in range(3)]
+
+        for img in self._run_async(load_images()):
+            assert img.size == (8, 8)
+        assert len(self.server.client_ports) == 1
+
+    def test_load_image_async_error_status(self):
+        with self.assertRaises(PIL.UnidentifiedImageError) as e:
+            self._run_async(clip_utils.load_image_from_path_async(f"{self.base_url}/missing.png", {}))
+        assert "404" in str(e.exception)
+
+    def test_load_image_async_retries_from_env_vars(self):
+        url = f"{self.base_url}/flaky.png"
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_DOWNLOAD_MAX_RETRIES: "1",
+                                          EnvVars.MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS: "0"}):
+            img = self._run_async(clip_utils.load_image_from_path_async(url, {}))
+        assert img.size == (8, 8)
+        assert self.server.path_counts["/flaky.png"] == 2
+
+    def test_load_image_async_backs_off_before_every_retry(self):
+        mock_get = mock.AsyncMock(return_value=mock.Mock(status_code=503))
+        mock_client = mock.Mock(get=mock_get)
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_IMAGE_DOWNLOAD_MAX_RETRIES: "3",
+                                          EnvVars.MARQO_IMAGE_DOWNLOAD_RETRY_BACKOFF_SECONDS: "0.5"}), \
+                mock.patch("marqo.s2_inference.image_download.get_async_client", return_value=mock_client), \
+                mock.patch("asyncio.sleep", mock.AsyncMock()) as mock_sleep:
+            response = asyncio.run(image_download.get_async(f"{self.base_url}/a.png"))
+        assert response.status_code == 503
+        assert mock_get.call_count == 4
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0, 2.0]
+
+    def test_download_images_async(self):
+        url_1 = f"{self.base_url}/1.png"
+        url_2 = f"{self.base_url}/2.png"
+        missing_url = f"{self.base_url}/missing.png"
+        docs = [
+            {"_id": "1", "image": url_1, "text": "hello"},
+            {"_id": "2", "image": url_1, "combo": {"img": url_2, "img_2": missing_url}},
+        ]
+        RequestMetricsStore.set_in_request(metrics=RequestMetrics())
+
+        async def download():
+            async with add_docs.download_images_async(
+                    docs=docs, thread_count=2, tensor_fields=None, non_tensor_fields=["_id"],
+                    image_download_headers={}) as image_repo:
+                return dict(image_repo)
+
+        image_repo = self._run_async(download())
+        assert set(image_repo) == {url_1, url_2, missing_url}
+        assert isinstance(image_repo[url_1], Image.Image)
+        assert isinstance(image_repo[url_2], Image.Image)
+        assert isinstance(image_repo[missing_url], PIL.UnidentifiedImageError)
+        assert self.server.path_counts == {"/1.png": 1, "/2.png": 1, "/missing.png": 1}
+        times = RequestMetricsStore.for_request().times
+        assert {f"image_download.{url}" for url in (url_1, url_2)}.issubset(times)
@@ -0,0 +1,194 @@
+import datetime
+import os
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from marqo.s2_inference import inference_batching, s2_inference
+from marqo.s2_inference.inference_batching import BatchingStats, InferenceBatcher
+from marqo.tensor_search.enums import AvailableModelsKey, EnvVars
+
+
+def _encode(batch: list) -> np.ndarray:
+    """Vectorises each item to [item length, batch length]"""
+    return np.array([[len(item), len(batch)] for item in batch], dtype=np.float32)
+
+
+class TestInferenceBatcher(unittest.TestCase):
+
+    def _submit_concurrently(self, batcher: InferenceBatcher, contents: list) -> list:
+        results = [None] * len(contents)
+        barrier = threading.Barrier(len(contents))
+
+        def call(i):
+            barrier.wait()
+            future = batcher.submit(contents[i])
+            try:
+                results[i] = future.result(timeout=10)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(contents))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_concurrent_calls_batched_together(self):
+        encode = mock.MagicMock(side_effect=_encode)
+        batcher = InferenceBatcher(encode, max_batch_size=64, max_wait_seconds=0.5, stats=BatchingStats())
+        contents = [["a" * (i + 1)] for i in range(8)]
+        results = self._submit_concurrently(batcher, contents)
+
+        assert encode.call_count == 1
+        for i, result in enumerate(results):
+            # each call gets the vectors of its own content, from a batch of 8
+            assert result.tolist() == [[i + 1, 8]]
+
+    def test_max_batch_size(self):
+        encode = mock.MagicMock(side_effect=_encode)
+        stats = BatchingStats()
+        batcher = InferenceBatcher(encode, max_batch_size=6, max_wait_seconds=0.5, stats=stats)
+        contents = [["a", "bb", "ccc"] for _ in range(5)]
+        results = self._submit_concurrently(batcher, contents)
+
+        for result in results:
+            assert result[:, 0].tolist() == [1, 2, 3]
+        batch_sizes = [len(call_args[0][0]) for call_args in encode.call_args_list]
+        assert sum(batch_sizes) == 15
+        assert max(batch_sizes) <= 6
+        assert stats.json()["calls"] == 5
+
+    def test_single_call_not_delayed_when_batch_full(self):
+        encode = mock.MagicMock(side_effect=_encode)
+        batcher = InferenceBatcher(encode, max_batch_size=2, max_wait_seconds=60, stats=BatchingStats())
+        # would time out if the batcher waited max_wait_seconds for more calls
+        assert batcher.submit(["a", "b"]).result(timeout=5).tolist() == [[1, 2], [1, 2]]
+
+    def test_failed_batch_retried_separately(self):
+        def encode(batch):
+            if "bad" in batch:
+                raise ValueError("bad content")
+            return _encode(batch)
+
+        batcher = InferenceBatcher(encode, max_batch_size=64, max_wait_seconds=0.5, stats=BatchingStats())
+        results = self._submit_concurrently(batcher, [["good"], ["bad"], ["also good"]])
+        assert results[0].tolist() == [[4, 1]]
+        assert isinstance(results[1], ValueError)
+        assert results[2].tolist() == [[9, 1]]
+
+    def test_closes_when_idle(self):
+        batcher = InferenceBatcher(_encode, max_batch_size=4, max_wait_seconds=0, stats=BatchingStats(),
+                                   idle_timeout_seconds=0.01)
+        batcher._thread.join(timeout=5)
+        assert not batcher._thread.is_alive()
+        assert batcher.submit(["a"]) is None
+
+    def test_submit_replaces_closed_batcher(self):
+        key = ("model", True, False, "{}")
+        with mock.patch.object(inference_batching, "IDLE_TIMEOUT_SECONDS", 0.01):
+            first = inference_batching.submit(key, "model", ["a"], _encode, max_batch_size=4, max_wait_seconds=0)
+            assert first.result(timeout=5).tolist() == [[1, 1]]
+            inference_batching._batchers[key]._thread.join(timeout=5)
+            second = inference_batching.submit(key, "model", ["bb"], _encode, max_batch_size=4, max_wait_seconds=0)
+            assert second.result(timeout=5).tolist() == [[2, 1]]
+        inference_batching.clear_stats("model")
+
+    def test_stats(self):
+        stats = BatchingStats()
+        stats.record(batch_size=4, queue_waits_ms=[0.5, 3])
+        stats.record(batch_size=1, queue_waits_ms=[2000])
+        result = stats.json()
+        assert result["batches"] == 2
+        assert result["calls"] == 3
+        assert result["batch_size"] == {"1": 1, "4": 1}
+        assert result["queue_wait_ms"]["max"] == 2000
+        assert result["queue_wait_ms"]["histogram"]["1"] == 1
+        assert result["queue_wait_ms"]["histogram"]["5"] == 1
+        assert result["queue_wait_ms"]["histogram"]["+Inf"] == 1
+
+
+class TestVectoriseWithInferenceBatching(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_model = mock.MagicMock()
+        self.mock_model.encode = mock.MagicMock(side_effect=self._encode)
+        self.model_properties = {"name": "mock_model", "dimensions": 16, "tokens": 128, "type": "random"}
+        self.model_cache_key = s2_inference._create_model_cache_key(
+            model_name='mock_model', device='cpu', model_properties=self.model_properties)
+        mock_available_models = {
+            self.model_cache_key: {AvailableModelsKey.model: self.mock_model,
+                                   AvailableModelsKey.model_size: 1,
+                                   AvailableModelsKey.most_recently_used_time: datetime.datetime.now()}
+        }
+        self.patchers = [
+            mock.patch('marqo.s2_inference.s2_inference.available_models', mock_available_models),
+            mock.patch('marqo.s2_inference.s2_inference._update_available_models', mock.MagicMock()),
+            mock.patch.dict(os.environ, {EnvVars.MARQO_ENABLE_INFERENCE_BATCHING: "TRUE",
+                                         EnvVars.MARQO_INFERENCE_BATCHING_MAX_WAIT_MS: "300",
+                                         EnvVars.MARQO_MAX_VECTORISE_BATCH_SIZE: "16"})
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        inference_batching.clear_stats(self.model_cache_key)
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+        inference_batching.clear_stats(self.model_cache_key)
+
+    @staticmethod
+    def _encode(content, normalize=True, **kwargs):
+        """Vectorises each item to a vector of its length"""
+        content = [content] if isinstance(content, str) else content
+        return np.array([[float(len(item))] * 16 for item in content])
+
+    def _vectorise(self, content, **kwargs):
+        return s2_inference.vectorise(model_name='mock_model', content=content,
+                                      model_properties=self.model_properties, device="cpu", **kwargs)
+
+    def test_concurrent_vectorise_calls_batched(self):
+        queries = ["q" * (i + 1) for i in range(6)]
+        results = [None] * len(queries)
+        barrier = threading.Barrier(len(queries))
+
+        def call(i):
+            barrier.wait()
+            results[i] = self._vectorise(queries[i])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(queries))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert self.mock_model.encode.call_count == 1
+        for query, result in zip(queries, results):
+            assert len(result) == 1
+            assert result == [[float(len(query))] * 16]
+
+        stats = s2_inference.get_inference_batching_stats()[self.model_cache_key]
+        assert stats["batch_size"] == {"6": 1}
+        assert stats["calls"] == 6
+
+    def test_full_batches_not_queued(self):
+        content = [f"text {i}" for i in range(16)]
+        result = self._vectorise(content)
+        assert len(result) == 16
+        assert self.model_cache_key not in s2_inference.get_inference_batching_stats()
+
+    def test_different_settings_not_batched_together(self):
+        key = s2_inference._get_inference_batching_key(self.model_cache_key, ["a"], True)
+        assert key != s2_inference._get_inference_batching_key(self.model_cache_key, ["a"], False)
+        assert key != s2_inference._get_inference_batching_key(self.model_cache_key, ["a.png"], True)
+        assert key != s2_inference._get_inference_batching_key(
+            self.model_cache_key, ["a"], True, image_download_headers={"Authorization": "key"})
+        assert key == s2_inference._get_inference_batching_key(self.model_cache_key, "b", True)
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ):
+            del os.environ[EnvVars.MARQO_ENABLE_INFERENCE_BATCHING]
+            assert s2_inference._get_inference_batching_key(self.model_cache_key, ["a"], True) is None
@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import onnx
+import onnxruntime
+import torch
+from onnx import TensorProto, helper, numpy_helper
+from transformers import BertTokenizer
+
+from marqo.s2_inference import onnx_session
+from marqo.s2_inference.sbert_onnx_utils import SBERT_ONNX
+from marqo.tensor_search.enums import EnvVars
+
+
+def save_matmul_model(path: str, weights: np.ndarray) -> None:
+    """Saves an ONNX model computing y = x @ weights"""
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["x", "weights"], ["y"])], "matmul",
+        inputs=[helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch_size", weights.shape[0]])],
+        outputs=[helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch_size", weights.shape[1]])],
+        initializer=[numpy_helper.from_array(weights, name="weights")])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)], ir_version=6), path)
+
+
+def save_token_embedding_model(path: str, embeddings: np.ndarray) -> None:
+    """Saves an ONNX model with the inputs and outputs of an exported sbert model, whose token embeddings are
+    looked up from embeddings"""
+    symbolic_names = ["batch_size", "max_seq_len"]
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["embeddings", "input_ids"], ["start"]),
+         helper.make_node("ReduceMean", ["start"], ["end"], axes=[1], keepdims=0)], "token_embeddings",
+        inputs=[helper.make_tensor_value_info(name, TensorProto.INT64, symbolic_names)
+                for name in ("input_ids", "attention_mask", "token_type_ids")],
+        outputs=[helper.make_tensor_value_info("start", TensorProto.FLOAT, symbolic_names + [embeddings.shape[1]]),
+                 helper.make_tensor_value_info("end", TensorProto.FLOAT, ["batch_size", embeddings.shape[1]])],
+        initializer=[numpy_helper.from_array(embeddings, name="embeddings")])
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 11)], ir_version=6), path)
+
+
+class TestOnnxSession(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.model_path = os.path.join(self.temp_dir.name, "model.onnx")
+        self.weights = np.random.default_rng(0).standard_normal((64, 32)).astype(np.float32)
+        save_matmul_model(self.model_path, self.weights)
+        self.x = np.random.default_rng(1).standard_normal((3, 64)).astype(np.float32)
+
+    def test_session_options(self):
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_ONNX_INTRA_OP_THREAD_COUNT: "2",
+                                          EnvVars.MARQO_ONNX_INTER_OP_THREAD_COUNT: "3"}):
+            sess_options = onnx_session.get_session_options()
+        assert sess_options.graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        assert (sess_options.intra_op_num_threads, sess_options.inter_op_num_threads) == (2, 3)
+        assert sess_options.execution_mode == onnxruntime.ExecutionMode.ORT_PARALLEL
+
+        sess_options = onnx_session.get_session_options()
+        assert (sess_options.intra_op_num_threads, sess_options.inter_op_num_threads) == (0, 0)
+        assert sess_options.execution_mode == onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+
+    def test_run(self):
+        session = onnx_session.create_session(self.model_path, [onnx_session.CPU_PROVIDER])
+        (y,) = onnx_session.run(session, {"x": self.x})
+        assert np.allclose(y, self.x @ self.weights, atol=1e-5)
+        assert np.array_equal(y, session.run(None, {"x": self.x})[0])
+
+    def test_quantized_model_cached(self):
+        quantized_folder = os.path.join(self.temp_dir.name, "quantized")
+        with mock.patch.object(onnx_session.ModelCache, "onnx_cache_path", quantized_folder), \
+                mock.patch.dict(os.environ, {EnvVars.MARQO_ONNX_QUANTIZE: "TRUE"}):
+            session = onnx_session.create_session(self.model_path, [onnx_session.CPU_PROVIDER])
+            quantized_files = os.listdir(quantized_folder)
+            assert len(quantized_files) == 1 and quantized_files[0].endswith(onnx_session.QUANTIZED_MODEL_SUFFIX)
+
+            with mock.patch("onnxruntime.quantization.quantize_dynamic") as mock_quantize:
+                onnx_session.create_session(self.model_path, [onnx_session.CPU_PROVIDER])
+            mock_quantize.assert_not_called()
+
+        quantized_model = onnx.load(os.path.join(quantized_folder, quantized_files[0]))
+        assert any(node.op_type != "MatMul" for node in quantized_model.graph.node)
+        (y,) = onnx_session.run(session, {"x": self.x})
+        expected = self.x @ self.weights
+        assert np.abs(y - expected).max() < 0.05 * np.abs(expected).max()
+
+    def test_not_quantized_on_gpu(self):
+        with mock.patch("marqo.s2_inference.onnx_session.quantized_model_path") as mock_quantized_model_path, \
+                mock.patch("onnxruntime.InferenceSession") as mock_session:
+            onnx_session.create_session(self.model_path, [onnx_session.CUDA_PROVIDER, onnx_session.CPU_PROVIDER],
+                                        quantize=True)
+        mock_quantized_model_path.assert_not_called()
+        assert mock_session.call_args[0][0] == self.model_path
+
+
+class TestSbertOnnxExportCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.model_dir = os.path.join(self.temp_dir.name, "model")
+        self.onnx_folder = os.path.join(self.temp_dir.name, "onnx")
+        os.makedirs(self.model_dir)
+        os.makedirs(self.onnx_folder)
+        vocab_file = os.path.join(self.model_dir, "vocab.txt")
+        with open(vocab_file, "w") as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "hello", "world"]))
+        BertTokenizer(vocab_file).save_pretrained(self.model_dir)
+        self.embeddings = np.random.default_rng(0).standard_normal((7, 8)).astype(np.float32)
+
+    def _model(self) -> SBERT_ONNX:
+        return SBERT_ONNX(self.model_dir, device="cpu", onnx_folder=self.onnx_folder)
+
+    def test_export_name_includes_versions(self):
+        model = self._model()
+        assert f"opset11-torch{torch.__version__}".replace("+", "_") in model.onnx_model_name
+        assert model.export_model_name == os.path.join(self.onnx_folder, model.onnx_model_name)
+
+    def test_existing_export_reused(self):
+        model = self._model()
+        save_token_embedding_model(model.export_model_name, self.embeddings)
+        with mock.patch("marqo.s2_inference.sbert_onnx_utils.AutoModel.from_pretrained") as mock_from_pretrained, \
+                mock.patch("torch.onnx.export") as mock_export:
+            model.load()
+        mock_from_pretrained.assert_not_called()
+        mock_export.assert_not_called()
+
+        # [CLS] hello world [SEP], mean pooled
+        expected = self.embeddings[[2, 5, 6, 3]].mean(axis=0)
+        output = model.encode("hello world", normalize=False)
+        assert np.allclose(output.numpy()[0], expected, atol=1e-6)
+
+    def test_model_exported_once(self):
+        model = self._model()
+        with mock.patch("marqo.s2_inference.sbert_onnx_utils.AutoModel.from_pretrained") as mock_from_pretrained, \
+                mock.patch("torch.onnx.export", side_effect=lambda model_, args, f, **kwargs:
+                           save_token_embedding_model(f, self.embeddings)) as mock_export:
+            model.load()
+            assert mock_export.call_args.kwargs["opset_version"] == 11
+            # exported to a temporary file, then moved into place
+            assert mock_export.call_args.kwargs["f"] != model.export_model_name
+            assert os.listdir(self.onnx_folder) == [model.onnx_model_name]
+
+            self._model().load()
+        assert mock_from_pretrained.call_count == mock_export.call_count == 1
@@ -0,0 +1,170 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import CLIPTokenizer, OwlViTConfig, OwlViTForObjectDetection, OwlViTImageProcessor, OwlViTProcessor
+
+from marqo.s2_inference.reranking import cross_encoders, image_cache, rerank
+from marqo.s2_inference.reranking.cross_encoders import ReRankerOwl
+from marqo.s2_inference.reranking.enums import ResultsFields
+from marqo.s2_inference.reranking.image_cache import LoadedImage, RerankImageCache
+from marqo.tensor_search.enums import EnvVars
+
+
+class TestRerankImageCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.image = Image.new("RGB", (10, 10))
+        self.image_bytes = 10 * 10 * 3
+
+    def test_get_put(self):
+        cache = RerankImageCache(max_bytes=10 ** 6)
+        assert cache.get(("image.png", (10, 10))) is None
+        cache.put(("image.png", (10, 10)), LoadedImage(self.image, (20, 20)))
+        assert cache.get(("image.png", (10, 10))) == LoadedImage(self.image, (20, 20))
+        assert cache.get(("image.png", (5, 5))) is None
+        assert cache.current_bytes == self.image_bytes
+
+    def test_lru_eviction_by_bytes(self):
+        cache = RerankImageCache(max_bytes=self.image_bytes * 2)
+        for name in ("a", "b"):
+            cache.put((name, None), LoadedImage(self.image, (10, 10)))
+        # "a" becomes the most recently used
+        assert cache.get(("a", None)) is not None
+        cache.put(("c", None), LoadedImage(self.image, (10, 10)))
+
+        assert cache.get(("b", None)) is None
+        assert cache.get(("a", None)) is not None and cache.get(("c", None)) is not None
+        assert cache.current_bytes == self.image_bytes * 2
+
+    def test_image_larger_than_cache_not_added(self):
+        cache = RerankImageCache(max_bytes=self.image_bytes - 1)
+        cache.put(("a", None), LoadedImage(self.image, (10, 10)))
+        assert len(cache) == 0
+
+    def test_load_image_cached(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "image.png")
+            Image.new("RGB", (64, 48)).save(path)
+            image_cache.empty_cache()
+            self.addCleanup(image_cache.empty_cache)
+            with mock.patch("marqo.s2_inference.reranking.cross_encoders.load_image_from_path",
+                            side_effect=cross_encoders.load_image_from_path) as mock_load:
+                image, original_size = cross_encoders._load_image(path, size=(24, 24))
+                assert cross_encoders._load_image(path, size=(24, 24)) == (image, original_size)
+                assert mock_load.call_count == 1
+                assert (image.size, original_size) == ((24, 24), (64, 48))
+
+                with mock.patch.dict(os.environ, {EnvVars.MARQO_RERANK_IMAGE_CACHE_MAX_BYTES: "0"}):
+                    image_cache.empty_cache()
+                    cross_encoders._load_image(path, size=(24, 24))
+                    cross_encoders._load_image(path, size=(24, 24))
+                assert mock_load.call_count == 3
+
+
+def make_tiny_owl_vit(directory: str):
+    """Returns a randomly initialised OWL-ViT model, and its processor, small enough to run in unit tests"""
+    vocab = {"<|startoftext|>": 0, "<|endoftext|>": 1, "!": 2}
+    for c in "abcdefghijklmnopqrstuvwxyz":
+        vocab[c] = len(vocab)
+        vocab[c + "</w>"] = len(vocab)
+    with open(os.path.join(directory, "vocab.json"), "w") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(directory, "merges.txt"), "w") as f:
+        f.write("#version: 0.2\n")
+    tokenizer = CLIPTokenizer(os.path.join(directory, "vocab.json"), os.path.join(directory, "merges.txt"),
+                              pad_token="!", model_max_length=16)
+    image_processor = OwlViTImageProcessor(size={"height": 32, "width": 32}, crop_size={"height": 32, "width": 32})
+
+    torch.manual_seed(0)
+    config = OwlViTConfig(
+        text_config=dict(vocab_size=len(vocab), hidden_size=32, intermediate_size=64, num_hidden_layers=1,
+                         num_attention_heads=2, max_position_embeddings=16),
+        vision_config=dict(hidden_size=32, intermediate_size=64, num_hidden_layers=1, num_attention_heads=2,
+                           image_size=32, patch_size=8),
+        projection_dim=32)
+    return OwlViTForObjectDetection(config).eval(), OwlViTProcessor(image_processor=image_processor, tokenizer=tokenizer)
+
+
+class TestBatchedOwlReranking(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        model, processor = make_tiny_owl_vit(self.temp_dir.name)
+        patcher = mock.patch("marqo.s2_inference.reranking.cross_encoders.load_owl_vit",
+                             return_value={"model": model, "processor": processor})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        image_cache.empty_cache()
+        self.addCleanup(image_cache.empty_cache)
+
+        self.image_paths = []
+        for i, size in enumerate([(50, 40), (64, 64), (30, 80)]):
+            path = os.path.join(self.temp_dir.name, f"{i}.png")
+            Image.fromarray((np.random.default_rng(i).random(size[::-1] + (3,)) * 255).astype("uint8")).save(path)
+            self.image_paths.append(path)
+
+    def _results(self):
+        return {"hits": [{"image": path, "_id": str(i), "_score": 1.0, "_highlights": {}}
+                         for i, path in enumerate(self.image_paths)] + [{"other": "no image", "_id": "other"}]}
+
+    def test_batched_same_as_one_image_at_a_time(self):
+        queries = ["a cat", "red car"]
+        batched_results = [self._results(), self._results()]
+        with mock.patch("marqo.s2_inference.reranking.cross_encoders._predict_owl",
+                        side_effect=cross_encoders._predict_owl) as mock_predict:
+            rerank.rerank_bulk_search_results(batched_results, queries, "owl/ViT-B/32", "cpu",
+                                              searchable_attributes=[["image"], ["image", "other"]])
+        # 6 (query, image) pairs in a single batch
+        assert mock_predict.call_count == 1
+
+        for query, results in zip(queries, batched_results):
+            expected = self._results()
+            reranker = ReRankerOwl("owl/ViT-B/32", "cpu", image_size=(240, 240), batch_size=1)
+            reranker.rerank(query, expected, image_attributes=["image"])
+            rerank.cleanup_final_reranked_results(expected)
+
+            # hits without the image are removed
+            assert [hit["_id"] for hit in results["hits"]] == [hit["_id"] for hit in expected["hits"]]
+            assert len(results["hits"]) == 3
+            for hit, expected_hit in zip(results["hits"], expected["hits"]):
+                assert np.isclose(hit[ResultsFields.original_score], expected_hit[ResultsFields.original_score],
+                                  atol=1e-5)
+                assert np.allclose(hit["_highlights"]["image"], expected_hit["_highlights"]["image"], atol=1e-3)
+            scores = [hit["_score"] for hit in results["hits"]]
+            assert scores == sorted(scores, reverse=True)
+
+    def test_boxes_in_original_image_coordinates(self):
+        results = self._results()
+        ReRankerOwl("owl/ViT-B/32", "cpu", image_size=(240, 240)).rerank("a cat", results, image_attributes=["image"])
+        sizes = {path: Image.open(path).size for path in self.image_paths}
+        for hit in results["hits"]:
+            x1, y1, x2, y2 = hit[ResultsFields.highlights_reranked]["image"]
+            width, height = sizes[hit["image"]]
+            assert -1 <= x1 <= x2 <= width + 1 and -1 <= y1 <= y2 <= height + 1
+
+    def test_images_loaded_once(self):
+        results_list = [self._results(), self._results()]
+        with mock.patch("marqo.s2_inference.reranking.cross_encoders.load_image_from_path",
+                        side_effect=cross_encoders.load_image_from_path) as mock_load:
+            ReRankerOwl("owl/ViT-B/32", "cpu", image_size=(240, 240)).rerank_batch(
+                ["a cat", "dog"], results_list, [["image"], ["image"]])
+            ReRankerOwl("owl/ViT-B/32", "cpu", image_size=(240, 240)).rerank("dog", self._results(), ["image"])
+        assert mock_load.call_count == len(self.image_paths)
+
+    def test_num_highlights(self):
+        results = self._results()
+        ReRankerOwl("owl/ViT-B/32", "cpu", image_size=(240, 240)).rerank(
+            "a cat", copy.deepcopy(results), image_attributes=["image"])
+        ReRankerOwl("owl/ViT-B/32", "cpu", image_size=(240, 240)).rerank(
+            "a cat", results, image_attributes=["image"], num_highlights=3)
+        for hit in results["hits"]:
+            assert len(hit[ResultsFields.highlights_reranked]) == 3
+            assert hit[ResultsFields.reranker_score] == sorted(hit[ResultsFields.reranker_score], reverse=True)
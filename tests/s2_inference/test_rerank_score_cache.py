@@ -0,0 +1,170 @@
+import copy
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from marqo.s2_inference.reranking import rerank, score_cache
+from marqo.s2_inference.reranking.cross_encoders import FormattedResults, ReRanker, ReRankerText
+from marqo.s2_inference.reranking.enums import Columns, ResultsFields
+from marqo.s2_inference.reranking.score_cache import RerankScoreCache
+from marqo.tensor_search.enums import EnvVars
+
+
+class TestRerankScoreCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.model_cache_key = "cross-encoder/ms-marco-MiniLM-L-6-v2||||||||cpu"
+
+    def test_get_put(self):
+        cache = RerankScoreCache(max_size=10)
+        key = RerankScoreCache.create_key(self.model_cache_key, "query", "passage")
+        assert cache.get(key) is None
+        cache.put(key, 0.5)
+        assert cache.get(key) == 0.5
+        assert cache.get(RerankScoreCache.create_key(self.model_cache_key, "query", "other passage")) is None
+        assert cache.get(RerankScoreCache.create_key(self.model_cache_key, "other query", "passage")) is None
+        assert cache.get(RerankScoreCache.create_key("other-model||||||||cpu", "query", "passage")) is None
+
+    def test_lru_eviction(self):
+        cache = RerankScoreCache(max_size=2)
+        keys = [RerankScoreCache.create_key(self.model_cache_key, "query", passage) for passage in "abc"]
+        cache.put(keys[0], 0.1)
+        cache.put(keys[1], 0.2)
+        # "a" becomes the most recently used
+        assert cache.get(keys[0]) == 0.1
+        cache.put(keys[2], 0.3)
+        assert cache.get(keys[1]) is None
+        assert (cache.get(keys[0]), cache.get(keys[2])) == (0.1, 0.3)
+        assert len(cache) == 2
+
+    def test_disabled(self):
+        cache = RerankScoreCache(max_size=0)
+        assert not cache.enabled
+        key = RerankScoreCache.create_key(self.model_cache_key, "query", "passage")
+        cache.put(key, 0.5)
+        assert cache.get(key) is None
+
+    def test_invalidate_model(self):
+        cache = RerankScoreCache(max_size=10)
+        cache.put(RerankScoreCache.create_key(self.model_cache_key, "query", "passage"), 0.5)
+        cache.put(RerankScoreCache.create_key("cross-encoder/other||||||||cpu", "query", "passage"), 0.5)
+        assert cache.invalidate_model("cross-encoder/ms-marco-MiniLM-L-6-v2", "cuda") == 0
+        assert cache.invalidate_model("cross-encoder/ms-marco-MiniLM-L-6-v2", "cpu") == 1
+        assert len(cache) == 1
+
+
+class WordOverlapModel:
+    """a deterministic cross encoder, that records its inputs"""
+
+    def __init__(self):
+        self.predict_inputs = []
+
+    def predict(self, inputs):
+        self.predict_inputs.append(inputs)
+        return np.array([len(set(query.split()) & set(content.split())) + len(content) / 1000
+                         for query, content in inputs])
+
+
+def make_results():
+    return {'hits': [
+        {'title': 'a red car', 'description': 'a fast car on a road', '_id': 'doc1', '_score': 1.2, '_highlights': []},
+        {'title': 'a blue house', '_id': 'doc2', '_score': 1.1, '_highlights': []},
+        {'title': 'a red house', 'description': 'the house is red and the car is blue', '_score': 0.4,
+         '_highlights': []},
+    ]}
+
+
+class TestBatchedTextReranking(unittest.TestCase):
+
+    def setUp(self) -> None:
+        score_cache.empty_cache()
+        self.addCleanup(score_cache.empty_cache)
+        self.model = WordOverlapModel()
+        patcher = mock.patch("marqo.s2_inference.reranking.cross_encoders.load_sbert_cross_encoder_model",
+                             return_value={"model": self.model})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _reranker(self, num_highlights: int = 1) -> ReRankerText:
+        return ReRankerText("my-cross-encoder", "cpu", num_highlights=num_highlights, split_params=None)
+
+    @staticmethod
+    def _legacy_rerank(query: str, results: dict, num_highlights: int, scores_function) -> None:
+        """the dataframe based reranking, that the batched reranking replaced"""
+        reranker = ReRanker()
+        reranker.num_highlights = num_highlights
+        reranker.format_results(results)
+        reranker.inputs_df = reranker.formatted_results.format_for_model(
+            reranker.formatted_results.results_df, reranker.formatted_results.searchable_fields, query=query)
+        reranker.inputs_df[ResultsFields.reranker_score] = scores_function(
+            reranker.inputs_df[[Columns.query, Columns.field_content]].values.tolist())
+        reranker.get_reranked_results()
+
+    def test_same_results_as_dataframe_reranking(self):
+        results, expected = make_results(), make_results()
+        self._reranker().rerank("red car", results)
+        self._legacy_rerank("red car", expected, 1, WordOverlapModel().predict)
+
+        assert [hit.get('_id') for hit in results['hits']] == [hit.get('_id') for hit in expected['hits']]
+        for hit, expected_hit in zip(results['hits'], expected['hits']):
+            assert np.isclose(hit[ResultsFields.reranker_score], expected_hit[ResultsFields.reranker_score])
+            assert hit[ResultsFields.highlights_reranked] == expected_hit[ResultsFields.highlights_reranked]
+
+    def test_num_highlights(self):
+        results = make_results()
+        self._reranker(num_highlights=2).rerank("red car", results)
+        doc1 = next(hit for hit in results['hits'] if hit.get('_id') == 'doc1')
+        assert doc1[ResultsFields.highlights_reranked] == [{'title': 'a red car'}, {'description': 'a fast car on a road'}]
+        assert doc1[ResultsFields.reranker_score] == sorted(doc1[ResultsFields.reranker_score], reverse=True)
+        doc2 = next(hit for hit in results['hits'] if hit.get('_id') == 'doc2')
+        assert doc2[ResultsFields.highlights_reranked] == [{'title': 'a blue house'}]
+
+    def test_queries_batched_into_one_predict(self):
+        results_list = [make_results(), make_results(), {'hits': []}]
+        # rerank_bulk_search_results() splits the content into sentences, which these are already
+        with mock.patch("marqo.s2_inference.processing.text.split_text", side_effect=lambda text, **kwargs: [text]):
+            rerank.rerank_bulk_search_results(
+                results_list, ["red car", "blue house", "anything"], "my-cross-encoder", "cpu",
+                searchable_attributes=[["title"], ["title", "description"], ["title"]])
+        assert len(self.model.predict_inputs) == 1
+        # 3 titles for the first query, 3 titles and 2 descriptions for the second
+        assert len(self.model.predict_inputs[0]) == 8
+
+        assert [hit['title'] for hit in results_list[0]['hits']] == ['a red car', 'a red house', 'a blue house']
+        assert results_list[0]['hits'][0]['_highlights'] == {'title': 'a red car'}
+        assert [hit['title'] for hit in results_list[1]['hits']] == ['a red house', 'a blue house', 'a red car']
+        assert all(ResultsFields.reranker_score not in hit for hit in results_list[1]['hits'])
+        assert results_list[2] == {'hits': []}
+
+    def test_cached_scores_not_rescored(self):
+        self._reranker().rerank("red car", make_results())
+        self._reranker().rerank("red car", make_results(), searchable_attributes=["title"])
+        assert len(self.model.predict_inputs) == 1
+
+        # only the new query's pairs are scored
+        self._reranker().rerank_batch(["red car", "blue car"], [make_results(), make_results()], [None, None])
+        assert len(self.model.predict_inputs) == 2
+        assert {query for query, _ in self.model.predict_inputs[1]} == {"blue car"}
+
+    def test_duplicate_pairs_scored_once(self):
+        results = {'hits': [{'title': 'same title', '_id': 'doc1'}, {'title': 'same title', '_id': 'doc2'}]}
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_RERANK_SCORE_CACHE_SIZE: "0"}):
+            score_cache.empty_cache()
+            self._reranker().rerank("title", results)
+            self._reranker().rerank("title", copy.deepcopy(results))
+        assert self.model.predict_inputs == [[["title", "same title"]], [["title", "same title"]]]
+
+    def test_hits_without_fields_kept_last(self):
+        results = {'hits': [{'other': 'not searched', '_id': 'doc1', '_score': 2.0},
+                            {'title': 'a title', '_id': 'doc2', '_score': 1.0}]}
+        self._reranker().rerank("title", results, searchable_attributes=["title"])
+        assert [hit['_id'] for hit in results['hits']] == ['doc2', 'doc1']
+        assert ResultsFields.reranker_score not in results['hits'][1]
+
+    def test_formatted_results_ids(self):
+        results = make_results()
+        FormattedResults._fill_doc_ids(results)
+        self._reranker().rerank("red", results)
+        assert all(ResultsFields.reranked_id in hit for hit in results['hits'])
@@ -0,0 +1,194 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+from clip.model import CLIP as ClipArchitecture, build_model
+from transformers import BertConfig, BertModel, BertTokenizer
+
+from marqo.s2_inference import clip_utils, weights_cache
+from marqo.s2_inference.hf_utils import HF_MODEL
+from marqo.tensor_search.enums import EnvVars
+
+
+class TinyModel(torch.nn.Module):
+
+    def __init__(self, width: int = 4):
+        super().__init__()
+        self.encoder = torch.nn.Linear(width, width)
+        self.decoder = torch.nn.Linear(width, width)
+        # tied weights are saved once
+        self.decoder.weight = self.encoder.weight
+        self.register_buffer("scale", torch.ones(width))
+
+
+def tiny_clip() -> torch.nn.Module:
+    """A small CLIP model, as clip.load() returns it on CPU: with fp16 weights cast to fp32"""
+    model = ClipArchitecture(embed_dim=16, image_resolution=32, vision_layers=1, vision_width=64, vision_patch_size=16,
+                             context_length=77, vocab_size=49408, transformer_width=64, transformer_heads=1,
+                             transformer_layers=1)
+    return build_model(model.state_dict()).float()
+
+
+class WeightsCacheTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+        env_patcher = mock.patch.dict(os.environ, {EnvVars.MARQO_WEIGHTS_CACHE_DIR: self.directory})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+
+class TestWeightsCache(WeightsCacheTestCase):
+
+    def test_save_and_load_model(self):
+        model = TinyModel()
+        assert weights_cache.load_model("my-model", TinyModel, device="cpu") is None
+        weights_cache.save_model("my-model", model)
+        assert [name.endswith(weights_cache.WEIGHTS_FILE_EXTENSION) for name in os.listdir(self.directory)] == [True]
+
+        loaded = weights_cache.load_model("my-model", TinyModel, device="cpu")
+        assert loaded is not model
+        for name, tensor in model.state_dict().items():
+            assert torch.equal(loaded.state_dict()[name], tensor)
+        assert loaded.decoder.weight is loaded.encoder.weight
+        assert weights_cache.load_model("another-model", TinyModel, device="cpu") is None
+
+    def test_load_state_dict(self):
+        model = TinyModel()
+        weights_cache.save_model("my-model", model)
+        state_dict = weights_cache.load_state_dict("my-model")
+        assert torch.equal(state_dict["encoder.bias"], model.encoder.bias)
+        assert weights_cache.load_state_dict("another-model") is None
+
+    def test_architecture_mismatch_removes_file(self):
+        weights_cache.save_model("my-model", TinyModel(width=4))
+        assert weights_cache.load_model("my-model", lambda: TinyModel(width=8), device="cpu") is None
+        assert os.listdir(self.directory) == []
+
+    def test_build_error_keeps_file(self):
+        weights_cache.save_model("my-model", TinyModel())
+        with self.assertRaises(ConnectionError):
+            weights_cache.load_model("my-model", mock.Mock(side_effect=ConnectionError("no network")), device="cpu")
+        assert weights_cache.load_model_from_state_dict(
+            "my-model", mock.Mock(side_effect=KeyError("visual.proj"))) is None
+        assert len(os.listdir(self.directory)) == 1
+        assert weights_cache.load_model("my-model", TinyModel, device="cpu") is not None
+
+    def test_corrupted_file_removed(self):
+        weights_cache.save_model("my-model", TinyModel())
+        with open(weights_cache.weights_path("my-model"), "wb") as f:
+            f.write(b"not safetensors")
+        assert weights_cache.load_state_dict("my-model") is None
+        assert os.listdir(self.directory) == []
+
+    def test_hash_collision_is_a_miss(self):
+        weights_cache.save_model("my-model", TinyModel())
+        with mock.patch("marqo.s2_inference.weights_cache.weights_path",
+                        return_value=weights_cache.weights_path("my-model")):
+            assert weights_cache.load_state_dict("another-model") is None
+        assert len(os.listdir(self.directory)) == 1
+
+    def test_disabled(self):
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_WEIGHTS_CACHE_DIR: ""}):
+            os.environ.pop(EnvVars.MARQO_WEIGHTS_CACHE_DIR)
+            assert not weights_cache.is_enabled()
+            weights_cache.save_model("my-model", TinyModel())
+            build_model = mock.Mock()
+            assert weights_cache.load_model("my-model", build_model, device="cpu") is None
+            build_model.assert_not_called()
+        assert os.listdir(self.directory) == []
+
+    def test_save_error_not_raised(self):
+        with mock.patch("safetensors.torch.save_model", side_effect=OSError("No space left on device")):
+            weights_cache.save_model("my-model", TinyModel())
+        assert os.listdir(self.directory) == []
+
+
+class TestClipWeightsCache(WeightsCacheTestCase):
+
+    def test_clip_loaded_from_cache(self):
+        original = tiny_clip()
+        with mock.patch("clip.load", return_value=(original, clip_utils._get_transform(32))) as mock_load:
+            model = clip_utils.CLIP("ViT-B/32", device="cpu")
+            model.load()
+        mock_load.assert_called_once()
+
+        with mock.patch("clip.load", side_effect=AssertionError("the checkpoint should not be loaded")):
+            cached = clip_utils.CLIP("ViT-B/32", device="cpu")
+            cached.load()
+        assert cached.model is not original
+        assert repr(cached.preprocess) == repr(model.preprocess)
+        text = ["a photo of a cat", "a dog"]
+        assert np.array_equal(cached.encode_text(text), model.encode_text(text))
+
+    def test_clip_loaded_from_checkpoint_if_cached_weights_invalid(self):
+        # weights that load, but that a CLIP model can't be built from
+        weights_cache.save_model("clip||ViT-B/32", TinyModel())
+        original = tiny_clip()
+        with mock.patch("clip.load", return_value=(original, clip_utils._get_transform(32))) as mock_load:
+            model = clip_utils.CLIP("ViT-B/32", device="cpu")
+            model.load()
+        mock_load.assert_called_once()
+        assert model.model is original
+        # the invalid weights were replaced by the checkpoint's
+        assert weights_cache.load_model_from_state_dict("clip||ViT-B/32", build_model) is not None
+
+    def test_open_clip_loaded_from_cache(self):
+        preprocess = clip_utils._get_transform(224)
+        with mock.patch("open_clip.create_model_and_transforms",
+                        return_value=(TinyModel(), None, preprocess)) as mock_create:
+            model = clip_utils.OPEN_CLIP("open_clip/ViT-B-32/laion2b_s34b_b79k", device="cpu")
+            model.load()
+        assert mock_create.call_args.kwargs["pretrained"] == "laion2b_s34b_b79k"
+
+        with mock.patch("open_clip.create_model_and_transforms",
+                        return_value=(TinyModel(), None, preprocess)) as mock_create:
+            cached = clip_utils.OPEN_CLIP("open_clip/ViT-B-32/laion2b_s34b_b79k", device="cpu")
+            cached.load()
+        # only the architecture is built, with the pretrained weights' preprocessing
+        assert mock_create.call_args.kwargs["pretrained"] is None
+        assert mock_create.call_args.kwargs["image_mean"] is not None
+        assert torch.equal(cached.model.encoder.weight, model.model.encoder.weight)
+
+    def test_openai_open_clip_not_cached(self):
+        with mock.patch("open_clip.create_model_and_transforms", return_value=(TinyModel(), None, None)):
+            model = clip_utils.OPEN_CLIP("open_clip/ViT-B-32/openai", device="cpu")
+            model.load()
+        assert os.listdir(self.directory) == []
+
+
+class TestHfWeightsCache(WeightsCacheTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.model_dir.cleanup)
+        vocab_file = os.path.join(self.model_dir.name, "vocab.txt")
+        with open(vocab_file, "w") as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "hello", "world"]))
+        BertTokenizer(vocab_file).save_pretrained(self.model_dir.name)
+        config = BertConfig(vocab_size=7, hidden_size=8, num_hidden_layers=1, num_attention_heads=1,
+                            intermediate_size=16)
+        BertModel(config).save_pretrained(self.model_dir.name)
+
+    def _model(self) -> HF_MODEL:
+        return HF_MODEL(device="cpu", model_properties={"name": self.model_dir.name, "dimensions": 8})
+
+    def test_hf_loaded_from_cache(self):
+        model = self._model()
+        model.load()
+        assert len(os.listdir(self.directory)) == 1
+
+        with mock.patch("transformers.AutoModel.from_pretrained",
+                        side_effect=AssertionError("the checkpoint should not be loaded")):
+            cached = self._model()
+            cached.load()
+        assert not cached.model.model.training
+        assert np.allclose(cached.encode(["hello world"]), model.encode(["hello world"]))
@@ -1,4 +1,9 @@
+import asyncio
+import http.server
+import json
+import threading
 import time
+import httpx
 import requests
 from tests.marqo_test import MarqoTestCase
 from marqo.tensor_search.models.add_docs_objects import AddDocsParams
@@ -7,6 +12,8 @@ from unittest import mock
 from marqo.tensor_search import tensor_search
 from marqo.tensor_search.enums import EnvVars, SearchMethod
 from marqo._httprequests import HttpRequests
+from marqo._async_httprequests import AsyncHttpRequests
+from marqo import _async_httprequests, _httprequests, config
 from marqo.errors import (
     IndexNotFoundError, TooManyRequestsError,
     DiskWatermarkBreachError, MarqoWebError, BackendCommunicationError
@@ -41,8 +48,7 @@ class Test_HttpRequests(MarqoTestCase):
         mock_post.return_value = mock_response
         tensor_search.create_vector_index(config=self.config, index_name=self.index_name_1)
 
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_post, requests.get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
         def run():
             try:
                 res = tensor_search.add_documents(
@@ -77,8 +83,7 @@ class Test_HttpRequests(MarqoTestCase):
         mock_post.return_value = mock_response
         tensor_search.create_vector_index(config=self.config, index_name=self.index_name_1)
 
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_post, requests.get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
         def run():
             try:
                 res = tensor_search.add_documents(
@@ -123,7 +128,8 @@ class Test_HttpRequests(MarqoTestCase):
         mock_put = mock.MagicMock()
         mock_delete = mock.MagicMock()
 
-        mock_allowed_operations = {mock_post, mock_get, mock_put, mock_delete}
+        mock_allowed_operations = {requests.post: mock_post, requests.get: mock_get,
+                                   requests.put: mock_put, requests.delete: mock_delete}
 
 
         mock_response = requests.Response()
@@ -133,18 +139,17 @@ class Test_HttpRequests(MarqoTestCase):
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('requests.put', mock_put)
-        @mock.patch('requests.delete', mock_delete)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', mock_allowed_operations)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
+        @mock.patch.object(_httprequests.get_session(), 'put', mock_put)
+        @mock.patch.object(_httprequests.get_session(), 'delete', mock_delete)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
-            for method in mock_allowed_operations:
+            for http_method, method in mock_allowed_operations.items():
                 method.return_value = mock_response
                 try:
                     res = self.httprequest_object.send_request(
-                        http_method=method,
+                        http_method=http_method,
                         path="some_path",
                         body="some_body"
                     )
@@ -161,7 +166,8 @@ class Test_HttpRequests(MarqoTestCase):
         mock_put = mock.MagicMock()
         mock_delete = mock.MagicMock()
 
-        mock_allowed_operations = {mock_post, mock_get, mock_put, mock_delete}
+        mock_allowed_operations = {requests.post: mock_post, requests.get: mock_get,
+                                   requests.put: mock_put, requests.delete: mock_delete}
 
 
         mock_response = requests.Response()
@@ -177,17 +183,16 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('requests.put', mock_put)
-        @mock.patch('requests.delete', mock_delete)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', mock_allowed_operations)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
+        @mock.patch.object(_httprequests.get_session(), 'put', mock_put)
+        @mock.patch.object(_httprequests.get_session(), 'delete', mock_delete)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
-            for method in mock_allowed_operations:
+            for http_method, method in mock_allowed_operations.items():
                 try:
                     res = self.httprequest_object.send_request(
-                        http_method=method,
+                        http_method=http_method,
                         path="some_path",
                         body="some_body",
                     )
@@ -206,7 +211,8 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
         mock_put = mock.MagicMock()
         mock_delete = mock.MagicMock()
 
-        mock_allowed_operations = {mock_post, mock_get, mock_put, mock_delete}
+        mock_allowed_operations = {requests.post: mock_post, requests.get: mock_get,
+                                   requests.put: mock_put, requests.delete: mock_delete}
 
 
         mock_response = requests.Response()
@@ -222,17 +228,16 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('requests.put', mock_put)
-        @mock.patch('requests.delete', mock_delete)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', mock_allowed_operations)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
+        @mock.patch.object(_httprequests.get_session(), 'put', mock_put)
+        @mock.patch.object(_httprequests.get_session(), 'delete', mock_delete)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
-            for method in mock_allowed_operations:
+            for http_method, method in mock_allowed_operations.items():
                 try:
                     res = self.httprequest_object.send_request(
-                        http_method=method,
+                        http_method=http_method,
                         path="some_path",
                         body="some_body",
                         max_retry_attempts=None,
@@ -260,7 +265,8 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             mock_put = mock.MagicMock()
             mock_delete = mock.MagicMock()
 
-            mock_allowed_operations = {mock_post, mock_get, mock_put, mock_delete}
+            mock_allowed_operations = {requests.post: mock_post, requests.get: mock_get,
+                                       requests.put: mock_put, requests.delete: mock_delete}
 
 
             mock_response = requests.Response()
@@ -278,18 +284,17 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
                 "DEFAULT_MARQO_MAX_BACKEND_RETRY_BACKOFF": str(mock_retry_pair['backoff_seconds']),
                 "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
             }
-            @mock.patch('requests.get', mock_get)
-            @mock.patch('requests.post', mock_post)
-            @mock.patch('requests.put', mock_put)
-            @mock.patch('requests.delete', mock_delete)
-            @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', mock_allowed_operations)
+            @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
+            @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
+            @mock.patch.object(_httprequests.get_session(), 'put', mock_put)
+            @mock.patch.object(_httprequests.get_session(), 'delete', mock_delete)
             @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
             def run():
-                for method in mock_allowed_operations:
+                for http_method, method in mock_allowed_operations.items():
                     try:
                         start_time = time.time()
                         res = self.httprequest_object.send_request(
-                            http_method=method,
+                            http_method=http_method,
                             path="some_path",
                             body="some_body",
                         )
@@ -320,7 +325,8 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             mock_put = mock.MagicMock()
             mock_delete = mock.MagicMock()
 
-            mock_allowed_operations = {mock_post, mock_get, mock_put, mock_delete}
+            mock_allowed_operations = {requests.post: mock_post, requests.get: mock_get,
+                                       requests.put: mock_put, requests.delete: mock_delete}
 
 
             mock_response = requests.Response()
@@ -336,18 +342,17 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             mock_environ = {
                 "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
             }
-            @mock.patch('requests.get', mock_get)
-            @mock.patch('requests.post', mock_post)
-            @mock.patch('requests.put', mock_put)
-            @mock.patch('requests.delete', mock_delete)
-            @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', mock_allowed_operations)
+            @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
+            @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
+            @mock.patch.object(_httprequests.get_session(), 'put', mock_put)
+            @mock.patch.object(_httprequests.get_session(), 'delete', mock_delete)
             @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
             def run():
-                for method in mock_allowed_operations:
+                for http_method, method in mock_allowed_operations.items():
                     try:
                         start_time = time.time()
                         res = self.httprequest_object.send_request(
-                            http_method=method,
+                            http_method=http_method,
                             path="some_path",
                             body="some_body",
                             max_retry_attempts=mock_retry_pair['retry_attempts'],
@@ -388,8 +393,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {requests.post, mock_get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -428,8 +432,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {requests.post, mock_get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -466,8 +469,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {requests.post, mock_get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -506,8 +508,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {requests.post, mock_get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -551,8 +552,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {requests.post, mock_get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -604,8 +604,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.get', mock_get)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {requests.post, mock_get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -648,8 +647,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_post, requests.get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -689,8 +687,7 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
             "MARQO_BEST_AVAILABLE_DEVICE": "cpu"
         }
 
-        @mock.patch('requests.post', mock_post)
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_post, requests.get, requests.put})
+        @mock.patch.object(_httprequests.get_session(), 'post', mock_post)
         @mock.patch.dict(os.environ, {**os.environ, **mock_environ})
         def run():
             try:
@@ -706,4 +703,198 @@ Max retries exceeded with url: /my-test-index-1/_mapping (Caused by SSLError(SSL
                 assert e.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
                 assert mock_post.call_count == 4 # 4 since the first call is not a retry
             return True
-        assert run()
\ No newline at end of file
+        assert run()
+
+class TestHttpRequestsConnectionPool(MarqoTestCase):
+    """Tests the session shared by HttpRequests instances. Runs against a local HTTP server rather than Marqo-OS."""
+
+    class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b'{"acknowledged": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    def setUp(self) -> None:
+        self.server = http.server.ThreadingHTTPServer(("localhost", 0), self.KeepAliveHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.local_config = config.Config(url=f"http://localhost:{self.server.server_address[1]}")
+        _httprequests.close_session()
+
+    def tearDown(self) -> None:
+        _httprequests.close_session()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_reused_across_instances(self):
+        for _ in range(3):
+            assert HttpRequests(self.local_config).get(path="my-index/_mapping") == {"acknowledged": True}
+
+        pools = _httprequests.get_connection_pool_stats()["pools"]
+        assert len(pools) == 1
+        assert pools[0]["host"] == "localhost"
+        assert pools[0]["port"] == self.server.server_address[1]
+        assert pools[0]["requests_sent"] == 3
+        assert pools[0]["connections_created"] == 1
+
+    def test_session_is_shared(self):
+        HttpRequests(self.local_config).get(path="my-index/_mapping")
+        session = _httprequests.get_session()
+        HttpRequests(self.local_config).get(path="my-index/_mapping")
+        assert _httprequests.get_session() is session
+
+    def test_pool_configured_from_env_vars(self):
+        mock_environ = {
+            EnvVars.MARQO_OS_CONNECTION_POOL_SIZE: "7",
+            EnvVars.MARQO_OS_CONNECTION_POOL_HOSTS: "3",
+            EnvVars.MARQO_OS_CONNECTION_POOL_BLOCK: "TRUE"
+        }
+        with mock.patch.dict(os.environ, {**os.environ, **mock_environ}):
+            adapter = _httprequests.get_session().get_adapter("https://")
+        assert adapter._pool_maxsize == 7
+        assert adapter._pool_connections == 3
+        assert adapter._pool_block is True
+
+    def test_requests_sent_through_session(self):
+        mock_get = mock.MagicMock()
+        mock_response = requests.Response()
+        mock_response.status_code = 200
+        mock_response._content = b'{"acknowledged": true}'
+        mock_get.return_value = mock_response
+
+        with mock.patch.object(_httprequests.get_session(), 'get', mock_get):
+            assert HttpRequests(self.local_config).get(path="my-index/_mapping") == {"acknowledged": True}
+        mock_get.assert_called_once()
+        assert mock_get.call_args[0][0] == f"{self.local_config.url}/my-index/_mapping"
+
+    def test_pool_stats_report_configured_size(self):
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_OS_CONNECTION_POOL_SIZE: "7"}):
+            HttpRequests(self.local_config).get(path="my-index/_mapping")
+        assert [pool["max_connections"] for pool in _httprequests.get_connection_pool_stats()["pools"]] == [7]
+
+    def test_pool_stats_before_first_request(self):
+        assert _httprequests.get_connection_pool_stats() == {"pools": []}
+
+
+class TestAsyncHttpRequests(MarqoTestCase):
+    """Tests AsyncHttpRequests against a local HTTP server rather than Marqo-OS."""
+
+    class JsonHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self):
+            request_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with self.server.lock:
+                self.server.requests.append((self.command, self.path, request_body, self.client_address[1]))
+            if self.path.startswith("/missing-index"):
+                status = 404
+                body = {"error": {"type": "index_not_found_exception", "reason": "no such index",
+                                  "index": "missing-index"}, "status": 404}
+            else:
+                status = 200
+                body = {"acknowledged": True}
+            encoded = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    def setUp(self) -> None:
+        self.server = http.server.ThreadingHTTPServer(("localhost", 0), self.JsonHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.local_config = config.Config(url=f"http://localhost:{self.server.server_address[1]}")
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _run(self, coroutine):
+        async def run_and_close_client():
+            try:
+                return await coroutine
+            finally:
+                await _async_httprequests.close_client()
+        return asyncio.run(run_and_close_client())
+
+    def test_requests_reuse_connection(self):
+        async def send_requests():
+            client = AsyncHttpRequests(self.local_config)
+            results = [
+                await client.get(path="my-index/_mapping"),
+                await client.get(path="_msearch", body='{"index": "my-index"}\n{}\n'),
+                await client.post(path="_bulk?refresh=false", body='{"index": {}}\n'),
+                await client.put(path="my-index/_mapping", body='{"properties": {}}')
+            ]
+            assert _async_httprequests.get_client(False) is _async_httprequests.get_client(False)
+            return results
+
+        assert self._run(send_requests()) == [{"acknowledged": True}] * 4
+        assert [(method, path, body) for method, path, body, _ in self.server.requests] == [
+            ("GET", "/my-index/_mapping", b""),
+            ("GET", "/_msearch", b'{"index": "my-index"}\n{}\n'),
+            ("POST", "/_bulk?refresh=false", b'{"index": {}}\n'),
+            ("PUT", "/my-index/_mapping", b'{"properties": {}}'),
+        ]
+        assert len({port for _, _, _, port in self.server.requests}) == 1
+
+    def test_dict_body_is_serialised(self):
+        self._run(AsyncHttpRequests(self.local_config).get(path="_mget/", body={"docs": [{"_id": "1"}]}))
+        assert json.loads(self.server.requests[0][2]) == {"docs": [{"_id": "1"}]}
+
+    def test_opensearch_error_is_converted(self):
+        with self.assertRaises(IndexNotFoundError) as e:
+            self._run(AsyncHttpRequests(self.local_config).get(path="missing-index/_mapping"))
+        assert "missing-index" in str(e.exception)
+
+    def test_connection_error_is_retried(self):
+        mock_request = mock.AsyncMock(side_effect=httpx.ConnectError("Connection refused"))
+        with mock.patch.object(httpx.AsyncClient, "request", mock_request), \
+                mock.patch("asyncio.sleep", mock.AsyncMock()) as mock_sleep:
+            with self.assertRaises(BackendCommunicationError):
+                self._run(AsyncHttpRequests(self.local_config).get(
+                    path="my-index/_mapping", max_retry_attempts=2, max_retry_backoff_seconds=1))
+        assert mock_request.call_count == 3
+        http_requests = HttpRequests(self.local_config)
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [
+            http_requests.calculate_backoff_sleep(0, 1), http_requests.calculate_backoff_sleep(1, 1)]
+
+    def test_client_verifies_certificates_as_sync_client(self):
+        clients = []
+        original_create_client = _async_httprequests._create_client
+
+        def create_client(verify):
+            clients.append(verify)
+            return original_create_client(verify)
+
+        for verify in [True, False]:
+            clients.clear()
+            with mock.patch("marqo._async_httprequests.verify_certificates", return_value=verify) as mock_verify, \
+                    mock.patch("marqo._async_httprequests._create_client", side_effect=create_client):
+                self._run(AsyncHttpRequests(self.local_config).get(path="my-index/_mapping"))
+            mock_verify.assert_called_once_with(self.local_config)
+            assert clients == [verify]
+
+    def test_client_per_event_loop(self):
+        async def get_client():
+            return _async_httprequests.get_client(False)
+
+        first_client = asyncio.run(get_client())
+        second_client = self._run(get_client())
+        assert first_client is not second_client
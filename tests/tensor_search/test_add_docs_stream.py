@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from marqo import config
+from marqo.errors import BadRequestError, IndexNotFoundError
+from marqo.tensor_search import add_docs_stream
+from marqo.tensor_search.models.indexing_job_objects import IndexingJobParams
+from marqo.tensor_search.telemetry import RequestMetrics, RequestMetricsStore
+from marqo.tensor_search.web import api_utils
+
+
+class TestAddDocsStream(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        self.params = IndexingJobParams(index_name="my-index", auto_refresh=False, device="cpu", batch_size=2,
+                                        tensor_fields=["title"])
+        self.metrics = RequestMetrics()
+        self.batches = []
+        self.pipeline_threads = []
+        self.failing_batch = None
+        patcher = mock.patch("marqo.tensor_search.tensor_search.add_documents_pipelined",
+                             side_effect=self._add_documents_pipelined)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _add_documents_pipelined(self, config, batches):
+        for add_docs_params in batches:
+            self.pipeline_threads.append(threading.current_thread().name)
+            RequestMetricsStore.for_request().increment_counter("batches")
+            self.batches.append([doc["_id"] for doc in add_docs_params.docs])
+            if len(self.batches) == self.failing_batch:
+                raise IndexNotFoundError("Cannot add documents to non-existent index my-index")
+            yield {"errors": False, "items": [
+                {"_id": doc["_id"], "error": "bad doc", "status": 400} if "fail" in doc
+                else {"_id": doc["_id"], "result": "created", "status": 201}
+                for doc in add_docs_params.docs]}
+
+    def _add_documents(self, chunks):
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def add_documents():
+            RequestMetricsStore.set_in_request(r=mock.Mock(), metrics=self.metrics)
+            results = await add_docs_stream.add_documents(
+                config=self.config, params=self.params,
+                doc_batches=api_utils.parse_ndjson(stream(), batch_size=self.params.batch_size))
+            with results:
+                return [json.loads(line) for line in results.read().splitlines()]
+
+        return asyncio.run(add_documents())
+
+    @staticmethod
+    def _ndjson(docs):
+        return [json.dumps(doc).encode() + b"\n" for doc in docs]
+
+    def test_results_of_each_doc(self):
+        docs = [{"_id": str(i), "title": "hello"} for i in range(5)]
+        docs[3]["fail"] = True
+        lines = self._add_documents(self._ndjson(docs))
+        assert lines[:5] == [
+            {"_id": "0", "result": "created", "status": 201},
+            {"_id": "1", "result": "created", "status": 201},
+            {"_id": "2", "result": "created", "status": 201},
+            {"_id": "3", "error": "bad doc", "status": 400},
+            {"_id": "4", "result": "created", "status": 201},
+        ]
+        summary = lines[5]["summary"]
+        assert summary["errors"] is True
+        assert (summary["processedDocuments"], summary["failedDocuments"]) == (5, 1)
+        assert summary["index_name"] == "my-index"
+        assert "error" not in summary
+        assert self.batches == [["0", "1"], ["2", "3"], ["4"]]
+        # batches are added off the event loop, in the caller's request metrics
+        assert "MainThread" not in self.pipeline_threads
+        assert self.metrics.counter["batches"] == 3
+
+    def test_error_after_docs_added(self):
+        self.failing_batch = 2
+        lines = self._add_documents(self._ndjson([{"_id": str(i)} for i in range(5)]))
+        assert [line["_id"] for line in lines[:-1]] == ["0", "1"]
+        summary = lines[-1]["summary"]
+        assert summary["errors"] is True
+        assert summary["processedDocuments"] == 2
+        assert summary["error"]["code"] == "index_not_found"
+
+    def test_invalid_line_after_docs_added(self):
+        lines = self._add_documents([b'{"_id": "0"}\n{"_id": "1"}\n', b'{"_id": \n'])
+        assert [line.get("_id") for line in lines[:-1]] == ["0", "1"]
+        assert "Line 3" in lines[-1]["summary"]["error"]["message"]
+
+    def test_error_before_docs_added(self):
+        self.failing_batch = 1
+        with self.assertRaises(IndexNotFoundError):
+            self._add_documents(self._ndjson([{"_id": "0"}]))
+        with self.assertRaises(BadRequestError):
+            self._add_documents([b"not json\n"])
+
+    def test_results_spooled_to_disk(self):
+        with mock.patch("marqo.tensor_search.add_docs_stream.RESULTS_SPOOL_MAX_MEMORY", 100):
+            async def add_documents():
+                async def stream():
+                    for chunk in self._ndjson([{"_id": str(i)} for i in range(10)]):
+                        yield chunk
+
+                RequestMetricsStore.set_in_request(r=mock.Mock(), metrics=self.metrics)
+                results = await add_docs_stream.add_documents(
+                    config=self.config, params=self.params,
+                    doc_batches=api_utils.parse_ndjson(stream(), batch_size=2))
+                with results:
+                    return results._rolled, results.read().count(b"\n")
+
+            rolled, line_count = asyncio.run(add_documents())
+        assert rolled
+        assert line_count == 11
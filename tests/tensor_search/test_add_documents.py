@@ -7,10 +7,11 @@ import functools
 import json
 import math
 import pprint
+import numpy as np
 from unittest import mock
 from unittest.mock import patch
 from marqo.tensor_search.enums import EnvVars
-from marqo.s2_inference import types, s2_inference
+from marqo.s2_inference import image_download, types, s2_inference
 import PIL
 import requests
 import pytest
@@ -463,7 +464,7 @@ class TestAddDocuments(MarqoTestCase):
         mock_config = copy.deepcopy(self.config)
 
         mock_vectorise = mock.MagicMock()
-        mock_vectorise.return_value = [[0, 0, 0, 0]]
+        mock_vectorise.side_effect = lambda *args, **kwargs: [[0, 0, 0, 0] for _ in kwargs["content"]]
 
         @mock.patch("marqo.s2_inference.s2_inference.vectorise", mock_vectorise)
         def run():
@@ -479,6 +480,41 @@ class TestAddDocuments(MarqoTestCase):
         args, kwargs = mock_vectorise.call_args
         assert kwargs["device"] == "cuda:22"
 
+    def test_add_documents_vectorises_across_docs(self):
+        """The chunks of all docs in a batch should be vectorised together, and their vectors
+        should end up in the right doc and field."""
+        mock_vectorise = mock.MagicMock()
+        mock_vectorise.side_effect = s2_inference.vectorise
+
+        @mock.patch("marqo.s2_inference.s2_inference.vectorise", mock_vectorise)
+        def run():
+            return tensor_search.add_documents(
+                config=self.config, add_docs_params=AddDocsParams(
+                    index_name=self.index_name_1, auto_refresh=True, device="cpu",
+                    docs=[{"_id": "1", "title": "hello", "desc": "a cat"},
+                          {"_id": "2", "title": "goodbye"},
+                          {"_id": "3", "title": {"bad": "dict"}},
+                          {"_id": "4", "desc": "a dog"}]
+                )
+            )
+
+        add_res = run()
+        assert [item["_id"] for item in add_res["items"]] == ["1", "2", "3", "4"]
+        assert "error" in add_res["items"][2]
+        mock_vectorise.assert_called_once()
+        assert mock_vectorise.call_args.kwargs["content"] == ["hello", "a cat", "goodbye", "a dog"]
+
+        res = tensor_search.get_documents_by_ids(
+            config=self.config, index_name=self.index_name_1, document_ids=["1", "4"], show_vectors=True
+        )["results"]
+        for doc in res:
+            for facet in doc[TensorField.tensor_facets]:
+                field_name = [k for k in facet if k != TensorField.embedding][0]
+                expected_vector = s2_inference.vectorise(
+                    model_name="hf/all_datasets_v4_MiniLM-L6", content=[facet[field_name]], device="cpu",
+                    normalize_embeddings=True)[0]
+                assert np.allclose(facet[TensorField.embedding], expected_vector, atol=1e-5)
+
     def test_add_documents_empty(self):
         try:
             tensor_search.add_documents(
@@ -1200,7 +1236,7 @@ class TestAddDocuments(MarqoTestCase):
         mock_get = mock.MagicMock()
         mock_get.side_effect = requests.exceptions.RequestException
 
-        @mock.patch('requests.get', mock_get)
+        @mock.patch.object(image_download.get_session(), 'get', mock_get)
         def run():
             image_repo = dict()
             add_docs.threaded_download_images(
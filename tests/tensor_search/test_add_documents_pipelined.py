@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from marqo import config
+from marqo.errors import IndexNotFoundError
+from marqo.tensor_search import configs, tensor_search
+from marqo.tensor_search.enums import IndexSettingsField as NsField
+from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+from marqo.tensor_search.models.index_info import IndexInfo
+from marqo.tensor_search.telemetry import RequestMetrics, RequestMetricsStore
+
+
+class TestAddDocumentsPipelined(unittest.TestCase):
+    """The stages of add_documents are mocked"""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        self.metrics = RequestMetrics()
+        RequestMetricsStore.set_in_request(r=mock.Mock(), metrics=self.metrics)
+        self.prepared = []
+        self.prepare_threads = []
+        self.written = []
+        self.patchers = [
+            mock.patch("marqo.tensor_search.tensor_search._prepare_add_documents_batch", side_effect=self._prepare),
+            mock.patch("marqo.tensor_search.tensor_search._write_add_documents_batch", side_effect=self._write),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _prepare(self, config, add_docs_params):
+        self.prepare_threads.append(threading.current_thread().name)
+        self.prepared.append(add_docs_params.docs[0]["_id"])
+        return add_docs_params.docs[0]["_id"]
+
+    def _write(self, config, prepared_batch):
+        self.written.append(prepared_batch)
+        return {"items": [{"_id": prepared_batch}]}
+
+    @staticmethod
+    def _batches(count: int, **kwargs):
+        for i in range(count):
+            yield AddDocsParams(index_name="my-index", auto_refresh=False, device="cpu", tensor_fields=["title"],
+                                non_tensor_fields=None, docs=[{"_id": str(i), "title": "hello"}], **kwargs)
+
+    def test_batches_written_in_order(self):
+        responses = list(tensor_search.add_documents_pipelined(config=self.config, batches=self._batches(5)))
+        assert [response["items"][0]["_id"] for response in responses] == ["0", "1", "2", "3", "4"]
+        assert self.written == ["0", "1", "2", "3", "4"]
+        # batches are prepared in a thread of their own, and timed in the caller's metrics
+        assert set(self.prepare_threads) == {"add-documents-pipeline"}
+        for stage in ("prepare", "write", "wait_for_prepare", "wait_for_write"):
+            assert f"add_documents.pipeline.{stage}" in self.metrics.times
+        assert len(self.metrics.times["add_documents.pipeline.write"]) == 5
+
+    def test_next_batch_prepared_while_writing(self):
+        next_batch_prepared = threading.Event()
+
+        def prepare(config, add_docs_params):
+            if add_docs_params.docs[0]["_id"] == "1":
+                next_batch_prepared.set()
+            return self._prepare(config, add_docs_params)
+
+        def write(config, prepared_batch):
+            if prepared_batch == "0":
+                assert next_batch_prepared.wait(timeout=5)
+            return self._write(config, prepared_batch)
+
+        with mock.patch("marqo.tensor_search.tensor_search._prepare_add_documents_batch", side_effect=prepare), \
+                mock.patch("marqo.tensor_search.tensor_search._write_add_documents_batch", side_effect=write):
+            responses = list(tensor_search.add_documents_pipelined(config=self.config, batches=self._batches(2)))
+        assert len(responses) == 2
+
+    def test_prepared_batches_bounded(self):
+        pipeline = tensor_search.add_documents_pipelined(config=self.config, batches=self._batches(20), queue_size=2)
+        next(pipeline)
+        time.sleep(0.3)
+        # the written batch, the queued batches and the batch waiting to be queued
+        assert len(self.prepared) == 4
+        pipeline.close()
+        assert self.written == ["0"]
+
+    def test_prepare_error_raised_after_earlier_batches(self):
+        def prepare(config, add_docs_params):
+            if add_docs_params.docs[0]["_id"] == "2":
+                raise IndexNotFoundError("Cannot add documents to non-existent index my-index")
+            return self._prepare(config, add_docs_params)
+
+        responses = []
+        with mock.patch("marqo.tensor_search.tensor_search._prepare_add_documents_batch", side_effect=prepare):
+            with self.assertRaises(IndexNotFoundError):
+                for response in tensor_search.add_documents_pipelined(config=self.config, batches=self._batches(5)):
+                    responses.append(response)
+        assert len(responses) == 2
+        assert self.written == ["0", "1"]
+        assert self.prepared == ["0", "1"]
+
+    def test_write_error_stops_preparing(self):
+        def write(config, prepared_batch):
+            raise IndexNotFoundError("Index my-index not found")
+
+        with mock.patch("marqo.tensor_search.tensor_search._write_add_documents_batch", side_effect=write):
+            with self.assertRaises(IndexNotFoundError):
+                list(tensor_search.add_documents_pipelined(config=self.config, batches=self._batches(20),
+                                                           queue_size=1))
+        prepared_count = len(self.prepared)
+        time.sleep(0.2)
+        assert prepared_count == len(self.prepared) < 20
+        assert not any(thread.name == "add-documents-pipeline" for thread in threading.enumerate())
+
+    def test_upserts_added_one_at_a_time(self):
+        with mock.patch("marqo.tensor_search.tensor_search.add_documents",
+                        side_effect=lambda config, add_docs_params: {"items": add_docs_params.docs}) as mock_add:
+            responses = list(tensor_search.add_documents_pipelined(
+                config=self.config, batches=self._batches(3, use_existing_tensors=True)))
+        assert [response["items"][0]["_id"] for response in responses] == ["0", "1", "2"]
+        assert mock_add.call_count == 3
+        assert self.prepared == []
+
+
+    def test_nothing_prepared_while_upsert_added(self):
+        adding = threading.Event()
+
+        def add_documents(config, add_docs_params):
+            adding.set()
+            # the next batch would be prepared by now, if it were prepared concurrently
+            time.sleep(0.2)
+            assert self.prepared == []
+            adding.clear()
+            return {"items": add_docs_params.docs}
+
+        def batches():
+            yield from self._batches(1, use_existing_tensors=True)
+            yield from self._batches(2)
+
+        def prepare(config, add_docs_params):
+            assert not adding.is_set()
+            return self._prepare(config, add_docs_params)
+
+        with mock.patch("marqo.tensor_search.tensor_search.add_documents", side_effect=add_documents), \
+                mock.patch("marqo.tensor_search.tensor_search._prepare_add_documents_batch", side_effect=prepare):
+            responses = list(tensor_search.add_documents_pipelined(config=self.config, batches=batches()))
+        assert len(responses) == 3
+        assert self.prepared == ["0", "1"]
+
+    def test_upsert_error_stops_preparing(self):
+        def batches():
+            yield from self._batches(1, use_existing_tensors=True)
+            yield from self._batches(5)
+
+        with mock.patch("marqo.tensor_search.tensor_search.add_documents",
+                        side_effect=IndexNotFoundError("Index my-index not found")):
+            with self.assertRaises(IndexNotFoundError):
+                list(tensor_search.add_documents_pipelined(config=self.config, batches=batches()))
+        assert self.prepared == []
+        assert not any(thread.name == "add-documents-pipeline" for thread in threading.enumerate())
+
+
+class TestAddDocumentsPipelinedBulk(unittest.TestCase):
+    """Compares add_documents_pipelined() with add_documents(). Marqo-OS and the model are mocked."""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        RequestMetricsStore.set_in_request(mock.Mock())
+        index_settings = configs.get_default_index_settings()
+        index_settings[NsField.index_defaults][NsField.text_preprocessing][NsField.split_method] = "passage"
+        index_info = IndexInfo(model_name="hf/all_datasets_v4_MiniLM-L6", search_model_name=None,
+                               properties={}, index_settings=index_settings)
+        self.patchers = [
+            mock.patch("marqo.s2_inference.s2_inference.vectorise",
+                       side_effect=lambda content, **kwargs: [[0.1] * 384 for _ in content]),
+            mock.patch("marqo.tensor_search.backend.get_index_info", return_value=index_info),
+            mock.patch("marqo.tensor_search.backend.add_customer_field_properties"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+
+    @staticmethod
+    def _batches():
+        for i in range(3):
+            yield AddDocsParams(index_name="my-index", auto_refresh=False, device="cpu", tensor_fields=["title"],
+                                non_tensor_fields=None,
+                                docs=[{"_id": f"{i}-{j}", "title": f"hello {i} {j}"} for j in range(2)])
+
+    @staticmethod
+    def _bulk_response(body: str) -> dict:
+        lines = [json.loads(line) for line in body.splitlines()]
+        return {"took": 1, "errors": False, "items": [
+            {"index": {"_id": line["index"]["_id"], "result": "created", "status": 201}}
+            for line in lines if "index" in line]}
+
+    def test_same_bulk_requests_and_responses(self):
+        with mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+            mock_http_requests.return_value.post.side_effect = lambda path, body, **kwargs: self._bulk_response(body)
+            sequential = [tensor_search.add_documents(config=self.config, add_docs_params=add_docs_params)
+                          for add_docs_params in self._batches()]
+            sequential_bodies = [call.kwargs["body"] for call in mock_http_requests.return_value.post.call_args_list]
+
+            mock_http_requests.return_value.post.reset_mock()
+            pipelined = list(tensor_search.add_documents_pipelined(config=self.config, batches=self._batches()))
+            pipelined_bodies = [call.kwargs["body"] for call in mock_http_requests.return_value.post.call_args_list]
+
+        for response in sequential + pipelined:
+            del response["processingTimeMs"]
+        assert pipelined == sequential
+        assert [[item["_id"] for item in response["items"]] for response in pipelined] == [
+            ["0-0", "0-1"], ["1-0", "1-1"], ["2-0", "2-1"]]
+        assert pipelined_bodies == sequential_bodies
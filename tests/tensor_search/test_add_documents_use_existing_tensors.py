@@ -1,4 +1,5 @@
 from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+import unittest
 import unittest.mock
 import requests
 from tests.marqo_test import MarqoTestCase
@@ -7,7 +8,8 @@ from marqo.s2_inference.s2_inference import vectorise
 from marqo.s2_inference.clip_utils import load_image_from_path
 from marqo.tensor_search import tensor_search, index_meta_cache, backend
 from marqo.tensor_search.enums import TensorField
-from marqo.errors import IndexNotFoundError, InvalidArgError, BadRequestError
+from marqo.errors import IndexNotFoundError, InvalidArgError, BadRequestError, InternalError
+from marqo import config
 
 
 class TestAddDocumentsUseExistingTensors(MarqoTestCase):
@@ -309,7 +311,7 @@ class TestAddDocumentsUseExistingTensors(MarqoTestCase):
                 }], auto_refresh=True, non_tensor_fields=["2nd-non-tensor-field"], use_existing_tensors=True, device="cpu"))
             content_to_be_vectorised = [call_kwargs['content'] for call_args, call_kwargs
                                         in mock_vectorise.call_args_list]
-            assert content_to_be_vectorised == [["cat on mat"], ["updated content"]]
+            assert content_to_be_vectorised == [["cat on mat", "updated content"]]
             return True
         assert run()
 
@@ -480,10 +482,11 @@ class TestAddDocumentsUseExistingTensors(MarqoTestCase):
             vectorised_content = [call_kwargs['content'] for call_args, call_kwargs
                                   in mock_vectorise.call_args_list]
             artefact_pil_image = load_image_from_path(artefact_hippo_img, image_download_headers={})
+            # Text and image chunks of all fields are vectorised in one call per modality
             expected_to_be_vectorised = [
-                ["this is the updated 1st sentence.", "This is my second"],
-                ["this is a brand new sentence.", "Yes it is"],
-                [artefact_pil_image], [artefact_pil_image]]
+                ["this is the updated 1st sentence.", "This is my second",
+                 "this is a brand new sentence.", "Yes it is"],
+                [artefact_pil_image, artefact_pil_image]]
             assert vectorised_content == expected_to_be_vectorised
 
             updated_doc = requests.get(
@@ -568,4 +571,61 @@ class TestAddDocumentsUseExistingTensors(MarqoTestCase):
                 config=self.config, index_name=self.index_name_1,
                 document_ids=[doc["_id" ]for doc in doc_arg], show_vectors=True)
 
-            self.assertEqual(d1, d2)
\ No newline at end of file
+            self.assertEqual(d1, d2)
+
+class TestGetDocumentsForUpsert(unittest.TestCase):
+    """Tests how _get_documents_for_upsert() combines the 2 halves of its _mget response. Marqo-OS is mocked."""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+
+    @staticmethod
+    def _mget_response(doc_ids, missing_ids=()):
+        chunk_results = []
+        data_results = []
+        for doc_id in doc_ids:
+            if doc_id in missing_ids:
+                chunk_results.append({"_id": doc_id, "found": False})
+                data_results.append({"_id": doc_id, "found": False})
+                continue
+            chunk_results.append({"_id": doc_id, "found": True, "_source": {"__chunks": [
+                {"__field_name": "title", "__field_content": f"title of {doc_id}", "__vector_title": [0.1]}]}})
+            data_results.append({"_id": doc_id, "found": True, "_source": {"title": f"title of {doc_id}",
+                                                                            "__chunks": []}})
+        return {"docs": chunk_results + data_results}
+
+    def _get(self, document_ids, response):
+        with unittest.mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+            mock_http_requests.return_value.get.return_value = response
+            result = tensor_search._get_documents_for_upsert(
+                config=self.config, index_name="my-test-index-1", document_ids=document_ids)
+        return result, mock_http_requests.return_value.get
+
+    def test_combines_chunks_and_data(self):
+        result, mock_get = self._get(["a", "b", "c"], self._mget_response(["a", "b", "c"], missing_ids=["b"]))
+        assert [doc["_id"] for doc in result["docs"]] == ["a", "b", "c"]
+        assert result["docs"][0]["_source"] == {
+            "title": "title of a",
+            "__chunks": [{"__field_name": "title", "__field_content": "title of a", "__vector_title": [0.1]}]}
+        assert result["docs"][1] == {"_id": "b", "found": False}
+        assert result["docs"][2]["_source"]["__chunks"][0]["__field_content"] == "title of c"
+
+    def test_results_in_any_order(self):
+        response = self._mget_response(["a", "b"])
+        response["docs"].reverse()
+        result, _ = self._get(["a", "b"], response)
+        assert [doc["_id"] for doc in result["docs"]] == ["a", "b"]
+        assert result["docs"][1]["_source"]["title"] == "title of b"
+        assert result["docs"][1]["_source"]["__chunks"][0]["__field_content"] == "title of b"
+
+    def test_duplicate_and_invalid_ids_fetched_once(self):
+        result, mock_get = self._get(["a", "b", "a", {"invalid": "id"}], self._mget_response(["a", "b"]))
+        requested_ids = [doc["_id"] for doc in mock_get.call_args[1]["body"]["docs"]]
+        assert requested_ids == ["a", "b", "a", "b"]
+        assert [doc["_id"] for doc in result["docs"]] == ["a", "b"]
+
+    def test_unexpected_result_count(self):
+        response = self._mget_response(["a"])
+        response["docs"].append(response["docs"][0])
+        with self.assertRaises(InternalError):
+            self._get(["a"], response)
@@ -1,8 +1,15 @@
+import json
+import os
+import shutil
+import tempfile
 from unittest import mock
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import marqo.tensor_search.api as api
+from marqo.tensor_search import indexing_jobs, on_start_script
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.models.indexing_job_objects import IndexingJobParams
 from tests.marqo_test import MarqoTestCase
 
 
@@ -193,4 +200,180 @@ class ApiTestsDeleteDocs(MarqoTestCase):
             args, kwargs = mock_delete_documents.call_args
 
             # Assert that delete_documents is called with the correct new arguments
-            assert kwargs["auto_refresh"] == True
\ No newline at end of file
+            assert kwargs["auto_refresh"] == True
+
+class ApiTestsAsyncRequestPath(MarqoTestCase):
+    def setUp(self):
+        api.OPENSEARCH_URL = 'http://localhost:0000'
+        self.client = TestClient(api.app)
+
+    def test_search_on_event_loop_if_enabled(self):
+        with mock.patch('marqo.tensor_search.async_tensor_search.search',
+                        mock.AsyncMock(return_value={"hits": []})) as mock_async_search, \
+                mock.patch('marqo.tensor_search.tensor_search.search') as mock_search, \
+                mock.patch.dict(os.environ, {EnvVars.MARQO_ENABLE_ASYNC_REQUEST_PATH: "TRUE"}):
+            response = self.client.post("/indexes/index1/search?device=cpu", json={"q": "hello", "limit": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"hits": []})
+        mock_async_search.assert_awaited_once()
+        mock_search.assert_not_called()
+        args, kwargs = mock_async_search.call_args
+        assert kwargs["text"] == "hello"
+        assert kwargs["result_count"] == 5
+
+    def test_search_in_threadpool_by_default(self):
+        with mock.patch('marqo.tensor_search.async_tensor_search.search', mock.AsyncMock()) as mock_async_search, \
+                mock.patch('marqo.tensor_search.tensor_search.search',
+                           return_value={"hits": []}) as mock_search:
+            response = self.client.post("/indexes/index1/search?device=cpu", json={"q": "hello"})
+        self.assertEqual(response.status_code, 200)
+        mock_search.assert_called_once()
+        mock_async_search.assert_not_called()
+
+    def test_add_documents_on_event_loop_if_enabled(self):
+        with mock.patch('marqo.tensor_search.async_tensor_search.add_documents',
+                        mock.AsyncMock(return_value={"errors": False})) as mock_async_add_documents, \
+                mock.patch('marqo.tensor_search.tensor_search.add_documents') as mock_add_documents, \
+                mock.patch.dict(os.environ, {EnvVars.MARQO_ENABLE_ASYNC_REQUEST_PATH: "TRUE"}):
+            response = self.client.post(
+                "/indexes/index1/documents?device=cpu&refresh=true",
+                json={"documents": [{"id": "1", "text": "This is a test document"}], "tensorFields": ['text']},
+            )
+        self.assertEqual(response.status_code, 200)
+        mock_async_add_documents.assert_awaited_once()
+        mock_add_documents.assert_not_called()
+        args, kwargs = mock_async_add_documents.call_args
+        assert kwargs["add_docs_params"].auto_refresh == True
+        assert kwargs["add_docs_params"].tensor_fields == ['text']
+
+
+class ApiTestsAddDocumentsJobs(MarqoTestCase):
+    def setUp(self):
+        api.OPENSEARCH_URL = 'http://localhost:0000'
+        self.client = TestClient(api.app)
+        self.jobs_directory = tempfile.mkdtemp()
+        self.patchers = [
+            mock.patch.dict(os.environ, {EnvVars.MARQO_INDEXING_JOBS_DIR: self.jobs_directory,
+                                         EnvVars.MARQO_INDEXING_JOB_WORKER_COUNT: "0"}),
+            mock.patch('marqo.tensor_search.api.get_index_info'),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        indexing_jobs.shutdown()
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.jobs_directory, ignore_errors=True)
+
+    def test_submit_json_body(self):
+        response = self.client.post(
+            "/indexes/index1/documents/jobs?device=cpu&refresh=true&batch_size=2",
+            json={"documents": [{"_id": str(i), "text": "a"} for i in range(3)], "tensorFields": ["text"]},
+        )
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["details"]["receivedDocuments"] == 3
+        assert job["details"]["batchSize"] == 2
+
+        response = self.client.get(f"/indexes/index1/documents/jobs/{job['jobId']}")
+        self.assertEqual(response.status_code, 200)
+        assert response.json() == job
+
+        params = IndexingJobParams.parse_file(
+            os.path.join(self.jobs_directory, job["jobId"], indexing_jobs.PARAMS_FILE))
+        assert params.tensor_fields == ["text"]
+        assert params.auto_refresh is True
+
+    def test_submit_ndjson_body(self):
+        body = "\n".join(json.dumps({"_id": str(i), "text": "a"}) for i in range(3)) + "\n"
+        response = self.client.post(
+            "/indexes/index1/documents/jobs?device=cpu&tensor_fields=text",
+            data=body, headers={"Content-Type": "application/x-ndjson"},
+        )
+        self.assertEqual(response.status_code, 202)
+        assert response.json()["details"]["receivedDocuments"] == 3
+
+    def test_invalid_ndjson_body(self):
+        response = self.client.post(
+            "/indexes/index1/documents/jobs?device=cpu&tensor_fields=text",
+            data='{"_id": "1"}\nnot json\n', headers={"Content-Type": "application/x-ndjson"},
+        )
+        self.assertEqual(response.status_code, 400)
+        assert "Line 2" in response.json()["message"]
+        assert os.listdir(self.jobs_directory) == []
+
+    def test_job_of_another_index(self):
+        response = self.client.post(
+            "/indexes/index1/documents/jobs?device=cpu",
+            json={"documents": [{"_id": "1", "text": "a"}], "tensorFields": ["text"]},
+        )
+        job_id = response.json()["jobId"]
+        for path in (f"/indexes/index2/documents/jobs/{job_id}", "/indexes/index1/documents/jobs/not-a-job"):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 404)
+            assert response.json()["code"] == "indexing_job_not_found"
+
+
+class ApiTestsAddDocumentsStream(MarqoTestCase):
+    def setUp(self):
+        api.OPENSEARCH_URL = 'http://localhost:0000'
+        self.client = TestClient(api.app)
+
+    @staticmethod
+    def _add_documents_pipelined(config, batches):
+        for add_docs_params in batches:
+            yield {"errors": False, "items": [{"_id": doc["_id"], "result": "created", "status": 201}
+                                              for doc in add_docs_params.docs]}
+
+    def test_results_streamed_as_ndjson(self):
+        body = "".join(json.dumps({"_id": str(i), "text": "a"}) + "\n" for i in range(3))
+        with mock.patch('marqo.tensor_search.tensor_search.add_documents_pipelined',
+                        side_effect=self._add_documents_pipelined) as mock_pipelined:
+            response = self.client.post(
+                "/indexes/index1/documents/stream?device=cpu&tensor_fields=text&batch_size=2&telemetry=true",
+                data=body, headers={"Content-Type": "application/x-ndjson"},
+            )
+        self.assertEqual(response.status_code, 200)
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["_id"] for line in lines[:-1]] == ["0", "1", "2"]
+        assert lines[-1]["summary"]["processedDocuments"] == 3
+        mock_pipelined.assert_called_once()
+
+    def test_invalid_first_line(self):
+        response = self.client.post(
+            "/indexes/index1/documents/stream?device=cpu&tensor_fields=text",
+            data='not json\n', headers={"Content-Type": "application/x-ndjson"},
+        )
+        self.assertEqual(response.status_code, 400)
+        assert "Line 1" in response.json()["message"]
+
+    def test_invalid_batch_size(self):
+        response = self.client.post(
+            "/indexes/index1/documents/stream?device=cpu&tensor_fields=text&batch_size=0",
+            data='{"_id": "1"}\n', headers={"Content-Type": "application/x-ndjson"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ApiTestsReadiness(MarqoTestCase):
+    def setUp(self):
+        api.OPENSEARCH_URL = 'http://localhost:0000'
+        self.client = TestClient(api.app)
+
+    def test_readiness(self):
+        status = on_start_script.ModelPreloadStatus()
+        status.start([("model-a", "cpu")])
+        with mock.patch.object(on_start_script, "model_preload_status", status):
+            response = self.client.get("/readiness")
+            self.assertEqual(response.status_code, 503)
+            assert response.json()["models"] == [{"model": "model-a", "device": "cpu", "status": "queued"}]
+
+            status.update("model-a", "cpu", status="warm")
+            status.finish(preload_time_ms=10)
+            response = self.client.get("/readiness")
+            self.assertEqual(response.status_code, 200)
+            assert response.json()["ready"] is True
+            assert response.json()["preloadTimeMs"] == 10
@@ -1,9 +1,13 @@
+import asyncio
+import os
+from unittest import mock
 import pydantic
 from marqo.tensor_search.models.add_docs_objects import ModelAuth, AddDocsParams, AddDocsBodyParams
 from marqo.tensor_search.web.api_utils import add_docs_params_orchestrator
 from marqo.tensor_search.models.private_models import S3Auth
 import urllib.parse
 from marqo.tensor_search.web import api_utils
+from marqo.tensor_search.enums import EnvVars
 from marqo.errors import InvalidArgError, InternalError, BadRequestError
 from tests.marqo_test import MarqoTestCase
 import unittest
@@ -214,3 +218,68 @@ class TestAddDocsParamsOrchestrator(unittest.TestCase):
                                              query_parameters=kwargs, **kwargs)
             except BadRequestError as e:
                 self.assertIn("Marqo is not accepting any of the following parameters in the query string", str(e))
+
+
+class TestIndexingJobParamsOrchestrator(unittest.TestCase):
+
+    def test_params_from_body(self):
+        body = AddDocsBodyParams(documents=[{"test": "doc"}], tensorFields=["test"], useExistingTensors=True,
+                                 imageDownloadHeaders={"header1": "value1"})
+        params = api_utils.indexing_job_params_orchestrator(
+            index_name="test-index", body=body, device="cpu", auto_refresh=True, batch_size=10,
+            tensor_fields=None, query_parameters={})
+        assert params.tensor_fields == ["test"]
+        assert params.use_existing_tensors is True
+        assert params.image_download_headers == {"header1": "value1"}
+        assert params.batch_size == 10
+        assert params.to_add_docs_params([{"test": "doc"}]).tensor_fields == ["test"]
+
+    def test_params_from_query_string(self):
+        params = api_utils.indexing_job_params_orchestrator(
+            index_name="test-index", body=None, device="cpu", tensor_fields=["test"],
+            query_parameters={"tensor_fields": "test"})
+        assert params.tensor_fields == ["test"]
+        assert params.batch_size == 64
+
+    def test_invalid_batch_size(self):
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_MAX_ADD_DOCS_COUNT: "10"}):
+            for batch_size in (0, -1, 11):
+                with self.assertRaises(BadRequestError):
+                    api_utils.indexing_job_params_orchestrator(
+                        index_name="test-index", body=None, device="cpu", batch_size=batch_size,
+                        tensor_fields=["test"])
+            params = api_utils.indexing_job_params_orchestrator(
+                index_name="test-index", body=None, device="cpu", batch_size=10, tensor_fields=["test"])
+            assert params.batch_size == 10
+
+    def test_tensor_fields_and_non_tensor_fields(self):
+        with self.assertRaises(BadRequestError):
+            api_utils.indexing_job_params_orchestrator(
+                index_name="test-index", body=None, device="cpu", tensor_fields=["a"], non_tensor_fields=["b"])
+
+
+class TestParseNdjson(unittest.TestCase):
+
+    @staticmethod
+    def _parse(chunks, batch_size):
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def collect():
+            return [batch async for batch in api_utils.parse_ndjson(stream(), batch_size=batch_size)]
+
+        return asyncio.run(collect())
+
+    def test_lines_split_across_chunks(self):
+        chunks = [b'{"_id": "1"}\n{"_i', b'd": "2"}\n\n', b'{"_id": "3"}\n{"_id"', b': "4"}']
+        assert self._parse(chunks, batch_size=3) == [[{"_id": "1"}, {"_id": "2"}, {"_id": "3"}], [{"_id": "4"}]]
+
+    def test_blank_lines_skipped(self):
+        assert self._parse([b"\n", b'{"_id": "1"}\r\n  \n'], batch_size=2) == [[{"_id": "1"}]]
+        assert self._parse([b""], batch_size=2) == []
+
+    def test_invalid_line(self):
+        with self.assertRaises(BadRequestError) as e:
+            self._parse([b'{"_id": "1"}\n\n{"_id": 2', b'\n'], batch_size=10)
+        assert "Line 3" in str(e.exception)
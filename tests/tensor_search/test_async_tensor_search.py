@@ -0,0 +1,238 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from marqo import config
+from marqo.errors import IndexNotFoundError
+from marqo.s2_inference import inference_executor
+from marqo.tensor_search import async_tensor_search, configs, tensor_search
+from marqo.tensor_search.enums import IndexSettingsField as NsField, SearchMethod
+from marqo.tensor_search.models.add_docs_objects import AddDocsParams
+from marqo.tensor_search.models.index_info import IndexInfo
+from marqo.tensor_search.telemetry import RequestMetrics, RequestMetricsStore
+
+
+class TestInferenceExecutor(unittest.TestCase):
+
+    def tearDown(self) -> None:
+        inference_executor.shutdown()
+
+    def test_run_in_inference_pool(self):
+        def func(a, b=None):
+            return threading.current_thread().name, a, b
+
+        thread_name, a, b = asyncio.run(inference_executor.run(func, 1, b=2))
+        assert thread_name.startswith("inference")
+        assert (a, b) == (1, 2)
+
+    def test_runs_in_callers_context(self):
+        metrics = RequestMetrics()
+
+        async def record_in_pool():
+            RequestMetricsStore.set_in_request(r=mock.Mock(), metrics=metrics)
+            await inference_executor.run(lambda: RequestMetricsStore.for_request().increment_counter("vectorise"))
+
+        asyncio.run(record_in_pool())
+        assert metrics.counter["vectorise"] == 1
+
+
+class TestAsyncSearch(unittest.TestCase):
+    """Compares async_tensor_search.search() with tensor_search.search(), for the same Marqo-OS responses.
+    Marqo-OS is mocked."""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        RequestMetricsStore.set_in_request(mock.Mock())
+        self.index_info = mock.MagicMock()
+        self.index_info.get_true_text_properties.return_value = ["title"]
+        self.index_info.get_text_properties.return_value = {"title": {}}
+        self.patchers = [
+            mock.patch("marqo.tensor_search.index_meta_cache.get_cache", return_value={"my-index": self.index_info}),
+            mock.patch("marqo.tensor_search.index_meta_cache.mark_index_hot"),
+            mock.patch("marqo.tensor_search.index_meta_cache.get_index_info", return_value=self.index_info),
+            mock.patch("marqo.tensor_search.tensor_search.get_index_info", return_value=self.index_info),
+            mock.patch("marqo.tensor_search.tensor_search.run_vectorise_pipeline",
+                       side_effect=self._vectorise),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.vectorise_threads = []
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+        inference_executor.shutdown()
+
+    def _vectorise(self, *args, **kwargs):
+        self.vectorise_threads.append(threading.current_thread().name)
+        return {0: [0.1, 0.2]}
+
+    @staticmethod
+    def _tensor_hit(doc_id: str, score: float) -> dict:
+        return {"_id": doc_id, "_score": score, "_source": {"title": f"title of {doc_id}"},
+                "inner_hits": {"__chunks": {"hits": {"hits": [
+                    {"_score": score, "_source": {"__field_name": "title", "__field_content": f"title of {doc_id}"}}
+                ]}}}}
+
+    @staticmethod
+    def _lexical_hit(doc_id: str, score: float) -> dict:
+        return {"_id": doc_id, "_score": score, "_source": {"title": f"title of {doc_id}"}}
+
+    def _search_both(self, response: dict, backend_function: str, **kwargs):
+        """Returns the results of the sync and async search, and the body each sent to Marqo-OS"""
+        with mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+            mock_http_requests.return_value.get.return_value = response
+            sync_result = tensor_search.search(
+                config=self.config, index_name="my-index", text="hello", device="cpu", **kwargs)
+        sync_body = mock_http_requests.return_value.get.call_args[1]["body"]
+
+        with mock.patch(f"marqo.tensor_search.async_backend.{backend_function}",
+                        mock.AsyncMock(return_value=response)) as mock_backend:
+            async_result = asyncio.run(async_tensor_search.search(
+                config=self.config, index_name="my-index", text="hello", device="cpu", **kwargs))
+        async_body = mock_backend.call_args[1]["body"]
+
+        del sync_result["processingTimeMs"]
+        del async_result["processingTimeMs"]
+        return sync_result, async_result, sync_body, async_body
+
+    def test_tensor_search(self):
+        response = {"took": 2, "responses": [{"hits": {"hits": [self._tensor_hit("a", 0.9), self._tensor_hit("b", 0.5)]}}]}
+        sync_result, async_result, sync_body, async_body = self._search_both(
+            response, "msearch", search_method=SearchMethod.TENSOR, result_count=2, filter="title:(x)")
+        assert async_result == sync_result
+        assert [hit["_id"] for hit in async_result["hits"]] == ["a", "b"]
+        assert tensor_search.utils.dicts_to_jsonl(async_body) == sync_body
+        # the query is vectorised in the inference pool, not on the event loop
+        assert self.vectorise_threads[0] == "MainThread"
+        assert self.vectorise_threads[1].startswith("inference")
+
+    def test_lexical_search(self):
+        response = {"took": 1, "hits": {"hits": [self._lexical_hit("a", 2.0), self._lexical_hit("b", 1.0)]}}
+        sync_result, async_result, sync_body, async_body = self._search_both(
+            response, "search", search_method=SearchMethod.LEXICAL, result_count=2, offset=1)
+        assert async_result == sync_result
+        assert [hit["_id"] for hit in async_result["hits"]] == ["a", "b"]
+        assert async_body == sync_body
+
+    def test_lexical_search_body_built_off_the_event_loop(self):
+        index_info_threads = []
+
+        def get_index_info(*args, **kwargs):
+            index_info_threads.append(threading.current_thread().name)
+            return self.index_info
+
+        response = {"took": 1, "hits": {"hits": [self._lexical_hit("a", 2.0)]}}
+        with mock.patch("marqo.tensor_search.index_meta_cache.get_index_info", side_effect=get_index_info), \
+                mock.patch("marqo.tensor_search.async_backend.search", mock.AsyncMock(return_value=response)):
+            asyncio.run(async_tensor_search.search(config=self.config, index_name="my-index", text="hello",
+                                                   device="cpu", search_method=SearchMethod.LEXICAL))
+        assert index_info_threads
+        assert all(name.startswith("inference") for name in index_info_threads)
+
+    def test_hybrid_search(self):
+        response = {"took": 2, "responses": [{"hits": {"hits": [self._lexical_hit("a", 3.0)]}},
+                                  {"hits": {"hits": [self._tensor_hit("b", 0.9)]}}]}
+        sync_result, async_result, sync_body, async_body = self._search_both(
+            response, "msearch", search_method=SearchMethod.HYBRID)
+        assert async_result == sync_result
+        assert [hit["_id"] for hit in async_result["hits"]] == ["b", "a"]
+        assert tensor_search.utils.dicts_to_jsonl(async_body) == sync_body
+
+    def test_index_info_fetched_if_not_cached(self):
+        response = {"took": 2, "responses": [{"hits": {"hits": []}}]}
+        with mock.patch("marqo.tensor_search.index_meta_cache.get_cache", return_value={}), \
+                mock.patch("marqo.tensor_search.async_backend.get_index_info",
+                           mock.AsyncMock(return_value=self.index_info)) as mock_get_index_info, \
+                mock.patch("marqo.tensor_search.async_backend.msearch", mock.AsyncMock(return_value=response)):
+            result = asyncio.run(async_tensor_search.search(
+                config=self.config, index_name="my-index", text="hello", device="cpu"))
+        mock_get_index_info.assert_awaited_once()
+        assert result["hits"] == []
+
+
+class TestAsyncAddDocuments(unittest.TestCase):
+    """Compares async_tensor_search.add_documents() with tensor_search.add_documents(). Marqo-OS and the model are
+    mocked."""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        RequestMetricsStore.set_in_request(mock.Mock())
+        index_settings = configs.get_default_index_settings()
+        index_settings[NsField.index_defaults][NsField.text_preprocessing][NsField.split_method] = "passage"
+        self.index_info = IndexInfo(model_name="hf/all_datasets_v4_MiniLM-L6", search_model_name=None,
+                                    properties={}, index_settings=index_settings)
+        self.bulk_response = {"took": 3, "errors": False, "items": [
+            {"index": {"_id": "1", "result": "created", "status": 201}},
+            {"index": {"_id": "2", "result": "created", "status": 201}},
+        ]}
+        self.vectorise_patcher = mock.patch(
+            "marqo.s2_inference.s2_inference.vectorise",
+            side_effect=lambda content, **kwargs: [[0.1] * 384 for _ in content])
+        self.vectorise_patcher.start()
+
+    def tearDown(self) -> None:
+        self.vectorise_patcher.stop()
+        inference_executor.shutdown()
+
+    def _add_docs_params(self, **kwargs) -> AddDocsParams:
+        return AddDocsParams(
+            index_name="my-index", auto_refresh=True, device="cpu", tensor_fields=["title"],
+            non_tensor_fields=None, docs=[{"_id": "1", "title": "hello", "desc": "a"}, {"_id": "2", "title": "world", "desc": "b"}],
+            **kwargs)
+
+    def test_same_bulk_request_and_response(self):
+        with mock.patch("marqo.tensor_search.backend.get_index_info", return_value=self.index_info), \
+                mock.patch("marqo.tensor_search.backend.add_customer_field_properties") as mock_add_properties, \
+                mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+            mock_http_requests.return_value.post.return_value = self.bulk_response
+            sync_result = tensor_search.add_documents(config=self.config, add_docs_params=self._add_docs_params())
+
+        with mock.patch("marqo.tensor_search.async_backend.get_index_info",
+                        mock.AsyncMock(return_value=self.index_info)), \
+                mock.patch("marqo.tensor_search.async_backend.add_customer_field_properties",
+                           mock.AsyncMock()) as mock_async_add_properties, \
+                mock.patch("marqo.tensor_search.async_backend.bulk",
+                           mock.AsyncMock(return_value=self.bulk_response)) as mock_bulk:
+            async_result = asyncio.run(async_tensor_search.add_documents(
+                config=self.config, add_docs_params=self._add_docs_params()))
+
+        del sync_result["processingTimeMs"]
+        del async_result["processingTimeMs"]
+        assert async_result == sync_result
+        assert [item["_id"] for item in async_result["items"]] == ["1", "2"]
+
+        sync_post_kwargs = mock_http_requests.return_value.post.call_args[1]
+        bulk_kwargs = mock_bulk.call_args[1]
+        assert sync_post_kwargs["path"] == "_bulk?refresh=true" and bulk_kwargs["auto_refresh"] is True
+        sync_bulk = [json.loads(line) for line in sync_post_kwargs["body"].splitlines()]
+        async_bulk = [json.loads(line) for line in bulk_kwargs["serialised_body"].splitlines()]
+        assert async_bulk == sync_bulk
+        assert async_bulk[1]["__chunks"][0]["__vector_marqo_knn_field"] == [0.1] * 384
+        assert (mock_async_add_properties.call_args[1]["customer_field_names"]
+                == mock_add_properties.call_args[1]["customer_field_names"])
+
+    def test_existing_docs_fetched_with_mget(self):
+        # 2 results per doc: its content and its chunks
+        mget_response = {"docs": [{"_index": "my-index", "_id": doc_id, "found": False}
+                                  for doc_id in ("1", "1", "2", "2")]}
+        with mock.patch("marqo.tensor_search.async_backend.get_index_info",
+                        mock.AsyncMock(return_value=self.index_info)), \
+                mock.patch("marqo.tensor_search.async_backend.add_customer_field_properties", mock.AsyncMock()), \
+                mock.patch("marqo.tensor_search.async_backend.mget",
+                           mock.AsyncMock(return_value=mget_response)) as mock_mget, \
+                mock.patch("marqo.tensor_search.async_backend.bulk", mock.AsyncMock(return_value=self.bulk_response)):
+            result = asyncio.run(async_tensor_search.add_documents(
+                config=self.config, add_docs_params=self._add_docs_params(use_existing_tensors=True)))
+        assert {doc["_id"] for doc in mock_mget.call_args[1]["body"]["docs"]} == {"1", "2"}
+        assert result["errors"] is False
+
+    def test_index_not_found(self):
+        with mock.patch("marqo.tensor_search.async_backend.get_index_info",
+                        mock.AsyncMock(side_effect=IndexNotFoundError("not found"))):
+            with self.assertRaises(IndexNotFoundError) as e:
+                asyncio.run(async_tensor_search.add_documents(
+                    config=self.config, add_docs_params=self._add_docs_params()))
+        assert "my-index" in str(e.exception)
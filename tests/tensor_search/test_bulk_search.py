@@ -15,7 +15,7 @@ from marqo.errors import (
 )
 
 from marqo.tensor_search.tensor_search import _create_dummy_query_for_zero_vector_search
-from marqo.tensor_search import api, tensor_search, index_meta_cache, utils
+from marqo.tensor_search import api, tensor_search, index_meta_cache, utils, query_vector_cache
 from marqo.tensor_search.models.api_models import BulkSearchQuery, BulkSearchQueryEntity
 from marqo.tensor_search.models.index_info import IndexInfo
 from marqo.tensor_search.models.search import Qidx, JHash, VectorisedJobPointer, VectorisedJobs
@@ -25,6 +25,7 @@ from typing import Dict, List
 import pydantic
 from tests.utils.transition import add_docs_caller, add_docs_batched
 from marqo.tensor_search.models.search import SearchContext, SearchContextTensor
+from marqo.tensor_search.telemetry import RequestMetricsStore
 
 
 
@@ -326,6 +327,8 @@ class TestCreateVectorJobs(MarqoTestCase):
 
 class TestVectoriseJobs(unittest.TestCase):
     def setUp(self):
+        # vectorise_jobs() records query vector cache hits and misses in the request's metrics
+        RequestMetricsStore.set_in_request(mock.Mock())
         self.vectorised_jobs = [
             VectorisedJobs(
                 model_name='test_model',
@@ -392,6 +395,69 @@ class TestVectoriseJobs(unittest.TestCase):
         self.assertListEqual(result[vectorised_jobs[0].groupby_key()]['test_content'], [0.1, 0.2, 0.3])
         self.assertListEqual(result[vectorised_jobs[1].groupby_key()]['test_content2'], [0.4, 0.5, 0.6])
 
+    @mock.patch('marqo.s2_inference.s2_inference.vectorise')
+    def test_vectorise_jobs_uses_query_vector_cache(self, mock_vectorise):
+        mock_vectorise.return_value = [[0.1, 0.2, 0.3]]
+        tensor_search.vectorise_jobs(self.vectorised_jobs)
+
+        # Only content that isn't cached is vectorised
+        job = self.vectorised_jobs[0].copy(update={"content": ['test_content', 'new_content', 'new_content']})
+        mock_vectorise.reset_mock()
+        mock_vectorise.return_value = [[0.4, 0.5, 0.6]]
+        result = tensor_search.vectorise_jobs([job])
+
+        mock_vectorise.assert_called_once()
+        self.assertListEqual(mock_vectorise.call_args.kwargs["content"], ['new_content'])
+        self.assertListEqual(result[job.groupby_key()]['test_content'], [0.1, 0.2, 0.3])
+        self.assertListEqual(result[job.groupby_key()]['new_content'], [0.4, 0.5, 0.6])
+
+    @mock.patch('marqo.s2_inference.s2_inference.vectorise')
+    def test_vectorise_jobs_query_vector_cache_metrics(self, mock_vectorise):
+        mock_metrics = mock.Mock()
+        RequestMetricsStore.set_in_request(mock.Mock(), metrics=mock_metrics)
+        mock_vectorise.return_value = [[0.1, 0.2, 0.3]]
+
+        tensor_search.vectorise_jobs(self.vectorised_jobs)
+        tensor_search.vectorise_jobs(self.vectorised_jobs)
+
+        mock_vectorise.assert_called_once()
+        self.assertListEqual(mock_metrics.increment_counter.call_args_list, [
+            mock.call("search.query_vector_cache.hits", 0), mock.call("search.query_vector_cache.misses", 1),
+            mock.call("search.query_vector_cache.hits", 1), mock.call("search.query_vector_cache.misses", 0),
+        ])
+
+    @mock.patch('marqo.s2_inference.s2_inference.vectorise')
+    def test_vectorise_jobs_query_vector_cache_keys(self, mock_vectorise):
+        """Content vectorised with different parameters shouldn't share a cached vector."""
+        mock_vectorise.return_value = [[0.1, 0.2, 0.3]]
+        tensor_search.vectorise_jobs(self.vectorised_jobs)
+
+        for update in [{"normalize_embeddings": False}, {"model_name": "test_model2"},
+                       {"model_properties": {"name": "other", "dimensions": 3}}, {"device": "cuda"},
+                       {"content_type": "image"}]:
+            mock_vectorise.reset_mock()
+            tensor_search.vectorise_jobs([self.vectorised_jobs[0].copy(update=update)])
+            mock_vectorise.assert_called_once()
+
+    @mock.patch('marqo.s2_inference.s2_inference.vectorise')
+    def test_vectorise_jobs_query_vector_cache_disabled(self, mock_vectorise):
+        mock_vectorise.return_value = [[0.1, 0.2, 0.3]]
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_QUERY_VECTOR_CACHE_MAX_BYTES: "0"}):
+            query_vector_cache.empty_cache()
+            tensor_search.vectorise_jobs(self.vectorised_jobs)
+            tensor_search.vectorise_jobs(self.vectorised_jobs)
+        query_vector_cache.empty_cache()
+        self.assertEqual(mock_vectorise.call_count, 2)
+
+    @mock.patch('marqo.s2_inference.s2_inference.eject_model')
+    @mock.patch('marqo.s2_inference.s2_inference.vectorise')
+    def test_eject_model_invalidates_query_vector_cache(self, mock_vectorise, mock_eject_model):
+        mock_vectorise.return_value = [[0.1, 0.2, 0.3]]
+        tensor_search.vectorise_jobs(self.vectorised_jobs)
+        tensor_search.eject_model(model_name='test_model', device='cpu')
+        tensor_search.vectorise_jobs(self.vectorised_jobs)
+        self.assertEqual(mock_vectorise.call_count, 2)
+
 
 class TestBulkSearch(MarqoTestCase):
     def setUp(self) -> None:
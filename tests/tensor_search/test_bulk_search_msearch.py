@@ -0,0 +1,151 @@
+import json
+import unittest
+from unittest import mock
+
+from marqo import config
+from marqo.errors import IndexNotFoundError, InvalidArgError
+from marqo.tensor_search import tensor_search
+from marqo.tensor_search.enums import SearchMethod
+from marqo.tensor_search.models.api_models import BulkSearchQuery, BulkSearchQueryEntity
+from marqo.tensor_search.telemetry import RequestMetricsStore
+
+
+class TestBulkSearchMsearch(unittest.TestCase):
+    """Tests that bulk_search() sends its tensor and lexical queries to Marqo-OS in a single `/_msearch` request.
+    Marqo-OS is mocked."""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        RequestMetricsStore.set_in_request(mock.Mock())
+        self.index_info = mock.MagicMock()
+        self.index_info.get_true_text_properties.return_value = ["title"]
+        self.index_info.get_text_properties.return_value = {"title": {}}
+        self.patchers = [
+            mock.patch("marqo.tensor_search.tensor_search.refresh_indexes_in_background"),
+            mock.patch("marqo.tensor_search.index_meta_cache.get_index_info", return_value=self.index_info),
+            mock.patch("marqo.tensor_search.tensor_search.get_index_info", return_value=self.index_info),
+            mock.patch("marqo.tensor_search.tensor_search.run_vectorise_pipeline", side_effect=self._vectorise),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.vectorised_queries = []
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _vectorise(self, config, queries, device):
+        self.vectorised_queries.append([q.q for q in queries])
+        return {qidx: [0.1, 0.2] for qidx in range(len(queries))}
+
+    @staticmethod
+    def _tensor_hit(doc_id: str, score: float) -> dict:
+        return {"_id": doc_id, "_score": score, "_source": {"title": f"title of {doc_id}"},
+                "inner_hits": {"__chunks": {"hits": {"hits": [
+                    {"_score": score, "_source": {"__field_name": "title", "__field_content": f"title of {doc_id}"}}
+                ]}}}}
+
+    @staticmethod
+    def _lexical_hit(doc_id: str, score: float) -> dict:
+        return {"_id": doc_id, "_score": score, "_source": {"title": f"title of {doc_id}"}}
+
+    def _bulk_search(self, queries, response: dict):
+        """Returns the bulk search results, and the mocked `HttpRequests().get`"""
+        with mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+            mock_http_requests.return_value.get.return_value = response
+            result = tensor_search.bulk_search(
+                query=BulkSearchQuery(queries=queries), marqo_config=self.config, device="cpu")
+        return result["result"], mock_http_requests.return_value.get
+
+    def test_tensor_and_lexical_in_one_msearch(self):
+        queries = [
+            BulkSearchQueryEntity(index="index-a", q="lexical one", searchMethod=SearchMethod.LEXICAL, limit=2),
+            BulkSearchQueryEntity(index="index-b", q="tensor one", searchMethod=SearchMethod.TENSOR),
+            BulkSearchQueryEntity(index="index-a", q="lexical two", searchMethod=SearchMethod.LEXICAL, offset=3),
+            BulkSearchQueryEntity(index="index-b", q="tensor two", searchMethod=SearchMethod.TENSOR),
+        ]
+        response = {"took": 3, "responses": [
+            {"hits": {"hits": [self._lexical_hit("l1", 2.0), self._lexical_hit("l2", 1.0)]}},
+            {"hits": {"hits": [self._tensor_hit("t1", 0.9)]}},
+            {"hits": {"hits": [self._lexical_hit("l3", 1.5)]}},
+            {"hits": {"hits": [self._tensor_hit("t2", 0.8), self._tensor_hit("t3", 0.7)]}},
+        ]}
+        results, mock_get = self._bulk_search(queries, response)
+
+        mock_get.assert_called_once()
+        assert mock_get.call_args[1]["path"] == "_msearch"
+        body = [json.loads(line) for line in mock_get.call_args[1]["body"].splitlines() if line]
+        assert body[::2] == [{"index": "index-a"}, {"index": "index-b"},
+                             {"index": "index-a"}, {"index": "index-b"}]
+        # lexical bodies are the same as those of a lexical `/_search`
+        assert body[1] == tensor_search._create_lexical_search_query(
+            text="lexical one", fields_to_search=["title"], result_count=2, offset=0)
+        assert body[5]["from"] == 3
+        # only tensor queries are vectorised
+        assert self.vectorised_queries == [["tensor one", "tensor two"]]
+
+        assert [[hit["_id"] for hit in result["hits"]] for result in results] == [
+            ["l1", "l2"], ["t1"], ["l3"], ["t2", "t3"]]
+        assert [result["query"] for result in results] == [q.q for q in queries]
+        assert results[0]["hits"][0] == {"_id": "l1", "_score": 2.0, "title": "title of l1", "_highlights": []}
+
+    def test_lexical_with_empty_searchable_attributes(self):
+        queries = [
+            BulkSearchQueryEntity(index="index-a", q="nothing", searchMethod=SearchMethod.LEXICAL,
+                                  searchableAttributes=[]),
+            BulkSearchQueryEntity(index="index-a", q="something", searchMethod=SearchMethod.LEXICAL),
+        ]
+        response = {"took": 1, "responses": [{"hits": {"hits": [self._lexical_hit("a", 1.0)]}}]}
+        results, mock_get = self._bulk_search(queries, response)
+        body = mock_get.call_args[1]["body"].splitlines()
+        assert len(body) == 2
+        assert [[hit["_id"] for hit in result["hits"]] for result in results] == [[], ["a"]]
+
+    def test_only_empty_lexical_searches(self):
+        queries = [BulkSearchQueryEntity(index="index-a", q="nothing", searchMethod=SearchMethod.LEXICAL,
+                                         searchableAttributes=[])]
+        results, mock_get = self._bulk_search(queries, response={})
+        mock_get.assert_not_called()
+        assert results[0]["hits"] == []
+        assert self.vectorised_queries == []
+
+    def test_lexical_errors_translated(self):
+        queries = [
+            BulkSearchQueryEntity(index="index-b", q="tensor", searchMethod=SearchMethod.TENSOR),
+            BulkSearchQueryEntity(index="missing", q="lexical", searchMethod=SearchMethod.LEXICAL,
+                                  searchableAttributes=["title"]),
+        ]
+        index_not_found = {"took": 1, "responses": [
+            {"hits": {"hits": []}},
+            {"error": {"root_cause": [{"type": "index_not_found_exception", "reason": "no such index [missing]",
+                                       "index": "missing"}],
+                       "type": "index_not_found_exception", "reason": "no such index [missing]", "index": "missing"},
+             "status": 404}]}
+        with self.assertRaises(IndexNotFoundError):
+            self._bulk_search(queries, index_not_found)
+
+        bad_filter = {"took": 1, "responses": [
+            {"hits": {"hits": []}},
+            {"error": {"root_cause": [{"type": "query_shard_exception",
+                                       "reason": "Failed to parse query [title:(]"}],
+                       "type": "search_phase_execution_exception", "reason": "all shards failed"},
+             "status": 400}]}
+        with self.assertRaises(InvalidArgError):
+            self._bulk_search(queries, bad_filter)
+
+    def test_queries_with_same_reranker_reranked_together(self):
+        queries = [
+            BulkSearchQueryEntity(index="index-a", q="one", searchMethod=SearchMethod.LEXICAL,
+                                  searchableAttributes=["title"], reRanker="my-cross-encoder"),
+            BulkSearchQueryEntity(index="index-a", q="two", searchMethod=SearchMethod.LEXICAL,
+                                  searchableAttributes=["title"]),
+            BulkSearchQueryEntity(index="index-a", q="three", searchMethod=SearchMethod.LEXICAL,
+                                  searchableAttributes=["title"], reRanker="my-cross-encoder"),
+        ]
+        response = {"took": 1, "responses": [{"hits": {"hits": [self._lexical_hit(str(i), 1.0)]}} for i in range(3)]}
+        with mock.patch("marqo.s2_inference.reranking.rerank.rerank_bulk_search_results") as mock_rerank:
+            results, _ = self._bulk_search(queries, response)
+        mock_rerank.assert_called_once()
+        assert mock_rerank.call_args[1]["queries"] == ["one", "three"]
+        assert mock_rerank.call_args[1]["search_results"] == [results[0], results[2]]
+        assert mock_rerank.call_args[1]["searchable_attributes"] == [["title"], ["title"]]
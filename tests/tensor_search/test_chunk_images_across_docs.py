@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+from marqo.s2_inference.errors import ChunkerError
+from marqo.tensor_search import tensor_search
+
+
+class TestChunkImagesAcrossDocs(unittest.TestCase):
+
+    def _entry(self, doc_index: int, image_to_chunk=None) -> dict:
+        return {"field": "image", "field_content": f"https://{doc_index}.png", "text_chunks": ["text"],
+                "content_chunks": ["content"], "content_type": "image", "field_chunks": [],
+                "image_to_chunk": image_to_chunk, "doc": {"doc_index": doc_index, "is_valid": True}}
+
+    def test_images_of_all_docs_chunked_together(self):
+        entries = [self._entry(0, "image 0"), self._entry(1), self._entry(2, "image 2"), self._entry(3, "image 3")]
+        chunker_error = ChunkerError("bad image")
+        with mock.patch("marqo.s2_inference.processing.image.chunk_images", return_value=[
+                (["patch 0a", "patch 0b"], ["box 0a", "box 0b"]), chunker_error, (["patch 3"], ["box 3"])
+        ]) as mock_chunk_images:
+            unchunked = tensor_search._chunk_images_across_docs(entries, image_method="frcnn", device="cpu")
+
+        mock_chunk_images.assert_called_once_with(["image 0", "image 2", "image 3"], device="cpu", method="frcnn")
+        assert unchunked == [(entries[2], chunker_error)]
+        assert (entries[0]["content_chunks"], entries[0]["text_chunks"]) == (
+            ["patch 0a", "patch 0b"], ["box 0a", "box 0b"])
+        assert (entries[1]["content_chunks"], entries[1]["text_chunks"]) == (["content"], ["text"])
+        assert (entries[3]["content_chunks"], entries[3]["text_chunks"]) == (["patch 3"], ["box 3"])
+
+    def test_nothing_to_chunk(self):
+        with mock.patch("marqo.s2_inference.processing.image.chunk_images") as mock_chunk_images:
+            assert tensor_search._chunk_images_across_docs([self._entry(0)], image_method=None, device="cpu") == []
+        mock_chunk_images.assert_not_called()
+
+
+class TestSplitTextsAcrossDocs(unittest.TestCase):
+
+    def test_texts_of_all_docs_split_together(self):
+        index_info = mock.MagicMock()
+        index_info.index_settings = {"index_defaults": {"text_preprocessing": {
+            "split_method": "word", "split_length": 2, "split_overlap": 0}}}
+        entries = [{"text_to_split": "one two three", "image_to_chunk": None},
+                   {"text_to_split": None, "image_to_chunk": "image", "text_chunks": [], "content_chunks": []},
+                   {"text_to_split": "", "image_to_chunk": None}]
+        with mock.patch("marqo.s2_inference.processing.text.split_texts",
+                        side_effect=tensor_search.text_processor.split_texts) as mock_split_texts:
+            tensor_search._split_texts_across_docs(entries, index_info=index_info, text_chunk_prefix="prefix: ")
+
+        mock_split_texts.assert_called_once_with(
+            ["one two three", ""], split_by="word", split_length=2, split_overlap=0)
+        assert entries[0]["text_chunks"] == ["one two", "three"]
+        assert entries[0]["content_chunks"] == ["prefix: one two", "prefix: three"]
+        assert (entries[1]["text_chunks"], entries[1]["content_chunks"]) == ([], [])
+        assert (entries[2]["text_chunks"], entries[2]["content_chunks"]) == ([" "], ["prefix:  "])
@@ -85,7 +85,9 @@ class TestDefaultDevice(MarqoTestCase):
             when device is None or not specified, add_documents will decide the value based on EnvVars.MARQO_BEST_AVAILABLE_DEVICE
             and pass it to vectorise
         """
-        dummy_vector = [[0.0, ] * 384, ]
+        def dummy_vectorise(*args, **kwargs):
+            # One vector per content item, as the docs are vectorised together
+            return [[0.0, ] * 384 for _ in kwargs["content"]]
         devices_list = ["cpu", "cuda", "cuda:0", "cuda:1"]
         AddDocsParams_kwargs_list = [{"index_name": self.index_name_1, "docs": [{"Title": "blah"} for _ in range(5)], "auto_refresh": True, "device": None},
                            {"index_name": self.index_name_1, "docs": [{"Title": "blah"} for _ in range(5)], "auto_refresh": True,}]
@@ -94,7 +96,7 @@ class TestDefaultDevice(MarqoTestCase):
             for AddDocsParams_kwargs in AddDocsParams_kwargs_list:
                 with patch.dict("marqo.tensor_search.utils.os.environ", {EnvVars.MARQO_BEST_AVAILABLE_DEVICE: best_available_device}),\
                      patch("marqo.tensor_search.utils.check_device_is_available", return_value=True) as mock_check_device_is_available,\
-                     patch("marqo.s2_inference.s2_inference.vectorise", return_value=dummy_vector) as mock_vectorise:
+                     patch("marqo.s2_inference.s2_inference.vectorise", side_effect=dummy_vectorise) as mock_vectorise:
                         tensor_search.add_documents(
                         config=self.config,
                         add_docs_params=AddDocsParams(**AddDocsParams_kwargs)
@@ -131,10 +133,12 @@ class TestDefaultDevice(MarqoTestCase):
             add docs orchestrator should call add_documents
             with set device, ignoring MARQO_BEST_AVAILABLE_DEVICE
         """
-        dummy_vector = [[0.0, ] * 384, ]
+        def dummy_vectorise(*args, **kwargs):
+            # One vector per content item, as the docs are vectorised together
+            return [[0.0, ] * 384 for _ in kwargs["content"]]
         devices_list = ["cpu", "cuda", "cuda:0", "cuda:1"]
         for explicitly_set_device in devices_list:
-            with patch("marqo.s2_inference.s2_inference.vectorise", return_value=dummy_vector) as mock_vectorise,\
+            with patch("marqo.s2_inference.s2_inference.vectorise", side_effect=dummy_vectorise) as mock_vectorise,\
                  patch("marqo.tensor_search.models.add_docs_objects.get_best_available_device") as mock_get_best_available_device:
                     tensor_search.add_documents(
                     config=self.config,
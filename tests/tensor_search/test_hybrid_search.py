@@ -0,0 +1,236 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+from marqo import config
+from marqo.errors import IndexNotFoundError, InvalidArgError
+from marqo.tensor_search import fusion, tensor_search
+from marqo.tensor_search.enums import HybridFusionMethod, SearchMethod
+from marqo.tensor_search.models.api_models import SearchQuery
+from marqo.tensor_search.models.search import HybridParameters
+from marqo.tensor_search.telemetry import RequestMetricsStore
+from tests.marqo_test import MarqoTestCase
+from tests.utils.transition import add_docs_caller
+
+
+def _hits(*id_scores):
+    return [{"_id": doc_id, "_score": score, "_highlights": []} for doc_id, score in id_scores]
+
+
+class TestFusion(unittest.TestCase):
+
+    def test_reciprocal_rank_fusion(self):
+        lexical = _hits(("a", 20.0), ("b", 10.0))
+        tensor = _hits(("b", 0.9), ("c", 0.8))
+        fused = fusion.reciprocal_rank_fusion(lexical, tensor, alpha=0.5, k=60)
+        # b is found by both methods
+        assert [hit["_id"] for hit in fused] == ["b", "a", "c"]
+        assert fused[0]["_score"] == 0.5 / 61 + 0.5 / 62
+        assert fused[1]["_score"] == 0.5 / 61
+        assert fused[2]["_score"] == 0.5 / 62
+
+    def test_ties_keep_tensor_order_first(self):
+        fused = fusion.reciprocal_rank_fusion(_hits(("a", 20.0)), _hits(("c", 0.8)))
+        assert [hit["_id"] for hit in fused] == ["c", "a"]
+
+    def test_alpha_weights_methods(self):
+        lexical = _hits(("a", 20.0))
+        tensor = _hits(("c", 0.8))
+        assert [hit["_id"] for hit in fusion.reciprocal_rank_fusion(lexical, tensor, alpha=0.2)] == ["a", "c"]
+        assert [hit["_id"] for hit in fusion.reciprocal_rank_fusion(lexical, tensor, alpha=0.8)] == ["c", "a"]
+        # alpha=1 is the tensor ranking
+        assert [hit["_id"] for hit in fusion.normalized_score_fusion(
+            _hits(("a", 20.0), ("b", 1.0)), _hits(("b", 0.9), ("a", 0.1)), alpha=1)][:2] == ["b", "a"]
+
+    def test_normalized_score_fusion(self):
+        lexical = _hits(("a", 30.0), ("b", 20.0), ("c", 10.0))
+        tensor = _hits(("c", 0.9), ("a", 0.5), ("b", 0.1))
+        fused = fusion.normalized_score_fusion(lexical, tensor, alpha=0.5)
+        scores = {hit["_id"]: hit["_score"] for hit in fused}
+        assert scores == {"a": 0.5 * 1 + 0.5 * 0.5, "b": 0.5 * 0.5 + 0, "c": 0 + 0.5 * 1}
+        assert [hit["_id"] for hit in fused] == ["a", "c", "b"]
+
+    def test_normalized_score_fusion_equal_scores(self):
+        fused = fusion.normalized_score_fusion(_hits(("a", 5.0), ("b", 5.0)), [], alpha=0.5)
+        assert [hit["_score"] for hit in fused] == [0.5, 0.5]
+
+    def test_fused_hit_uses_tensor_fields_and_highlights(self):
+        lexical = [{"_id": "a", "_score": 2.0, "title": "lexical", "_highlights": []}]
+        tensor = [{"_id": "a", "_score": 0.5, "title": "tensor", "_highlights": {"title": "tensor"}}]
+        for fused in (fusion.reciprocal_rank_fusion(lexical, tensor), fusion.normalized_score_fusion(lexical, tensor)):
+            assert len(fused) == 1
+            assert fused[0]["title"] == "tensor"
+            assert fused[0]["_highlights"] == {"title": "tensor"}
+        # inputs aren't modified
+        assert tensor[0]["_score"] == 0.5
+
+    def test_lexical_only_hits_have_dict_highlights(self):
+        fused = fusion.reciprocal_rank_fusion(_hits(("a", 1.0)), [])
+        assert fused[0]["_highlights"] == {}
+
+    def test_fuse_dispatches_on_fusion_method(self):
+        lexical = _hits(("a", 30.0), ("b", 29.0))
+        tensor = _hits(("b", 0.9), ("c", 0.1))
+        assert fusion.fuse(lexical, tensor, HybridParameters()) == fusion.reciprocal_rank_fusion(lexical, tensor)
+        assert fusion.fuse(lexical, tensor, HybridParameters(fusionMethod="NORMALIZED_SCORE", alpha=0.3)) \
+            == fusion.normalized_score_fusion(lexical, tensor, alpha=0.3)
+
+
+class TestHybridParameters(unittest.TestCase):
+
+    def test_defaults(self):
+        params = HybridParameters()
+        assert params.fusionMethod == HybridFusionMethod.RRF
+        assert params.alpha == 0.5
+        assert params.rrfK == 60
+
+    def test_invalid(self):
+        for invalid in [{"alpha": 1.5}, {"alpha": -0.1}, {"rrfK": 0}, {"fusionMethod": "MAX"}, {"other": 1}]:
+            with self.assertRaises(InvalidArgError):
+                HybridParameters(**invalid)
+
+    def test_search_query(self):
+        query = SearchQuery(q="hello", searchMethod="HYBRID", hybridParameters={"fusionMethod": "NORMALIZED_SCORE"})
+        assert query.hybridParameters.fusionMethod == HybridFusionMethod.NORMALIZED_SCORE
+        with self.assertRaises(InvalidArgError):
+            SearchQuery(searchMethod="HYBRID")
+
+
+class TestHybridSearchRequest(unittest.TestCase):
+    """Tests the /_msearch request sent by _hybrid_search() and how its response is fused. Marqo-OS is mocked."""
+
+    def setUp(self) -> None:
+        self.config = config.Config(url="https://localhost:9200")
+        RequestMetricsStore.set_in_request(mock.Mock())
+        self.index_info = mock.MagicMock()
+        self.index_info.get_true_text_properties.return_value = ["title", "desc"]
+        self.index_info.get_text_properties.return_value = {"title": {}, "desc": {}}
+
+    @staticmethod
+    def _tensor_hit(doc_id: str, score: float) -> dict:
+        return {"_id": doc_id, "_score": score, "_source": {"title": f"title of {doc_id}"},
+                "inner_hits": {"__chunks": {"hits": {"hits": [
+                    {"_score": score, "_source": {"__field_name": "title", "__field_content": f"title of {doc_id}"}}
+                ]}}}}
+
+    @staticmethod
+    def _lexical_hit(doc_id: str, score: float) -> dict:
+        return {"_id": doc_id, "_score": score, "_source": {"title": f"title of {doc_id}"}}
+
+    def _search(self, lexical_hits, tensor_hits, **kwargs):
+        response = {"took": 2, "responses": [{"hits": {"hits": lexical_hits}}, {"hits": {"hits": tensor_hits}}]}
+        with mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests, \
+                mock.patch("marqo.tensor_search.tensor_search.get_index_info", return_value=self.index_info), \
+                mock.patch("marqo.tensor_search.tensor_search.run_vectorise_pipeline",
+                           return_value={0: [0.1, 0.2]}) as mock_vectorise:
+            mock_http_requests.return_value.get.return_value = response
+            result = tensor_search._hybrid_search(
+                config=self.config, index_name="my-index", text="hello", device="cpu", **kwargs)
+        mock_get = mock_http_requests.return_value.get
+        assert mock_get.call_count == 1
+        assert mock_get.call_args[1]["path"] == "_msearch"
+        body = [json.loads(line) for line in mock_get.call_args[1]["body"].splitlines() if line]
+        return result, body, mock_vectorise
+
+    def test_single_msearch_with_lexical_and_tensor_queries(self):
+        result, body, mock_vectorise = self._search(
+            [self._lexical_hit("a", 3.0)], [self._tensor_hit("b", 0.9)],
+            filter_string="title:(x)", searchable_attributes=["title"], attributes_to_retrieve=["title"])
+        assert len(body) == 4
+        assert body[0] == {"index": "my-index"} and body[2] == {"index": "my-index"}
+        lexical_query, tensor_query = body[1], body[3]
+        assert lexical_query["query"]["bool"]["should"] == [{"match": {"title": "hello"}}]
+        assert lexical_query["query"]["bool"]["filter"] == [{"query_string": {"query": "title:(x)"}}]
+        assert lexical_query["_source"]["include"] == ["title"]
+        knn = tensor_query["query"]["nested"]["query"]["knn"]["__chunks.__vector_marqo_knn_field"]
+        assert knn["vector"] == [0.1, 0.2]
+        assert "title:(x)" in knn["filter"]["query_string"]["query"]
+        assert tensor_query["_source"] == {"include": ["title"]}
+        assert mock_vectorise.call_args[1]["queries"][0].q == "hello"
+        assert [hit["_id"] for hit in result["hits"]] == ["b", "a"]
+
+    def test_all_text_fields_searched_by_default(self):
+        _, body, _ = self._search([], [])
+        assert body[1]["query"]["bool"]["should"] == [{"match": {"title": "hello"}}, {"match": {"desc": "hello"}}]
+
+    def test_pagination(self):
+        lexical = [self._lexical_hit(doc_id, 10.0 - i) for i, doc_id in enumerate(["a", "b", "c", "d"])]
+        tensor = [self._tensor_hit(doc_id, 0.9 - i / 10) for i, doc_id in enumerate(["a", "b", "c", "d"])]
+        result, body, _ = self._search(lexical, tensor, result_count=2, offset=1)
+        # each method retrieves the top offset + limit hits, from the first rank
+        assert body[1]["size"] == 3 and body[1]["from"] == 0
+        assert body[3]["size"] == 3 and body[3]["from"] == 0
+        assert [hit["_id"] for hit in result["hits"]] == ["b", "c"]
+
+    def test_fusion_method(self):
+        lexical = [self._lexical_hit("a", 100.0), self._lexical_hit("b", 1.0)]
+        tensor = [self._tensor_hit("b", 0.51), self._tensor_hit("a", 0.5), self._tensor_hit("c", 0.0)]
+        rrf, _, _ = self._search(lexical, tensor, result_count=3)
+        # a and b tie on rank, so the tensor ranking comes first
+        assert [hit["_id"] for hit in rrf["hits"]] == ["b", "a", "c"]
+        normalised, _, _ = self._search(lexical, tensor, result_count=3, hybrid_parameters=HybridParameters(
+            fusionMethod=HybridFusionMethod.NORMALIZED_SCORE))
+        assert [hit["_id"] for hit in normalised["hits"]] == ["a", "b", "c"]
+        assert normalised["hits"][0]["_score"] == 0.5 * 0.5 / 0.51 + 0.5
+        assert normalised["hits"][0]["_highlights"] == {"title": "title of a"}
+
+    def test_empty_searchable_attributes(self):
+        with mock.patch("marqo.tensor_search.tensor_search.HttpRequests") as mock_http_requests:
+            result = tensor_search._hybrid_search(
+                config=self.config, index_name="my-index", text="hello", device="cpu", searchable_attributes=[])
+        assert result == {"hits": []}
+        mock_http_requests.return_value.get.assert_not_called()
+
+    def test_query_must_be_str(self):
+        with self.assertRaises(InvalidArgError):
+            tensor_search._hybrid_search(config=self.config, index_name="my-index", text={"a": 1}, device="cpu")
+
+
+class TestHybridSearch(MarqoTestCase):
+
+    def setUp(self) -> None:
+        self.index_name_1 = "my-test-index-1"
+        try:
+            tensor_search.delete_index(config=self.config, index_name=self.index_name_1)
+        except IndexNotFoundError:
+            pass
+        tensor_search.create_vector_index(config=self.config, index_name=self.index_name_1)
+        self.device_patcher = mock.patch.dict(os.environ, {"MARQO_BEST_AVAILABLE_DEVICE": "cpu"})
+        self.device_patcher.start()
+
+    def tearDown(self) -> None:
+        self.device_patcher.stop()
+
+    def test_hybrid_search(self):
+        add_docs_caller(
+            config=self.config, index_name=self.index_name_1, docs=[
+                {"title": "The hippopotamus is a large mammal", "_id": "hippo"},
+                {"title": "Cars drive on the road", "_id": "car"},
+                {"title": "A horse is an animal people ride", "_id": "horse"},
+            ], auto_refresh=True)
+        for fusion_method in HybridFusionMethod:
+            res = tensor_search.search(
+                config=self.config, index_name=self.index_name_1, text="hippopotamus",
+                search_method=SearchMethod.HYBRID, hybrid_parameters=HybridParameters(fusionMethod=fusion_method))
+            assert res["hits"][0]["_id"] == "hippo"
+            assert len(res["hits"]) == 3
+
+        filtered = tensor_search.search(
+            config=self.config, index_name=self.index_name_1, text="hippopotamus",
+            search_method=SearchMethod.HYBRID, filter="_id:car")
+        assert [hit["_id"] for hit in filtered["hits"]] == ["car"]
+
+        first_page = tensor_search.search(
+            config=self.config, index_name=self.index_name_1, text="hippopotamus",
+            search_method=SearchMethod.HYBRID, result_count=2)
+        second_page = tensor_search.search(
+            config=self.config, index_name=self.index_name_1, text="hippopotamus",
+            search_method=SearchMethod.HYBRID, result_count=1, offset=1)
+        assert [hit["_id"] for hit in second_page["hits"]] == [first_page["hits"][1]["_id"]]
+
+    def test_hybrid_parameters_only_for_hybrid_search(self):
+        with self.assertRaises(InvalidArgError):
+            tensor_search.search(
+                config=self.config, index_name=self.index_name_1, text="hippopotamus",
+                search_method=SearchMethod.TENSOR, hybrid_parameters=HybridParameters())
@@ -9,6 +9,7 @@ from requests import get as requests_get
 from marqo.tensor_search.models.api_models import BulkSearchQuery
 from unittest import mock
 import requests
+from marqo.s2_inference import image_download
 from marqo.s2_inference.clip_utils import load_image_from_path
 from marqo.tensor_search.enums import IndexSettingsField
 from marqo.errors import IndexNotFoundError
@@ -72,20 +73,19 @@ class TestImageDownloadHeaders(MarqoTestCase):
         mock_get = unittest.mock.MagicMock()
         mock_get.side_effect = pass_through_requests_get
 
-        # Mock the requests.get method to check if the headers are passed correctly
-        with mock.patch("requests.get", mock_get):
-            with mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_get, requests.post, requests.put}):
-                # Perform a vector search
-                search_res = tensor_search._vector_text_search(
-                    config=self.config, index_name=self.index_name_1,
-                    result_count=1, query=self.real_img_url, image_download_headers=image_download_headers, device="cpu"
-                )
-                # Check if the image URL was called at least once with the correct headers
-                image_url_called = any(
-                    call_args[0] == self.real_img_url and call_kwargs.get('headers', None) == image_download_headers
-                    for call_args, call_kwargs in mock_get.call_args_list
-                )
-                assert image_url_called, "Image URL not called with the correct headers"
+        # Mock the image download session's get method to check if the headers are passed correctly
+        with mock.patch.object(image_download.get_session(), "get", mock_get):
+            # Perform a vector search
+            search_res = tensor_search._vector_text_search(
+                config=self.config, index_name=self.index_name_1,
+                result_count=1, query=self.real_img_url, image_download_headers=image_download_headers, device="cpu"
+            )
+            # Check if the image URL was called at least once with the correct headers
+            image_url_called = any(
+                call_args[0] == self.real_img_url and call_kwargs.get('headers', None) == image_download_headers
+                for call_args, call_kwargs in mock_get.call_args_list
+            )
+            assert image_url_called, "Image URL not called with the correct headers"
 
     def test_img_download_add_docs(self):
 
@@ -149,14 +149,13 @@ class TestImageDownloadHeaders(MarqoTestCase):
         mock_get = unittest.mock.MagicMock()
         mock_get.side_effect = pass_through_requests_get
 
-        with mock.patch("requests.get", mock_get):
-            with mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_get, requests.post, requests.put}):
-                bulk_search_query = BulkSearchQuery(queries=[{
-                    "index": self.index_name_1,
-                    "q": self.real_img_url,
-                    "image_download_headers": image_download_headers
-                }])
-                resp = tensor_search.bulk_search(marqo_config=self.config, query=bulk_search_query)
+        with mock.patch.object(image_download.get_session(), "get", mock_get):
+            bulk_search_query = BulkSearchQuery(queries=[{
+                "index": self.index_name_1,
+                "q": self.real_img_url,
+                "image_download_headers": image_download_headers
+            }])
+            resp = tensor_search.bulk_search(marqo_config=self.config, query=bulk_search_query)
 
         # Check if the image URL was called at least once with the correct headers
         image_url_called = any(
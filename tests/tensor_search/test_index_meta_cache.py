@@ -2,6 +2,7 @@ import copy
 import os
 import datetime
 import threading
+import unittest
 import time
 import requests
 from marqo.tensor_search.models.add_docs_objects import AddDocsParams
@@ -14,7 +15,7 @@ from marqo.tensor_search.enums import TensorField, SearchMethod, IndexSettingsFi
 from marqo.tensor_search import configs
 from tests.marqo_test import MarqoTestCase
 from unittest import mock
-from marqo import errors
+from marqo import _httprequests, errors
 
 
 class TestIndexMetaCache(MarqoTestCase):
@@ -398,8 +399,7 @@ class TestIndexMetaCache(MarqoTestCase):
 
         """
         mock_get = mock.MagicMock()
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_get})
-        @mock.patch('requests.get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         def run():
             N_seconds = 3
             REFRESH_INTERVAL_SECONDS = 1
@@ -447,8 +447,7 @@ class TestIndexMetaCache(MarqoTestCase):
         mock_response.json = lambda: '{"a":"b"}'
 
         # mock_get.return_value = mock_response
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_get})
-        @mock.patch('requests.get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         def run(error):
             def use_error(*args, **kwargs):
                 raise error('')
@@ -502,8 +501,7 @@ class TestIndexMetaCache(MarqoTestCase):
         mock_response.json = lambda: '{"a":"b"}'
 
         # mock_get.return_value = mock_response
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_get})
-        @mock.patch('requests.get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         def run(error):
             def use_error(*args, **kwargs):
                 raise error('')
@@ -569,13 +567,12 @@ class TestIndexMetaCache(MarqoTestCase):
                     auto_refresh=False, device="cpu"))
         except IndexNotFoundError:
             pass
-        @mock.patch('marqo._httprequests.ALLOWED_OPERATIONS', {mock_get})
-        @mock.patch('marqo._httprequests.requests.get', mock_get)
+        @mock.patch.object(_httprequests.get_session(), 'get', mock_get)
         def run():
 
             # requests.get('23456')
             N_seconds = 4
-            # the following is hard coded in search()
+            # index_meta_cache.INDEX_INFO_REFRESH_INTERVAL_SECONDS
             REFRESH_INTERVAL_SECONDS = 2
             start_time = time.perf_counter_ns()
             num_threads = 5
@@ -597,14 +594,18 @@ class TestIndexMetaCache(MarqoTestCase):
                 th.start()
             for th in threads:
                 th.join()
+            # stop scheduled refreshes, as the index is no longer being searched
+            index_meta_cache.get_index_info_refresher().stop()
 
             estimated_loops = round((N_seconds/sleep_time) * num_threads)
             assert sum(total_loops) in range(estimated_loops - (2 * num_threads), estimated_loops + 1)
             time.sleep(0.5)  # let remaining thread complete, if needed
             mappings_call_count = len([c for c in mock_get.mock_calls if '_mapping' in str(c)])
-            # for the refresh interal hardcoded in search(), which is 2 seconds, we expect a total
-            # of only 2 calls to the mappings endpoint, even though there are a lot more search requests
-            assert mappings_call_count == round(N_seconds/REFRESH_INTERVAL_SECONDS)
+            # for the refresh interval of the index_info refresher, which is 2 seconds (plus jitter), we expect
+            # only 2 calls to the mappings endpoint (3 if the last refresh lands just as the searches end),
+            # even though there are a lot more search requests
+            assert mappings_call_count in range(round(N_seconds/REFRESH_INTERVAL_SECONDS),
+                                                round(N_seconds/REFRESH_INTERVAL_SECONDS) + 2)
             return True
         assert run()
 
@@ -691,3 +692,100 @@ class TestIndexMetaCache(MarqoTestCase):
             return True
 
         assert run()
+
+
+class TestIndexInfoRefresher(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.config = Config("http://localhost:9200")
+        self.refresher = index_meta_cache.IndexInfoRefresher(
+            interval_seconds=0.2, jitter_seconds=0, hot_index_expiry_seconds=60)
+
+    def tearDown(self) -> None:
+        self.refresher.stop()
+
+    def _wait_for_calls(self, mock_get_index_info, call_count, timeout_seconds=2):
+        start_time = time.monotonic()
+        while mock_get_index_info.call_count < call_count and time.monotonic() - start_time < timeout_seconds:
+            time.sleep(0.01)
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_hot_index_refreshed_on_interval(self, mock_get_index_info):
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        self._wait_for_calls(mock_get_index_info, 1)
+        assert mock_get_index_info.call_count == 1
+        mock_get_index_info.assert_called_with(config=self.config, index_name="my-index")
+
+        time.sleep(0.5)
+        assert mock_get_index_info.call_count in (3, 4)
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_searches_dont_create_threads(self, mock_get_index_info):
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        thread_count = threading.active_count()
+        for _ in range(100):
+            self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+            self.refresher.mark_index_hot(config=self.config, index_name="my-index-2")
+        assert threading.active_count() == thread_count
+        assert sorted(self.refresher.get_hot_indexes()) == ["my-index", "my-index-2"]
+
+        # Marking an already hot index doesn't trigger an extra refresh
+        self._wait_for_calls(mock_get_index_info, 2)
+        time.sleep(0.1)
+        assert mock_get_index_info.call_count == 2
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_single_flight(self, mock_get_index_info):
+        """A slow refresh isn't started again while it is in flight"""
+        in_flight = []
+        max_in_flight = []
+
+        def slow_get_index_info(config, index_name):
+            in_flight.append(index_name)
+            max_in_flight.append(len(in_flight))
+            time.sleep(0.5)
+            in_flight.remove(index_name)
+
+        mock_get_index_info.side_effect = slow_get_index_info
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        time.sleep(1.2)
+        assert max(max_in_flight) == 1
+        assert mock_get_index_info.call_count in (2, 3)
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_cold_index_expires(self, mock_get_index_info):
+        self.refresher.hot_index_expiry_seconds = 0.3
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        time.sleep(0.7)
+        assert self.refresher.get_hot_indexes() == []
+        call_count = mock_get_index_info.call_count
+        time.sleep(0.3)
+        assert mock_get_index_info.call_count == call_count
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_deleted_index_no_longer_refreshed(self, mock_get_index_info):
+        mock_get_index_info.side_effect = errors.IndexNotFoundError("not found")
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        self._wait_for_calls(mock_get_index_info, 1)
+        time.sleep(0.3)
+        assert mock_get_index_info.call_count == 1
+        assert self.refresher.get_hot_indexes() == []
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_refresh_errors_retried(self, mock_get_index_info):
+        mock_get_index_info.side_effect = errors.BackendCommunicationError("can't connect")
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        time.sleep(0.5)
+        assert mock_get_index_info.call_count >= 2
+        assert self.refresher.get_hot_indexes() == ["my-index"]
+
+    @mock.patch("marqo.tensor_search.backend.get_index_info")
+    def test_restarts_after_stop(self, mock_get_index_info):
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        self._wait_for_calls(mock_get_index_info, 1)
+        self.refresher.stop()
+        assert self.refresher.get_hot_indexes() == []
+
+        self.refresher.mark_index_hot(config=self.config, index_name="my-index")
+        self._wait_for_calls(mock_get_index_info, 2)
+        assert mock_get_index_info.call_count == 2
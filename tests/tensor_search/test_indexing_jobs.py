@@ -0,0 +1,236 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from marqo import config
+from marqo.errors import (
+    BadRequestError, IndexingJobNotFoundError, IndexNotFoundError, TooManyRequestsError
+)
+from marqo.tensor_search import indexing_jobs
+from marqo.tensor_search.enums import IndexingJobStatus
+from marqo.tensor_search.indexing_jobs import IndexingJobQueue
+from marqo.tensor_search.models.indexing_job_objects import IndexingJob, IndexingJobParams
+from marqo.tensor_search.telemetry import METRICS_AGGREGATOR
+
+
+def fake_add_documents(config, add_docs_params):
+    """Adds every doc, other than those with a `fail` field"""
+    items = []
+    for doc in add_docs_params.docs:
+        if "fail" in doc:
+            items.append({"_id": doc["_id"], "error": "bad doc", "status": 400, "code": "invalid_argument"})
+        else:
+            items.append({"_id": doc["_id"], "result": "created", "status": 201})
+    return {"errors": any("error" in item for item in items), "processingTimeMs": 1,
+            "index_name": add_docs_params.index_name, "items": items}
+
+
+class TestIndexingJobQueue(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.config = config.Config(url="https://localhost:9200")
+        self.params = IndexingJobParams(index_name="my-index", auto_refresh=False, device="cpu", batch_size=2,
+                                        tensor_fields=["title"])
+        self.queues = []
+        self.mock_add_documents = mock.Mock(side_effect=fake_add_documents)
+        add_documents_patcher = mock.patch("marqo.tensor_search.tensor_search.add_documents_pipelined",
+                                           side_effect=self._add_documents_pipelined)
+        add_documents_patcher.start()
+        self.addCleanup(add_documents_patcher.stop)
+
+    def tearDown(self) -> None:
+        for job_queue in self.queues:
+            job_queue.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _add_documents_pipelined(self, config, batches):
+        for add_docs_params in batches:
+            yield self.mock_add_documents(config=config, add_docs_params=add_docs_params)
+
+    def _queue(self, start: bool = True, **kwargs) -> IndexingJobQueue:
+        job_queue = IndexingJobQueue(config=self.config, directory=self.directory,
+                                     **{"worker_count": 1, "max_queued_jobs": 10, "retention_seconds": 3600, **kwargs})
+        if start:
+            job_queue.start()
+        self.queues.append(job_queue)
+        return job_queue
+
+    @staticmethod
+    def _docs(count: int, start: int = 0):
+        return [{"_id": str(i), "title": f"doc {i}"} for i in range(start, start + count)]
+
+    @staticmethod
+    def _wait_until_finished(job_queue: IndexingJobQueue, job_id: str) -> IndexingJob:
+        for _ in range(500):
+            job = job_queue.get_job(job_id)
+            if job.is_finished:
+                return job
+            time.sleep(0.01)
+        raise AssertionError(f"job {job_id} did not finish")
+
+    def test_docs_added_in_batches(self):
+        job_queue = self._queue()
+        job = job_queue.submit(self.params, self._docs(5))
+        assert job.received_documents == 5
+
+        job = self._wait_until_finished(job_queue, job.job_id)
+        assert job.status == IndexingJobStatus.completed
+        assert (job.processed_documents, job.failed_documents, job.completed_batches) == (5, 0, 3)
+        assert job.started_at is not None and job.finished_at >= job.started_at
+
+        batches = [call.kwargs["add_docs_params"] for call in self.mock_add_documents.call_args_list]
+        assert [[doc["_id"] for doc in add_docs_params.docs] for add_docs_params in batches] == [
+            ["0", "1"], ["2", "3"], ["4"]]
+        assert all(add_docs_params.tensor_fields == ["title"] and add_docs_params.auto_refresh is False
+                   and add_docs_params.index_name == "my-index" for add_docs_params in batches)
+        # only the status of a finished job is kept
+        assert os.listdir(job_queue.job_directory(job.job_id)) == [indexing_jobs.JOB_FILE]
+
+    def test_job_recorded_in_metrics(self):
+        with mock.patch.object(METRICS_AGGREGATOR, "record") as mock_record:
+            job_queue = self._queue()
+            job = job_queue.submit(self.params, self._docs(3))
+            self._wait_until_finished(job_queue, job.job_id)
+        mock_record.assert_called_once()
+        assert "indexing_job.run" in mock_record.call_args[0][0].times
+
+    def test_failed_docs_recorded(self):
+        docs = self._docs(4)
+        docs[1]["fail"] = True
+        docs[3]["fail"] = True
+        job_queue = self._queue()
+        job = self._wait_until_finished(job_queue, job_queue.submit(self.params, docs).job_id)
+        assert job.status == IndexingJobStatus.completed
+        assert (job.processed_documents, job.failed_documents) == (4, 2)
+        assert [(error["position"], error["_id"], error["status"]) for error in job.errors] == [
+            (1, "1", 400), (3, "3", 400)]
+
+    def test_recorded_errors_capped(self):
+        docs = [{**doc, "fail": True} for doc in self._docs(5)]
+        job_queue = self._queue()
+        with mock.patch("marqo.tensor_search.indexing_jobs.MAX_RECORDED_ERRORS", 3):
+            job = self._wait_until_finished(job_queue, job_queue.submit(self.params, docs).job_id)
+        assert job.failed_documents == 5
+        assert [error["position"] for error in job.errors] == [0, 1, 2]
+
+    def test_job_fails_on_error(self):
+        self.mock_add_documents.side_effect = [fake_add_documents(self.config, self.params.to_add_docs_params(
+            self._docs(2))), IndexNotFoundError("Index `my-index` not found.")]
+        job_queue = self._queue()
+        job = self._wait_until_finished(job_queue, job_queue.submit(self.params, self._docs(5)).job_id)
+        assert job.status == IndexingJobStatus.failed
+        assert (job.processed_documents, job.completed_batches) == (2, 1)
+        assert job.error["code"] == "index_not_found"
+        assert "my-index" in job.error["message"]
+        response = indexing_jobs.format_indexing_job_response(job)
+        assert response["status"] == "failed"
+        assert response["error"] == job.error
+
+    def test_unfinished_jobs_resumed(self):
+        first_queue = self._queue(start=False)
+        queued_job = first_queue.submit(self.params, self._docs(3))
+        interrupted_job = first_queue.submit(self.params, self._docs(5, start=10))
+        # the process stopped after the first batch of the interrupted job
+        interrupted_job.status = IndexingJobStatus.running
+        interrupted_job.processed_documents = 2
+        interrupted_job.completed_batches = 1
+        first_queue._write_file(interrupted_job.job_id, indexing_jobs.JOB_FILE, interrupted_job.json())
+        # a job whose docs were still being written is discarded
+        first_queue.create_job(self.params)
+
+        second_queue = self._queue()
+        queued_job = self._wait_until_finished(second_queue, queued_job.job_id)
+        interrupted_job = self._wait_until_finished(second_queue, interrupted_job.job_id)
+        assert queued_job.status == interrupted_job.status == IndexingJobStatus.completed
+        assert (interrupted_job.processed_documents, interrupted_job.completed_batches) == (5, 3)
+        added_ids = [[doc["_id"] for doc in call.kwargs["add_docs_params"].docs]
+                     for call in self.mock_add_documents.call_args_list]
+        assert added_ids == [["0", "1"], ["2"], ["12", "13"], ["14"]]
+        assert sorted(os.listdir(self.directory)) == sorted([queued_job.job_id, interrupted_job.job_id])
+
+    def test_docs_without_ids_given_ids_when_written(self):
+        # so a batch added again when the job is resumed overwrites its docs, rather than adding them twice
+        job_queue = self._queue(start=False)
+        docs = [{"title": "doc 0"}, {"_id": "1", "title": "doc 1"}, {"title": "doc 2"}, "not a doc"]
+        job = job_queue.submit(self.params, docs)
+        with open(os.path.join(job_queue.job_directory(job.job_id), indexing_jobs.DOCS_FILE)) as f:
+            written_docs = [json.loads(line) for line in f]
+        generated_ids = [written_docs[0]["_id"], written_docs[2]["_id"]]
+        assert written_docs == [{"_id": generated_ids[0], "title": "doc 0"}, {"_id": "1", "title": "doc 1"},
+                                {"_id": generated_ids[1], "title": "doc 2"}, "not a doc"]
+        assert generated_ids[0] != generated_ids[1]
+        assert "_id" not in docs[0]
+
+    def test_queue_full(self):
+        job_queue = self._queue(start=False, max_queued_jobs=2)
+        job_queue.submit(self.params, self._docs(1))
+        job_queue.submit(self.params, self._docs(1))
+        with self.assertRaises(TooManyRequestsError):
+            job_queue.submit(self.params, self._docs(1))
+        assert len(os.listdir(self.directory)) == 2
+
+    def test_empty_job(self):
+        job_queue = self._queue(start=False)
+        with self.assertRaises(BadRequestError):
+            job_queue.submit(self.params, [])
+        assert os.listdir(self.directory) == []
+
+    def test_job_discarded_on_write_error(self):
+        job_queue = self._queue(start=False)
+        with self.assertRaises(BadRequestError):
+            with job_queue.create_job(self.params) as writer:
+                writer.write(self._docs(2))
+                raise BadRequestError("Line 3 of the NDJSON body is not valid JSON")
+        assert os.listdir(self.directory) == []
+        assert job_queue._queue.empty()
+
+    def test_unknown_job(self):
+        job_queue = self._queue(start=False)
+        with self.assertRaises(IndexingJobNotFoundError):
+            job_queue.get_job("not-a-job")
+
+    def test_expired_jobs_removed(self):
+        job_queue = self._queue(retention_seconds=60)
+        job = self._wait_until_finished(job_queue, job_queue.submit(self.params, self._docs(1)).job_id)
+        job.finished_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=61)
+        job_queue._write_file(job.job_id, indexing_jobs.JOB_FILE, job.json())
+        job_queue.stop()
+
+        job_queue = self._queue(start=False, retention_seconds=60)
+        with self.assertRaises(IndexingJobNotFoundError):
+            job_queue.get_job(job.job_id)
+        assert os.listdir(self.directory) == []
+
+    def test_params_file_readable_by_owner_only(self):
+        job_queue = self._queue(start=False)
+        job = job_queue.submit(self.params, self._docs(1))
+        params_file = os.path.join(job_queue.job_directory(job.job_id), indexing_jobs.PARAMS_FILE)
+        assert os.stat(params_file).st_mode & 0o077 == 0
+        assert IndexingJobParams.parse_file(params_file) == self.params
+
+    def test_format_response(self):
+        job = IndexingJob(job_id="abc", index_name="my-index", status=IndexingJobStatus.completed, batch_size=2,
+                          created_at=datetime.datetime(2023, 4, 17, 0, 0, 0),
+                          started_at=datetime.datetime(2023, 4, 17, 0, 0, 1),
+                          finished_at=datetime.datetime(2023, 4, 17, 0, 0, 3),
+                          received_documents=3, processed_documents=3, failed_documents=1, completed_batches=2,
+                          errors=[{"position": 2, "_id": "2", "error": "bad doc", "status": 400}])
+        assert indexing_jobs.format_indexing_job_response(job) == {
+            "jobId": "abc",
+            "index_name": "my-index",
+            "status": "completed",
+            "type": "addDocuments",
+            "details": {"receivedDocuments": 3, "processedDocuments": 3, "failedDocuments": 1,
+                        "completedBatches": 2, "batchSize": 2},
+            "errors": [{"position": 2, "_id": "2", "error": "bad doc", "status": 400}],
+            "createdAt": "2023-04-17T00:00:00Z",
+            "startedAt": "2023-04-17T00:00:01Z",
+            "finishedAt": "2023-04-17T00:00:03Z",
+            "duration": "PT2.0S",
+        }
@@ -1,4 +1,8 @@
+import contextlib
 import json
+import threading
+import time
+import unittest
 
 from tests.marqo_test import MarqoTestCase
 from unittest import mock
@@ -6,6 +10,7 @@ from marqo.tensor_search import enums, configs
 from marqo.tensor_search import on_start_script
 from marqo.s2_inference import s2_inference
 from marqo import errors
+from marqo.s2_inference.errors import ModelLoadError
 import os
 
 
@@ -200,3 +205,100 @@ class TestOnStartScript(MarqoTestCase):
 
 
 
+
+
+class TestParallelModelPreloading(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.models = ["model-a", "model-b"]
+        self.environ = {enums.EnvVars.MARQO_MODELS_TO_PRELOAD: json.dumps(self.models),
+                        enums.EnvVars.MARQO_MODEL_PRELOAD_THREAD_COUNT: "2"}
+        self.patchers = [mock.patch("torch.cuda.is_available", return_value=False)]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_models_loaded_at_the_same_time(self):
+        # Each load waits for the other model's load to start
+        both_loading = threading.Barrier(2, timeout=5)
+        loaded = set()
+
+        def preload(model, content, device):
+            if model not in loaded:
+                both_loading.wait()
+                loaded.add(model)
+
+        with mock.patch("marqo.tensor_search.on_start_script._preload_model", side_effect=preload) as mock_preload, \
+                mock.patch.dict(os.environ, self.environ):
+            on_start_script.ModelsForCacheing().run()
+
+        assert loaded == {"model-a", "model-b"}
+        # loaded, then vectorised 10 times
+        assert mock_preload.call_count == 22
+        readiness = on_start_script.get_readiness()
+        assert readiness["ready"] is True
+        assert {(model["model"], model["device"], model["status"]) for model in readiness["models"]} == {
+            ("model-a", "cpu", "warm"), ("model-b", "cpu", "warm")}
+        assert all("loadTimeMs" in model and "warmupTimeMs" in model for model in readiness["models"])
+
+    def test_preload_error_raised_after_other_models(self):
+        def preload(model, content, device):
+            if model == "model-a":
+                raise ModelLoadError("Unable to load model=model-a")
+
+        with mock.patch("marqo.tensor_search.on_start_script._preload_model", side_effect=preload) as mock_preload, \
+                mock.patch.dict(os.environ, self.environ):
+            with self.assertRaises(ModelLoadError):
+                on_start_script.ModelsForCacheing().run()
+        assert mock.call(model="model-b", content=mock.ANY, device="cpu") in mock_preload.call_args_list
+        statuses = {model["model"]: model for model in on_start_script.get_readiness()["models"]}
+        assert statuses["model-a"]["status"] == "failed"
+        assert "model-a" in statuses["model-a"]["error"]
+        assert statuses["model-b"]["status"] == "warm"
+
+    def test_serve_before_models_loaded(self):
+        release = threading.Event()
+        self.environ[enums.EnvVars.MARQO_SERVE_BEFORE_MODELS_LOADED] = "TRUE"
+
+        def preload(model, content, device):
+            if model == "model-b":
+                assert release.wait(timeout=5)
+            elif model == "model-a":
+                raise ModelLoadError("Unable to load model=model-a")
+
+        with mock.patch("marqo.tensor_search.on_start_script._preload_model", side_effect=preload), \
+                mock.patch.dict(os.environ, self.environ):
+            # returns while the models are loading, and errors are reported rather than raised
+            on_start_script.ModelsForCacheing().run()
+            for _ in range(500):
+                readiness = on_start_script.get_readiness()
+                if {model["model"]: model["status"] for model in readiness["models"]}["model-b"] == "loading":
+                    break
+                time.sleep(0.01)
+            else:
+                raise AssertionError("model-b was not loaded")
+            assert readiness["ready"] is False
+
+            release.set()
+            for _ in range(500):
+                if on_start_script.get_readiness()["ready"]:
+                    break
+                time.sleep(0.01)
+        statuses = {model["model"]: model["status"] for model in on_start_script.get_readiness()["models"]}
+        assert statuses == {"model-a": "failed", "model-b": "warm"}
+
+    def test_startup_phases_timed(self):
+        phases = [on_start_script.PopulateCache, on_start_script.DownloadStartText, on_start_script.CUDAAvailable,
+                  on_start_script.SetBestAvailableDevice, on_start_script.ModelsForCacheing,
+                  on_start_script.InitializeRedis, on_start_script.ResumeIndexingJobs,
+                  on_start_script.DownloadFinishText, on_start_script.MarqoWelcome, on_start_script.MarqoPhrase]
+        with contextlib.ExitStack() as stack:
+            for phase in phases:
+                stack.enter_context(mock.patch.object(phase, "run"))
+            stack.enter_context(mock.patch.dict(os.environ, self.environ))
+            on_start_script.on_start("http://localhost:9200")
+        startup_times = on_start_script.get_readiness()["startupTimesMs"]
+        assert set(startup_times) == {phase.__name__ for phase in phases}
@@ -0,0 +1,104 @@
+import os
+import unittest
+from unittest import mock
+
+from marqo.tensor_search import query_vector_cache
+from marqo.tensor_search.enums import EnvVars
+from marqo.tensor_search.query_vector_cache import QueryVectorCache
+
+
+class TestQueryVectorCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.model_cache_key = "hf/all_datasets_v4_MiniLM-L6||||||||cpu"
+        self.vector = [0.1, 0.2, 0.3]
+
+    def _key(self, content: str, model_cache_key: str = None, normalize_embeddings: bool = True,
+             content_type: str = "text"):
+        return QueryVectorCache.create_key(
+            model_cache_key if model_cache_key is not None else self.model_cache_key,
+            normalize_embeddings, content_type, content)
+
+    def _entry_size(self, content: str) -> int:
+        return QueryVectorCache._estimate_size_bytes(self._key(content), self.vector)
+
+    def test_get_put(self):
+        cache = QueryVectorCache(max_bytes=10 ** 6)
+        assert cache.get(self._key("hello")) is None
+        cache.put(self._key("hello"), self.vector)
+        assert cache.get(self._key("hello")) == self.vector
+        assert len(cache) == 1
+
+    def test_key_includes_all_parts(self):
+        cache = QueryVectorCache(max_bytes=10 ** 6)
+        cache.put(self._key("hello"), self.vector)
+        assert cache.get(self._key("hello", normalize_embeddings=False)) is None
+        assert cache.get(self._key("hello", content_type="image")) is None
+        assert cache.get(self._key("hello", model_cache_key="ViT-B/32||||||||cpu")) is None
+        assert cache.get(self._key("PREFIX: hello")) is None
+
+    def test_lru_eviction_by_bytes(self):
+        cache = QueryVectorCache(max_bytes=self._entry_size("a") * 2)
+        cache.put(self._key("a"), self.vector)
+        cache.put(self._key("b"), self.vector)
+        # "a" becomes the most recently used
+        assert cache.get(self._key("a")) == self.vector
+        cache.put(self._key("c"), self.vector)
+
+        assert cache.get(self._key("b")) is None
+        assert cache.get(self._key("a")) == self.vector
+        assert cache.get(self._key("c")) == self.vector
+        assert cache.current_bytes <= cache.max_bytes
+
+    def test_put_existing_key_does_not_double_count(self):
+        cache = QueryVectorCache(max_bytes=10 ** 6)
+        cache.put(self._key("a"), self.vector)
+        cache.put(self._key("a"), self.vector)
+        assert len(cache) == 1
+        assert cache.current_bytes == self._entry_size("a")
+
+    def test_entry_larger_than_cache_not_added(self):
+        cache = QueryVectorCache(max_bytes=self._entry_size("a") - 1)
+        cache.put(self._key("a"), self.vector)
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_disabled(self):
+        cache = QueryVectorCache(max_bytes=0)
+        assert not cache.enabled
+        cache.put(self._key("a"), self.vector)
+        assert cache.get(self._key("a")) is None
+
+    def test_ttl(self):
+        cache = QueryVectorCache(max_bytes=10 ** 6, ttl_seconds=10)
+        with mock.patch("marqo.tensor_search.query_vector_cache.time.monotonic", return_value=100):
+            cache.put(self._key("a"), self.vector)
+        with mock.patch("marqo.tensor_search.query_vector_cache.time.monotonic", return_value=109):
+            assert cache.get(self._key("a")) == self.vector
+        with mock.patch("marqo.tensor_search.query_vector_cache.time.monotonic", return_value=110):
+            assert cache.get(self._key("a")) is None
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_invalidate_model(self):
+        cache = QueryVectorCache(max_bytes=10 ** 6)
+        cache.put(self._key("a"), self.vector)
+        cache.put(self._key("b"), self.vector)
+        cache.put(self._key("a", model_cache_key="hf/all_datasets_v4_MiniLM-L6||||||||cuda"), self.vector)
+        cache.put(self._key("a", model_cache_key="ViT-B/32||||||||cpu"), self.vector)
+
+        assert cache.invalidate_model(model_name="hf/all_datasets_v4_MiniLM-L6", device="cpu") == 2
+        assert cache.get(self._key("a")) is None
+        assert cache.get(self._key("b")) is None
+        assert cache.get(self._key("a", model_cache_key="hf/all_datasets_v4_MiniLM-L6||||||||cuda")) == self.vector
+        assert cache.get(self._key("a", model_cache_key="ViT-B/32||||||||cpu")) == self.vector
+
+    def test_get_cache_reads_env_vars(self):
+        query_vector_cache.empty_cache()
+        with mock.patch.dict(os.environ, {EnvVars.MARQO_QUERY_VECTOR_CACHE_MAX_BYTES: "1234",
+                                          EnvVars.MARQO_QUERY_VECTOR_CACHE_TTL_SECONDS: "0"}):
+            cache = query_vector_cache.get_cache()
+        assert cache.max_bytes == 1234
+        assert cache.ttl_seconds is None
+        assert query_vector_cache.get_cache() is cache
+        query_vector_cache.empty_cache()
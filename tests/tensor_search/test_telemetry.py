@@ -12,7 +12,10 @@ from starlette.datastructures import QueryParams
 from starlette.applications import Starlette
 from starlette.responses import Response
 
-from marqo.tensor_search.telemetry import RequestMetricsStore, TelemetryMiddleware, Timer, TimerError
+from marqo.tensor_search.telemetry import (
+    METRICS_AGGREGATOR, MetricsAggregator, RequestMetrics, RequestMetricsStore, TelemetryMiddleware, Timer, TimerError,
+    normalise_metric_key
+)
 
 
 class TestTimer(unittest.TestCase):
@@ -73,6 +76,14 @@ class TestRequestMetricsStore(unittest.TestCase):
         RequestMetricsStore.set_in_request(self.request)
         self.assertIsNotNone(RequestMetricsStore.for_request(self.request))
 
+    def test_store_is_bounded(self):
+        with patch.object(RequestMetricsStore, "MAX_METRIC_STORES", 2):
+            requests = [Request({'type': 'http'}) for _ in range(3)]
+            for r in requests:
+                RequestMetricsStore.set_in_request(r)
+            self.assertEqual(requests[1:], list(RequestMetricsStore.METRIC_STORES))
+        RequestMetricsStore.METRIC_STORES = {}
+
     def test_clear_metrics_for(self):
         RequestMetricsStore.set_in_request(self.request)
         self.assertIsNotNone(RequestMetricsStore.for_request(self.request))
@@ -203,6 +214,71 @@ class TestRequestMetricsStore(unittest.TestCase):
         self.assertEqual(expected_json, metric.json())
 
 
+class TestMetricsAggregator(unittest.TestCase):
+
+    def _metrics(self, times: dict, counter: dict = None) -> RequestMetrics:
+        m = RequestMetrics()
+        for k, v in times.items():
+            for t in (v if isinstance(v, list) else [v]):
+                m.add_time(k, t)
+        for k, v in (counter or {}).items():
+            m.increment_counter(k, v)
+        return m
+
+    def test_histogram_buckets_are_cumulative(self):
+        aggregator = MetricsAggregator(buckets_ms=(10, 100, float("inf")))
+        aggregator.record(self._metrics({"search": [5.0, 50.0]}))
+        aggregator.record(self._metrics({"search": 500.0}))
+        histogram = aggregator.json()["timesMs"]["search"]
+        self.assertEqual({"10": 1, "100": 2, "+Inf": 3}, histogram["buckets"])
+        self.assertEqual(555.0, histogram["sum"])
+        self.assertEqual(3, histogram["count"])
+
+    def test_normalise_metric_key(self):
+        self.assertEqual("image_download.image", normalise_metric_key("image_download.https://a.com/b.png"))
+        self.assertEqual("image_download.full_time", normalise_metric_key("image_download.full_time"))
+        self.assertEqual("image_download.UnidentifiedImageError",
+                         normalise_metric_key("https://a.com/b.png.UnidentifiedImageError"))
+        self.assertEqual("POST /indexes/{index_name}/search", normalise_metric_key("POST /indexes/my-index/search"))
+        self.assertEqual("POST /indexes/bulk/search", normalise_metric_key("POST /indexes/bulk/search"))
+        self.assertEqual("bulk_search.{i}.rerank", normalise_metric_key("bulk_search.3.rerank"))
+        self.assertEqual("search.opensearch._msearch", normalise_metric_key("search.opensearch._msearch"))
+
+    def test_per_image_keys_share_a_series(self):
+        aggregator = MetricsAggregator()
+        aggregator.record(self._metrics({f"image_download.https://a.com/{i}.png": 1.0 for i in range(50)}))
+        self.assertEqual(["image_download.image"], list(aggregator.json()["timesMs"]))
+        self.assertEqual(50, aggregator.json()["timesMs"]["image_download.image"]["count"])
+
+    def test_max_series(self):
+        aggregator = MetricsAggregator(max_series=2)
+        aggregator.record(self._metrics({"a": 1.0, "b": 1.0}, {"c": 1}))
+        aggregator.record(self._metrics({"a": 1.0}))
+        aggregates = aggregator.json()
+        self.assertEqual(["a", "b"], list(aggregates["timesMs"]))
+        self.assertEqual({}, aggregates["counter"])
+        self.assertEqual(1, aggregates["droppedKeys"])
+        self.assertEqual(2, aggregates["timesMs"]["a"]["count"])
+
+    def test_prometheus_text(self):
+        aggregator = MetricsAggregator(buckets_ms=(10, float("inf")))
+        aggregator.record(self._metrics({"search.opensearch._msearch": 5.0}, {"search.query_vector_cache.hits": 3}))
+        text = aggregator.prometheus_text()
+        self.assertIn("marqo_requests_total 1\n", text)
+        self.assertIn("# TYPE marqo_request_stage_duration_milliseconds histogram\n", text)
+        self.assertIn('marqo_request_stage_duration_milliseconds_bucket{stage="search.opensearch._msearch",le="10"} 1\n',
+                      text)
+        self.assertIn('marqo_request_stage_duration_milliseconds_bucket{stage="search.opensearch._msearch",le="+Inf"} 1\n',
+                      text)
+        self.assertIn('marqo_request_stage_duration_milliseconds_count{stage="search.opensearch._msearch"} 1\n', text)
+        self.assertIn('marqo_request_stage_events_total{name="search.query_vector_cache.hits"} 3\n', text)
+
+    def test_prometheus_label_values_escaped(self):
+        aggregator = MetricsAggregator()
+        aggregator.record(self._metrics({'a"b\\c': 1.0}))
+        self.assertIn('stage="a\\"b\\\\c"', aggregator.prometheus_text())
+
+
 class TestTelemetryMiddleware(unittest.TestCase):
 
     def setUp(self):
@@ -228,6 +304,44 @@ class TestTelemetryMiddleware(unittest.TestCase):
         response = self.client.get("/?telemetry=true")
         self.assertIn("telemetry", response.json())
 
+    def test_metrics_cleared_after_request(self):
+        RequestMetricsStore.METRIC_STORES = {}
+        for path in ["/", "/?telemetry=true", "/?telemetry=false"]:
+            self.client.get(path)
+        self.assertEqual({}, RequestMetricsStore.METRIC_STORES)
+
+    def test_metrics_cleared_and_aggregated_when_endpoint_raises(self):
+        @self.app.route("/error", methods=["GET"])
+        def test_endpoint(request):
+            RequestMetricsStore.for_request().add_time("error_endpoint", 3.0)
+            raise ValueError("endpoint error")
+
+        RequestMetricsStore.METRIC_STORES = {}
+        METRICS_AGGREGATOR.clear()
+        with self.assertRaises(ValueError):
+            self.client.get("/error")
+        self.assertEqual({}, RequestMetricsStore.METRIC_STORES)
+        self.assertEqual(1, METRICS_AGGREGATOR.json()["timesMs"]["error_endpoint"]["count"])
+        METRICS_AGGREGATOR.clear()
+
+    def test_metrics_aggregated_across_requests(self):
+        @self.app.route("/timed", methods=["GET"])
+        def test_endpoint(request):
+            m = RequestMetricsStore.for_request()
+            m.add_time("stage", 7.0)
+            m.increment_counter("hits", 2)
+            return JSONResponse({"data": "test"})
+
+        METRICS_AGGREGATOR.clear()
+        self.client.get("/timed")
+        self.client.get("/timed?telemetry=true")
+        aggregates = METRICS_AGGREGATOR.json()
+        self.assertEqual(2, aggregates["requests"])
+        self.assertEqual(2, aggregates["timesMs"]["stage"]["count"])
+        self.assertEqual(14.0, aggregates["timesMs"]["stage"]["sum"])
+        self.assertEqual({"hits": 4}, aggregates["counter"])
+        METRICS_AGGREGATOR.clear()
+
     @unittest.skip("Error running in GH Actions")
     def test_counter_usage(self):
         @self.app.route("/test", methods=["GET"])
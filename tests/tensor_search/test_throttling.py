@@ -1,11 +1,15 @@
+import asyncio
+import threading
+import os
 import time
+import unittest
 import math
 import pprint
 from unittest import mock
 from marqo.tensor_search.enums import TensorField, SearchMethod, EnvVars
 from marqo.errors import (
     MarqoApiError, MarqoError, IndexNotFoundError, InvalidArgError,
-    InvalidFieldNameError, IllegalRequestedDocCount
+    InvalidFieldNameError, IllegalRequestedDocCount, TooManyRequestsError
 )
 from marqo.tensor_search import tensor_search, constants, index_meta_cache
 from marqo.tensor_search.throttling.redis_throttle import throttle
@@ -73,4 +77,81 @@ class TestThrottling(MarqoTestCase):
                 return True
 
         assert run()
-        """
\ No newline at end of file
+        """
+
+class TestThrottleCoroutineFunctions(unittest.TestCase):
+    """Tests throttle() on the async endpoints. Redis is mocked."""
+
+    def setUp(self) -> None:
+        self.db = mock.MagicMock()
+        self.db.evalsha.return_value = 0
+        redis_driver_patcher = mock.patch("marqo.tensor_search.throttling.redis_throttle.redis_driver")
+        self.mock_redis_driver = redis_driver_patcher.start()
+        self.mock_redis_driver.get_db.return_value = self.db
+        self.mock_redis_driver.get_lua_shas.return_value = {"check_and_increment": "sha"}
+        self.addCleanup(redis_driver_patcher.stop)
+        env_patcher = mock.patch.dict(os.environ, {EnvVars.MARQO_ENABLE_THROTTLING: "TRUE"})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def _wait_for_release(self):
+        for _ in range(100):
+            if self.db.zrem.called:
+                return
+            time.sleep(0.01)
+
+    def test_thread_released_after_await(self):
+        @throttle("SEARCH")
+        async def search():
+            await asyncio.sleep(0)
+            # the request still counts towards the limit while it's awaited
+            assert not self.db.zrem.called
+            return "result"
+
+        assert asyncio.iscoroutinefunction(search)
+        assert asyncio.run(search()) == "result"
+        self._wait_for_release()
+        set_key, thread_name = self.db.evalsha.call_args[0][2:4]
+        assert set_key == "set:SEARCH"
+        self.db.zrem.assert_called_once_with(set_key, thread_name)
+
+    def test_thread_acquired_off_the_event_loop(self):
+        thread_names = []
+
+        def get_db():
+            thread_names.append(threading.current_thread().name)
+            return self.db
+
+        self.mock_redis_driver.get_db.side_effect = get_db
+
+        @throttle("SEARCH")
+        async def search():
+            thread_names.append(threading.current_thread().name)
+
+        asyncio.run(search())
+        # redis is called from a threadpool thread, the endpoint runs on the event loop's thread
+        assert len(thread_names) == 2
+        assert thread_names[0] != thread_names[1] == threading.current_thread().name
+
+    def test_thread_released_on_error(self):
+        @throttle("INDEX")
+        async def add_documents():
+            raise InvalidArgError("bad request")
+
+        with self.assertRaises(InvalidArgError):
+            asyncio.run(add_documents())
+        self._wait_for_release()
+        self.db.zrem.assert_called_once()
+
+    def test_too_many_requests(self):
+        self.db.evalsha.return_value = 1
+        called = []
+
+        @throttle("SEARCH")
+        async def search():
+            called.append(True)
+
+        with self.assertRaises(TooManyRequestsError):
+            asyncio.run(search())
+        assert called == []
+        self.db.zrem.assert_not_called()